@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Analysis Result Cache
+pokequant_analyses rows keyed by a fingerprint of everything the analysis was computed from,
+with an in-process LRU tier in front of the table
+"""
+
+import sys
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from supabase_client import supabase
+
+def analysis_fingerprint(pokequant_product_id: str, price_watermark: Optional[str], filter_version: str,
+                         metrics_version: str, prompt_version: Optional[str]) -> str:
+    """
+    Content fingerprint of an analysis' inputs
+
+    Args:
+        pokequant_product_id: Product analyzed
+        price_watermark: pokequant_products.last_data_update, bumped whenever its price series is written
+        filter_version: Outlier filter configuration version
+        metrics_version: Metrics / recommendation code version
+        prompt_version: LLM prompt version (None when no LLM is involved)
+    """
+    identity = json.dumps([str(pokequant_product_id), price_watermark, filter_version, metrics_version, prompt_version])
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+class AnalysisResultCache:
+    """
+    Reuses a stored analysis exactly when none of its inputs changed
+
+    Rows are looked up by input_fingerprint, first in a local LRU of recently seen rows and
+    then in pokequant_analyses. Price watermarks come from pokequant_products, so a hit
+    never touches the price tables. Rows stored without a fingerprint (before this cache
+    existed) never match and are recomputed once. Watermarks only move when raw listings
+    are aggregated, so rows older than max_age_hours are recomputed regardless.
+    """
+
+    def __init__(self, supabase_client: Any = None, max_entries: int = 512, max_age_hours: Optional[float] = 24):
+        """
+        Args:
+            supabase_client: Client to use (defaults to the shared client)
+            max_entries: Rows kept in the local LRU tier
+            max_age_hours: Also recompute analyses older than this (None = only when inputs change)
+        """
+        self.supabase = supabase_client or supabase
+        self.max_entries = max_entries
+        self.max_age_hours = max_age_hours
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def price_watermarks(self, pokequant_product_ids: List[str], chunk_size: int = 200) -> Dict[str, Optional[str]]:
+        """last_data_update per product, one in_() query per chunk (missing products are left out)"""
+        ids = list(dict.fromkeys(pokequant_product_ids))
+        watermarks = {}
+
+        for i in range(0, len(ids), chunk_size):
+            result = self.supabase.table('pokequant_products').select('id, last_data_update').in_('id', ids[i:i + chunk_size]).execute()
+            for row in result.data or []:
+                watermarks[row['id']] = str(row['last_data_update']) if row.get('last_data_update') else None
+
+        return watermarks
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """The stored pokequant_analyses row for a fingerprint, or None"""
+        return self.get_many([fingerprint]).get(fingerprint)
+
+    def get_many(self, fingerprints: List[str], chunk_size: int = 200) -> Dict[str, Dict[str, Any]]:
+        """Stored rows for many fingerprints: local hits first, then one in_() query per chunk for the rest"""
+        found = {}
+        missing = []
+
+        with self._lock:
+            for fingerprint in dict.fromkeys(fingerprints):
+                row = self._entries.get(fingerprint)
+                if row is not None and self._is_current(row):
+                    self._entries.move_to_end(fingerprint)
+                    found[fingerprint] = row
+                else:
+                    missing.append(fingerprint)
+
+        for i in range(0, len(missing), chunk_size):
+            query = self.supabase.table('pokequant_analyses').select('*').in_('input_fingerprint', missing[i:i + chunk_size])
+            if self.max_age_hours is not None:
+                cutoff_time = datetime.now() - timedelta(hours=self.max_age_hours)
+                query = query.gte('analysis_date', cutoff_time.isoformat())
+            result = query.order('analysis_date', desc=True).execute()
+
+            for row in result.data or []:
+                # Rows come newest first, so the first one seen per fingerprint wins
+                if row['input_fingerprint'] not in found:
+                    found[row['input_fingerprint']] = row
+                    self.put(row)
+
+        return found
+
+    def put(self, row: Dict[str, Any]):
+        """Remember a stored row (ignored without a fingerprint)"""
+        fingerprint = row.get('input_fingerprint')
+        if not fingerprint:
+            return
+
+        with self._lock:
+            self._entries[fingerprint] = row
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _is_current(self, row: Dict[str, Any]) -> bool:
+        if self.max_age_hours is None:
+            return True
+        try:
+            analysis_date = datetime.fromisoformat(str(row['analysis_date']).replace('Z', '+00:00'))
+        except (KeyError, ValueError):
+            return False
+        now = datetime.now(timezone.utc) if analysis_date.tzinfo else datetime.now()
+        return now - analysis_date < timedelta(hours=self.max_age_hours)
@@ -13,6 +13,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from supabase_client import supabase
 from quant.price_data_service import PriceDataService
+from quant.price_series_cache import PriceSeriesCache
 
 def clean_pokequant_price_series():
     """Clean existing data in pokequant_price_series table"""
@@ -31,6 +32,7 @@ def clean_pokequant_price_series():
         print(f"   📊 Found {len(products_query.data)} products with potential data")
         
         total_cleaned = 0
+        price_cache = PriceSeriesCache()
         
         for product in products_query.data:
             product_id = product['id']
@@ -50,6 +52,8 @@ def clean_pokequant_price_series():
             # For now, we'll just delete all existing data so it can be re-aggregated with filtering
             # In a production system, you might want more sophisticated cleaning
             delete_result = supabase.table('pokequant_price_series').delete().eq('pokequant_product_id', product_id).execute()
+            # The local cache only syncs forward - drop its copy of the deleted points
+            price_cache.invalidate(product_id)
             
             deleted_count = len(price_series_query.data)  # Approximate
             total_cleaned += deleted_count
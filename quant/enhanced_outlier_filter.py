@@ -6,9 +6,14 @@ Provides product-specific filtering and outlier removal
 
 import re
 import statistics
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 from datetime import datetime, timedelta
 
+import numpy as np
+
+# Bump whenever thresholds, patterns or filtering rules change so stored analyses are recomputed
+FILTER_VERSION = "1"
+
 class EnhancedOutlierFilter:
     """Enhanced outlier filtering with product-specific logic"""
     
@@ -76,6 +81,9 @@ class EnhancedOutlierFilter:
             'elite_trainer_box': ['elite', 'trainer', 'box'],
             'theme_deck': ['theme', 'deck']
         }
+        
+        # One compiled alternation per product type for the batch engine (built on first use)
+        self._compiled_suspicious = {}
     
     def filter_price_data(self, price_data: List[Dict], product_info: Dict) -> Dict[str, Any]:
         """Filter price data removing outliers and suspicious entries"""
@@ -133,6 +141,80 @@ class EnhancedOutlierFilter:
             'filter_summary': self._generate_filter_summary(removed_suspicious, removed_statistical)
         }
     
+    def filter_price_data_batch(self, price_data: List[Dict], product_info: Dict) -> Dict[str, Any]:
+        """
+        Array-based equivalent of filter_price_data for large batches (e.g. backfills)
+        
+        Thresholds and IQR bounds are computed over NumPy arrays, with one grouped pass
+        for all source/condition groups, and each distinct title is matched once against
+        a single compiled alternation. Returns exactly what filter_price_data returns.
+        """
+        
+        product_type = self._determine_product_type(product_info)
+        
+        print(f"🔍 Filtering price data for {product_type}")
+        print(f"   Original data points: {len(price_data)}")
+        
+        # Step 1: Apply product-specific filters
+        thresholds = self.price_thresholds.get(product_type, self.price_thresholds['card'])
+        raw_prices = [point.get('price', 0) for point in price_data]
+        prices = np.array(raw_prices, dtype=np.float64)
+        out_of_range = (prices < thresholds['min']) | (prices > thresholds['max'])
+        
+        suspicious_titles = {}
+        
+        def title_is_suspicious(point):
+            if point.get('source', '') != 'ebay' or 'title' not in point:
+                return False
+            title = point['title']
+            is_suspicious = suspicious_titles.get(title)
+            if is_suspicious is None:
+                is_suspicious = suspicious_titles[title] = self._is_suspicious_title_batch(title, product_type)
+            return is_suspicious
+        
+        bad_title = np.zeros(len(price_data), dtype=bool)
+        in_range = np.flatnonzero(~out_of_range).tolist()
+        bad_title[in_range] = [title_is_suspicious(price_data[i]) for i in in_range]
+        
+        removed_suspicious = [
+            {
+                'point': price_data[i],
+                'reason': f"Price ${raw_prices[i]} outside valid range ${thresholds['min']}-${thresholds['max']}"
+            } if out_of_range[i] else {
+                'point': price_data[i],
+                'reason': "Suspicious title pattern detected"
+            }
+            for i in np.flatnonzero(out_of_range | bad_title).tolist()
+        ]
+        kept = np.flatnonzero(~(out_of_range | bad_title))
+        filtered_data = [price_data[i] for i in kept.tolist()]
+        filtered_prices = prices[kept]
+        
+        # Step 2: Apply statistical outlier removal
+        if len(filtered_data) >= 5:  # Need minimum data for statistical analysis
+            grouped = self._group_bounds_batch(filtered_data, filtered_prices)
+            statistically_filtered, removed_statistical = self._remove_statistical_outliers_batch(filtered_data, filtered_prices,
+                                                                                                  grouped=grouped)
+            statistical_bounds = self._bounds_by_group(grouped)
+        else:
+            statistically_filtered = filtered_data
+            removed_statistical = []
+            statistical_bounds = {}
+        
+        print(f"   After filtering: {len(statistically_filtered)} data points")
+        print(f"   Removed suspicious: {len(removed_suspicious)}")
+        print(f"   Removed statistical outliers: {len(removed_statistical)}")
+        
+        return {
+            'filtered_data': statistically_filtered,
+            'original_count': len(price_data),
+            'final_count': len(statistically_filtered),
+            'removed_suspicious': removed_suspicious,
+            'removed_statistical': removed_statistical,
+            'statistical_bounds': statistical_bounds,
+            'filter_summary': self._generate_filter_summary(removed_suspicious, removed_statistical)
+        }
+    
     def _determine_product_type(self, product_info: Dict) -> str:
         """Determine the specific product type for filtering"""
         
@@ -236,6 +318,112 @@ class EnhancedOutlierFilter:
         
         return filtered_data, removed_outliers
     
+    def _is_suspicious_title_batch(self, title: str, product_type: str) -> bool:
+        """_is_suspicious_title with the product type's patterns combined into one compiled regex"""
+        
+        if product_type not in self._compiled_suspicious:
+            patterns = self.suspicious_patterns.get(product_type, [])
+            self._compiled_suspicious[product_type] = re.compile('|'.join(f'(?:{pattern})' for pattern in patterns)) if patterns else None
+        
+        title_lower = title.lower()
+        
+        combined = self._compiled_suspicious[product_type]
+        if combined is not None and combined.search(title_lower):
+            return True
+        
+        required_keywords = self.required_keywords.get(product_type, [])
+        if required_keywords:
+            if product_type == 'booster_box':
+                has_booster_box = 'booster box' in title_lower
+                has_box_and_booster = ('box' in title_lower and 'booster' in title_lower)
+                has_standard_count = ('36' in title_lower and 'pack' in title_lower) or ('24' in title_lower and 'pack' in title_lower)
+                
+                if not (has_booster_box or has_box_and_booster or has_standard_count):
+                    return True
+            elif product_type != 'booster_box_inclusive':
+                if not all(keyword in title_lower for keyword in required_keywords):
+                    return True
+        
+        return False
+    
+    def _remove_statistical_outliers_batch(self, data: List[Dict], prices: np.ndarray, iqr_multiplier: float = 1.5,
+                                           grouped: Optional[Tuple] = None) -> Tuple[List[Dict], List[Dict]]:
+        """
+        _remove_statistical_outliers over arrays: one sort gives every group's quartiles
+        
+        Quartiles reproduce statistics.quantiles(method='exclusive') term for term so the
+        bounds (and the reason strings built from them) are identical.
+        """
+        
+        if len(data) < 5:
+            return data, []
+        
+        codes, group_names, testable, lower_bounds, upper_bounds = grouped or self._group_bounds_batch(data, prices, iqr_multiplier)
+        
+        point_lower = lower_bounds[codes]
+        point_upper = upper_bounds[codes]
+        keep = ~testable[codes] | ((point_lower <= prices) & (prices <= point_upper))
+        
+        # Output is grouped (first-appearance order), original order within each group
+        order = np.argsort(codes, kind='stable') if len(group_names) > 1 else np.arange(len(data))
+        filtered_data = [data[i] for i in order[keep[order]].tolist()]
+        removed_outliers = []
+        
+        for i in order[~keep[order]].tolist():
+            point = data[i]
+            price = point['price']
+            lower_bound = float(point_lower[i])
+            upper_bound = float(point_upper[i])
+            outlier_type = 'extreme_low' if prices[i] < lower_bound else 'extreme_high'
+            removed_outliers.append({
+                'point': point,
+                'reason': f"Statistical outlier ({outlier_type}): ${price} outside ${lower_bound:.2f}-${upper_bound:.2f}",
+                'group': group_names[codes[i]]
+            })
+        
+        return filtered_data, removed_outliers
+    
+    @staticmethod
+    def _bounds_by_group(grouped: Tuple) -> Dict[str, Tuple[float, float]]:
+        """IQR bounds per source/condition group, for the groups large enough to be tested"""
+        
+        codes, group_names, testable, lower_bounds, upper_bounds = grouped
+        return {
+            group_names[code]: (float(lower_bounds[code]), float(upper_bounds[code]))
+            for code in np.flatnonzero(testable).tolist()
+        }
+    
+    def _group_bounds_batch(self, data: List[Dict], prices: np.ndarray, iqr_multiplier: float = 1.5) -> Tuple:
+        """Group codes per point, group names, and each group's testable flag and IQR bounds"""
+        
+        # Group codes numbered in order of first appearance, like the dict in the loop version
+        group_codes = {}
+        codes = np.array([
+            group_codes.setdefault(f"{point.get('source', 'unknown')}_{point.get('condition_category', 'unknown')}", len(group_codes))
+            for point in data
+        ], dtype=np.int64)
+        group_names = list(group_codes)
+        
+        counts = np.bincount(codes, minlength=len(group_names))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sorted_prices = prices[np.lexsort((prices, codes))]
+        
+        testable = counts >= 3  # Not enough data for outlier detection otherwise
+        n = np.where(testable, counts, 3)
+        quartiles = []
+        for i in (1, 3):
+            m = n + 1
+            j = np.clip(i * m // 4, 1, n - 1)
+            delta = i * m - j * 4
+            quartiles.append((sorted_prices[np.minimum(starts + j - 1, len(prices) - 1)] * (4 - delta)
+                              + sorted_prices[np.minimum(starts + j, len(prices) - 1)] * delta) / 4)
+        q1, q3 = quartiles
+        iqr = q3 - q1
+        lower_bounds = q1 - iqr_multiplier * iqr
+        upper_bounds = q3 + iqr_multiplier * iqr
+        
+        return codes, group_names, testable, lower_bounds, upper_bounds
+    
     def _generate_filter_summary(self, removed_suspicious: List[Dict], removed_statistical: List[Dict]) -> Dict[str, Any]:
         """Generate a summary of filtering results"""
         
@@ -314,7 +502,7 @@ def apply_enhanced_filtering(price_data: List[Dict], product_info: Dict, verbose
     """Apply enhanced filtering to PokeQuant price data"""
     
     filter_system = EnhancedOutlierFilter()
-    filter_result = filter_system.filter_price_data(price_data, product_info)
+    filter_result = filter_system.filter_price_data_batch(price_data, product_info)
     
     if verbose:
         filter_system.print_filter_report(filter_result, product_info)
@@ -6,27 +6,37 @@ Determines if we have up-to-date pricing data for Pokemon cards and sealed produ
 
 import sys
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 import argparse
 
 # Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+sys.path.append(os.path.join(REPO_ROOT, 'src', 'pokequant', 'scraping', 'ebay'))
 
 from supabase_client import supabase
+from freshness_snapshot import FreshnessSnapshot, parse_timestamp
+from product_name_index import ProductNameIndex
 
 class DataFreshnessChecker:
     """Checks data freshness and determines if new data collection is needed"""
     
-    def __init__(self, max_age_days: int = 7):
+    def __init__(self, max_age_days: int = 7, snapshot: Optional[FreshnessSnapshot] = None,
+                 supabase_client: Any = None, name_index: Optional[ProductNameIndex] = None):
         """
         Initialize the freshness checker
         
         Args:
             max_age_days: Maximum age in days before data is considered stale
+            snapshot: Catalog-wide freshness snapshot (defaults to data/freshness_snapshot.json)
+            supabase_client: Client to use (defaults to the shared client)
+            name_index: Card / sealed name index (defaults to the index cached in the repo root data/ directory)
         """
         self.max_age_days = max_age_days
-        self.supabase = supabase
+        self.supabase = supabase_client or supabase
+        self.snapshot = snapshot if snapshot is not None else FreshnessSnapshot(self.supabase)
+        self.name_index = name_index if name_index is not None else ProductNameIndex(self.supabase)
         
     def check_product_freshness(self, product_name: str, product_type: str = None) -> Dict[str, Any]:
         """
@@ -102,9 +112,7 @@ class DataFreshnessChecker:
         # Search cards table if not specifically looking for sealed products
         if product_type != 'sealed':
             try:
-                card_result = self.supabase.table('pokemon_cards').select('*').ilike('card_name', f'%{product_name}%').limit(5).execute()
-                
-                for card in card_result.data:
+                for card in self.name_index.search(product_name, 'card', limit=5):
                     found_products.append({
                         'product_type': 'card',
                         'product_id': str(card['id']),
@@ -118,9 +126,7 @@ class DataFreshnessChecker:
         # Search sealed products table if not specifically looking for cards
         if product_type != 'card':
             try:
-                sealed_result = self.supabase.table('sealed_products').select('*').ilike('product_name', f'%{product_name}%').limit(5).execute()
-                
-                for product in sealed_result.data:
+                for product in self.name_index.search(product_name, 'sealed', limit=5):
                     found_products.append({
                         'product_type': 'sealed',
                         'product_id': str(product['id']),
@@ -182,6 +188,18 @@ class DataFreshnessChecker:
         table_name = 'ebay_sold_listings' if product_type == 'card' else 'ebay_sealed_listings'
         id_column = 'card_id' if product_type == 'card' else 'sealed_product_id'
         
+        # A snapshot built this run can only under-report freshness, so trust it when it says fresh
+        if self.snapshot.is_fresh():
+            listing_count, last_update = self.snapshot.get(product_type, product_id)
+            if last_update is not None:
+                days_old = (datetime.now(timezone.utc) - last_update).days
+                if days_old <= self.max_age_days:
+                    return {
+                        'last_update': last_update,
+                        'days_old': days_old,
+                        'ebay_listing_count': listing_count
+                    }
+        
         try:
             # Count total listings
             count_result = self.supabase.table(table_name).select('id', count='exact').eq(id_column, product_id).execute()
@@ -224,20 +242,46 @@ class DataFreshnessChecker:
             'last_update': None
         }
     
-    def get_stale_products(self, limit: int = 20) -> List[Dict]:
-        """Get list of products with stale data that need updating"""
+    def get_stale_products(self, limit: int = 20, page_size: int = 1000) -> List[Dict]:
+        """
+        Get list of products with stale data that need updating, stalest first
+        
+        A product's last update is the later of its newest eBay listing (from the
+        freshness snapshot) and its last_data_update; products with neither are stale.
+        """
         
         print(f"🔍 Finding products with data older than {self.max_age_days} days...")
         
         try:
-            # Find products that haven't been updated recently
-            cutoff_date = datetime.now() - timedelta(days=self.max_age_days)
+            cutoff_date = datetime.now(timezone.utc) - timedelta(days=self.max_age_days)
+            self.snapshot.ensure_fresh()
+            
+            stale = []
+            start = 0
+            while True:
+                result = self.supabase.table('pokequant_products').select('*').order('id').range(start, start + page_size - 1).execute()
+                products = result.data or []
+                
+                for product in products:
+                    listing_count, last_listing = self.snapshot.get(product['product_type'], product['product_id'])
+                    updates = [t for t in (last_listing, parse_timestamp(product.get('last_data_update'))) if t]
+                    last_update = max(updates) if updates else None
+                    
+                    if last_update is None or last_update < cutoff_date:
+                        product['last_update'] = last_update.isoformat() if last_update else None
+                        product['ebay_listing_count'] = listing_count
+                        stale.append((last_update or datetime.min.replace(tzinfo=timezone.utc), product))
+                
+                if len(products) < page_size:
+                    break
+                start += page_size
             
-            result = self.supabase.table('pokequant_products').select('*').filter('last_data_update', 'lt', cutoff_date.isoformat()).limit(limit).execute()
+            stale.sort(key=lambda entry: entry[0])
+            stale_products = [product for _, product in stale[:limit]]
             
-            print(f"   📊 Found {len(result.data)} products needing updates")
+            print(f"   📊 Found {len(stale)} products needing updates")
             
-            return result.data
+            return stale_products
             
         except Exception as e:
             print(f"   ❌ Error finding stale products: {e}")
@@ -292,7 +336,7 @@ def main():
         if stale_products:
             print(f"\nFound {len(stale_products)} products needing updates:")
             for product in stale_products:
-                print(f"   📦 {product['product_name']} ({product['product_type']}) - Last update: {product.get('last_data_update', 'Never')}")
+                print(f"   📦 {product['product_name']} ({product['product_type']}) - Last update: {product.get('last_update') or 'Never'}")
         else:
             print("✅ No stale products found!")
     
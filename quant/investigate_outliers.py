@@ -9,10 +9,13 @@ from typing import List, Dict, Any
 import statistics
 
 # Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+sys.path.append(os.path.join(REPO_ROOT, 'src', 'pokequant', 'scraping', 'ebay'))
 
 from supabase_client import supabase
 from quant.price_data_service import PriceDataService
+from product_name_index import ProductNameIndex
 
 class OutlierInvestigator:
     """Investigate outliers in PokeQuant price data"""
@@ -20,6 +23,7 @@ class OutlierInvestigator:
     def __init__(self):
         self.supabase = supabase
         self.price_service = PriceDataService()
+        self.name_index = ProductNameIndex(self.supabase)
     
     def investigate_product(self, product_name: str) -> Dict[str, Any]:
         """Investigate outliers for a specific product"""
@@ -66,15 +70,13 @@ class OutlierInvestigator:
         
         # Search in sealed_products first
         try:
-            sealed_query = self.supabase.table('sealed_products').select('*').ilike('product_name', f'%{product_name}%').limit(5).execute()
-            sealed_results = sealed_query.data
+            sealed_results = self.name_index.search(product_name, 'sealed', limit=5)
         except Exception as e:
             sealed_results = []
         
         # Search in pokemon_cards
         try:
-            card_query = self.supabase.table('pokemon_cards').select('*').ilike('card_name', f'%{product_name}%').limit(5).execute()
-            card_results = card_query.data
+            card_results = self.name_index.search(product_name, 'card', limit=5)
         except Exception as e:
             card_results = []
         
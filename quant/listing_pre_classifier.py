@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Listing Pre-Classifier
+Cheap local tier in front of the LLM filter - only uncertain listings are escalated
+"""
+
+import os
+import sys
+import re
+import math
+import zlib
+import threading
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# Add parent directory to path for imports
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+sys.path.append(os.path.join(REPO_ROOT, 'src', 'pokequant', 'scraping', 'ebay'))
+
+from quant.enhanced_outlier_filter import EnhancedOutlierFilter
+from quant.llm_decision_cache import LLMDecisionCache, normalize_title
+
+# Optional regex signals from the scraper's quality filter
+try:
+    from listing_quality_filter_fixed import ListingQualityFilterFixed
+    QUALITY_FILTER_AVAILABLE = True
+except ImportError:
+    QUALITY_FILTER_AVAILABLE = False
+
+# LLM product types -> EnhancedOutlierFilter product types
+OUTLIER_PRODUCT_TYPES = {
+    'booster_box': 'booster_box_inclusive',
+    'elite_trainer_box': 'elite_trainer_box',
+    'theme_deck': 'theme_deck',
+    'tin': 'tin',
+    'collection_box': 'collection_box',
+    'single_card': 'card',
+}
+
+SEALED_PRODUCT_TYPES = {'booster_box', 'elite_trainer_box', 'booster_pack', 'theme_deck', 'tin',
+                        'collection_box', 'bundle', 'starter_deck'}
+
+@dataclass
+class PreClassification:
+    """Result of the local tier for one listing"""
+    action: str  # 'keep', 'remove' or 'escalate'
+    keep_probability: float
+    signals: List[str]
+
+class TitleDecisionModel:
+    """Tiny hashed TF-IDF + logistic regression model of past LLM keep/remove decisions (NumPy only)"""
+
+    def __init__(self, n_features: int = 2 ** 14, l2: float = 1e-3, epochs: int = 300, learning_rate: float = 2.0):
+        self.n_features = n_features
+        self.l2 = l2
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.idf = None
+        self.weights = None
+        self.bias = 0.0
+
+    def _tokens(self, title: str, expected_product_type: str) -> List[str]:
+        words = re.findall(r"[a-z0-9/]+", normalize_title(title))
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])] + [f"__type_{expected_product_type}"]
+
+    def _counts(self, documents: List[Tuple[str, str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Sparse hashed token counts as (row, column, count) arrays - a title only touches a few dozen columns"""
+        rows, columns, counts = [], [], []
+        for row, (title, expected_product_type) in enumerate(documents):
+            document = {}
+            for token in self._tokens(title, expected_product_type):
+                column = zlib.crc32(token.encode('utf-8')) % self.n_features
+                document[column] = document.get(column, 0) + 1
+            rows.extend([row] * len(document))
+            columns.extend(document)
+            counts.extend(document.values())
+        return (np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64),
+                np.array(counts, dtype=np.float64))
+
+    def _transform(self, counts: Tuple[np.ndarray, np.ndarray, np.ndarray], n_documents: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        rows, columns, values = counts
+        values = np.log1p(values) * self.idf[columns]
+        norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=n_documents))
+        return rows, columns, values / np.where(norms == 0, 1, norms)[rows]
+
+    @staticmethod
+    def _dot(features: Tuple[np.ndarray, np.ndarray, np.ndarray], weights: np.ndarray, n_documents: int) -> np.ndarray:
+        rows, columns, values = features
+        return np.bincount(rows, weights=values * weights[columns], minlength=n_documents)
+
+    def fit(self, documents: List[Tuple[str, str]], labels: List[int]) -> 'TitleDecisionModel':
+        counts = self._counts(documents)
+        document_frequency = np.bincount(counts[1], minlength=self.n_features)
+        self.idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+        rows, columns, values = features = self._transform(counts, len(documents))
+        y = np.asarray(labels, dtype=np.float64)
+
+        self.weights = np.zeros(self.n_features)
+        self.bias = 0.0
+        for _ in range(self.epochs):
+            predictions = 1 / (1 + np.exp(-(self._dot(features, self.weights, len(y)) + self.bias)))
+            error = predictions - y
+            gradient = np.bincount(columns, weights=values * error[rows], minlength=self.n_features)
+            self.weights -= self.learning_rate * (gradient / len(y) + self.l2 * self.weights)
+            self.bias -= self.learning_rate * error.mean()
+        return self
+
+    def predict_proba(self, documents: List[Tuple[str, str]]) -> np.ndarray:
+        """Probability each (title, expected type) would be kept"""
+        features = self._transform(self._counts(documents), len(documents))
+        return 1 / (1 + np.exp(-(self._dot(features, self.weights, len(documents)) + self.bias)))
+
+    def save(self, path: str, trained_on: int):
+        """Persist the fitted weights, with the number of cached examples they were trained from"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, idf=self.idf, weights=self.weights, bias=np.array(self.bias),
+                 trained_on=np.array(trained_on))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple[Optional['TitleDecisionModel'], Optional[int]]:
+        """(model, trained_on) from a file written by save, or (None, None) if there is no usable one"""
+        try:
+            with np.load(path, allow_pickle=False) as stored:
+                model = cls(n_features=len(stored['weights']))
+                model.idf = stored['idf']
+                model.weights = stored['weights']
+                model.bias = float(stored['bias'])
+                return model, int(stored['trained_on'])
+        except (OSError, KeyError, ValueError):
+            return None, None
+
+class ListingPreClassifier:
+    """
+    Scores listings from local signals and only escalates the uncertain middle band
+
+    Signals are summed as log-odds: ListingQualityFilterFixed verdicts, the
+    EnhancedOutlierFilter suspicious-title patterns, a robust z-score of the log price
+    against the batch, and (once enough LLM decisions are cached) a title model
+    trained on those decisions.
+
+    The rule signals can reject a listing on their own but never keep one: a valid
+    title at a typical price only reaches p≈0.88, below keep_threshold, so a local
+    keep needs the title model to add about one log-odd more (model p ≥ 0.73).
+    Until a model is trained, every listing without a negative signal is escalated.
+    """
+
+    def __init__(self, keep_threshold: float = 0.95, remove_threshold: float = 0.15,
+                 decision_cache: Optional[LLMDecisionCache] = None, min_training_examples: int = 50,
+                 max_training_examples: int = 5000, retrain_every: int = 200, model_path: Optional[str] = None):
+        """
+        Args:
+            keep_threshold: Keep locally at or above this keep probability (only with a title model)
+            remove_threshold: Remove locally at or below this keep probability
+            decision_cache: Cached LLM decisions to train the title model on
+            min_training_examples: Minimum keep/remove decisions before the title model is used
+            max_training_examples: Train on at most this many of the most recent decisions
+            retrain_every: Retrain once the cache has gained this many decisions since the last fit
+            model_path: Where the fitted model is kept between runs (defaults to next to the
+                        decision cache file; memory-only caches don't persist it)
+        """
+        self.keep_threshold = keep_threshold
+        self.remove_threshold = remove_threshold
+        self.outlier_filter = EnhancedOutlierFilter()
+        self.quality_filter = ListingQualityFilterFixed() if QUALITY_FILTER_AVAILABLE else None
+        self.title_model = None
+        self.decision_cache = decision_cache
+        self.min_training_examples = min_training_examples
+        self.max_training_examples = max_training_examples
+        self.retrain_every = retrain_every
+        self.model_path = model_path
+        if model_path is None and decision_cache is not None and decision_cache.cache_path:
+            self.model_path = f"{os.path.splitext(decision_cache.cache_path)[0]}_title_model.npz"
+        self._trained_on = None  # Decisions in the cache when the title model was last fit
+        self._train_lock = threading.Lock()
+
+        if decision_cache is not None:
+            if self.model_path and os.path.exists(self.model_path):
+                self.title_model, self._trained_on = TitleDecisionModel.load(self.model_path)
+            self.refresh()
+
+    def refresh(self) -> bool:
+        """Retrain on the decision cache if it grew by retrain_every since the last fit; returns whether it did"""
+        if self.decision_cache is None:
+            return False
+        with self._train_lock:
+            count = self.decision_cache.example_count()
+            if self._trained_on is not None and 0 <= count - self._trained_on < self.retrain_every:
+                return False
+            self.train(self.decision_cache, self.min_training_examples)
+            return True
+
+    def train(self, decision_cache: LLMDecisionCache, min_training_examples: int = 50) -> bool:
+        """Fit the title model on cached keep/remove decisions; returns whether a model is in use"""
+        self._trained_on = decision_cache.example_count()
+        examples = [(title, expected_type, action) for title, expected_type, action in decision_cache.training_examples()
+                    if action in ('keep', 'remove')][-self.max_training_examples:]
+        labels = [1 if action == 'keep' else 0 for _, _, action in examples]
+
+        if len(examples) < min_training_examples or len(set(labels)) < 2:
+            self.title_model = None
+            return False
+
+        self.title_model = TitleDecisionModel().fit([(title, expected_type) for title, expected_type, _ in examples], labels)
+        if self.model_path:
+            try:
+                self.title_model.save(self.model_path, self._trained_on)
+            except OSError as e:
+                print(f"⚠️ Could not save title model: {e}")
+        return True
+
+    def classify(self, listings: List[Dict], expected_product_type: str,
+                 reference_prices: List[float] = None) -> List[PreClassification]:
+        """
+        Classify listings locally
+
+        Args:
+            listings: Listing dicts with 'title' and 'price'
+            expected_product_type: LLM product type the listings should be
+            reference_prices: Prices the z-score is computed against (defaults to the listings' own)
+        """
+        outlier_type = OUTLIER_PRODUCT_TYPES.get(expected_product_type, 'card')
+        is_sealed = expected_product_type in SEALED_PRODUCT_TYPES
+        center, spread = self._log_price_stats(reference_prices if reference_prices is not None
+                                               else [listing.get('price', 0) for listing in listings])
+
+        self.refresh()
+        model_probabilities = None
+        if self.title_model is not None and listings:
+            model_probabilities = self.title_model.predict_proba(
+                [(listing.get('title', ''), expected_product_type) for listing in listings])
+
+        results = []
+        for i, listing in enumerate(listings):
+            title = listing.get('title', '') or ''
+            log_odds = 0.0
+            signals = []
+
+            if self.quality_filter is not None:
+                quality = self.quality_filter.filter_listing({'title': title, 'price': listing.get('price', 0)}, None, is_sealed)
+                if quality.is_valid:
+                    log_odds += 1.0
+                else:
+                    log_odds -= 3.0
+                    signals.append(f"quality: {quality.reason}")
+
+            if title and self.outlier_filter._is_suspicious_title_batch(title, outlier_type):
+                log_odds -= 2.5
+                signals.append("suspicious title")
+
+            z_score = self._price_z_score(listing.get('price', 0), center, spread)
+            if z_score is None or abs(z_score) > 3.5:
+                log_odds -= 2.5
+                signals.append("price outlier" if z_score is not None else "no usable price")
+            elif abs(z_score) < 1.5:
+                log_odds += 1.0
+
+            if model_probabilities is not None:
+                probability = min(max(float(model_probabilities[i]), 1e-4), 1 - 1e-4)
+                log_odds += math.log(probability / (1 - probability))
+                signals.append(f"title model {probability:.2f}")
+
+            keep_probability = 1 / (1 + math.exp(-log_odds))
+            if keep_probability >= self.keep_threshold and model_probabilities is not None:
+                action = 'keep'
+            elif keep_probability <= self.remove_threshold:
+                action = 'remove'
+            else:
+                action = 'escalate'
+            results.append(PreClassification(action, keep_probability, signals))
+
+        return results
+
+    @staticmethod
+    def _log_price_stats(prices: List[float]) -> Tuple[Optional[float], Optional[float]]:
+        """Median and scaled MAD of log prices (robust to the outliers we are looking for)"""
+        logs = np.log([p for p in (ListingPreClassifier._as_price(p) for p in prices) if p])
+        if len(logs) < 5:
+            return None, None
+        center = float(np.median(logs))
+        spread = float(np.median(np.abs(logs - center))) * 1.4826
+        return center, max(spread, 0.05)
+
+    @staticmethod
+    def _price_z_score(price: Any, center: Optional[float], spread: Optional[float]) -> Optional[float]:
+        price = ListingPreClassifier._as_price(price)
+        if not price:
+            return None
+        if center is None:
+            return 0.0  # Too few prices to judge
+        return (math.log(price) - center) / spread
+
+    @staticmethod
+    def _as_price(price: Any) -> Optional[float]:
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return None
+        return price if price > 0 else None
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+LLM Decision Cache
+Persistent content-addressed store of LLM listing classifications
+"""
+
+import os
+import re
+import json
+import math
+import hashlib
+import threading
+from typing import Dict, Any, Optional, List, Tuple
+
+def normalize_title(title: str) -> str:
+    """Lowercase and collapse whitespace so trivially different titles share a cache entry"""
+    return re.sub(r'\s+', ' ', (title or '').lower()).strip()
+
+def price_bucket(price: float) -> int:
+    """Log-scale price bucket (~5% wide) - prices in the same bucket get the same decision"""
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        return -1
+    if price <= 0:
+        return -1
+    return int(math.floor(math.log(price) / math.log(1.05)))
+
+class LLMDecisionCache:
+    """
+    Append-only JSONL cache of raw LLM classification results
+
+    Entries are keyed by a hash of (normalized title, price bucket, expected product type,
+    prompt version), so changing the prompt version invalidates old decisions without
+    deleting them. The raw LLM JSON is cached rather than the FilterDecision, so derived
+    fields like price reasonableness are recomputed from the exact price.
+
+    Decisions the local pre-classifier made are stored too, tagged with their source, so
+    the title model trains on every decided listing. They are training data only: get()
+    serves LLM results alone, and a later LLM decision for the same key replaces them.
+    """
+
+    def __init__(self, cache_path: str = "data/llm_decision_cache.jsonl"):
+        """
+        Args:
+            cache_path: JSONL file holding one {"key", "result"} entry per line (None = memory only)
+        """
+        self.cache_path = cache_path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._examples: Dict[str, Tuple[str, str]] = {}  # key -> (normalized title, expected type)
+        self._local: Dict[str, Dict[str, Any]] = {}  # key -> pre-classifier decision, until the LLM decides it
+        self._lock = threading.Lock()  # Analysis threads share one cache
+        self._load()
+
+    def _load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+
+        with open(self.cache_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    if entry.get('source', 'llm') == 'llm':
+                        self._entries[entry['key']] = entry['result']
+                        self._local.pop(entry['key'], None)
+                    elif entry['key'] not in self._entries:
+                        self._local[entry['key']] = entry['result']
+                    if entry.get('title') is not None:
+                        self._examples[entry['key']] = (entry['title'], entry.get('expected_product_type') or '')
+                except (ValueError, KeyError):
+                    continue  # Skip a torn last line from an interrupted write
+
+    @staticmethod
+    def make_key(title: str, price: float, expected_product_type: str, prompt_version: str) -> str:
+        identity = json.dumps([normalize_title(title), price_bucket(price), expected_product_type, prompt_version])
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(key)
+
+    def put(self, key: str, result: Dict[str, Any], title: str = None, expected_product_type: str = None,
+            source: str = 'llm'):
+        """
+        Store a decision; title and expected type are kept so the cache can double as training data
+
+        Args:
+            source: 'llm', or 'pre_classifier' for a decision made locally (kept for training only)
+        """
+        with self._lock:
+            if key in self._entries or (source != 'llm' and key in self._local):
+                return
+
+            entry = {'key': key, 'result': result}
+            if source == 'llm':
+                self._entries[key] = result
+                self._local.pop(key, None)
+            else:
+                entry['source'] = source
+                self._local[key] = result
+            if title is not None:
+                entry['title'] = normalize_title(title)
+                entry['expected_product_type'] = expected_product_type
+                self._examples[key] = (entry['title'], expected_product_type or '')
+
+            if self.cache_path:
+                directory = os.path.dirname(self.cache_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.cache_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def training_examples(self) -> List[Tuple[str, str, str]]:
+        """(normalized title, expected product type, action) for every decision stored with its title, local ones included"""
+        with self._lock:
+            return [(title, expected_type, (self._entries[key] if key in self._entries else self._local[key]).get('action', 'flag'))
+                    for key, (title, expected_type) in self._examples.items()]
+
+    def example_count(self) -> int:
+        """Decisions stored with their title (the size of training_examples, without building it)"""
+        return len(self._examples)
+
+    def local_decision_count(self) -> int:
+        """Pre-classifier decisions stored for training (not counted by len())"""
+        return len(self._local)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
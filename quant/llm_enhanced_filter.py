@@ -5,13 +5,32 @@ Inspired by PriceCharting's approach to data quality
 """
 
 import os
+import sys
 import json
 import re
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 import google.generativeai as genai
 import statistics
 
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quant.llm_decision_cache import LLMDecisionCache
+from quant.listing_pre_classifier import ListingPreClassifier
+
+# Bump whenever the prompts change so cached decisions from the old prompt are not reused
+PROMPT_VERSION = "v1"
+
+# Rough budget charge per response on top of the prompt (~4 characters per token)
+RESPONSE_TOKEN_ESTIMATE = 300
+
+# Listings packed into one request by apply_llm_enhanced_filtering
+LISTINGS_PER_PROMPT = 10
+
 @dataclass
 class FilterDecision:
     """Result of LLM filtering decision"""
@@ -24,16 +43,72 @@ class FilterDecision:
     is_authentic: bool
     price_reasonableness: float  # 0.0 to 1.0
 
+class MinuteBudget:
+    """Async per-minute request and token budget, refilled continuously like a token bucket"""
+    
+    def __init__(self, requests_per_minute: float = 60, tokens_per_minute: float = 1_000_000):
+        self.limits = {'requests': requests_per_minute, 'tokens': tokens_per_minute}
+        self.available = dict(self.limits)
+        self.updated = time.monotonic()
+        self._lock = None
+        self._lock_loop = None
+    
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        for name, limit in self.limits.items():
+            self.available[name] = min(limit, self.available[name] + elapsed * limit / 60)
+    
+    async def acquire(self, tokens: float):
+        """Wait until one request and `tokens` tokens fit in the budget, then consume them"""
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        
+        needed = {'requests': 1, 'tokens': min(tokens, self.limits['tokens'])}
+        async with self._lock:
+            while True:
+                self._refill()
+                if all(self.available[name] >= amount for name, amount in needed.items()):
+                    for name, amount in needed.items():
+                        self.available[name] -= amount
+                    return
+                await asyncio.sleep(max((amount - self.available[name]) * 60 / self.limits[name]
+                                        for name, amount in needed.items()))
+
 class LLMEnhancedFilter:
     """LLM-powered filtering system for Pokemon product listings"""
     
-    def __init__(self, gemini_api_key: Optional[str] = None):
-        api_key = gemini_api_key or os.getenv('GEMINI_API_KEY')
-        if api_key:
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+    def __init__(self, gemini_api_key: Optional[str] = None, model: Any = None,
+                 decision_cache: Optional[LLMDecisionCache] = None,
+                 requests_per_minute: float = 60, tokens_per_minute: float = 1_000_000,
+                 pre_classifier: Optional[ListingPreClassifier] = None):
+        """
+        Args:
+            gemini_api_key: Gemini API key (defaults to GEMINI_API_KEY)
+            model: Model exposing generate_content (and optionally generate_content_async);
+                   defaults to Gemini
+            decision_cache: Cache of past decisions (defaults to data/llm_decision_cache.jsonl)
+            requests_per_minute: Request budget for batch classification
+            tokens_per_minute: Estimated token budget for batch classification
+            pre_classifier: Local tier that settles confident listings before batch
+                            classification calls the LLM (None = send everything)
+        """
+        if model is not None:
+            self.model = model
         else:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
+            api_key = gemini_api_key or os.getenv('GEMINI_API_KEY')
+            if api_key:
+                genai.configure(api_key=api_key)
+                self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+            else:
+                raise ValueError("GEMINI_API_KEY not found in environment variables")
+        
+        self.decision_cache = decision_cache if decision_cache is not None else LLMDecisionCache()
+        self.budget = MinuteBudget(requests_per_minute, tokens_per_minute)
+        self.pre_classifier = pre_classifier
         
         # Price ranges for reasonableness check (in USD)
         self.expected_price_ranges = {
@@ -60,45 +135,203 @@ class LLMEnhancedFilter:
             expected_product_type: What we think this should be (e.g., 'booster_box')
         """
         
-        prompt = self._build_analysis_prompt(title, description, price, expected_product_type)
+        cache_key = LLMDecisionCache.make_key(title, price, expected_product_type, PROMPT_VERSION)
+        cached = self.decision_cache.get(cache_key)
+        if cached is not None:
+            return self._parse_llm_response(cached, price, expected_product_type)
         
         try:
-            # Combine system prompt and user prompt for Gemini
-            full_prompt = f"{self._get_system_prompt()}\n\n{prompt}\n\nRespond ONLY with valid JSON."
-            
             response = self.model.generate_content(
-                full_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.1,  # Low temperature for consistent analysis
-                    response_mime_type="application/json"
-                )
+                self._build_full_prompt(title, description, price, expected_product_type),
+                generation_config=self._generation_config()
             )
             
             result = json.loads(response.text)
+            self.decision_cache.put(cache_key, result, title, expected_product_type)
             return self._parse_llm_response(result, price, expected_product_type)
             
         except Exception as e:
             # Fallback to basic filtering if LLM fails
-            return FilterDecision(
-                action='flag',
-                confidence=0.5,
-                reason=f'LLM analysis failed: {str(e)}',
-                detected_language='unknown',
-                detected_product_type='unknown',
-                detected_condition='unknown',
-                is_authentic=True,
-                price_reasonableness=0.5
-            )
+            return self._failed_decision(e)
+    
+    async def analyze_listings_async(self, listings: List[Dict], expected_product_type: str,
+                                     max_concurrent: int = 5,
+                                     listings_per_prompt: int = 1) -> Tuple[List[FilterDecision], Dict[str, int]]:
+        """
+        Classify many listings concurrently, in listing order
+        
+        Cached decisions cost no API call, identical listings within the batch share one
+        call, and calls are limited to max_concurrent in flight and the per-minute budget.
+        With a pre_classifier, listings it is confident about are decided locally.
+        
+        Args:
+            listings_per_prompt: Pack up to this many listings into one JSON-array prompt.
+                                 Malformed batch responses are split in half and retried.
+        
+        Returns:
+            (decisions, stats) where stats counts api_calls, cache_hits, deduplicated,
+            batch_splits and pre_classified
+        """
+        semaphore = asyncio.Semaphore(max_concurrent)
+        stats = {'api_calls': 0, 'cache_hits': 0, 'deduplicated': 0, 'batch_splits': 0, 'pre_classified': 0}
+        
+        decisions: List[Optional[FilterDecision]] = [None] * len(listings)
+        keys = []
+        pending: Dict[str, Dict] = {}  # cache key -> first listing needing that decision
+        
+        for i, listing in enumerate(listings):
+            key = LLMDecisionCache.make_key(listing.get('title', ''), listing.get('price', 0),
+                                            expected_product_type, PROMPT_VERSION)
+            keys.append(key)
+            
+            cached = self.decision_cache.get(key)
+            if cached is not None:
+                stats['cache_hits'] += 1
+                decisions[i] = self._parse_llm_response(cached, listing.get('price', 0), expected_product_type)
+            elif key in pending:
+                stats['deduplicated'] += 1
+            else:
+                pending[key] = listing
+        
+        outcomes: Dict[str, Any] = {}  # cache key -> raw LLM result or the exception that prevented one
+        local_decisions: Dict[str, FilterDecision] = {}  # cache key -> pre-classifier decision
+        
+        if self.pre_classifier is not None and pending:
+            classifications = self.pre_classifier.classify(list(pending.values()), expected_product_type,
+                                                           reference_prices=[l.get('price', 0) for l in listings])
+            for key, classification in zip(list(pending), classifications):
+                if classification.action == 'escalate':
+                    continue
+                listing = pending.pop(key)
+                local_decisions[key] = self._pre_classified_decision(classification, listing.get('price', 0),
+                                                                     expected_product_type)
+                # Recorded for training, so the title model also learns from the listings it settles
+                self.decision_cache.put(key, {'action': classification.action,
+                                              'keep_probability': round(classification.keep_probability, 4)},
+                                        listing.get('title', ''), expected_product_type, source='pre_classifier')
+        
+        async def request(full_prompt: str, expected_responses: int) -> str:
+            async with semaphore:
+                await self.budget.acquire(len(full_prompt) // 4 + RESPONSE_TOKEN_ESTIMATE * expected_responses)
+                stats['api_calls'] += 1
+                response = await self._generate_async(full_prompt)
+            return response.text
+        
+        async def classify_one(key: str):
+            listing = pending[key]
+            try:
+                text = await request(self._build_full_prompt(listing.get('title', ''), listing.get('description', ''),
+                                                              listing.get('price', 0), expected_product_type), 1)
+                outcomes[key] = json.loads(text)
+                self.decision_cache.put(key, outcomes[key], listing.get('title', ''), expected_product_type)
+            except Exception as e:
+                outcomes[key] = e
+        
+        async def classify_group(group: List[str]):
+            if len(group) == 1:
+                return await classify_one(group[0])
+            
+            try:
+                text = await request(self._build_batch_prompt([(key[:12], pending[key]) for key in group], expected_product_type), len(group))
+                results = self._parse_batch_response(text, [key[:12] for key in group])
+            except Exception:
+                results = {}
+            
+            missing = []
+            for key in group:
+                if key[:12] in results:
+                    outcomes[key] = results[key[:12]]
+                    self.decision_cache.put(key, outcomes[key], pending[key].get('title', ''), expected_product_type)
+                else:
+                    missing.append(key)
+            
+            if not missing:
+                return
+            if len(missing) < len(group):
+                return await classify_group(missing)  # Retry only the listings the model skipped
+            
+            stats['batch_splits'] += 1
+            middle = len(group) // 2
+            await asyncio.gather(classify_group(group[:middle]), classify_group(group[middle:]))
+        
+        pending_keys = list(pending)
+        if listings_per_prompt > 1:
+            await asyncio.gather(*(classify_group(pending_keys[i:i + listings_per_prompt])
+                                   for i in range(0, len(pending_keys), listings_per_prompt)))
+        else:
+            await asyncio.gather(*(classify_one(key) for key in pending_keys))
+        
+        for i, listing in enumerate(listings):
+            if decisions[i] is not None:
+                continue
+            if keys[i] in local_decisions:
+                stats['pre_classified'] += 1
+                decisions[i] = local_decisions[keys[i]]
+                continue
+            outcome = outcomes[keys[i]]
+            if isinstance(outcome, Exception):
+                decisions[i] = self._failed_decision(outcome)
+            else:
+                decisions[i] = self._parse_llm_response(outcome, listing.get('price', 0), expected_product_type)
+        
+        return decisions, stats
+    
+    async def _generate_async(self, full_prompt: str):
+        """Call the model without blocking the event loop"""
+        if hasattr(self.model, 'generate_content_async'):
+            return await self.model.generate_content_async(full_prompt, generation_config=self._generation_config())
+        return await asyncio.to_thread(self.model.generate_content, full_prompt, generation_config=self._generation_config())
+    
+    def _generation_config(self):
+        return genai.types.GenerationConfig(
+            temperature=0.1,  # Low temperature for consistent analysis
+            response_mime_type="application/json"
+        )
+    
+    def _build_full_prompt(self, title: str, description: str, price: float, expected_product_type: str) -> str:
+        """Combine system prompt and user prompt for Gemini"""
+        prompt = self._build_analysis_prompt(title, description, price, expected_product_type)
+        return f"{self._get_system_prompt()}\n\n{prompt}\n\nRespond ONLY with valid JSON."
+    
+    def _failed_decision(self, error: Exception) -> FilterDecision:
+        return FilterDecision(
+            action='flag',
+            confidence=0.5,
+            reason=f'LLM analysis failed: {str(error)}',
+            detected_language='unknown',
+            detected_product_type='unknown',
+            detected_condition='unknown',
+            is_authentic=True,
+            price_reasonableness=0.5
+        )
+    
+    def _pre_classified_decision(self, classification, price: float, expected_product_type: str) -> FilterDecision:
+        keep = classification.action == 'keep'
+        signals = ', '.join(classification.signals) or 'no negative signals'
+        return FilterDecision(
+            action=classification.action,
+            confidence=classification.keep_probability if keep else 1 - classification.keep_probability,
+            reason=f'Pre-classifier: {signals}',
+            detected_language='unknown',
+            detected_product_type=expected_product_type,
+            detected_condition='unknown',
+            is_authentic=True,
+            price_reasonableness=self._calculate_price_reasonableness(price, expected_product_type)
+        )
     
     def batch_filter_listings(self, listings: List[Dict], expected_product_type: str,
-                             max_concurrent: int = 5) -> Dict[str, Any]:
+                             max_concurrent: int = 5, listings_per_prompt: int = 1) -> Dict[str, Any]:
         """
         Filter a batch of listings with LLM analysis
         
         Args:
             listings: List of listing dicts with 'title', 'description', 'price'
             expected_product_type: Expected product type
-            max_concurrent: Max concurrent LLM calls (cost control)
+            max_concurrent: Max LLM calls in flight at once (cost control)
+            listings_per_prompt: Listings packed into each LLM request (1 = one prompt per listing)
+        
+        Safe to call from inside a running event loop (the analysis then runs on a worker thread),
+        though async code should await analyze_listings_async instead.
         """
         
         results = {
@@ -108,30 +341,32 @@ class LLMEnhancedFilter:
             'analysis_summary': {}
         }
         
-        # Process in batches to control API costs
-        for i in range(0, len(listings), max_concurrent):
-            batch = listings[i:i + max_concurrent]
+        analysis = self.analyze_listings_async(listings, expected_product_type, max_concurrent, listings_per_prompt)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            decisions, stats = asyncio.run(analysis)
+        else:
+            # asyncio.run can't be nested in a running loop; async callers should await analyze_listings_async
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                decisions, stats = executor.submit(asyncio.run, analysis).result()
+        
+        for listing, decision in zip(listings, decisions):
+            # Categorize based on decision
+            listing['filter_decision'] = decision
             
-            for listing in batch:
-                decision = self.analyze_listing(
-                    title=listing.get('title', ''),
-                    description=listing.get('description', ''),
-                    price=listing.get('price', 0),
-                    expected_product_type=expected_product_type
-                )
-                
-                # Categorize based on decision
-                listing['filter_decision'] = decision
-                
-                if decision.action == 'keep':
-                    results['kept'].append(listing)
-                elif decision.action == 'remove':
-                    results['removed'].append(listing)
-                else:  # flag
-                    results['flagged'].append(listing)
+            if decision.action == 'keep':
+                results['kept'].append(listing)
+            elif decision.action == 'remove':
+                results['removed'].append(listing)
+            else:  # flag
+                results['flagged'].append(listing)
         
         # Generate summary
         results['analysis_summary'] = self._generate_analysis_summary(results)
+        results['api_calls'] = stats['api_calls']
+        results['cache_hits'] = stats['cache_hits'] + stats['deduplicated']
+        results['pre_classified'] = stats['pre_classified']
         
         return results
     
@@ -196,6 +431,58 @@ Focus on semantic meaning - "4 Booster Packs" is NOT a "Booster Box" even if the
 Japanese/Korean products should be flagged unless specifically looking for those.
 """
 
+    def _build_batch_prompt(self, items: List[Tuple[str, Dict]], expected_product_type: str) -> str:
+        """Prompt classifying several listings at once; items are (id, listing) pairs"""
+        
+        expected_range = self.expected_price_ranges.get(expected_product_type, {})
+        typical_min, typical_max = expected_range.get('typical', (0, 999999))
+        
+        entries = [
+            {
+                'id': item_id,
+                'title': listing.get('title', ''),
+                'description': (listing.get('description') or '')[:300] or "No description",
+                'price': listing.get('price', 0)
+            }
+            for item_id, listing in items
+        ]
+        
+        return f"""{self._get_system_prompt()}
+
+Analyze each of these {len(entries)} Pokemon TCG listings independently:
+
+EXPECTED PRODUCT TYPE: {expected_product_type}
+TYPICAL PRICE RANGE for {expected_product_type}: ${typical_min} - ${typical_max}
+
+LISTINGS (JSON):
+{json.dumps(entries, ensure_ascii=False, indent=2)}
+
+Focus on semantic meaning - "4 Booster Packs" is NOT a "Booster Box" even if the title says "box".
+Japanese/Korean products should be flagged unless specifically looking for those.
+
+Respond ONLY with a valid JSON array holding one object per listing, in the format above plus the listing's "id"."""
+    
+    def _parse_batch_response(self, text: str, expected_ids: List[str]) -> Dict[str, Dict]:
+        """Map a batch response back to listing ids, keeping only well-formed entries"""
+        
+        data = json.loads(text)
+        if isinstance(data, dict):
+            # Tolerate {"results": [...]} style wrappers
+            lists = [value for value in data.values() if isinstance(value, list)]
+            data = lists[0] if len(lists) == 1 else []
+        if not isinstance(data, list):
+            return {}
+        
+        wanted = set(expected_ids)
+        results = {}
+        for entry in data:
+            if not isinstance(entry, dict) or entry.get('id') not in wanted:
+                continue
+            if entry.get('action') not in ('keep', 'remove', 'flag'):
+                continue
+            results[entry['id']] = {field: value for field, value in entry.items() if field != 'id'}
+        return results
+    
     def _parse_llm_response(self, llm_result: Dict, price: float, 
                            expected_product_type: str) -> FilterDecision:
         """Parse LLM response into FilterDecision"""
@@ -285,7 +572,8 @@ Japanese/Korean products should be flagged unless specifically looking for those
 
 # Integration function for existing PokeQuant system
 def apply_llm_enhanced_filtering(price_data: List[Dict], product_info: Dict, 
-                                verbose: bool = False) -> Dict[str, Any]:
+                                verbose: bool = False,
+                                pre_classifier: Optional[ListingPreClassifier] = None) -> Dict[str, Any]:
     """
     Apply LLM-enhanced filtering to price data
     
@@ -293,6 +581,8 @@ def apply_llm_enhanced_filtering(price_data: List[Dict], product_info: Dict,
         price_data: List of price data points with titles/descriptions
         product_info: Product information
         verbose: Whether to print detailed output
+        pre_classifier: Long-lived local tier (and its decision cache) to reuse across calls;
+                        built from data/llm_decision_cache.jsonl when not given
     """
     
     # Check if LLM filtering is enabled and API key is available
@@ -320,8 +610,10 @@ def apply_llm_enhanced_filtering(price_data: List[Dict], product_info: Dict,
     if verbose:
         print(f"   🤖 Applying LLM filtering for product type: {expected_type}")
     
-    # Initialize LLM filter
-    llm_filter = LLMEnhancedFilter()
+    # Initialize LLM filter, with a local tier trained on its past decisions in front of it
+    if pre_classifier is None:
+        pre_classifier = ListingPreClassifier(decision_cache=LLMDecisionCache())
+    llm_filter = LLMEnhancedFilter(decision_cache=pre_classifier.decision_cache, pre_classifier=pre_classifier)
     
     # Convert price data to format expected by LLM filter
     listings = []
@@ -341,13 +633,15 @@ def apply_llm_enhanced_filtering(price_data: List[Dict], product_info: Dict,
         })
     
     # Apply LLM filtering
-    llm_results = llm_filter.batch_filter_listings(listings, expected_type, max_concurrent=3)
+    llm_results = llm_filter.batch_filter_listings(listings, expected_type, max_concurrent=3,
+                                                   listings_per_prompt=LISTINGS_PER_PROMPT)
     
     if verbose:
         summary = llm_results['analysis_summary']
         print(f"   📊 LLM Analysis: {summary.get('kept_count', 0)} kept, "
               f"{summary.get('removed_count', 0)} removed, "
-              f"{summary.get('flagged_count', 0)} flagged")
+              f"{summary.get('flagged_count', 0)} flagged "
+              f"({llm_results['pre_classified']} decided locally, {llm_results['api_calls']} API calls)")
         
         if summary.get('languages_detected'):
             print(f"   🌍 Languages: {summary['languages_detected']}")
@@ -6,9 +6,11 @@ Complete end-to-end flow: Product Input → Freshness Check → Scraping → Ana
 
 import sys
 import os
+import time
 import argparse
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple, Union
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,39 +18,74 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from supabase_client import supabase
 from quant.freshness_checker import DataFreshnessChecker
 from quant.price_data_service import PriceDataService
-from quant.enhanced_outlier_filter import apply_enhanced_filtering
+from quant.price_series_cache import PriceSeriesCache
+from quant.enhanced_outlier_filter import apply_enhanced_filtering, FILTER_VERSION
+from quant.stage_pipeline import Stage, StagePipeline, StopPipeline
+from quant.analysis_cache import AnalysisResultCache, analysis_fingerprint
 
 # Optional LLM-enhanced filtering
 try:
-    from quant.llm_enhanced_filter import apply_llm_enhanced_filtering
+    from quant.llm_enhanced_filter import apply_llm_enhanced_filtering, PROMPT_VERSION as LLM_PROMPT_VERSION
     LLM_FILTERING_AVAILABLE = True
 except ImportError:
     LLM_FILTERING_AVAILABLE = False
     apply_llm_enhanced_filtering = None
+    LLM_PROMPT_VERSION = None
 
 # Import existing scrapers
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ebay-scraper'))
 from ebay_search import eBaySearcher
 from ebay_parser import eBayParser
+from parse_executor import ParallelPageParser
 from ebay_to_supabase import eBaySupabaseUploader
 from pricecharting_scraper import PriceChartingScraper
+from refresh_scheduler import record_product_demand
+from product_name_index import ProductNameIndex
+
+# Source table and name column for each product type
+PRODUCT_TABLES = {
+    'card': ('pokemon_cards', 'card_name'),
+    'sealed': ('sealed_products', 'product_name'),
+}
+
+# Bump whenever metrics or recommendation logic changes so stored analyses are recomputed
+ANALYSIS_VERSION = '1.0'
 
 class PokeQuantOrchestrator:
     """Main PokeQuant orchestrator - complete product analysis pipeline"""
     
-    def __init__(self, max_age_days: int = 7, analysis_cache_hours: int = 24, use_llm: bool = False):
+    def __init__(self, max_age_days: int = 7, analysis_cache_hours: Optional[int] = 24, use_llm: bool = False,
+                 parse_workers: Optional[int] = None):
         self.max_age_days = max_age_days
         self.analysis_cache_hours = analysis_cache_hours
         self._use_llm_flag = use_llm
         self.supabase = supabase
-        self.freshness_checker = DataFreshnessChecker(max_age_days)
-        self.price_data_service = PriceDataService()
+        # Card / sealed names resolved in memory instead of with ilike scans
+        self.name_index = ProductNameIndex(self.supabase)
+        self.freshness_checker = DataFreshnessChecker(max_age_days, name_index=self.name_index)
+        # Local price series cache - repeated reads only fetch rows newer than each product's watermark
+        self.price_data_service = PriceDataService(price_cache=PriceSeriesCache())
+        # Stored analyses reused until their price data, filter, metrics or prompt version changes,
+        # or they are older than analysis_cache_hours
+        self.analysis_cache = AnalysisResultCache(self.supabase, max_age_hours=analysis_cache_hours)
         
         # Initialize scrapers
         self.ebay_searcher = eBaySearcher()
         self.ebay_parser = eBayParser()
+        self.page_parser = ParallelPageParser(max_workers=parse_workers)
         self.ebay_uploader = eBaySupabaseUploader()
         self.pricecharting_scraper = PriceChartingScraper()
+    
+    def close(self):
+        """Stop the parse worker processes (the orchestrator can't scrape eBay afterwards)"""
+        self.page_parser.shutdown()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
         
     def analyze_product(self, product_name: str, force_refresh: bool = False, force_analysis: bool = False) -> Dict[str, Any]:
         """
@@ -76,95 +113,326 @@ class PokeQuantOrchestrator:
         }
         
         try:
-            # Stage 1: Find and identify the product
+            run = StagePipeline(self._analysis_stages(product_name, force_refresh, force_analysis)).run()
+            outputs = run.outputs
+            
+            result['stages'] = {name: output for name, output in run.timed_outputs().items() if name != 'final_analysis'}
+            result['wall_time_seconds'] = round(run.wall_time, 3)
+            
+            if run.stopped_by == 'product_identification':
+                result['error'] = f"Product '{product_name}' not found in database"
+            elif run.stopped_by == 'cached_analysis':
+                result['used_cached_analysis'] = True
+                result['success'] = True
+                result['final_analysis'] = outputs['cached_analysis']['analysis']
+            elif run.stopped_by == 'data_preparation':
+                result['error'] = "Insufficient data for analysis"
+            else:
+                result['final_analysis'] = outputs['final_analysis']
+                result['success'] = True
+                print(f"\n🎉 Analysis Complete for {product_name}!")
+            
+        except Exception as e:
+            print(f"\n❌ Analysis failed: {e}")
+            result['error'] = str(e)
+        
+        return result
+    
+    def _analysis_stages(self, product_name: str, force_refresh: bool, force_analysis: bool) -> List[Stage]:
+        """
+        analyze_product as a stage DAG
+        
+        The freshness check runs alongside product identification, and eBay and
+        PriceCharting collection run alongside each other; everything else follows
+        its inputs. A stored analysis is only reused when the freshness check finds
+        the data fresh, since stale data is about to be re-scraped.
+        """
+        
+        def identify(outputs):
             print("\n📍 Stage 1: Product Identification")
             product_info = self._find_product(product_name)
-            result['stages']['product_identification'] = product_info
-            
             if not product_info['found']:
-                result['error'] = f"Product '{product_name}' not found in database"
-                return result
+                raise StopPipeline('not_found', product_info)
             
+            # Products people ask about get refreshed sooner by the scrape scheduler
+            record_product_demand(product_info['product']['type'], product_info['product']['id'])
+            return product_info
+        
+        def check_freshness(outputs):
+            print("\n📅 Stage 2: Data Freshness Check")
+            return self.freshness_checker.check_product_freshness(product_name)
+        
+        def register(outputs):
             # Get or create the pokequant_product_id early
-            product = product_info['product']
+            product = outputs['product_identification']['product']
             pokequant_product_id = self.price_data_service.ensure_product_exists(
                 product['type'], product['id'], product['name'], product.get('set_name')
             )
-            
-            # Stage 1.5: Check for cached analysis (NEW)
-            if not force_analysis:
-                print("\n🔍 Stage 1.5: Checking for Cached Analysis")
-                cached_analysis = self._check_cached_analysis(pokequant_product_id)
-                if cached_analysis:
-                    print(f"   ✅ Using cached analysis from {cached_analysis['analysis_metadata']['analysis_date']}")
-                    result['used_cached_analysis'] = True
-                    result['success'] = True
-                    result['final_analysis'] = cached_analysis
-                    return result
-                else:
-                    print("   💾 No recent cached analysis found, proceeding with full analysis")
-            
-            # Stage 2: Check data freshness
-            print("\n📅 Stage 2: Data Freshness Check")
-            freshness_info = self.freshness_checker.check_product_freshness(product_name)
-            result['stages']['freshness_check'] = freshness_info
-            
-            # Stage 3: Data collection (if needed)
-            if force_refresh or not freshness_info['is_fresh']:
-                print("\n🔄 Stage 3: Data Collection")
-                collection_result = self._collect_fresh_data(product_info, freshness_info)
-                result['stages']['data_collection'] = collection_result
-            else:
+            return {'pokequant_product_id': pokequant_product_id}
+        
+        def needs_collection(outputs):
+            return force_refresh or not outputs['freshness_check']['is_fresh']
+        
+        def check_cache(outputs):
+            print("\n🔍 Stage 1.5: Checking for Cached Analysis")
+            if needs_collection(outputs):
+                # A stored analysis only reflects the data collected so far; stale data is scraped first
+                print("   🔄 Data is stale, collecting before analysis")
+                return {'status': 'skipped', 'reason': 'data_is_stale'}
+            pokequant_product_id = outputs['product_registration']['pokequant_product_id']
+            fingerprint = self._analysis_input_fingerprint(pokequant_product_id)
+            cached_analysis = self._check_cached_analysis(pokequant_product_id, outputs['product_identification']['product'],
+                                                          fingerprint)
+            if cached_analysis:
+                print(f"   ✅ Using cached analysis from {cached_analysis['analysis_metadata']['analysis_date']}")
+                raise StopPipeline('cached_analysis', {'status': 'hit', 'analysis': cached_analysis})
+            print("   💾 No cached analysis for the current inputs, proceeding with full analysis")
+            return {'status': 'miss', 'input_fingerprint': fingerprint}
+        
+        def collects(*actions):
+            return lambda outputs: needs_collection(outputs) and outputs['freshness_check'].get('recommended_action', 'scrape_both') in actions
+        
+        def collect_ebay(outputs):
+            print("\n🔄 Stage 3a: eBay Data Collection")
+            return self._collect_ebay_data(outputs['product_identification']['product'])
+        
+        def collect_pricecharting(outputs):
+            print("\n🔄 Stage 3b: PriceCharting Data Collection")
+            return self._collect_pricecharting_data(outputs['product_identification']['product'])
+        
+        def merge_collection(outputs):
+            if not needs_collection(outputs):
                 print("\n✅ Stage 3: Using cached data (fresh enough)")
-                result['stages']['data_collection'] = {'status': 'skipped', 'reason': 'data_is_fresh'}
-            
-            # Stage 4: Load and prepare data for analysis
+                return {'status': 'skipped', 'reason': 'data_is_fresh'}
+            return self._merge_collection_results(outputs['freshness_check'], outputs['ebay_collection'],
+                                                  outputs['pricecharting_collection'])
+        
+        def prepare(outputs):
             print("\n📊 Stage 4: Data Preparation")
-            analysis_data = self._prepare_analysis_data(product_info)
-            result['stages']['data_preparation'] = analysis_data
-            
+            pokequant_product_id = outputs['product_registration']['pokequant_product_id']
+            fingerprint = outputs['cached_analysis'].get('input_fingerprint')
+            if fingerprint is None or outputs['data_collection'].get('status') != 'skipped':
+                # Taken before the series is loaded, so data written meanwhile invalidates this result
+                fingerprint = self._analysis_input_fingerprint(pokequant_product_id)
+            analysis_data = self._prepare_analysis_data(outputs['product_identification'], pokequant_product_id)
             if not analysis_data['success']:
-                result['error'] = "Insufficient data for analysis"
-                return result
-            
-            # Stage 5: Quantitative analysis
+                raise StopPipeline('insufficient_data', analysis_data)
+            analysis_data['input_fingerprint'] = fingerprint
+            return analysis_data
+        
+        def analyze(outputs):
             print("\n🧮 Stage 5: Quantitative Analysis")
-            analysis_results = self._perform_quantitative_analysis(analysis_data)
-            result['stages']['quantitative_analysis'] = analysis_results
-            
-            # Stage 6: Generate recommendations
+            return self._perform_quantitative_analysis(outputs['data_preparation'])
+        
+        def recommend(outputs):
             print("\n💡 Stage 6: Investment Recommendation")
-            recommendation = self._generate_recommendation(analysis_results)
-            result['stages']['recommendation'] = recommendation
-            
-            # Compile final results
-            final_analysis = {
-                'product': product_info,
-                'data_summary': analysis_data.get('summary', {}),
-                'metrics': analysis_results.get('metrics', {}),
-                'recommendation': recommendation,
-                'analysis_metadata': {
-                    'pokequant_product_id': pokequant_product_id,
-                    'analysis_date': datetime.now().isoformat(),
-                    'data_range': analysis_data.get('summary', {}).get('date_range', {}),
-                    'total_data_points': analysis_data.get('summary', {}).get('total_data_points', 0)
-                }
+            return self._generate_recommendation(outputs['quantitative_analysis'])
+        
+        def compile_analysis(outputs):
+            return self._compile_final_analysis(outputs['product_identification'],
+                                                outputs['product_registration']['pokequant_product_id'],
+                                                outputs['data_preparation'], outputs['quantitative_analysis'],
+                                                outputs['recommendation'])
+        
+        def store(outputs):
+            print("\n💾 Stage 7: Storing Analysis Results")
+            stored = self._store_analysis_results(outputs['product_registration']['pokequant_product_id'],
+                                                  outputs['final_analysis'])
+            return {'success': stored}
+        
+        return [
+            Stage('product_identification', identify),
+            Stage('freshness_check', check_freshness),
+            Stage('product_registration', register, ('product_identification',)),
+            Stage('cached_analysis', check_cache, ('product_registration', 'freshness_check'),
+                  when=lambda outputs: not force_analysis, skipped={'status': 'skipped', 'reason': 'force_analysis'}),
+            Stage('ebay_collection', collect_ebay, ('cached_analysis', 'freshness_check'),
+                  when=collects('scrape_both', 'scrape_ebay_only'), skipped={'ebay_scraping': {'status': 'skipped'}}),
+            Stage('pricecharting_collection', collect_pricecharting, ('cached_analysis', 'freshness_check'),
+                  when=collects('scrape_both', 'scrape_pricecharting_only'), skipped={'pricecharting_scraping': {'status': 'skipped'}}),
+            Stage('data_collection', merge_collection, ('ebay_collection', 'pricecharting_collection')),
+            Stage('data_preparation', prepare, ('data_collection',)),
+            Stage('quantitative_analysis', analyze, ('data_preparation',)),
+            Stage('recommendation', recommend, ('quantitative_analysis',)),
+            Stage('final_analysis', compile_analysis, ('recommendation',)),
+            Stage('storage', store, ('final_analysis',)),
+        ]
+    
+    def analyze_products(self, products: List[Union[str, Tuple[str, Any]]], force_analysis: bool = False,
+                         max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Batch analysis pipeline for a watchlist, built for nightly runs
+        
+        Works from the price series already collected (no scraping). Products are
+        resolved, registered and checked for cached analyses in bulk, all price series
+        are prefetched in a few in_() queries, filtering and metrics run in a thread
+        pool, and fresh results are written to pokequant_analyses in batched inserts.
+        
+        Args:
+            products: Product names and/or ('card' | 'sealed', product_id) pairs
+            force_analysis: Re-analyze even products with a cached analysis
+            max_workers: Analysis threads (None = executor default, 0 or 1 = inline)
+            
+        Returns:
+            Batch summary with one analyze_product-style result per product
+        """
+        
+        started = time.monotonic()
+        queries = list(dict.fromkeys(query if isinstance(query, str) else (query[0], str(query[1])) for query in products))
+        
+        print(f"🚀 PokeQuant Batch Analysis: {len(queries)} products")
+        print("=" * 60)
+        
+        results = {
+            query: {
+                'product_name': query if isinstance(query, str) else f"{query[0]}:{query[1]}",
+                'timestamp': datetime.now().isoformat(),
+                'success': False,
+                'stages': {},
+                'final_analysis': {},
+                'used_cached_analysis': False
             }
+            for query in queries
+        }
+        
+        # Stage 1: Resolve every product and its PokeQuant ID in bulk
+        print("\n📍 Stage 1: Product Identification")
+        product_infos = self._find_products(queries)
+        for query, product_info in product_infos.items():
+            results[query]['stages']['product_identification'] = product_info
+            if not product_info['found']:
+                results[query]['error'] = f"Product '{results[query]['product_name']}' not found in database"
+        
+        found = {query: info['product'] for query, info in product_infos.items() if info['found']}
+        product_ids = self.price_data_service.ensure_products_exist(list(found.values()))
+        pokequant_ids = {}
+        for query, product in found.items():
+            pokequant_product_id = product_ids.get((product['type'], product['id']))
+            if pokequant_product_id:
+                pokequant_ids[query] = pokequant_product_id
+            else:
+                results[query]['error'] = 'Failed to create PokeQuant product entry'
+        print(f"   ✅ Resolved {len(pokequant_ids)}/{len(queries)} products")
+        
+        # Stage 2: Input fingerprints, then cached analyses in one pass
+        fingerprints = self._analysis_input_fingerprints(list(set(pokequant_ids.values())))
+        if not force_analysis:
+            print("\n🔍 Stage 2: Checking for Cached Analyses")
+            cached_rows = self._check_cached_analyses(list(set(fingerprints.values())))
+            for query, pokequant_product_id in list(pokequant_ids.items()):
+                row = cached_rows.get(fingerprints.get(pokequant_product_id))
+                cached_analysis = self._format_cached_analysis(pokequant_product_id, row, found[query]) if row else None
+                if cached_analysis:
+                    results[query].update({'success': True, 'used_cached_analysis': True, 'final_analysis': cached_analysis})
+                    del pokequant_ids[query]
+            cached_count = sum(1 for result in results.values() if result['used_cached_analysis'])
+            print(f"   💾 {cached_count} cached, {len(pokequant_ids)} to analyze")
+        
+        # Stage 3: Prefetch every price series
+        print("\n📊 Stage 3: Loading Price Series")
+        series = self.price_data_service.get_price_series_bulk(list(set(pokequant_ids.values())))
+        
+        # Aggregation writes shared state (watermark file, price cache), so products without
+        # a series are aggregated one at a time here rather than inside the thread pool
+        for pokequant_product_id, query in {pokequant_product_id: query for query, pokequant_product_id in pokequant_ids.items()}.items():
+            if not series[pokequant_product_id]['success']:
+                series[pokequant_product_id] = self._aggregate_missing_series(found[query], pokequant_product_id)
+        
+        # Stage 4: Filtering, metrics and recommendations in parallel
+        print("\n🧮 Stage 4: Quantitative Analysis")
+        
+        def analyze(query):
+            pokequant_product_id = pokequant_ids[query]
+            return query, self._analyze_prefetched(product_infos[query], pokequant_product_id, series[pokequant_product_id],
+                                                   fingerprints.get(pokequant_product_id))
+        
+        if max_workers is not None and max_workers <= 1:
+            analyzed = [analyze(query) for query in pokequant_ids]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                analyzed = list(executor.map(analyze, pokequant_ids))
+        
+        to_store = []
+        queued_ids = set()  # A product named twice in the watchlist is stored once
+        for query, outcome in analyzed:
+            results[query]['stages'].update(outcome['stages'])
+            if outcome.get('final_analysis'):
+                results[query]['success'] = True
+                results[query]['final_analysis'] = outcome['final_analysis']
+                if pokequant_ids[query] not in queued_ids:
+                    queued_ids.add(pokequant_ids[query])
+                    to_store.append((pokequant_ids[query], outcome['final_analysis']))
+            else:
+                results[query]['error'] = outcome['error']
+        
+        # Stage 5: Store fresh results in batches
+        print("\n💾 Stage 5: Storing Analysis Results")
+        stored = self._store_analysis_results_bulk(to_store) if to_store else 0
+        print(f"   ✅ Stored {stored}/{len(to_store)} analyses")
+        
+        batch = {
+            'timestamp': datetime.now().isoformat(),
+            'total': len(queries),
+            'analyzed': len(to_store),
+            'cached': sum(1 for result in results.values() if result['used_cached_analysis']),
+            'not_found': sum(1 for info in product_infos.values() if not info['found']),
+            'failed': sum(1 for result in results.values() if not result['success']),
+            'stored': stored,
+            'elapsed_seconds': round(time.monotonic() - started, 2),
+            'results': [results[query] for query in queries]
+        }
+        
+        print(f"\n🎉 Batch complete: {batch['analyzed']} analyzed, {batch['cached']} cached, "
+              f"{batch['failed']} failed in {batch['elapsed_seconds']}s")
+        
+        return batch
+    
+    def _analyze_prefetched(self, product_info: Dict, pokequant_product_id: str,
+                            price_series_result: Dict[str, Any], input_fingerprint: str = None) -> Dict[str, Any]:
+        """Stages 4-6 of analyze_product on an already loaded price series (thread pool worker)"""
+        
+        stages = {}
+        try:
+            analysis_data = self._prepare_analysis_data(product_info, pokequant_product_id, price_series_result,
+                                                        aggregate_missing=False)
+            stages['data_preparation'] = analysis_data
+            if not analysis_data['success']:
+                return {'stages': stages, 'error': 'Insufficient data for analysis'}
+            analysis_data['input_fingerprint'] = input_fingerprint
             
-            result['final_analysis'] = final_analysis
-            result['success'] = True
+            analysis_results = self._perform_quantitative_analysis(analysis_data)
+            stages['quantitative_analysis'] = analysis_results
             
-            # Stage 7: Store analysis results (NEW)
-            print("\n💾 Stage 7: Storing Analysis Results")
-            self._store_analysis_results(pokequant_product_id, final_analysis)
+            recommendation = self._generate_recommendation(analysis_results)
+            stages['recommendation'] = recommendation
             
-            print(f"\n🎉 Analysis Complete for {product_name}!")
+            final_analysis = self._compile_final_analysis(product_info, pokequant_product_id, analysis_data,
+                                                          analysis_results, recommendation)
+            return {'stages': stages, 'final_analysis': final_analysis}
             
         except Exception as e:
-            print(f"\n❌ Analysis failed: {e}")
-            result['error'] = str(e)
+            print(f"   ❌ Analysis failed for {product_info['product']['display_name']}: {e}")
+            return {'stages': stages, 'error': str(e)}
+    
+    @staticmethod
+    def _compile_final_analysis(product_info: Dict, pokequant_product_id: str, analysis_data: Dict[str, Any],
+                                analysis_results: Dict[str, Any], recommendation: Dict[str, Any]) -> Dict[str, Any]:
+        """Assemble the final_analysis stored and returned for a product"""
         
-        return result
+        return {
+            'product': product_info,
+            'data_summary': analysis_data.get('summary', {}),
+            'metrics': analysis_results.get('metrics', {}),
+            'recommendation': recommendation,
+            'analysis_metadata': {
+                'pokequant_product_id': pokequant_product_id,
+                'analysis_date': datetime.now().isoformat(),
+                'data_range': analysis_data.get('summary', {}).get('date_range', {}),
+                'total_data_points': analysis_data.get('summary', {}).get('total_data_points', 0),
+                'analysis_version': ANALYSIS_VERSION,
+                'input_fingerprint': analysis_data.get('input_fingerprint')
+            }
+        }
     
     def _find_product(self, product_name: str) -> Dict[str, Any]:
         """Find and identify a product in the database"""
@@ -174,16 +442,14 @@ class PokeQuantOrchestrator:
         # Search in pokemon_cards
         card_results = []
         try:
-            card_query = self.supabase.table('pokemon_cards').select('*').ilike('card_name', f'%{product_name}%').limit(5).execute()
-            card_results = card_query.data
+            card_results = self.name_index.search(product_name, 'card', limit=5)
         except Exception as e:
             print(f"   ⚠️ Error searching cards: {e}")
         
         # Search in sealed_products
         sealed_results = []
         try:
-            sealed_query = self.supabase.table('sealed_products').select('*').ilike('product_name', f'%{product_name}%').limit(5).execute()
-            sealed_results = sealed_query.data
+            sealed_results = self.name_index.search(product_name, 'sealed', limit=5)
         except Exception as e:
             print(f"   ⚠️ Error searching sealed products: {e}")
         
@@ -191,24 +457,10 @@ class PokeQuantOrchestrator:
         all_results = []
         
         for card in card_results:
-            all_results.append({
-                'type': 'card',
-                'id': str(card['id']),
-                'name': card['card_name'],
-                'set_name': card.get('set_name', ''),
-                'display_name': f"{card['card_name']} - {card.get('set_name', 'Unknown Set')}",
-                'raw_data': card
-            })
+            all_results.append(self._format_product_match('card', card))
         
         for product in sealed_results:
-            all_results.append({
-                'type': 'sealed',
-                'id': str(product['id']),
-                'name': product['product_name'],
-                'set_name': product.get('set_name', ''),
-                'display_name': f"{product['product_name']}",
-                'raw_data': product
-            })
+            all_results.append(self._format_product_match('sealed', product))
         
         if all_results:
             # For now, return the first match
@@ -231,55 +483,124 @@ class PokeQuantOrchestrator:
                 'match_count': 0
             }
     
-    def _collect_fresh_data(self, product_info: Dict, freshness_info: Dict) -> Dict[str, Any]:
-        """Collect fresh data using existing scrapers"""
+    @staticmethod
+    def _format_product_match(product_type: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        """A pokemon_cards / sealed_products row in the shape _find_product returns"""
         
-        product = product_info['product']
-        product_type = product['type']
-        product_id = product['id']
+        if product_type == 'card':
+            return {
+                'type': 'card',
+                'id': str(row['id']),
+                'name': row['card_name'],
+                'set_name': row.get('set_name', ''),
+                'display_name': f"{row['card_name']} - {row.get('set_name', 'Unknown Set')}",
+                'raw_data': row
+            }
+        
+        return {
+            'type': 'sealed',
+            'id': str(row['id']),
+            'name': row['product_name'],
+            'set_name': row.get('set_name', ''),
+            'display_name': f"{row['product_name']}",
+            'raw_data': row
+        }
+    
+    def _find_products(self, queries: List[Any], chunk_size: int = 200) -> Dict[Any, Dict[str, Any]]:
+        """
+        Bulk _find_product for a batch of product names and (product_type, product_id) pairs
+        
+        Names are resolved locally through the product name index; IDs are fetched with
+        one in_() query per table and chunk.
+        
+        Args:
+            queries: Product names and (product_type, product_id) pairs with string IDs
+            chunk_size: IDs per in_() request
+            
+        Returns:
+            Dict of query -> _find_product result
+        """
+        
+        found = {query: self._find_product(query) for query in queries if isinstance(query, str)}
+        
+        ids = {product_type: [] for product_type in PRODUCT_TABLES}
+        for query in queries:
+            if not isinstance(query, str):
+                ids[query[0]].append(query[1])
+        
+        rows_by_key = {}
+        for product_type, (table, _) in PRODUCT_TABLES.items():
+            for i in range(0, len(ids[product_type]), chunk_size):
+                try:
+                    rows = self.supabase.table(table).select('*').in_('id', ids[product_type][i:i + chunk_size]).execute().data or []
+                except Exception as e:
+                    print(f"   ⚠️ Error looking up {table}: {e}")
+                    continue
+                for row in rows:
+                    rows_by_key[(product_type, str(row['id']))] = self._format_product_match(product_type, row)
+        
+        for query in queries:
+            if not isinstance(query, str):
+                match = rows_by_key.get(query)
+                found[query] = {
+                    'found': match is not None,
+                    'product': match,
+                    'all_matches': [match] if match else [],
+                    'match_count': 1 if match else 0
+                }
+        
+        return found
+    
+    def _collect_ebay_data(self, product: Dict[str, Any]) -> Dict[str, Any]:
+        """Scrape eBay and aggregate the listings into PokeQuant price series"""
+        
+        print("   📈 Scraping eBay data...")
+        ebay_result = self._scrape_ebay_data(product['type'], product['id'], product['name'])
+        collection = {'ebay_scraping': ebay_result}
+        
+        # Aggregate eBay data into PokeQuant price series
+        if ebay_result.get('status') == 'success':
+            print("   📊 Aggregating eBay data...")
+            collection['ebay_aggregation'] = self.price_data_service.aggregate_ebay_data(
+                product['type'], product['id'], product['name'], product.get('set_name'), incremental=True
+            )
+        
+        return collection
+    
+    def _collect_pricecharting_data(self, product: Dict[str, Any]) -> Dict[str, Any]:
+        """Scrape PriceCharting and aggregate its history into PokeQuant price series"""
+        
+        print("   💰 Scraping PriceCharting data...")
+        pc_result = self._scrape_pricecharting_data(product['type'], product['id'], product['name'])
+        collection = {'pricecharting_scraping': pc_result}
+        
+        # Aggregate PriceCharting data into PokeQuant price series
+        if pc_result.get('status') == 'success':
+            print("   📊 Aggregating PriceCharting data...")
+            collection['pricecharting_aggregation'] = self.price_data_service.aggregate_pricecharting_data(
+                product['type'], product['id'], product['name'], pc_result['pc_data'], product.get('set_name')
+            )
         
-        print(f"   🔄 Collecting fresh data for {product['display_name']}")
+        return collection
+    
+    @staticmethod
+    def _merge_collection_results(freshness_info: Dict, ebay: Optional[Dict[str, Any]],
+                                  pricecharting: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine the per-source collection results into one data_collection stage result"""
         
         collection_result = {
             'ebay_scraping': {'status': 'skipped'},
             'pricecharting_scraping': {'status': 'skipped'},
             'success': False
         }
-        
-        # Determine what needs scraping
-        action = freshness_info.get('recommended_action', 'scrape_both')
-        
-        if action in ['scrape_both', 'scrape_ebay_only']:
-            print("   📈 Scraping eBay data...")
-            ebay_result = self._scrape_ebay_data(product_type, product_id, product['name'])
-            collection_result['ebay_scraping'] = ebay_result
-            
-            # Aggregate eBay data into PokeQuant price series
-            if ebay_result.get('status') == 'success':
-                print("   📊 Aggregating eBay data...")
-                agg_result = self.price_data_service.aggregate_ebay_data(
-                    product_type, product_id, product['name'], product.get('set_name')
-                )
-                collection_result['ebay_aggregation'] = agg_result
-        
-        if action in ['scrape_both', 'scrape_pricecharting_only']:
-            print("   💰 Scraping PriceCharting data...")
-            pc_result = self._scrape_pricecharting_data(product_type, product_id, product['name'])
-            collection_result['pricecharting_scraping'] = pc_result
-            
-            # Aggregate PriceCharting data into PokeQuant price series
-            if pc_result.get('status') == 'success':
-                print("   📊 Aggregating PriceCharting data...")
-                agg_result = self.price_data_service.aggregate_pricecharting_data(
-                    product_type, product_id, product['name'], pc_result['pc_data'], product.get('set_name')
-                )
-                collection_result['pricecharting_aggregation'] = agg_result
+        collection_result.update(ebay or {})
+        collection_result.update(pricecharting or {})
         
         # Check if any scraping was successful
         ebay_success = collection_result['ebay_scraping'].get('status') == 'success'
         pc_success = collection_result['pricecharting_scraping'].get('status') == 'success'
         
-        collection_result['success'] = ebay_success or pc_success or action == 'use_cache'
+        collection_result['success'] = ebay_success or pc_success or freshness_info.get('recommended_action') == 'use_cache'
         
         return collection_result
     
@@ -289,16 +610,20 @@ class PokeQuantOrchestrator:
         try:
             # Search eBay for the product
             search_terms = product_name
-            html_pages = self.ebay_searcher.search_sold_listings(search_terms, max_pages=3)
+            # Each page goes to the parse workers as soon as it arrives, while later pages download
+            pending_parse = self.page_parser.start(product_name, product_type == 'sealed')
+            html_pages = self.ebay_searcher.search_sold_listings(search_terms, max_pages=3, on_page=pending_parse.add)
             
             if not html_pages:
                 return {'status': 'failed', 'error': 'No eBay pages retrieved'}
             
-            # Parse the HTML
+            # Collect the parsed pages (results stay in page order)
             all_listings = []
-            for html in html_pages:
-                listings = self.ebay_parser.parse_listing_html(html, product_name, product_type == 'sealed')
-                all_listings.extend(listings)
+            for page_result in pending_parse.results():
+                if page_result.success:
+                    all_listings.extend(page_result.listings)
+                else:
+                    print(f"   ⚠️ Parse error page {page_result.page_num}: {page_result.error}")
             
             if not all_listings:
                 return {'status': 'failed', 'error': 'No listings parsed from eBay'}
@@ -325,13 +650,10 @@ class PokeQuantOrchestrator:
         """Scrape PriceCharting data for a product"""
         
         try:
-            print(f"   🔍 Searching PriceCharting for: {product_name}")
+            print(f"   🔍 Resolving PriceCharting page for: {product_name}")
             
-            # Search for the product on PriceCharting
-            if product_type == 'card':
-                pc_url = self.pricecharting_scraper.search_card_on_pricecharting(product_name)
-            else:  # sealed
-                pc_url = self.pricecharting_scraper.search_sealed_product_on_pricecharting(product_name)
+            # URL index first, fuzzy search only for products it doesn't know yet
+            pc_url = self.pricecharting_scraper.resolve_product_url(product_type, product_id, product_name)
             
             if not pc_url:
                 return {
@@ -341,8 +663,9 @@ class PokeQuantOrchestrator:
             
             print(f"   📈 Scraping price history from: {pc_url}")
             
-            # Scrape historical price data
-            pc_data = self.pricecharting_scraper.scrape_price_history(pc_url)
+            # Scrape historical price data (re-resolves once if the indexed page has gone)
+            pc_data = self.pricecharting_scraper.scrape_product(product_type, product_id, product_name)
+            pc_url = pc_data.get('url', pc_url)
             
             if not pc_data or not pc_data.get('historical_chart_data'):
                 return {
@@ -366,8 +689,30 @@ class PokeQuantOrchestrator:
                 'error': str(e)
             }
     
-    def _prepare_analysis_data(self, product_info: Dict) -> Dict[str, Any]:
-        """Load and prepare data for quantitative analysis from pokequant_price_series"""
+    def _aggregate_missing_series(self, product: Dict, pokequant_product_id: str) -> Dict[str, Any]:
+        """Fallback for a product without aggregated points: aggregate its raw eBay listings, then reload"""
+        
+        print("   🔄 No aggregated data found, attempting to aggregate existing data...")
+        ebay_agg = self.price_data_service.aggregate_ebay_data(
+            product['type'], product['id'], product['name'], product.get('set_name')
+        )
+        
+        if not ebay_agg['success']:
+            return {'success': False, 'error': 'No price data available for analysis'}
+        return self.price_data_service.get_price_series(pokequant_product_id)
+    
+    def _prepare_analysis_data(self, product_info: Dict, pokequant_product_id: str = None,
+                               price_series_result: Dict[str, Any] = None, aggregate_missing: bool = True) -> Dict[str, Any]:
+        """
+        Load and prepare data for quantitative analysis from pokequant_price_series
+        
+        Args:
+            product_info: _find_product result
+            pokequant_product_id: Already resolved PokeQuant product (looked up if not given)
+            price_series_result: Prefetched get_price_series result (loaded if not given)
+            aggregate_missing: Aggregate raw listings when there is no price series (the batch
+                pipeline does this up front, outside its thread pool)
+        """
         
         product = product_info['product']
         product_type = product['type']
@@ -377,9 +722,10 @@ class PokeQuantOrchestrator:
         
         try:
             # First, get or create the pokequant_product_id
-            pokequant_product_id = self.price_data_service.ensure_product_exists(
-                product_type, product_id, product['name'], product.get('set_name')
-            )
+            if not pokequant_product_id:
+                pokequant_product_id = self.price_data_service.ensure_product_exists(
+                    product_type, product_id, product['name'], product.get('set_name')
+                )
             
             if not pokequant_product_id:
                 return {
@@ -388,25 +734,17 @@ class PokeQuantOrchestrator:
                 }
             
             # Load aggregated price series data from PokeQuant tables
-            price_series_result = self.price_data_service.get_price_series(pokequant_product_id)
+            if price_series_result is None:
+                price_series_result = self.price_data_service.get_price_series(pokequant_product_id)
+            
+            if not price_series_result['success'] and aggregate_missing:
+                price_series_result = self._aggregate_missing_series(product, pokequant_product_id)
             
             if not price_series_result['success']:
-                # Fallback: try to aggregate existing raw data
-                print("   🔄 No aggregated data found, attempting to aggregate existing data...")
-                
-                ebay_agg = self.price_data_service.aggregate_ebay_data(
-                    product_type, product_id, product['name'], product.get('set_name')
-                )
-                
-                if ebay_agg['success']:
-                    # Retry loading price series
-                    price_series_result = self.price_data_service.get_price_series(pokequant_product_id)
-                
-                if not price_series_result['success']:
-                    return {
-                        'success': False,
-                        'error': 'No price data available for analysis'
-                    }
+                return {
+                    'success': False,
+                    'error': 'No price data available for analysis'
+                }
             
             # Extract price data for analysis
             price_data = price_series_result['raw_data']
@@ -435,18 +773,13 @@ class PokeQuantOrchestrator:
             # Extract the actual product info from the nested structure
             actual_product_info = product_info['product'] if 'product' in product_info else product_info
             
-            # Check if LLM filtering is enabled (via env var or CLI flag)
-            use_llm = (LLM_FILTERING_AVAILABLE and 
-                      os.getenv('OPENAI_API_KEY') and 
-                      (os.getenv('POKEQUANT_USE_LLM', 'false').lower() == 'true' or 
-                       getattr(self, '_use_llm_flag', False)))
-            
-            if use_llm:
+            if self._use_llm_filtering():
                 print(f"   🤖 Using LLM-enhanced filtering...")
                 filtered_data = apply_llm_enhanced_filtering(
                     raw_data_with_titles,
                     actual_product_info,
-                    verbose=False
+                    verbose=False,
+                    pre_classifier=self.price_data_service.llm_pre_classifier()  # Shared, not retrained per product
                 )
             else:
                 filtered_data = apply_enhanced_filtering(
@@ -463,6 +796,7 @@ class PokeQuantOrchestrator:
             
             # Create analysis-ready data structure
             summary = price_series_result['summary']
+            quality_score = self.price_data_service.score_price_summary(summary)  # Scored on the unfiltered series
             summary['total_data_points'] = len(filtered_data)  # Update count after filtering
             
             return {
@@ -471,7 +805,8 @@ class PokeQuantOrchestrator:
                 'prices': all_prices,
                 'summary': summary,
                 'organized_data': price_series_result['organized_data'],
-                'pokequant_product_id': pokequant_product_id
+                'pokequant_product_id': pokequant_product_id,
+                'quality_score': quality_score
             }
             
         except Exception as e:
@@ -480,6 +815,13 @@ class PokeQuantOrchestrator:
                 'error': str(e)
             }
     
+    def _use_llm_filtering(self) -> bool:
+        """Whether LLM filtering is enabled (via env var or CLI flag) and usable"""
+        return bool(LLM_FILTERING_AVAILABLE and 
+                    os.getenv('OPENAI_API_KEY') and 
+                    (os.getenv('POKEQUANT_USE_LLM', 'false').lower() == 'true' or 
+                     getattr(self, '_use_llm_flag', False)))
+    
     def _get_date_range(self, listings: List[Dict]) -> Dict[str, str]:
         """Get date range from listings"""
         
@@ -534,7 +876,9 @@ class PokeQuantOrchestrator:
                 trend_strength = 0
             
             # Calculate data quality score
-            quality_score = self.price_data_service.calculate_data_quality_score(data['pokequant_product_id'])
+            quality_score = data.get('quality_score')
+            if quality_score is None:
+                quality_score = self.price_data_service.calculate_data_quality_score(data['pokequant_product_id'])
             
             # Multi-source analysis
             source_breakdown = {}
@@ -704,38 +1048,68 @@ class PokeQuantOrchestrator:
             'risk_level': 'HIGH' if price_stats['volatility_percent'] > 25 else 'MEDIUM' if price_stats['volatility_percent'] > 15 else 'LOW'
         }
 
-    def _check_cached_analysis(self, pokequant_product_id: str) -> Optional[Dict[str, Any]]:
-        """Check if a recent analysis exists in cache"""
+    def _analysis_input_fingerprint(self, pokequant_product_id: str) -> Optional[str]:
+        """Fingerprint of the inputs an analysis of this product would use now (None if it can't be read)"""
+        return self._analysis_input_fingerprints([pokequant_product_id]).get(pokequant_product_id)
+    
+    def _analysis_input_fingerprints(self, pokequant_product_ids: List[str]) -> Dict[str, str]:
+        """
+        Input fingerprints for many products: price watermark, filter, metrics and prompt versions
+        
+        Products whose watermark can't be read are left out, so their analyses are neither
+        served from nor added to the cache.
+        """
+        
+        try:
+            watermarks = self.analysis_cache.price_watermarks(pokequant_product_ids)
+        except Exception as e:
+            print(f"   ⚠️ Error reading price data watermarks: {e}")
+            return {}
+        
+        prompt_version = LLM_PROMPT_VERSION if self._use_llm_filtering() else None
+        return {
+            pokequant_product_id: analysis_fingerprint(pokequant_product_id, watermark, FILTER_VERSION,
+                                                       ANALYSIS_VERSION, prompt_version)
+            for pokequant_product_id, watermark in watermarks.items()
+        }
+    
+    def _check_cached_analysis(self, pokequant_product_id: str, product: Dict[str, Any],
+                               fingerprint: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The stored analysis computed from exactly the current inputs, if any"""
+        
+        if not fingerprint:
+            return None
+        
+        try:
+            analysis_row = self.analysis_cache.get(fingerprint)
+        except Exception as e:
+            print(f"   ⚠️ Error checking cached analysis: {e}")
+            return None
+        
+        return self._format_cached_analysis(pokequant_product_id, analysis_row, product) if analysis_row else None
+    
+    def _check_cached_analyses(self, fingerprints: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored pokequant_analyses rows by input fingerprint (local LRU, then one query per chunk)"""
+        
+        try:
+            return self.analysis_cache.get_many(fingerprints)
+        except Exception as e:
+            print(f"   ⚠️ Error checking cached analyses: {e}")
+            return {}
+    
+    @staticmethod
+    def _format_cached_analysis(pokequant_product_id: str, analysis_row: Dict[str, Any], product: Dict[str, Any]) -> Dict[str, Any]:
+        """Reconstruct the final_analysis format from a stored pokequant_analyses row"""
         
         try:
-            # Calculate cutoff time for cache expiry
-            cutoff_time = datetime.now() - timedelta(hours=self.analysis_cache_hours)
-            
-            # Query for recent analysis
-            result = self.supabase.table('pokequant_analyses').select('*').eq('pokequant_product_id', pokequant_product_id).gte('analysis_date', cutoff_time.isoformat()).order('analysis_date', desc=True).limit(1).execute()
-            
-            if not result.data:
-                return None
-            
-            analysis_row = result.data[0]
-            
-            # Get the associated product info
-            product_result = self.supabase.table('pokequant_products').select('*').eq('id', pokequant_product_id).execute()
-            
-            if not product_result.data:
-                return None
-            
-            product_row = product_result.data[0]
-            
-            # Reconstruct the analysis format
             return {
                 'product': {
                     'product': {
-                        'type': product_row['product_type'],
-                        'id': product_row['product_id'],
-                        'name': product_row['product_name'],
-                        'set_name': product_row['set_name'],
-                        'display_name': product_row['product_name']
+                        'type': product['type'],
+                        'id': product['id'],
+                        'name': product['name'],
+                        'set_name': product.get('set_name'),
+                        'display_name': product['display_name']
                     },
                     'found': True
                 },
@@ -755,39 +1129,27 @@ class PokeQuantOrchestrator:
                     'pokequant_product_id': pokequant_product_id,
                     'analysis_date': str(analysis_row['analysis_date']),
                     'analysis_version': analysis_row['analysis_version'],
+                    'input_fingerprint': analysis_row.get('input_fingerprint'),
                     'cached': True
                 }
             }
             
         except Exception as e:
-            print(f"   ⚠️ Error checking cached analysis: {e}")
+            print(f"   ⚠️ Error reading cached analysis: {e}")
             return None
     
     def _store_analysis_results(self, pokequant_product_id: str, analysis: Dict[str, Any]) -> bool:
         """Store analysis results in pokequant_analyses table"""
         
         try:
-            metrics = analysis.get('metrics', {})
-            recommendation = analysis.get('recommendation', {})
-            data_summary = analysis.get('data_summary', {})
-            date_range = data_summary.get('date_range', {})
-            
             # Prepare data for storage
-            analysis_data = {
-                'pokequant_product_id': pokequant_product_id,
-                'metrics': metrics,
-                'recommendation': recommendation.get('recommendation'),
-                'confidence_score': recommendation.get('confidence', 0.0),
-                'analysis_version': '1.0',
-                'data_range_start': date_range.get('start'),
-                'data_range_end': date_range.get('end'),
-                'total_data_points': data_summary.get('total_data_points', 0)
-            }
+            analysis_data = self._analysis_row(pokequant_product_id, analysis)
             
             # Insert into database
             result = self.supabase.table('pokequant_analyses').insert(analysis_data).execute()
             
             if result.data:
+                self._remember_analysis(result.data[0], analysis)
                 print(f"   ✅ Analysis results stored successfully")
                 return True
             else:
@@ -798,6 +1160,51 @@ class PokeQuantOrchestrator:
             print(f"   ❌ Error storing analysis results: {e}")
             return False
     
+    def _store_analysis_results_bulk(self, analyses: List[Tuple[str, Dict[str, Any]]], chunk_size: int = 100) -> int:
+        """Store many (pokequant_product_id, final_analysis) results with one insert per chunk; returns rows stored"""
+        
+        rows = [self._analysis_row(pokequant_product_id, analysis) for pokequant_product_id, analysis in analyses]
+        stored = 0
+        
+        for i in range(0, len(rows), chunk_size):
+            try:
+                result = self.supabase.table('pokequant_analyses').insert(rows[i:i + chunk_size]).execute()
+                stored += len(result.data or [])
+                for row, (_, analysis) in zip(result.data or [], analyses[i:i + chunk_size]):
+                    self._remember_analysis(row, analysis)
+            except Exception as e:
+                print(f"   ❌ Error storing analysis results: {e}")
+        
+        return stored
+    
+    @staticmethod
+    def _analysis_row(pokequant_product_id: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """A final_analysis as a pokequant_analyses row"""
+        
+        metrics = analysis.get('metrics', {})
+        recommendation = analysis.get('recommendation', {})
+        data_summary = analysis.get('data_summary', {})
+        date_range = data_summary.get('date_range') or {}
+        
+        return {
+            'pokequant_product_id': pokequant_product_id,
+            'metrics': metrics,
+            'recommendation': recommendation.get('recommendation'),
+            'confidence_score': recommendation.get('confidence', 0.0),
+            'analysis_version': ANALYSIS_VERSION,
+            'data_range_start': date_range.get('start'),
+            'data_range_end': date_range.get('end'),
+            'total_data_points': data_summary.get('total_data_points', 0),
+            'input_fingerprint': analysis.get('analysis_metadata', {}).get('input_fingerprint')
+        }
+    
+    def _remember_analysis(self, stored_row: Dict[str, Any], analysis: Dict[str, Any]):
+        """Put a freshly inserted row in the local cache tier so the next lookup skips the table"""
+        
+        row = dict(stored_row)
+        row.setdefault('analysis_date', analysis.get('analysis_metadata', {}).get('analysis_date'))
+        self.analysis_cache.put(row)
+    
     def get_analysis_history(self, product_name: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get analysis history for a product"""
         
@@ -839,18 +1246,58 @@ def main():
     """CLI interface for PokeQuant analysis"""
     
     parser = argparse.ArgumentParser(description="PokeQuant: Complete Pokemon card and sealed product analysis")
-    parser.add_argument('product_name', help='Name of the product to analyze')
+    parser.add_argument('product_name', nargs='?', help='Name of the product to analyze')
     parser.add_argument('--force-refresh', action='store_true', help='Force data refresh even if recent data exists')
     parser.add_argument('--force-analysis', action='store_true', help='Force analysis even if cached analysis exists')
     parser.add_argument('--max-age', type=int, default=7, help='Maximum age in days before data is stale')
-    parser.add_argument('--cache-hours', type=int, default=24, help='Cache analysis results for this many hours')
+    parser.add_argument('--cache-hours', type=int, default=24,
+                        help='Recompute cached analyses older than this many hours even if their inputs are unchanged')
     parser.add_argument('--history', action='store_true', help='Show analysis history instead of running new analysis')
     parser.add_argument('--use-llm', action='store_true', help='Enable LLM-enhanced filtering (requires OpenAI API key)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    parser.add_argument('--parse-workers', type=int, help='Worker processes for eBay HTML parsing (default: one per core)')
+    parser.add_argument('--batch', metavar='WATCHLIST', help='Analyze every product in a file (one name or card:ID / sealed:ID per line)')
+    parser.add_argument('--analysis-workers', type=int, help='Threads for batch filtering and metrics')
     
     args = parser.parse_args()
+    if not args.product_name and not args.batch:
+        parser.error('product_name is required unless --batch is given')
+    
+    orchestrator = PokeQuantOrchestrator(max_age_days=args.max_age, analysis_cache_hours=args.cache_hours, use_llm=args.use_llm,
+                                         parse_workers=args.parse_workers)
+    try:
+        _run_cli(orchestrator, args)
+    finally:
+        orchestrator.close()
+
+def _run_cli(orchestrator: PokeQuantOrchestrator, args: argparse.Namespace):
+    """Run the batch, history or single-product command chosen on the command line"""
     
-    orchestrator = PokeQuantOrchestrator(max_age_days=args.max_age, analysis_cache_hours=args.cache_hours, use_llm=args.use_llm)
+    # Batch mode: analyze a whole watchlist from the stored price series
+    if args.batch:
+        products = []
+        with open(args.batch, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                product_type, _, product_id = line.partition(':')
+                products.append((product_type, product_id) if product_type in PRODUCT_TABLES and product_id else line)
+        
+        batch = orchestrator.analyze_products(products, force_analysis=args.force_analysis, max_workers=args.analysis_workers)
+        
+        print("\n" + "="*60)
+        print("🎯 POKEQUANT BATCH SUMMARY")
+        print("="*60)
+        for result in batch['results']:
+            if result['success']:
+                rec = result['final_analysis'].get('recommendation', {})
+                source = 'cached' if result['used_cached_analysis'] else 'fresh'
+                print(f"  {result['product_name']}: {rec.get('recommendation')} ({rec.get('confidence', 0):.0%}, {source})")
+            else:
+                print(f"  {result['product_name']}: ❌ {result.get('error', 'Unknown error')}")
+        print(f"\nAnalyzed: {batch['analyzed']}  Cached: {batch['cached']}  Failed: {batch['failed']}  Stored: {batch['stored']}")
+        return
     
     # Show analysis history instead of running new analysis
     if args.history:
@@ -887,7 +1334,7 @@ def main():
             print("   (Use --force-analysis to force fresh analysis)")
         else:
             print("🔄 Fresh analysis completed")
-            print("   (Results cached for next 24 hours)")
+            print("   (Results reused until the price data or analysis code changes)")
         
         final = result['final_analysis']
         product = final['product']['product']
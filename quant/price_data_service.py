@@ -6,7 +6,9 @@ Handles storage and retrieval of price data from multiple sources in PokeQuant f
 
 import sys
 import os
-from datetime import datetime, timedelta
+import json
+import threading
+from datetime import datetime, date, timedelta, timezone
 from typing import Dict, List, Any, Optional
 from statistics import median, mean
 
@@ -14,12 +16,39 @@ from statistics import median, mean
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from supabase_client import supabase
+from quant.price_series_cache import PriceSeriesCache, WATERMARK_OVERLAP
+
+# Unique key of pokequant_price_series - one price point per product/date/source/condition
+PRICE_SERIES_CONFLICT_KEY = 'pokequant_product_id,price_date,source,condition_category'
+
+# Listing columns the rule and IQR filters read; enough to recompute the outlier bounds over a product's history
+LISTING_FILTER_COLUMNS = 'id, title, price, condition_category, sold_date, created_at'
+
+# Anchored to the repo root so the watermarks don't depend on the working directory
+DEFAULT_WATERMARK_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                      'data', 'ebay_aggregation_watermarks.json')
 
 class PriceDataService:
     """Service for aggregating and storing price data from multiple sources"""
     
-    def __init__(self):
+    def __init__(self, upsert_chunk_size: int = 500, price_cache: Optional[PriceSeriesCache] = None,
+                 watermark_path: str = DEFAULT_WATERMARK_PATH, page_size: int = 1000):
+        """
+        Args:
+            upsert_chunk_size: Price points per bulk upsert request
+            price_cache: Local price series cache to serve reads from (None = always query Supabase)
+            watermark_path: File tracking the newest listing created_at and the IQR bounds aggregated per product
+            page_size: Rows per listing request (Supabase caps responses at 1000 rows)
+        """
         self.supabase = supabase
+        self.upsert_chunk_size = upsert_chunk_size
+        self.page_size = page_size
+        self.price_cache = price_cache
+        self.watermark_path = watermark_path
+        self._aggregation_watermarks = None
+        self._watermark_lock = threading.RLock()
+        self._pre_classifier = None
+        self._pre_classifier_lock = threading.Lock()
         
         # Initialize filtering capabilities
         try:
@@ -64,8 +93,64 @@ class PriceDataService:
             print(f"   ❌ Error ensuring product exists: {e}")
             return None
     
-    def aggregate_ebay_data(self, product_type: str, product_id: str, product_name: str, set_name: str = None) -> Dict[str, Any]:
-        """Aggregate eBay data into pokequant_price_series"""
+    def ensure_products_exist(self, products: List[Dict[str, Any]], chunk_size: int = 200) -> Dict[tuple, str]:
+        """
+        ensure_product_exists for many products: one lookup per product type and chunk,
+        then a single insert for the ones that are missing
+        
+        Args:
+            products: Dicts with 'type', 'id', 'name' and optional 'set_name'
+            chunk_size: Product IDs per in_() request
+            
+        Returns:
+            Dict of (product_type, product_id) -> pokequant_products UUID
+        """
+        
+        wanted = {(product['type'], str(product['id'])): product for product in products}
+        product_ids: Dict[tuple, str] = {}
+        
+        try:
+            for product_type in sorted(set(key[0] for key in wanted)):
+                ids = [product_id for kind, product_id in wanted if kind == product_type]
+                for i in range(0, len(ids), chunk_size):
+                    result = self.supabase.table('pokequant_products').select('id, product_type, product_id').eq('product_type', product_type).in_('product_id', ids[i:i + chunk_size]).execute()
+                    for row in result.data or []:
+                        product_ids[(row['product_type'], str(row['product_id']))] = row['id']
+            
+            missing = [
+                {
+                    'product_type': product_type,
+                    'product_id': product_id,
+                    'product_name': product['name'],
+                    'set_name': product.get('set_name'),
+                    'last_data_update': datetime.now().isoformat(),
+                    'data_quality_score': 0.5  # Initial score, will be updated
+                }
+                for (product_type, product_id), product in wanted.items() if (product_type, product_id) not in product_ids
+            ]
+            
+            for i in range(0, len(missing), chunk_size):
+                result = self.supabase.table('pokequant_products').insert(missing[i:i + chunk_size]).execute()
+                for row in result.data or []:
+                    product_ids[(row['product_type'], str(row['product_id']))] = row['id']
+            
+            if missing:
+                print(f"   ✅ Created {len(missing)} PokeQuant product entries")
+                
+        except Exception as e:
+            print(f"   ❌ Error ensuring products exist: {e}")
+        
+        return product_ids
+    
+    def aggregate_ebay_data(self, product_type: str, product_id: str, product_name: str, set_name: str = None,
+                            incremental: bool = False) -> Dict[str, Any]:
+        """
+        Aggregate eBay data into pokequant_price_series
+        
+        Args:
+            incremental: Only rewrite the dates touched by listings added since the last run (or by moved IQR bounds)
+                         (falls back to a full aggregation when the product has no watermark yet)
+        """
         
         print(f"   📈 Aggregating eBay data for {product_name}...")
         
@@ -79,43 +164,253 @@ class PriceDataService:
             table_name = 'ebay_sold_listings' if product_type == 'card' else 'ebay_sealed_listings'
             id_column = 'card_id' if product_type == 'card' else 'sealed_product_id'
             
-            ebay_result = self.supabase.table(table_name).select('*').eq(id_column, product_id).execute()
-            
-            if not ebay_result.data:
-                return {'success': False, 'error': 'No eBay data found'}
-            
-            # Apply data quality filtering before aggregation
             product_info = {
                 'name': product_name,
                 'type': product_type,
                 'set_name': set_name
             }
             
+            watermark = self._get_aggregation_watermark(pokequant_product_id) if incremental else None
+            if watermark:
+                return self._aggregate_ebay_incremental(pokequant_product_id, table_name, id_column, product_id,
+                                                        product_info, watermark)
+            
+            listings = self._load_listings(table_name, id_column, product_id)
+            
+            if not listings:
+                return {'success': False, 'error': 'No eBay data found'}
+            
             # Fix: Apply filtering to raw listings before aggregation
-            filtered_listings = self._apply_data_quality_filtering(ebay_result.data, product_info)
+            enhanced = self._apply_enhanced_filtering(listings, product_info)
+            filtered_listings = self._apply_llm_filtering(enhanced['kept'], product_info, len(listings))
             
             # Group by date and aggregate prices
             aggregated_data = self._aggregate_prices_by_date(filtered_listings, 'ebay')
             
             # Store in pokequant_price_series
-            stored_count = self._store_price_series(pokequant_product_id, aggregated_data, 'ebay')
+            store_report = self._store_price_series(pokequant_product_id, aggregated_data, 'ebay')
+            
+            # Only advance the watermark once everything is stored, so failed chunks get retried
+            if not store_report['failed_chunks']:
+                self._advance_aggregation_watermark(pokequant_product_id, listings, enhanced['bounds'])
             
             # Update product timestamp
             self._update_product_timestamp(pokequant_product_id)
             
             return {
                 'success': True,
-                'raw_listings': len(ebay_result.data),
+                'mode': 'full',
+                'raw_listings': len(listings),
                 'filtered_listings': len(filtered_listings),
-                'removed_listings': len(ebay_result.data) - len(filtered_listings),
+                'removed_listings': len(listings) - len(filtered_listings),
                 'aggregated_points': len(aggregated_data),
-                'stored_points': stored_count,
+                'stored_points': store_report['stored'],
+                'failed_chunks': store_report['failed_chunks'],
                 'pokequant_product_id': pokequant_product_id
             }
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    def _aggregate_ebay_incremental(self, pokequant_product_id: str, table_name: str, id_column: str, product_id: str,
+                                    product_info: Dict, watermark: str) -> Dict[str, Any]:
+        """
+        Re-aggregate only the dates that received new listings since the watermark
+        
+        Full rows are read only for listings created past the watermark and for the dates
+        being rewritten. The rule and IQR filters still run over the whole product history,
+        read with just the columns they need, so the outlier bounds match a full aggregation.
+        Dates where a listing moves in or out of the bounds stored with the watermark are
+        rewritten as well (all dates when none are stored).
+        """
+        
+        # Re-read a little before the watermark so rows committed with a slightly older created_at aren't missed
+        since = self._parse_timestamp(watermark) - WATERMARK_OVERLAP
+        new_listings = self._load_listings(table_name, id_column, product_id, created_after=since.isoformat())
+        affected_dates = {date_key for date_key in map(self._listing_date_key, new_listings) if date_key}
+        
+        previous_bounds = self._get_aggregation_bounds(pokequant_product_id)
+        if not new_listings and previous_bounds is not None:
+            return self._incremental_result(pokequant_product_id, new_listings)
+        
+        history = self._load_listings(table_name, id_column, product_id, columns=LISTING_FILTER_COLUMNS)
+        enhanced = self._apply_enhanced_filtering(history, product_info, verbose=False)
+        if previous_bounds is None or enhanced['bounds'] is None:
+            moved_dates = {date_key for date_key in map(self._listing_date_key, history) if date_key}
+        else:
+            moved_dates = {
+                self._listing_date_key(listing) for listing in enhanced['checked']
+                if self._within_bounds(listing, previous_bounds) != self._within_bounds(listing, enhanced['bounds'])
+            }
+            moved_dates.discard(None)
+        
+        recomputed_dates = sorted(affected_dates | moved_dates)
+        
+        if not recomputed_dates:
+            self._advance_aggregation_watermark(pokequant_product_id, new_listings, enhanced['bounds'])
+            return self._incremental_result(pokequant_product_id, new_listings)
+        
+        print(f"   🔁 {len(new_listings)} new listings touch {len(affected_dates)} dates, "
+              f"re-aggregating {len(recomputed_dates)} dates")
+        
+        wanted = set(recomputed_dates)
+        raw_count = sum(1 for listing in history if self._listing_date_key(listing) in wanted)
+        kept_ids = [listing['id'] for listing in enhanced['kept'] if self._listing_date_key(listing) in wanted]
+        
+        # Full rows for the kept listings of the rewritten dates (new ones are already loaded)
+        full_rows = {listing['id']: listing for listing in new_listings}
+        missing_ids = [listing_id for listing_id in kept_ids if listing_id not in full_rows]
+        full_rows.update((listing['id'], listing) for listing in self._load_listings_by_id(table_name, missing_ids))
+        bucket_listings = [full_rows[listing_id] for listing_id in kept_ids if listing_id in full_rows]
+        
+        filtered_listings = self._apply_llm_filtering(bucket_listings, product_info, raw_count)
+        aggregated_data = self._aggregate_prices_by_date(filtered_listings, 'ebay')
+        store_report = self._store_price_series(pokequant_product_id, aggregated_data, 'ebay')
+        
+        if not store_report['failed_chunks']:
+            self._advance_aggregation_watermark(pokequant_product_id, new_listings, enhanced['bounds'])
+        
+        self._update_product_timestamp(pokequant_product_id)
+        
+        return {
+            'success': True,
+            'mode': 'incremental',
+            'new_listings': len(new_listings),
+            'recomputed_dates': recomputed_dates,
+            'raw_listings': raw_count,
+            'filtered_listings': len(filtered_listings),
+            'removed_listings': raw_count - len(filtered_listings),
+            'aggregated_points': len(aggregated_data),
+            'stored_points': store_report['stored'],
+            'failed_chunks': store_report['failed_chunks'],
+            'pokequant_product_id': pokequant_product_id
+        }
+    
+    @staticmethod
+    def _incremental_result(pokequant_product_id: str, new_listings: List[Dict]) -> Dict[str, Any]:
+        """Result of an incremental aggregation that had no dates to rewrite"""
+        
+        return {
+            'success': True,
+            'mode': 'incremental',
+            'new_listings': len(new_listings),
+            'recomputed_dates': [],
+            'raw_listings': 0,
+            'filtered_listings': 0,
+            'removed_listings': 0,
+            'aggregated_points': 0,
+            'stored_points': 0,
+            'failed_chunks': [],
+            'pokequant_product_id': pokequant_product_id
+        }
+    
+    def _load_listings(self, table_name: str, id_column: str, product_id: str, columns: str = '*',
+                       created_after: str = None) -> List[Dict]:
+        """
+        Listings of a product, one page of page_size rows per request
+        
+        Args:
+            columns: Columns to read
+            created_after: Only listings with a later created_at (None = all of them)
+        """
+        
+        listings = []
+        start = 0
+        while True:
+            query = self.supabase.table(table_name).select(columns).eq(id_column, product_id)
+            if created_after:
+                query = query.gt('created_at', created_after)
+            page = query.order('id').range(start, start + self.page_size - 1).execute().data or []
+            listings.extend(page)
+            if len(page) < self.page_size:
+                return listings
+            start += self.page_size
+    
+    def _load_listings_by_id(self, table_name: str, listing_ids: List[Any], chunk_size: int = 200) -> List[Dict]:
+        """Full rows of the given listings, one in_() query per chunk"""
+        
+        listings = []
+        for i in range(0, len(listing_ids), chunk_size):
+            result = self.supabase.table(table_name).select('*').in_('id', listing_ids[i:i + chunk_size]).execute()
+            listings.extend(result.data or [])
+        return listings
+    
+    @staticmethod
+    def _within_bounds(listing: Dict, bounds: Dict[str, Any]) -> bool:
+        """Whether a listing survives the IQR pass with the given per-group bounds"""
+        
+        group = f"ebay_{listing.get('condition_category') or 'unknown'}"
+        if group not in bounds:
+            return True  # Group too small to be tested
+        lower, upper = bounds[group]
+        return lower <= float(listing.get('price', 0)) <= upper
+    
+    @staticmethod
+    def _parse_timestamp(value: str) -> datetime:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    
+    def _load_aggregation_watermarks(self) -> Dict[str, Dict[str, Any]]:
+        with self._watermark_lock:
+            if self._aggregation_watermarks is None:
+                watermarks = {}
+                if os.path.exists(self.watermark_path):
+                    try:
+                        with open(self.watermark_path, 'r') as f:
+                            watermarks = {
+                                # Older files stored the bare created_at
+                                product: entry if isinstance(entry, dict) else {'created_at': entry, 'iqr_bounds': None}
+                                for product, entry in json.load(f).items()
+                            }
+                    except Exception as e:
+                        print(f"   ⚠️ Ignoring unreadable aggregation watermarks: {e}")
+                self._aggregation_watermarks = watermarks
+            return self._aggregation_watermarks
+    
+    def _get_aggregation_watermark(self, pokequant_product_id: str) -> Optional[str]:
+        """Newest listing created_at already aggregated for a product"""
+        return self._load_aggregation_watermarks().get(pokequant_product_id, {}).get('created_at')
+    
+    def _get_aggregation_bounds(self, pokequant_product_id: str) -> Optional[Dict[str, Any]]:
+        """IQR bounds per group the stored price points were filtered with (None = unknown)"""
+        return self._load_aggregation_watermarks().get(pokequant_product_id, {}).get('iqr_bounds')
+    
+    def _advance_aggregation_watermark(self, pokequant_product_id: str, listings: List[Dict],
+                                       iqr_bounds: Optional[Dict[str, Any]]):
+        """
+        Move a product's watermark up to the newest created_at in listings and record the IQR bounds used
+        
+        Threads aggregating different products share the watermark dict and file, so the update
+        and the write happen under one lock.
+        """
+        
+        with self._watermark_lock:
+            watermarks = self._load_aggregation_watermarks()
+            current = watermarks.get(pokequant_product_id, {})
+            newest = current.get('created_at')
+            
+            for listing in listings:
+                created_at = listing.get('created_at')
+                if created_at and (not newest or self._parse_timestamp(created_at) > self._parse_timestamp(newest)):
+                    newest = created_at
+            
+            # JSON round trips turn the bound tuples into lists
+            entry = {'created_at': newest, 'iqr_bounds': json.loads(json.dumps(iqr_bounds))}
+            if entry == current:
+                return
+            
+            watermarks[pokequant_product_id] = entry
+            try:
+                directory = os.path.dirname(self.watermark_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                # Per-process temp file, so two processes saving at once don't interleave writes
+                tmp_path = f"{self.watermark_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(watermarks, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.watermark_path)
+            except Exception as e:
+                print(f"   ⚠️ Failed to save aggregation watermark: {e}")
+    
     def aggregate_pricecharting_data(self, product_type: str, product_id: str, product_name: str, 
                                    pricecharting_data: Dict[str, Any], set_name: str = None) -> Dict[str, Any]:
         """Aggregate PriceCharting data into pokequant_price_series"""
@@ -135,7 +430,7 @@ class PriceDataService:
                 return {'success': False, 'error': 'No valid PriceCharting data found'}
             
             # Store in pokequant_price_series
-            stored_count = self._store_price_series(pokequant_product_id, aggregated_data, 'pricecharting')
+            store_report = self._store_price_series(pokequant_product_id, aggregated_data, 'pricecharting')
             
             # Update product timestamp
             self._update_product_timestamp(pokequant_product_id)
@@ -143,7 +438,8 @@ class PriceDataService:
             return {
                 'success': True,
                 'aggregated_points': len(aggregated_data),
-                'stored_points': stored_count,
+                'stored_points': store_report['stored'],
+                'failed_chunks': store_report['failed_chunks'],
                 'pokequant_product_id': pokequant_product_id
             }
             
@@ -157,16 +453,8 @@ class PriceDataService:
         date_groups = {}
         
         for listing in listings:
-            # Get the date (prefer sold_date, fallback to created_at)
-            date_str = listing.get('sold_date') or listing.get('created_at')
-            if not date_str:
-                continue
-                
-            # Extract date part (YYYY-MM-DD)
-            try:
-                date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                date_key = date_obj.date().isoformat()
-            except:
+            date_key = self._listing_date_key(listing)
+            if not date_key:
                 continue
             
             # Get price
@@ -221,6 +509,18 @@ class PriceDataService:
         
         return aggregated
     
+    def _listing_date_key(self, listing: Dict) -> Optional[str]:
+        """Aggregation date of a listing (YYYY-MM-DD, prefer sold_date, fallback to created_at)"""
+        
+        date_str = listing.get('sold_date') or listing.get('created_at')
+        if not date_str:
+            return None
+        
+        try:
+            return datetime.fromisoformat(date_str.replace('Z', '+00:00')).date().isoformat()
+        except:
+            return None
+    
     def _determine_condition_category(self, listing: Dict) -> str:
         """Determine condition category from listing data"""
         
@@ -275,37 +575,90 @@ class PriceDataService:
         
         return aggregated
     
-    def _store_price_series(self, pokequant_product_id: str, price_data: List[Dict], source: str) -> int:
-        """Store aggregated price data in pokequant_price_series table"""
+    def _store_price_series(self, pokequant_product_id: str, price_data: List[Dict], source: str) -> Dict[str, Any]:
+        """
+        Store aggregated price data in pokequant_price_series table
         
-        if not price_data:
-            return 0
+        Points are upserted in chunks of upsert_chunk_size on the table's unique key. A chunk
+        that fails is reported and retried row by row, so one bad point can't sink the others.
         
-        stored_count = 0
+        Returns:
+            Dict with stored count, failed_chunks (start/end index, error) and failed_rows
+        """
         
+        report = {'stored': 0, 'failed_chunks': [], 'failed_rows': 0}
+        
+        if not price_data:
+            return report
+        
+        # One entry per conflict key (last wins, like sequential upserts) - Postgres rejects
+        # a single upsert statement that touches the same row twice.
+        # updated_at moves on every write so price cache watermarks pick up re-aggregated points
+        # (created_at keeps the first write).
+        written_at = datetime.now(timezone.utc).isoformat()
+        entries_by_key = {}
         for data_point in price_data:
+            price_entry = {
+                'pokequant_product_id': pokequant_product_id,
+                'price_date': data_point['price_date'],
+                'price': data_point['price'],
+                'source': source,
+                'condition_category': data_point['condition_category'],
+                'data_confidence': data_point['data_confidence'],
+                'listing_count': data_point['listing_count'],
+                'updated_at': written_at
+            }
+            entries_by_key[(price_entry['price_date'], price_entry['condition_category'])] = price_entry
+        
+        entries = list(entries_by_key.values())
+        
+        for start in range(0, len(entries), self.upsert_chunk_size):
+            chunk = entries[start:start + self.upsert_chunk_size]
+            
             try:
-                price_entry = {
-                    'pokequant_product_id': pokequant_product_id,
-                    'price_date': data_point['price_date'],
-                    'price': data_point['price'],
-                    'source': source,
-                    'condition_category': data_point['condition_category'],
-                    'data_confidence': data_point['data_confidence'],
-                    'listing_count': data_point['listing_count']
-                }
+                result = self.supabase.table('pokequant_price_series').upsert(
+                    chunk, on_conflict=PRICE_SERIES_CONFLICT_KEY
+                ).execute()
                 
-                # Use upsert to handle duplicates
-                result = self.supabase.table('pokequant_price_series').upsert(price_entry).execute()
+                if result.data:
+                    report['stored'] += len(chunk)
+                    continue
+                error = 'no data returned'
+                
+            except Exception as e:
+                error = str(e)
+            
+            end = start + len(chunk)
+            print(f"   ⚠️ Price point chunk {start}-{end} failed ({error}) - retrying row by row")
+            report['failed_chunks'].append({'start': start, 'end': end, 'error': error})
+            report['stored'] += self._upsert_price_rows(chunk, report)
+        
+        if self.price_cache:
+            self.price_cache.mark_stale(pokequant_product_id)
+        
+        print(f"   ✅ Stored {report['stored']}/{len(entries)} price points in pokequant_price_series")
+        return report
+    
+    def _upsert_price_rows(self, entries: List[Dict], report: Dict[str, Any]) -> int:
+        """Row-level fallback for a failed chunk - returns rows stored, counts failures in report"""
+        
+        stored_count = 0
+        
+        for price_entry in entries:
+            try:
+                result = self.supabase.table('pokequant_price_series').upsert(
+                    price_entry, on_conflict=PRICE_SERIES_CONFLICT_KEY
+                ).execute()
                 
                 if result.data:
                     stored_count += 1
+                else:
+                    report['failed_rows'] += 1
                     
             except Exception as e:
-                print(f"   ⚠️ Failed to store price point: {e}")
-                continue
+                print(f"   ⚠️ Failed to store price point {price_entry['price_date']}: {e}")
+                report['failed_rows'] += 1
         
-        print(f"   ✅ Stored {stored_count}/{len(price_data)} price points in pokequant_price_series")
         return stored_count
     
     def _apply_data_quality_filtering(self, listings: List[Dict], product_info: Dict) -> List[Dict]:
@@ -314,7 +667,19 @@ class PriceDataService:
         if not listings:
             return listings
         
-        print(f"   🧹 Applying data quality filtering to {len(listings)} listings...")
+        enhanced = self._apply_enhanced_filtering(listings, product_info)
+        return self._apply_llm_filtering(enhanced['kept'], product_info, len(listings))
+    
+    def _apply_enhanced_filtering(self, listings: List[Dict], product_info: Dict, verbose: bool = True) -> Dict[str, Any]:
+        """
+        Rule-based and IQR filtering of raw listings
+        
+        Returns the kept listings, the listings that passed the rule checks (the ones the IQR
+        pass looked at) and the IQR bounds per group (None if filtering failed)
+        """
+        
+        if verbose:
+            print(f"   🧹 Applying data quality filtering to {len(listings)} listings...")
         
         # Convert database format to filtering format
         price_data = []
@@ -324,83 +689,83 @@ class PriceDataService:
                 'price': float(listing.get('price', 0)),
                 'source': 'ebay',  # Since this is eBay data aggregation
                 'title': listing.get('title', ''),
-                'condition_category': listing.get('condition_category', 'unknown'),
+                'condition_category': listing.get('condition_category') or 'unknown',
                 'original_data': listing  # Keep original for later reconstruction
             }
             price_data.append(price_point)
         
-        # Apply enhanced filtering
         try:
-            from quant.enhanced_outlier_filter import apply_enhanced_filtering
-            clean_data = apply_enhanced_filtering(
-                price_data, 
-                product_info, 
-                verbose=False
-            )
-            
-            # Convert back to original format
-            clean_listings = []
-            for clean_point in clean_data:
-                if 'original_data' in clean_point:
-                    clean_listings.append(clean_point['original_data'])
-                else:
-                    # Fallback: reconstruct from filtered data
-                    clean_listings.append({
-                        'price': clean_point['price'],
-                        'title': clean_point.get('title', ''),
-                        'condition_category': clean_point.get('condition_category', 'unknown'),
-                        'sold_date': clean_point.get('sold_date', ''),
-                        'created_at': clean_point.get('created_at', '')
-                    })
-            
-            removed_count = len(listings) - len(clean_listings)
-            
-            if removed_count > 0:
-                print(f"   🚫 Enhanced filtering removed {removed_count} suspicious listings")
-            
-            # Optionally apply LLM filtering if enabled
-            use_llm = (self.llm_filtering_available and 
-                      os.getenv('GEMINI_API_KEY') and 
-                      os.getenv('POKEQUANT_USE_LLM', 'false').lower() == 'true')
-            
-            if use_llm:
-                try:
-                    from quant.llm_enhanced_filter import apply_llm_enhanced_filtering
-                    print(f"   🤖 Applying LLM filtering to {len(clean_listings)} listings...")
-                    
-                    # Convert to LLM format (needs sample_titles)
-                    llm_data = []
-                    for listing in clean_listings:
-                        llm_point = listing.copy()
-                        llm_point['sample_titles'] = [listing.get('title', 'Unknown')]
-                        llm_data.append(llm_point)
-                    
-                    llm_result = apply_llm_enhanced_filtering(
-                        llm_data,
-                        product_info,
-                        verbose=False
-                    )
-                    
-                    final_listings = llm_result['filtered_data']
-                    llm_removed = len(clean_listings) - len(final_listings)
-                    
-                    if llm_removed > 0:
-                        print(f"   🧠 LLM filtering removed {llm_removed} additional problematic listings")
-                    
-                    clean_listings = final_listings
-                    
-                except Exception as e:
-                    print(f"   ⚠️ LLM filtering failed, using enhanced filtering only: {e}")
-            
-            total_removed = len(listings) - len(clean_listings)
-            if total_removed > 0:
-                print(f"   ✅ Data quality filtering: {len(clean_listings)} kept, {total_removed} removed ({total_removed/len(listings)*100:.1f}%)")
-            
-            return clean_listings
-            
+            from quant.enhanced_outlier_filter import EnhancedOutlierFilter
+            filter_result = EnhancedOutlierFilter().filter_price_data_batch(price_data, product_info)
         except Exception as e:
             print(f"   ⚠️ Filtering failed, using unfiltered data: {e}")
-            return listings
+            return {'kept': listings, 'checked': listings, 'bounds': None}
+        
+        rejected = {id(removed['point']) for removed in filter_result['removed_suspicious']}
+        clean_listings = [point['original_data'] for point in filter_result['filtered_data']]
+        
+        removed_count = len(listings) - len(clean_listings)
+        if verbose and removed_count > 0:
+            print(f"   🚫 Enhanced filtering removed {removed_count} suspicious listings")
+        
+        return {
+            'kept': clean_listings,
+            'checked': [point['original_data'] for point in price_data if id(point) not in rejected],
+            'bounds': filter_result['statistical_bounds']
+        }
+    
+    def _apply_llm_filtering(self, clean_listings: List[Dict], product_info: Dict, raw_count: int) -> List[Dict]:
+        """Optionally run the LLM filter over listings that passed enhanced filtering"""
+        
+        use_llm = (self.llm_filtering_available and 
+                  os.getenv('GEMINI_API_KEY') and 
+                  os.getenv('POKEQUANT_USE_LLM', 'false').lower() == 'true')
+        
+        if use_llm and clean_listings:
+            try:
+                from quant.llm_enhanced_filter import apply_llm_enhanced_filtering
+                print(f"   🤖 Applying LLM filtering to {len(clean_listings)} listings...")
+                
+                # Convert to LLM format (needs sample_titles)
+                llm_data = []
+                for listing in clean_listings:
+                    llm_point = listing.copy()
+                    llm_point['sample_titles'] = [listing.get('title', 'Unknown')]
+                    llm_data.append(llm_point)
+                
+                llm_result = apply_llm_enhanced_filtering(
+                    llm_data,
+                    product_info,
+                    verbose=False,
+                    pre_classifier=self.llm_pre_classifier()
+                )
+                
+                final_listings = llm_result['filtered_data']
+                llm_removed = len(clean_listings) - len(final_listings)
+                
+                if llm_removed > 0:
+                    print(f"   🧠 LLM filtering removed {llm_removed} additional problematic listings")
+                
+                clean_listings = final_listings
+                
+            except Exception as e:
+                print(f"   ⚠️ LLM filtering failed, using enhanced filtering only: {e}")
+        
+        total_removed = raw_count - len(clean_listings)
+        if total_removed > 0:
+            print(f"   ✅ Data quality filtering: {len(clean_listings)} kept, {total_removed} removed ({total_removed/raw_count*100:.1f}%)")
+        
+        return clean_listings
+    
+    def llm_pre_classifier(self):
+        """Local tier in front of the LLM filter, built (and its title model trained) once per service"""
+        
+        with self._pre_classifier_lock:
+            if self._pre_classifier is None:
+                from quant.listing_pre_classifier import ListingPreClassifier
+                from quant.llm_decision_cache import LLMDecisionCache
+                self._pre_classifier = ListingPreClassifier(decision_cache=LLMDecisionCache())
+            return self._pre_classifier
     
     def _update_product_timestamp(self, pokequant_product_id: str):
         """Update the last_data_update timestamp for a product"""
@@ -416,61 +781,129 @@ class PriceDataService:
         """Retrieve price series data for analysis"""
         
         try:
-            query = self.supabase.table('pokequant_price_series').select('*').eq('pokequant_product_id', pokequant_product_id).order('price_date')
-            
-            if days_back:
-                cutoff_date = (datetime.now() - timedelta(days=days_back)).date().isoformat()
-                query = query.gte('price_date', cutoff_date)
-            
-            result = query.execute()
-            
-            if not result.data:
-                return {'success': False, 'error': 'No price data found'}
-            
-            # Organize data by source and condition
-            organized_data = {
-                'ebay': {'raw': [], 'graded': [], 'sealed': []},
-                'pricecharting': {'market': [], 'loose': [], 'graded': [], 'new': []}
-            }
+            if self.price_cache:
+                # Local partition, topped up with rows newer than its watermark
+                rows = self.price_cache.get_rows(pokequant_product_id, days_back)
+            else:
+                query = self.supabase.table('pokequant_price_series').select('*').eq('pokequant_product_id', pokequant_product_id).order('price_date')
+                
+                if days_back:
+                    cutoff_date = (datetime.now() - timedelta(days=days_back)).date().isoformat()
+                    query = query.gte('price_date', cutoff_date)
+                
+                rows = query.execute().data
             
-            all_prices = []
-            all_dates = []
+            return self._organize_price_series(rows)
             
-            for price_point in result.data:
-                source = price_point['source']
-                condition = price_point['condition_category']
-                
-                price_data = {
-                    'date': price_point['price_date'],
-                    'price': price_point['price'],
-                    'confidence': price_point['data_confidence'],
-                    'listing_count': price_point['listing_count']
-                }
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def get_price_series_bulk(self, pokequant_product_ids: List[str], days_back: int = None,
+                              chunk_size: int = 100, page_size: int = 1000) -> Dict[str, Dict[str, Any]]:
+        """
+        get_price_series for many products with a few queries instead of one per product
+        
+        Args:
+            pokequant_product_ids: Products to load
+            days_back: Only include points from the last N days
+            chunk_size: Products per in_() request
+            page_size: Rows per request
+            
+        Returns:
+            Dict of pokequant_product_id -> get_price_series result
+        """
+        
+        product_ids = list(dict.fromkeys(pokequant_product_ids))
+        rows_by_product: Dict[str, List[Dict]] = {product_id: [] for product_id in product_ids}
+        
+        try:
+            if self.price_cache:
+                self.price_cache.sync_many(product_ids, chunk_size=chunk_size)
+                for product_id in product_ids:
+                    rows_by_product[product_id] = self.price_cache.get_rows(product_id, days_back)
+            else:
+                cutoff_date = (datetime.now() - timedelta(days=days_back)).date().isoformat() if days_back else None
                 
-                if source in organized_data and condition in organized_data[source]:
-                    organized_data[source][condition].append(price_data)
+                for i in range(0, len(product_ids), chunk_size):
+                    chunk = product_ids[i:i + chunk_size]
+                    start = 0
+                    
+                    while True:
+                        query = self.supabase.table('pokequant_price_series').select('*').in_('pokequant_product_id', chunk)
+                        if cutoff_date:
+                            query = query.gte('price_date', cutoff_date)
+                        # Page on the primary key so pages stay stable; dates are sorted per product below
+                        rows = query.order('id').range(start, start + page_size - 1).execute().data or []
+                        
+                        for row in rows:
+                            rows_by_product[row['pokequant_product_id']].append(row)
+                        if len(rows) < page_size:
+                            break
+                        start += page_size
                 
-                all_prices.append(price_point['price'])
-                all_dates.append(price_point['price_date'])
-            
-            # Calculate summary statistics
-            summary = {
-                'total_data_points': len(result.data),
-                'date_range': {'start': min(all_dates), 'end': max(all_dates)} if all_dates else None,
-                'price_range': {'min': min(all_prices), 'max': max(all_prices)} if all_prices else None,
-                'average_price': mean(all_prices) if all_prices else 0,
-                'sources': list(set(point['source'] for point in result.data))
+                for rows in rows_by_product.values():
+                    rows.sort(key=lambda row: row['price_date'])
+                        
+        except Exception as e:
+            return {product_id: {'success': False, 'error': str(e)} for product_id in product_ids}
+        
+        return {product_id: self._organize_price_series(rows) for product_id, rows in rows_by_product.items()}
+    
+    def _organize_price_series(self, rows: List[Dict]) -> Dict[str, Any]:
+        """Group price points by source and condition and summarize them"""
+        
+        if not rows:
+            return {'success': False, 'error': 'No price data found'}
+        
+        # Organize data by source and condition
+        organized_data = {
+            'ebay': {'raw': [], 'graded': [], 'sealed': []},
+            'pricecharting': {'market': [], 'loose': [], 'graded': [], 'new': []}
+        }
+        
+        all_prices = []
+        all_dates = []
+        
+        for price_point in rows:
+            source = price_point['source']
+            condition = price_point['condition_category']
+            
+            price_data = {
+                'date': price_point['price_date'],
+                'price': price_point['price'],
+                'confidence': price_point['data_confidence'],
+                'listing_count': price_point['listing_count']
             }
             
-            return {
-                'success': True,
-                'organized_data': organized_data,
-                'raw_data': result.data,
-                'summary': summary
-            }
+            if source in organized_data and condition in organized_data[source]:
+                organized_data[source][condition].append(price_data)
             
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+            all_prices.append(price_point['price'])
+            all_dates.append(price_point['price_date'])
+        
+        # Calculate summary statistics
+        summary = {
+            'total_data_points': len(rows),
+            'date_range': {'start': min(all_dates), 'end': max(all_dates)} if all_dates else None,
+            'price_range': {'min': min(all_prices), 'max': max(all_prices)} if all_prices else None,
+            'average_price': mean(all_prices) if all_prices else 0,
+            'sources': list(set(point['source'] for point in rows))
+        }
+        
+        return {
+            'success': True,
+            'organized_data': organized_data,
+            'raw_data': rows,
+            'summary': summary
+        }
+    
+    def get_price_arrays(self, pokequant_product_id: str, days_back: int = None) -> Dict[str, Any]:
+        """Price series as NumPy column arrays sorted by date (needs a price cache)"""
+        
+        if not self.price_cache:
+            raise ValueError("get_price_arrays requires PriceDataService(price_cache=...)")
+        
+        return self.price_cache.get_arrays(pokequant_product_id, days_back)
     
     def calculate_data_quality_score(self, pokequant_product_id: str) -> float:
         """Calculate data quality score for a product"""
@@ -481,45 +914,50 @@ class PriceDataService:
             if not price_data['success']:
                 return 0.0
             
-            total_points = price_data['summary']['total_data_points']
-            sources = price_data['summary']['sources']
-            date_range_days = self._calculate_date_range_days(price_data['summary']['date_range'])
-            
-            # Quality scoring factors
-            score = 0.0
-            
-            # Data volume (0-40 points)
-            if total_points >= 100:
-                score += 40
-            elif total_points >= 50:
-                score += 30
-            elif total_points >= 20:
-                score += 20
-            elif total_points >= 10:
-                score += 10
-            
-            # Multiple sources (0-30 points)
-            if len(sources) >= 2:
-                score += 30
-            elif len(sources) == 1:
-                score += 15
-            
-            # Time coverage (0-30 points)
-            if date_range_days >= 365:
-                score += 30
-            elif date_range_days >= 180:
-                score += 20
-            elif date_range_days >= 90:
-                score += 15
-            elif date_range_days >= 30:
-                score += 10
-            
-            return min(1.0, score / 100)
+            return self.score_price_summary(price_data['summary'])
             
         except Exception as e:
             print(f"   ⚠️ Error calculating data quality: {e}")
             return 0.0
     
+    def score_price_summary(self, summary: Dict[str, Any]) -> float:
+        """Data quality score (0-1) from a get_price_series summary"""
+        
+        total_points = summary['total_data_points']
+        sources = summary['sources']
+        date_range_days = self._calculate_date_range_days(summary['date_range'])
+        
+        # Quality scoring factors
+        score = 0.0
+        
+        # Data volume (0-40 points)
+        if total_points >= 100:
+            score += 40
+        elif total_points >= 50:
+            score += 30
+        elif total_points >= 20:
+            score += 20
+        elif total_points >= 10:
+            score += 10
+        
+        # Multiple sources (0-30 points)
+        if len(sources) >= 2:
+            score += 30
+        elif len(sources) == 1:
+            score += 15
+        
+        # Time coverage (0-30 points)
+        if date_range_days >= 365:
+            score += 30
+        elif date_range_days >= 180:
+            score += 20
+        elif date_range_days >= 90:
+            score += 15
+        elif date_range_days >= 30:
+            score += 10
+        
+        return min(1.0, score / 100)
+    
     def _calculate_date_range_days(self, date_range: Dict) -> int:
         """Calculate days between start and end dates"""
         
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Local Price Series Cache
+Columnar on-disk copy of pokequant_price_series, one partition per product
+"""
+
+import os
+import sys
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from supabase_client import supabase
+
+# Columns kept per partition (pokequant_product_id is implied by the partition)
+PRICE_SERIES_COLUMNS = ['id', 'price_date', 'price', 'source', 'condition_category',
+                        'data_confidence', 'listing_count', 'created_at', 'updated_at']
+
+# Bumped on every write to a row (see database_schema_price_series_sync.sql)
+WATERMARK_COLUMN = 'updated_at'
+
+# Re-read a little before the watermark so rows written with a slightly skewed clock aren't missed
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Anchored to the repo root so the partitions don't depend on the working directory
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 'data', 'price_series_cache')
+
+class PriceSeriesCache:
+    """
+    Local columnar cache of pokequant_price_series partitioned by product
+
+    Each partition is a .npz file of column arrays plus its high-water mark (the newest
+    updated_at seen). Reads only pull rows newer than the watermark from Supabase and
+    merge them by (price_date, source, condition_category).
+
+    A delta can't show deletions, so each partition also keeps the remote row count it
+    was last reconciled at. After a delta the remote count is checked (one count request
+    per product, or per chunk in sync_many) and a partition that doesn't add up is
+    fetched again in full.
+
+    The partition dicts are shared by every thread using the cache, so syncs and reads
+    run under one lock.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, sync_interval_seconds: float = 300,
+                 supabase_client: Any = None, page_size: int = 1000):
+        """
+        Args:
+            cache_dir: Directory holding the partition files
+            sync_interval_seconds: Skip the Supabase delta check if a partition synced this recently
+            supabase_client: Client to use (defaults to the shared client)
+            page_size: Rows per delta request
+        """
+        self.cache_dir = cache_dir
+        self.sync_interval_seconds = sync_interval_seconds
+        self.supabase = supabase_client or supabase
+        self.page_size = page_size
+
+        self._partitions: Dict[str, Dict[str, np.ndarray]] = {}
+        self._watermarks: Dict[str, Optional[str]] = {}
+        self._remote_counts: Dict[str, Optional[int]] = {}
+        self._last_sync: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def _path(self, pokequant_product_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{pokequant_product_id}.npz")
+
+    @staticmethod
+    def _empty_partition() -> Dict[str, np.ndarray]:
+        return {
+            'id': np.array([], dtype=str),
+            'price_date': np.array([], dtype='datetime64[D]'),
+            'price': np.array([], dtype=np.float64),
+            'source': np.array([], dtype=str),
+            'condition_category': np.array([], dtype=str),
+            'data_confidence': np.array([], dtype=np.float64),
+            'listing_count': np.array([], dtype=np.int64),
+            'created_at': np.array([], dtype=str),
+            'updated_at': np.array([], dtype=str),
+        }
+
+    def _load(self, pokequant_product_id: str) -> Dict[str, np.ndarray]:
+        if pokequant_product_id in self._partitions:
+            return self._partitions[pokequant_product_id]
+
+        path = self._path(pokequant_product_id)
+        partition = self._empty_partition()
+        watermark = None
+        remote_count = None
+
+        if os.path.exists(path):
+            try:
+                with np.load(path, allow_pickle=False) as stored:
+                    partition = {column: stored[column] for column in PRICE_SERIES_COLUMNS}
+                    watermark = str(stored['watermark']) or None
+                    remote_count = int(stored['remote_count'])
+                    remote_count = remote_count if remote_count >= 0 else None
+            except Exception as e:
+                # Includes partitions written before updated_at / remote_count were kept
+                print(f"   ⚠️ Discarding unreadable price cache partition {pokequant_product_id}: {e}")
+                partition = self._empty_partition()
+                watermark = remote_count = None
+
+        self._partitions[pokequant_product_id] = partition
+        self._watermarks[pokequant_product_id] = watermark
+        self._remote_counts[pokequant_product_id] = remote_count
+        return partition
+
+    def _save(self, pokequant_product_id: str):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(pokequant_product_id)
+        tmp_path = f"{path}.tmp.npz"
+
+        remote_count = self._remote_counts.get(pokequant_product_id)
+        np.savez(tmp_path, watermark=np.array(self._watermarks.get(pokequant_product_id) or ''),
+                 remote_count=np.array(-1 if remote_count is None else remote_count),
+                 **self._partitions[pokequant_product_id])
+        os.replace(tmp_path, path)  # Readers never see a half-written partition
+
+    def sync(self, pokequant_product_id: str, force: bool = False) -> int:
+        """Pull rows newer than the partition's watermark, then reconcile its row count; returns rows fetched"""
+        with self._lock:
+            self._load(pokequant_product_id)
+
+            last_sync = self._last_sync.get(pokequant_product_id)
+            if not force and last_sync is not None and time.monotonic() - last_sync < self.sync_interval_seconds:
+                return 0
+
+            watermark = self._watermarks.get(pokequant_product_id)
+            count_before = self._remote_counts.get(pokequant_product_id)
+            since = self._parse_ts(watermark) - WATERMARK_OVERLAP if watermark else None
+            new_rows = self._fetch_rows([pokequant_product_id], since)
+            fetched = len(new_rows)
+
+            if watermark:
+                added = self._merge_rows(pokequant_product_id, new_rows) if new_rows else 0
+                fetched += self._reconcile([pokequant_product_id], {pokequant_product_id: added})
+            else:
+                # Full fetch: what Supabase returned is the whole partition
+                self._reset(pokequant_product_id)
+                if new_rows:
+                    self._merge_rows(pokequant_product_id, new_rows)
+                self._remote_counts[pokequant_product_id] = len(new_rows)
+
+            if fetched or self._remote_counts.get(pokequant_product_id) != count_before:
+                self._save(pokequant_product_id)
+            self._last_sync[pokequant_product_id] = time.monotonic()
+            return fetched
+
+    def sync_many(self, pokequant_product_ids: List[str], force: bool = False, chunk_size: int = 100) -> int:
+        """
+        Delta sync many partitions with a few requests instead of one per product
+
+        Products are pulled chunk_size at a time with one in_() query starting at the
+        oldest watermark in the chunk. Rows a partition already holds are merged again
+        harmlessly (the merge is keyed by date/source/condition). A chunk with a new
+        partition is fetched in full and replaces what the others held. Returns rows fetched.
+        """
+        with self._lock:
+            now = time.monotonic()
+            due = []
+            for pokequant_product_id in dict.fromkeys(pokequant_product_ids):
+                self._load(pokequant_product_id)
+                last_sync = self._last_sync.get(pokequant_product_id)
+                if force or last_sync is None or now - last_sync >= self.sync_interval_seconds:
+                    due.append(pokequant_product_id)
+
+            fetched = 0
+            for i in range(0, len(due), chunk_size):
+                chunk = due[i:i + chunk_size]
+                watermarks = [self._watermarks.get(pokequant_product_id) for pokequant_product_id in chunk]
+                since = None
+                if all(watermarks):
+                    since = min(self._parse_ts(watermark) for watermark in watermarks) - WATERMARK_OVERLAP
+
+                counts_before = {pokequant_product_id: self._remote_counts.get(pokequant_product_id) for pokequant_product_id in chunk}
+                rows_by_product: Dict[str, List[Dict[str, Any]]] = {}
+                for row in self._fetch_rows(chunk, since):
+                    rows_by_product.setdefault(row['pokequant_product_id'], []).append(row)
+                    fetched += 1
+
+                added = {}
+                for pokequant_product_id in chunk:
+                    rows = rows_by_product.get(pokequant_product_id, [])
+                    if since is None:
+                        # Full fetch: what Supabase returned is the whole partition
+                        self._reset(pokequant_product_id)
+                        self._remote_counts[pokequant_product_id] = len(rows)
+                    if rows:
+                        added[pokequant_product_id] = self._merge_rows(pokequant_product_id, rows)
+
+                if since is not None:
+                    fetched += self._reconcile(chunk, added)
+
+                synced_at = time.monotonic()
+                for pokequant_product_id in chunk:
+                    if pokequant_product_id in rows_by_product or self._remote_counts.get(pokequant_product_id) != counts_before[pokequant_product_id]:
+                        self._save(pokequant_product_id)
+                    self._last_sync[pokequant_product_id] = synced_at
+
+            return fetched
+
+    def _fetch_rows(self, pokequant_product_ids: List[str], since: Optional[datetime]) -> List[Dict[str, Any]]:
+        """Rows of the given products written after since (everything when since is None), paged"""
+        rows = []
+        start = 0
+
+        while True:
+            query = self.supabase.table('pokequant_price_series').select('*')
+            if len(pokequant_product_ids) == 1:
+                query = query.eq('pokequant_product_id', pokequant_product_ids[0])
+            else:
+                query = query.in_('pokequant_product_id', pokequant_product_ids)
+            if since:
+                query = query.gt(WATERMARK_COLUMN, since.isoformat())
+            result = query.order(WATERMARK_COLUMN).range(start, start + self.page_size - 1).execute()
+
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < self.page_size:
+                return rows
+            start += self.page_size
+
+    def _remote_count(self, pokequant_product_ids: List[str]) -> Optional[int]:
+        """Rows Supabase holds for the given products (None if the client doesn't report counts)"""
+        query = self.supabase.table('pokequant_price_series').select('id', count='exact')
+        if len(pokequant_product_ids) == 1:
+            query = query.eq('pokequant_product_id', pokequant_product_ids[0])
+        else:
+            query = query.in_('pokequant_product_id', pokequant_product_ids)
+        return getattr(query.limit(1).execute(), 'count', None)
+
+    def _reconcile(self, pokequant_product_ids: List[str], added: Dict[str, int]) -> int:
+        """
+        Fully resync partitions whose remote row count isn't what the delta explains
+
+        Expected count = count at the last reconcile + rows the delta added, so rows deleted
+        (or missed) upstream show up as a mismatch. Several products are checked with one
+        total first and only counted one by one when it doesn't match. Returns rows re-fetched.
+        """
+        expected = {}
+        for pokequant_product_id in pokequant_product_ids:
+            known = self._remote_counts.get(pokequant_product_id)
+            expected[pokequant_product_id] = None if known is None else known + added.get(pokequant_product_id, 0)
+
+        if len(pokequant_product_ids) > 1 and None not in expected.values():
+            total = self._remote_count(pokequant_product_ids)
+            if total is None:
+                return 0
+            if total == sum(expected.values()):
+                self._remote_counts.update(expected)
+                return 0
+
+        fetched = 0
+        for pokequant_product_id in pokequant_product_ids:
+            count = self._remote_count([pokequant_product_id])
+            if count is None:
+                continue
+            if expected[pokequant_product_id] is not None and count != expected[pokequant_product_id]:
+                print(f"   ♻️ Price cache partition {pokequant_product_id} has {expected[pokequant_product_id]} rows, "
+                      f"Supabase {count} - fetching it again")
+                self._reset(pokequant_product_id)
+                rows = self._fetch_rows([pokequant_product_id], None)
+                if rows:
+                    self._merge_rows(pokequant_product_id, rows)
+                count = len(rows)
+                fetched += count
+            self._remote_counts[pokequant_product_id] = count
+
+        return fetched
+
+    def _reset(self, pokequant_product_id: str):
+        self._partitions[pokequant_product_id] = self._empty_partition()
+        self._watermarks[pokequant_product_id] = None
+        self._remote_counts[pokequant_product_id] = None
+
+    def _merge_rows(self, pokequant_product_id: str, rows: List[Dict[str, Any]]) -> int:
+        """
+        Merge fetched rows into a partition - newer rows replace the same date/source/condition
+
+        Returns how many rows are new to the partition (by row id; upserts keep the id).
+        """
+        partition = self._partitions[pokequant_product_id]
+        known_ids = set(partition['id'].tolist())
+        merged = {}
+
+        for i in range(len(partition['price'])):
+            row = {column: partition[column][i] for column in PRICE_SERIES_COLUMNS}
+            merged[(str(row['price_date']), str(row['source']), str(row['condition_category']))] = row
+
+        watermark = self._watermarks.get(pokequant_product_id)
+        added = 0
+        for row in rows:
+            if str(row.get('id') or '') not in known_ids:
+                added += 1
+            price_date = str(row['price_date'])[:10]
+            merged[(price_date, row['source'], row.get('condition_category') or '')] = {
+                'id': str(row.get('id') or ''),
+                'price_date': price_date,
+                'price': float(row['price']),
+                'source': row['source'],
+                'condition_category': row.get('condition_category') or '',
+                'data_confidence': float(row['data_confidence']) if row.get('data_confidence') is not None else 1.0,
+                'listing_count': int(row['listing_count']) if row.get('listing_count') is not None else 1,
+                'created_at': row.get('created_at') or '',
+                'updated_at': row.get(WATERMARK_COLUMN) or '',
+            }
+            updated_at = row.get(WATERMARK_COLUMN)
+            if updated_at and (not watermark or self._parse_ts(updated_at) > self._parse_ts(watermark)):
+                watermark = updated_at
+
+        ordered = sorted(merged.values(), key=lambda r: (str(r['price_date']), str(r['source']), str(r['condition_category'])))
+        self._partitions[pokequant_product_id] = {
+            'id': np.array([str(r['id']) for r in ordered], dtype=str),
+            'price_date': np.array([str(r['price_date']) for r in ordered], dtype='datetime64[D]'),
+            'price': np.array([r['price'] for r in ordered], dtype=np.float64),
+            'source': np.array([str(r['source']) for r in ordered], dtype=str),
+            'condition_category': np.array([str(r['condition_category']) for r in ordered], dtype=str),
+            'data_confidence': np.array([r['data_confidence'] for r in ordered], dtype=np.float64),
+            'listing_count': np.array([r['listing_count'] for r in ordered], dtype=np.int64),
+            'created_at': np.array([str(r['created_at']) for r in ordered], dtype=str),
+            'updated_at': np.array([str(r['updated_at']) for r in ordered], dtype=str),
+        }
+        self._watermarks[pokequant_product_id] = watermark
+        return added
+
+    @staticmethod
+    def _parse_ts(value: str) -> datetime:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+    def get_arrays(self, pokequant_product_id: str, days_back: int = None) -> Dict[str, np.ndarray]:
+        """Column arrays for a product sorted by price_date (synced with Supabase first)"""
+        with self._lock:
+            self.sync(pokequant_product_id)
+            partition = self._partitions[pokequant_product_id]
+
+            if days_back:
+                cutoff = np.datetime64((datetime.now() - timedelta(days=days_back)).date().isoformat(), 'D')
+                mask = partition['price_date'] >= cutoff
+                return {column: values[mask] for column, values in partition.items()}
+
+            return dict(partition)
+
+    def get_rows(self, pokequant_product_id: str, days_back: int = None) -> List[Dict[str, Any]]:
+        """Price points as row dicts, in the shape Supabase returns them"""
+        arrays = self.get_arrays(pokequant_product_id, days_back)
+
+        return [
+            {
+                'id': str(arrays['id'][i]) or None,
+                'pokequant_product_id': pokequant_product_id,
+                'price_date': str(arrays['price_date'][i]),
+                'price': float(arrays['price'][i]),
+                'source': str(arrays['source'][i]),
+                'condition_category': str(arrays['condition_category'][i]) or None,
+                'data_confidence': float(arrays['data_confidence'][i]),
+                'listing_count': int(arrays['listing_count'][i]),
+                'created_at': str(arrays['created_at'][i]) or None,
+                'updated_at': str(arrays['updated_at'][i]) or None,
+            }
+            for i in range(len(arrays['price']))
+        ]
+
+    def mark_stale(self, pokequant_product_id: str):
+        """Force a delta check on the next read (e.g. right after writing new points)"""
+        with self._lock:
+            self._last_sync.pop(pokequant_product_id, None)
+
+    def invalidate(self, pokequant_product_id: str):
+        """Drop a partition entirely (call after deleting its rows upstream)"""
+        with self._lock:
+            self._partitions.pop(pokequant_product_id, None)
+            self._watermarks.pop(pokequant_product_id, None)
+            self._remote_counts.pop(pokequant_product_id, None)
+            self._last_sync.pop(pokequant_product_id, None)
+
+            path = self._path(pokequant_product_id)
+            if os.path.exists(path):
+                os.remove(path)
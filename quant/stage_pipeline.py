@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Stage Pipeline
+Declarative stage DAG for the analysis orchestrators, run on a thread pool so that
+independent (mostly I/O bound) stages overlap
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+class StopPipeline(Exception):
+    """
+    Raised by a stage to end the run early (product not found, cached analysis, ...)
+
+    The stage's output is still recorded. Stages already running are allowed to finish;
+    nothing new is started.
+    """
+
+    def __init__(self, reason: str, output: Any = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.output = output
+
+@dataclass
+class Stage:
+    """
+    One pipeline stage
+
+    run receives the outputs of the stages finished so far, keyed by stage name, and
+    starts as soon as every stage in depends_on has finished. When `when` is given and
+    returns False for those outputs, the stage is not run and `skipped` is recorded as
+    its output instead.
+    """
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+    when: Optional[Callable[[Dict[str, Any]], bool]] = None
+    skipped: Any = None
+
+@dataclass
+class PipelineRun:
+    """Outputs and wall times of one pipeline run"""
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    wall_times: Dict[str, float] = field(default_factory=dict)
+    stopped_by: Optional[str] = None
+    stop_reason: Optional[str] = None
+    wall_time: float = 0.0
+
+    def timed_outputs(self) -> Dict[str, Any]:
+        """Outputs with each dict output's wall time added as 'wall_time_seconds' (copies, outputs untouched)"""
+        timed = {}
+        for name, output in self.outputs.items():
+            if isinstance(output, dict):
+                output = dict(output, wall_time_seconds=round(self.wall_times.get(name, 0.0), 3))
+            timed[name] = output
+        return timed
+
+class StagePipeline:
+    """Runs a stage DAG, starting every stage whose dependencies are done"""
+
+    def __init__(self, stages: List[Stage], max_workers: int = 4):
+        """
+        Args:
+            stages: The stages, in any order that reads well (dependencies decide the schedule)
+            max_workers: Stages allowed to run at once
+        """
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage: {stage.name}")
+            self.stages[stage.name] = stage
+        self.max_workers = max_workers
+        self._check_graph()
+
+    def _check_graph(self):
+        """Reject unknown dependencies and cycles up front"""
+        for stage in self.stages.values():
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dependency}'")
+
+        done = set()
+        remaining = dict(self.stages)
+        while remaining:
+            ready = [name for name, stage in remaining.items() if all(dep in done for dep in stage.depends_on)]
+            if not ready:
+                raise ValueError(f"Stage dependencies form a cycle: {sorted(remaining)}")
+            for name in ready:
+                done.add(name)
+                del remaining[name]
+
+    @staticmethod
+    def _run_stage(stage: Stage, outputs: Dict[str, Any]) -> Tuple[Any, Optional[BaseException], float]:
+        started = time.monotonic()
+        try:
+            return stage.run(outputs), None, time.monotonic() - started
+        except Exception as e:
+            return None, e, time.monotonic() - started
+
+    def run(self) -> PipelineRun:
+        """
+        Run every stage once its dependencies are done
+
+        Returns the run's outputs and wall times. If a stage raises anything other than
+        StopPipeline, the stages already running finish and the exception is re-raised.
+        """
+        run = PipelineRun()
+        started = time.monotonic()
+        remaining = dict(self.stages)
+        running = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                # Start (or skip) everything that has become ready; skipping can unblock more
+                progressed = True
+                while progressed and run.stopped_by is None and error is None:
+                    progressed = False
+                    for name, stage in list(remaining.items()):
+                        if not all(dep in run.outputs for dep in stage.depends_on):
+                            continue
+                        del remaining[name]
+                        if stage.when is not None and not stage.when(run.outputs):
+                            run.outputs[name] = stage.skipped
+                            run.wall_times[name] = 0.0
+                            progressed = True
+                        else:
+                            running[executor.submit(self._run_stage, stage, dict(run.outputs))] = stage
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    output, stage_error, elapsed = future.result()
+                    run.wall_times[stage.name] = elapsed
+
+                    if isinstance(stage_error, StopPipeline):
+                        run.outputs[stage.name] = stage_error.output
+                        if run.stopped_by is None:
+                            run.stopped_by, run.stop_reason = stage.name, stage_error.reason
+                    elif stage_error is not None:
+                        error = error or stage_error
+                    else:
+                        run.outputs[stage.name] = output
+
+        run.wall_time = time.monotonic() - started
+        if error is not None:
+            raise error
+        return run
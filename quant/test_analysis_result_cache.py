@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test fingerprint-keyed analysis reuse: hits skip the price tables, input changes recompute
+"""
+
+import sys
+import os
+import io
+import contextlib
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import quant.pokequant_main as pokequant_main
+from quant.analysis_cache import AnalysisResultCache
+from tests.watchlist_fixtures import fake_client, watchlist_orchestrator, price_series_rows, watchlist_tables
+
+def _watchlist_client():
+    client = fake_client(watchlist_tables(card_count=3))
+    client.tables['pokequant_analyses'] = []
+    client.tables['pokequant_products'] = [
+        {'id': f"pq-{n}", 'product_type': 'card', 'product_id': str(n), 'product_name': f"Card {n}",
+         'set_name': 'Test Set', 'last_data_update': '2024-03-01T00:00:00'}
+        for n in (2, 3)
+    ]
+    client.tables['pokequant_price_series'] = price_series_rows('pq-2', 50, days=20) + price_series_rows('pq-3', 80, days=20)
+    return client
+
+def _analyze(client, orchestrator=None):
+    client.requests = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        return (orchestrator or watchlist_orchestrator(client)).analyze_products(['Card 2', 'Card 3'], max_workers=0)
+
+def test_analyses_are_reused_until_an_input_changes():
+    client = _watchlist_client()
+    assert _analyze(client)['analyzed'] == 2
+
+    # Nothing changed: both come from pokequant_analyses and no price series is read
+    batch = _analyze(client)
+    assert batch['cached'] == 2 and batch['analyzed'] == 0
+    assert ('pokequant_price_series', 'select') not in client.requests
+
+    # New price data landed for card 2 (the aggregators bump last_data_update)
+    client.tables['pokequant_products'][0]['last_data_update'] = '2024-03-02T00:00:00'
+    batch = _analyze(client)
+    assert batch['cached'] == 1 and batch['analyzed'] == 1
+    assert not batch['results'][0]['used_cached_analysis'] and batch['results'][1]['used_cached_analysis']
+
+    # A new filter configuration invalidates everything, however recent
+    filter_version = pokequant_main.FILTER_VERSION
+    pokequant_main.FILTER_VERSION = filter_version + '-next'
+    try:
+        assert _analyze(client)['analyzed'] == 2
+    finally:
+        pokequant_main.FILTER_VERSION = filter_version
+    assert len(client.tables['pokequant_analyses']) == 5
+
+def test_local_tier_answers_repeat_lookups():
+    client = _watchlist_client()
+    orchestrator = watchlist_orchestrator(client)
+    _analyze(client, orchestrator)
+
+    # The rows just stored are served locally: only the watermark lookup reaches Supabase
+    batch = _analyze(client, orchestrator)
+    assert batch['cached'] == 2
+    assert ('pokequant_analyses', 'select') not in client.requests
+    assert client.requests.count(('pokequant_products', 'select')) == 2  # registration + watermarks
+
+    fingerprint = batch['results'][0]['final_analysis']['analysis_metadata']['input_fingerprint']
+    assert orchestrator._analysis_input_fingerprint('pq-2') == fingerprint
+
+def test_lru_eviction_and_optional_age_limit():
+    client = fake_client({'pokequant_analyses': []})
+    cache = AnalysisResultCache(client, max_entries=2)
+    now = datetime.now()
+
+    for n in range(3):
+        cache.put({'input_fingerprint': f"fp-{n}", 'analysis_date': now.isoformat()})
+    cache.put({'analysis_date': now.isoformat()})  # No fingerprint, not cacheable
+    assert len(cache) == 2
+
+    client.requests = []
+    assert cache.get('fp-2') and cache.get('fp-1') and client.requests == []
+    assert cache.get('fp-0') is None and client.requests == [('pokequant_analyses', 'select')]
+
+    aged = AnalysisResultCache(client, max_age_hours=24)
+    aged.put({'input_fingerprint': 'old', 'analysis_date': (now - timedelta(hours=30)).isoformat()})
+    aged.put({'input_fingerprint': 'new', 'analysis_date': (datetime.now(timezone.utc) - timedelta(hours=2)).isoformat()})
+    assert aged.get('new') and aged.get('old') is None
+
+def test_stale_data_is_collected_instead_of_serving_the_stored_analysis():
+    client = fake_client(watchlist_tables(card_count=1))
+    orchestrator = watchlist_orchestrator(client)
+    collected = []
+    freshness = {'is_fresh': True, 'recommended_action': 'use_cache'}
+    orchestrator.freshness_checker.check_product_freshness = lambda product_name: dict(freshness)
+    orchestrator._collect_ebay_data = lambda product: collected.append('ebay') or {'ebay_scraping': {'status': 'success'}}
+    orchestrator._collect_pricecharting_data = lambda product: collected.append('pricecharting') or {}
+    client.tables['pokequant_price_series'] = price_series_rows('pq-1', 50, days=20)
+
+    record_product_demand = pokequant_main.record_product_demand
+    pokequant_main.record_product_demand = lambda product_type, product_id: None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Fresh data: card 1's stored analysis still matches its inputs
+            assert orchestrator.analyze_product('Card 1')['used_cached_analysis']
+            assert collected == []
+
+            # Stale data: scraped and analyzed again even though the stored fingerprint matches
+            freshness.update(is_fresh=False, recommended_action='scrape_ebay_only')
+            result = orchestrator.analyze_product('Card 1')
+    finally:
+        pokequant_main.record_product_demand = record_product_demand
+
+    assert result['success'] and not result['used_cached_analysis']
+    assert result['stages']['cached_analysis']['status'] == 'skipped'
+    assert collected == ['ebay']
+
+def test_stored_analyses_expire_by_default():
+    assert AnalysisResultCache(fake_client({})).max_age_hours == 24
+    assert pokequant_main.PokeQuantOrchestrator(parse_workers=0).analysis_cache.max_age_hours == 24
+
+if __name__ == "__main__":
+    test_analyses_are_reused_until_an_input_changes()
+    test_local_tier_answers_repeat_lookups()
+    test_lru_eviction_and_optional_age_limit()
+    test_stale_data_is_collected_instead_of_serving_the_stored_analysis()
+    test_stored_analyses_expire_by_default()
+    print("✅ All analysis result cache tests passed")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test batch watchlist analysis: bulk lookups, prefetched price series, batched inserts
+"""
+
+import sys
+import os
+import io
+import tempfile
+import threading
+import contextlib
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.watchlist_fixtures import fake_client, watchlist_orchestrator, price_series_rows, watchlist_tables
+
+def test_batch_round_trips_do_not_grow_with_the_watchlist():
+    client = fake_client(watchlist_tables(card_count=30))
+    # The new products get registered as pokequant_products-<n> in insertion order
+    for n in range(2, 33):
+        client.tables['pokequant_price_series'].extend(price_series_rows(f"pokequant_products-{n}", 100 + n, days=20))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        batch = watchlist_orchestrator(client).analyze_products(
+            [f"Card {i}" for i in range(1, 31)] + [('sealed', 7), 'Card 5'], max_workers=4)
+
+    assert batch['total'] == 31  # 'Card 5' twice is analyzed once
+    assert batch['cached'] == 1 and batch['analyzed'] == 30 and batch['failed'] == 0
+    assert batch['stored'] == 30 and len(client.tables['pokequant_analyses']) == 31
+
+    # name index load (one page per table), sealed by ID, products lookup per type + insert, price
+    # watermarks, cached analyses, one page of price series, analyses insert - regardless of how
+    # many products are listed
+    assert len(client.requests) == 10
+    assert client.requests.count(('pokequant_analyses', 'insert')) == 1
+
+    first = batch['results'][0]
+    assert first['used_cached_analysis'] and first['final_analysis']['recommendation']['recommendation'] == 'HOLD'
+    booster = next(result for result in batch['results'] if result['product_name'] == 'sealed:7')
+    assert booster['final_analysis']['metrics']['price_stats']['minimum'] > 0
+
+def test_batch_matches_single_product_analysis():
+    client = fake_client(watchlist_tables(card_count=2))
+    client.tables['pokequant_products'].append({'id': 'pq-2', 'product_type': 'card', 'product_id': '2',
+                                                 'product_name': 'Card 2', 'set_name': 'Test Set'})
+    client.tables['pokequant_price_series'] = price_series_rows('pq-2', 50)
+
+    with tempfile.TemporaryDirectory() as cache_dir, contextlib.redirect_stdout(io.StringIO()):
+        orchestrator = watchlist_orchestrator(client, cache_dir)
+        batch = orchestrator.analyze_products([('card', 2)], max_workers=0)
+
+        # Stages 4-6 of analyze_product, each loading its own data
+        single = watchlist_orchestrator(client)
+        analysis = single._perform_quantitative_analysis(single._prepare_analysis_data(single._find_product('Card 2')))
+        recommendation = single._generate_recommendation(analysis)
+
+    result = batch['results'][0]
+    assert result['success'] and not result['used_cached_analysis']
+    assert result['final_analysis']['metrics'] == analysis['metrics']
+    assert result['final_analysis']['recommendation'] == recommendation
+
+def test_unknown_products_are_reported_not_fatal():
+    client = fake_client(watchlist_tables(card_count=1))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        batch = watchlist_orchestrator(client).analyze_products(['No Such Card', ('card', 999)], force_analysis=True)
+
+    assert batch['not_found'] == 2 and batch['failed'] == 2 and batch['stored'] == 0
+    assert all('not found' in result['error'] for result in batch['results'])
+
+def test_missing_series_are_aggregated_before_the_thread_pool():
+    client = fake_client(watchlist_tables(card_count=3))
+    client.tables['pokequant_products'] = [{'id': f"pq-{n}", 'product_type': 'card', 'product_id': str(n),
+                                            'product_name': f"Card {n}", 'set_name': 'Test Set'} for n in (2, 3)]
+    orchestrator = watchlist_orchestrator(client)
+
+    # Aggregation writes the shared watermark file: it must not run in the pool's threads
+    aggregated = []
+    def aggregate_ebay_data(product_type, product_id, product_name, set_name=None):
+        aggregated.append((product_id, threading.current_thread()))
+        if product_id == '3':
+            return {'success': False}
+        client.tables['pokequant_price_series'].extend(price_series_rows(f"pq-{product_id}", 60))
+        return {'success': True}
+    orchestrator.price_data_service.aggregate_ebay_data = aggregate_ebay_data
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        batch = orchestrator.analyze_products(['Card 2', 'Card 3'], max_workers=4)
+
+    assert aggregated == [('2', threading.main_thread()), ('3', threading.main_thread())]  # once each
+    assert batch['analyzed'] == 1 and batch['failed'] == 1
+    assert batch['results'][1]['error'] == 'Insufficient data for analysis'
+
+if __name__ == "__main__":
+    test_batch_round_trips_do_not_grow_with_the_watchlist()
+    test_batch_matches_single_product_analysis()
+    test_unknown_products_are_reported_not_fatal()
+    test_missing_series_are_aggregated_before_the_thread_pool()
+    print("✅ All batch analysis tests passed")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test the catalog-wide freshness snapshot behind DataFreshnessChecker and
+eBaySupabaseUploader.get_cards_needing_updates
+"""
+
+import sys
+import os
+import io
+import tempfile
+import contextlib
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quant.freshness_checker import DataFreshnessChecker
+from freshness_snapshot import FreshnessSnapshot
+from ebay_to_supabase import eBaySupabaseUploader
+from listing_index import ListingIdentityIndex
+from tests.fake_supabase import FakeSupabase, FakeResult
+
+NOW = datetime.now(timezone.utc)
+
+def _days_ago(days):
+    return (NOW - timedelta(days=days)).isoformat()
+
+def _client(tables):
+    # Unknown tables raise, like the freshness view before its migration is applied
+    return FakeSupabase(tables, create_missing_tables=False)
+
+def _tables_read(client):
+    return [table for table, _ in client.requests]
+
+def _listings():
+    sold = [{'id': i, 'card_id': 1, 'created_at': _days_ago(20 - i)} for i in range(5)]   # newest 16 days ago
+    sold += [{'id': 10 + i, 'card_id': 2, 'created_at': _days_ago(i + 1)} for i in range(3)]  # newest 1 day ago
+    sealed = [{'id': 1, 'sealed_product_id': 7, 'created_at': _days_ago(2)}]
+    return {'ebay_sold_listings': sold, 'ebay_sealed_listings': sealed}
+
+def test_fallback_scan_groups_listings_by_product():
+    client = _client(_listings())
+    snapshot = FreshnessSnapshot(client, cache_path=None, page_size=2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        snapshot.refresh()
+
+    assert snapshot.get('card', 1) == (5, datetime.fromisoformat(_days_ago(16)))
+    assert snapshot.get('card', '2')[0] == 3
+    assert snapshot.get('sealed', 7)[0] == 1
+    assert snapshot.get('card', 3) == (0, None)
+
+def test_summary_view_is_used_when_installed():
+    tables = _listings()
+    tables['ebay_listing_freshness'] = [
+        {'product_type': 'card', 'product_id': '1', 'listing_count': 5, 'last_update': _days_ago(16)},
+        {'product_type': 'card', 'product_id': '2', 'listing_count': 3, 'last_update': _days_ago(1)},
+    ]
+    client = _client(tables)
+    snapshot = FreshnessSnapshot(client, cache_path=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        snapshot.refresh()
+
+    assert _tables_read(client) == ['ebay_listing_freshness']
+    assert snapshot.get('card', 2)[0] == 3
+
+def test_snapshot_is_reused_from_disk_until_the_ttl_expires():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = os.path.join(cache_dir, 'freshness.json')
+        with contextlib.redirect_stdout(io.StringIO()):
+            FreshnessSnapshot(_client(_listings()), cache_path=cache_path).refresh()
+
+            client = _client(_listings())
+            reloaded = FreshnessSnapshot(client, cache_path=cache_path)
+            assert reloaded.get('card', 1)[0] == 5
+            assert client.requests == []
+
+            expired = FreshnessSnapshot(client, cache_path=cache_path, ttl_seconds=0)
+            expired.get('card', 1)
+            assert client.requests
+
+def test_stale_products_come_from_the_snapshot():
+    tables = _listings()
+    tables['pokequant_products'] = [
+        {'id': 'a', 'product_type': 'card', 'product_id': '1', 'product_name': 'Old Card', 'last_data_update': None},
+        {'id': 'b', 'product_type': 'card', 'product_id': '2', 'product_name': 'Fresh Card', 'last_data_update': None},
+        {'id': 'c', 'product_type': 'sealed', 'product_id': '9', 'product_name': 'Never Scraped', 'last_data_update': None},
+        # No recent listings, but aggregated recently
+        {'id': 'd', 'product_type': 'card', 'product_id': '3', 'product_name': 'Aggregated', 'last_data_update': _days_ago(1)},
+    ]
+    client = _client(tables)
+    checker = DataFreshnessChecker(max_age_days=7, snapshot=FreshnessSnapshot(client, cache_path=None), supabase_client=client)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        stale = checker.get_stale_products()
+        requests_before_check = len(client.requests)
+        fresh_info = checker._check_ebay_data('card', '2')
+
+    assert [p['product_name'] for p in stale] == ['Never Scraped', 'Old Card']
+    assert stale[1]['ebay_listing_count'] == 5
+    # A fresh product is answered from the snapshot without per-product queries
+    assert fresh_info['ebay_listing_count'] == 3 and fresh_info['days_old'] == 1
+    assert len(client.requests) == requests_before_check
+
+def test_cards_needing_updates_use_one_snapshot_instead_of_a_query_per_card():
+    tables = _listings()
+    tables['pokemon_cards'] = [{'id': card_id, 'card_name': f'Card {card_id}', 'set_name': 'Base', 'number': str(card_id)}
+                               for card_id in range(1, 201)]
+    client = _client(tables)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        uploader = eBaySupabaseUploader()
+        uploader.supabase = client
+        uploader.freshness = FreshnessSnapshot(client, cache_path=None)
+        cards = uploader.get_cards_needing_updates(days_threshold=7)
+
+    assert len(cards) == 199  # everything except card 2
+    assert cards[0]['card_name'] == 'Card 1' and cards[0]['days_since_update'] == 16
+    assert cards[1]['last_update'] is None
+    assert len(client.requests) < 10
+
+def test_uploads_refresh_the_snapshot_in_place():
+    client = _client(_listings())
+
+    with tempfile.TemporaryDirectory() as cache_dir, contextlib.redirect_stdout(io.StringIO()):
+        cache_path = os.path.join(cache_dir, 'freshness.json')
+        uploader = eBaySupabaseUploader()
+        uploader.supabase = client
+        uploader.freshness = FreshnessSnapshot(client, cache_path=cache_path)
+        uploader.listing_index = ListingIdentityIndex(client, index_dir=os.path.join(cache_dir, 'listing_index'))
+        assert uploader.freshness.last_update('card', 1) < NOW - timedelta(days=7)
+
+        # Card 1 is scraped again: it counts as fresh right away, here and in other processes
+        uploader._write_listing_batch = lambda table_name, batch: FakeResult(batch)
+        uploader._batch_upload_listings([{'card_id': 1, 'title': 'Card 1'}, {'card_id': 1, 'title': 'Card 1 PSA 9'}])
+
+        assert uploader.freshness.get('card', 1)[0] == 7
+        assert uploader.freshness.last_update('card', 1) > NOW
+        assert FreshnessSnapshot(client, cache_path=cache_path).get('card', 1)[0] == 7
+        assert _tables_read(client).count('ebay_listing_freshness') == 1  # Never rebuilt
+
+if __name__ == "__main__":
+    test_fallback_scan_groups_listings_by_product()
+    test_summary_view_is_used_when_installed()
+    test_snapshot_is_reused_from_disk_until_the_ttl_expires()
+    test_stale_products_come_from_the_snapshot()
+    test_cards_needing_updates_use_one_snapshot_instead_of_a_query_per_card()
+    test_uploads_refresh_the_snapshot_in_place()
+    print("✅ All freshness snapshot tests passed")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Test incremental eBay aggregation keyed on the per-product created_at watermark
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import threading
+import contextlib
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quant.price_data_service import PriceDataService, LISTING_FILTER_COLUMNS
+from tests.fake_supabase import FakeSupabase
+
+def _client(listings):
+    return FakeSupabase({'ebay_sold_listings': listings})
+
+def _price_points(client):
+    """Stored points by (date, condition); a test clears the table to see what a run writes"""
+    return {(row['price_date'], row['condition_category']): row for row in client.tables.get('pokequant_price_series', [])}
+
+def _listing(listing_id, day, price, created_day, graded=False):
+    return {
+        'id': listing_id,
+        'card_id': 'card-1',
+        'title': 'Charizard Base Set',
+        'price': price,
+        'is_graded': graded,
+        'sold_date': f"2024-03-{day:02d}T00:00:00+00:00",
+        'created_at': f"2024-03-{created_day:02d}T10:00:00+00:00",
+    }
+
+def _service(client, state_dir, page_size=1000):
+    service = PriceDataService(watermark_path=os.path.join(state_dir, 'watermarks.json'), page_size=page_size)
+    service.supabase = client
+    return service
+
+def _aggregate(service, incremental):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return service.aggregate_ebay_data('card', 'card-1', 'Charizard Base Set', 'Base Set', incremental=incremental)
+
+def _full_points(listings, state_dir):
+    client = _client(list(listings))
+    _aggregate(_service(client, state_dir), incremental=False)
+    return _price_points(client)
+
+def _assert_same_points(client, full_points):
+    points = _price_points(client)
+    for bucket, point in full_points.items():
+        assert points[bucket]['price'] == point['price'], bucket
+        assert points[bucket]['listing_count'] == point['listing_count'], bucket
+
+def test_only_dates_with_new_listings_are_recomputed():
+    # Listings are scraped on the day they sell
+    history = [_listing(i, 1 + i % 20, 100.0 + i % 7, 1 + i % 20) for i in range(200)]
+    client = _client(history)
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        first = _aggregate(_service(client, state_dir), incremental=True)
+        assert first['mode'] == 'full'  # no watermark yet
+        assert first['raw_listings'] == 200
+
+        # Two new sales on March 5th, one undated sale created on the 25th
+        client.tables['ebay_sold_listings'] += [
+            _listing(500, 5, 104.5, 25),
+            _listing(501, 5, 105.5, 25),
+            dict(_listing(502, 25, 103.0, 25), sold_date=None),
+        ]
+        client.tables['pokequant_price_series'] = []
+
+        # A new process picks the watermark up from disk
+        service = _service(client, state_dir)
+        result = _aggregate(service, incremental=True)
+
+        assert result['mode'] == 'incremental'
+        # The watermark overlap window also re-reads the last batch aggregated (March 20th)
+        assert result['new_listings'] == 3 + 10
+        assert result['recomputed_dates'] == ['2024-03-05', '2024-03-20', '2024-03-25']
+        assert result['raw_listings'] == 12 + 10 + 1
+        # Only those dates are written
+        points = _price_points(client)
+        assert sorted(date for date, _ in points) == result['recomputed_dates']
+
+        # Exact medians over old and new sales, matching a full recompute
+        full_points = _full_points(client.tables['ebay_sold_listings'], state_dir + '/full')
+        for bucket in points:
+            assert points[bucket]['price'] == full_points[bucket]['price']
+            assert points[bucket]['listing_count'] == full_points[bucket]['listing_count']
+        assert points[('2024-03-05', 'raw')]['listing_count'] == 12
+
+        # Nothing new: only the overlap window is recomputed
+        again = _aggregate(service, incremental=True)
+        assert again['recomputed_dates'] == ['2024-03-05', '2024-03-25']
+        assert again['raw_listings'] == 13
+
+def test_outlier_bounds_come_from_the_whole_history():
+    # Prices spread over 80-120 on every date, plus a 300 sale that the IQR pass drops
+    history = [_listing(i, 1 + i % 20, 80.0 + (i * 7) % 41, 1 + i % 20) for i in range(200)]
+    history.append(_listing(200, 3, 300.0, 3))
+    client = _client(history)
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        _aggregate(_service(client, state_dir), incremental=False)
+        assert _price_points(client)[('2024-03-03', 'raw')]['listing_count'] == 10
+
+        # New sales on one date: 150 and 160 are outliers against the history, though not against
+        # the other listings of March 25th alone
+        client.tables['ebay_sold_listings'] += [_listing(300 + i, 25, price, 25)
+                                                for i, price in enumerate([150.0, 160.0, 155.0, 158.0, 90.0])]
+        result = _aggregate(_service(client, state_dir), incremental=True)
+        assert result['mode'] == 'incremental'
+        assert result['removed_listings'] == 4
+        _assert_same_points(client, _full_points(client.tables['ebay_sold_listings'], state_dir + '/full-1'))
+
+        # Enough sales at 100 to narrow the bounds: every date with a listing that moves
+        # across them is rewritten too, not only the date the new sales landed on
+        client.tables['ebay_sold_listings'] += [_listing(1000 + i, 26, 100.0, 26) for i in range(150)]
+        result = _aggregate(_service(client, state_dir), incremental=True)
+        assert len(result['recomputed_dates']) > 3
+        _assert_same_points(client, _full_points(client.tables['ebay_sold_listings'], state_dir + '/full-2'))
+
+def test_full_rows_are_read_only_for_new_listings_and_rewritten_dates():
+    history = [_listing(i, 1 + i % 20, 100.0 + i % 7, 1 + i % 20) for i in range(200)]
+    client = _client(history)
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        _aggregate(_service(client, state_dir), incremental=False)
+        client.tables['ebay_sold_listings'] += [_listing(500, 5, 104.5, 25), _listing(501, 5, 105.5, 25)]
+        client.queries = []
+        result = _aggregate(_service(client, state_dir), incremental=True)
+
+    assert result['recomputed_dates'] == ['2024-03-05', '2024-03-20']
+    reads = [query for query in client.queries if query.table == 'ebay_sold_listings']
+    # 12 rows past the watermark (2 new + the overlap window) and the 10 older sales of March 5th
+    assert sum(len(query.data) for query in reads if query.columns == '*') == 22
+    # The history the outlier bounds come from is read with the filter columns only
+    assert sum(len(query.data) for query in reads if query.columns == LISTING_FILTER_COLUMNS) == 202
+
+def test_listings_are_read_in_pages():
+    history = [_listing(i, 1 + i % 20, 100.0 + i % 7, 1 + i % 20) for i in range(250)]
+    client = _client(history)
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        result = _aggregate(_service(client, state_dir, page_size=100), incremental=False)
+
+    assert result['raw_listings'] == 250
+    assert client.requests.count(('ebay_sold_listings', 'select')) == 3
+    _assert_same_points(client, _full_points(history, state_dir + '-full'))
+
+def test_legacy_watermarks_recompute_every_date():
+    history = [_listing(i, 1 + i % 20, 100.0 + i % 7, 1 + i % 20) for i in range(200)]
+    client = _client(history)
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        service = _service(client, state_dir)
+        _aggregate(service, incremental=False)
+        pokequant_product_id = next(iter(service._load_aggregation_watermarks()))
+
+        # Files written before the bounds were recorded hold the bare created_at
+        with open(service.watermark_path, 'w') as f:
+            json.dump({pokequant_product_id: '2024-03-20T10:00:00+00:00'}, f)
+
+        result = _aggregate(_service(client, state_dir), incremental=True)
+        assert len(result['recomputed_dates']) == 20
+        assert _service(client, state_dir)._get_aggregation_bounds(pokequant_product_id) is not None
+
+def test_watermarks_saved_from_several_threads_are_all_kept():
+    with tempfile.TemporaryDirectory() as state_dir, contextlib.redirect_stdout(io.StringIO()) as output:
+        service = _service(_client([]), state_dir)
+
+        def advance(thread_number):
+            for n in range(25):
+                service._advance_aggregation_watermark(f"product-{thread_number}-{n}", [_listing(n, 1, 100.0, 1 + n % 28)], {})
+        threads = [threading.Thread(target=advance, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with open(service.watermark_path) as f:
+            assert len(json.load(f)) == 200
+    assert 'Failed to save' not in output.getvalue()
+
+if __name__ == "__main__":
+    test_only_dates_with_new_listings_are_recomputed()
+    test_outlier_bounds_come_from_the_whole_history()
+    test_full_rows_are_read_only_for_new_listings_and_rewritten_dates()
+    test_listings_are_read_in_pages()
+    test_legacy_watermarks_recompute_every_date()
+    test_watermarks_saved_from_several_threads_are_all_kept()
+    print("✅ All incremental aggregation tests passed")
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test the local pre-classifier tier in front of the LLM listing filter
+"""
+
+import sys
+import os
+import math
+import zlib
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quant.listing_pre_classifier import ListingPreClassifier
+from quant.llm_decision_cache import LLMDecisionCache
+from quant.llm_enhanced_filter import LLMEnhancedFilter, PROMPT_VERSION
+from tests.stub_gemini_model import StubGeminiModel
+
+def _listings():
+    clean = [{'title': f'Pokemon Brilliant Stars Booster Box Sealed #{i}', 'description': '', 'price': 120.0 + i}
+             for i in range(12)]
+    junk = [{'title': 'Pokemon Brilliant Stars 4 Packs', 'description': '', 'price': 20.0},
+            {'title': 'pokemon brilliant stars booster box lot of 5 damaged', 'description': '', 'price': 300.0}]
+    unsure = [{'title': 'Brilliant Stars Booster Box Japanese', 'description': '', 'price': 110.0},
+              {'title': 'Brilliant Stars Booster Box EMPTY', 'description': '', 'price': 125.0}]
+    return clean + junk + unsure
+
+def _trained_pre_classifier():
+    """Pre-classifier whose title model learned from earlier LLM decisions on this product"""
+    cache = LLMDecisionCache(None)
+    for i in range(20):
+        for title, action in ((f'Pokemon Brilliant Stars Booster Box Sealed {i}', 'keep'),
+                              (f'Brilliant Stars Booster Box Factory Sealed English {i}', 'keep'),
+                              (f'Brilliant Stars Booster Box Empty {i}', 'remove'),
+                              (f'Pokemon Brilliant Stars Booster Box Japanese {i}', 'remove')):
+            cache.put(LLMDecisionCache.make_key(title, 100 + i, 'booster_box', 'v1'), {'action': action},
+                      title, 'booster_box')
+    return ListingPreClassifier(decision_cache=cache)
+
+def test_rule_signals_alone_never_keep_locally():
+    classifications = ListingPreClassifier().classify(_listings(), 'booster_box')
+    assert [c.action for c in classifications] == ['escalate'] * 12 + ['remove'] * 2 + ['escalate'] * 2
+    assert max(c.keep_probability for c in classifications) < 0.9
+
+def test_confident_listings_are_decided_locally():
+    actions = [c.action for c in _trained_pre_classifier().classify(_listings(), 'booster_box')]
+    assert actions == ['keep'] * 12 + ['remove'] * 4
+
+def test_only_uncertain_listings_reach_the_llm():
+    model = StubGeminiModel(delay=0)
+    llm_filter = LLMEnhancedFilter(model=model, decision_cache=LLMDecisionCache(None),
+                                   pre_classifier=ListingPreClassifier())
+
+    results = llm_filter.batch_filter_listings(_listings(), 'booster_box')
+
+    # Without a title model only the clear rejects are settled locally
+    assert model.calls == results['api_calls'] == 14
+    assert results['pre_classified'] == 2
+    assert len(results['kept']) == 14 and len(results['removed']) == 2
+    assert results['removed'][0]['filter_decision'].reason.startswith('Pre-classifier: ')
+
+    summary = results['analysis_summary']
+    assert summary['total_analyzed'] == 16 and summary['kept_count'] == 14
+    assert summary['product_types_detected'] == {'booster_box': 16}
+    assert 0.5 < summary['avg_confidence'] <= 1.0
+
+def test_local_decisions_are_recorded_for_training_only():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = os.path.join(cache_dir, 'decisions.jsonl')
+        cache = LLMDecisionCache(cache_path)
+        llm_filter = LLMEnhancedFilter(model=StubGeminiModel(delay=0), decision_cache=cache, pre_classifier=ListingPreClassifier())
+        llm_filter.batch_filter_listings(_listings(), 'booster_box')
+
+        assert len(cache) == 14 and cache.local_decision_count() == 2
+        assert cache.example_count() == 16
+        assert ('pokemon brilliant stars 4 packs', 'booster_box', 'remove') in cache.training_examples()
+
+        # Reloaded from disk, local decisions stay out of get() until the LLM decides the listing
+        reloaded = LLMDecisionCache(cache_path)
+        key = LLMDecisionCache.make_key('Pokemon Brilliant Stars 4 Packs', 20.0, 'booster_box', PROMPT_VERSION)
+        assert reloaded.local_decision_count() == 2 and reloaded.get(key) is None
+        reloaded.put(key, {'action': 'remove', 'confidence': 0.9}, 'Pokemon Brilliant Stars 4 Packs', 'booster_box')
+        assert reloaded.get(key)['confidence'] == 0.9 and reloaded.local_decision_count() == 1
+        assert LLMDecisionCache(cache_path).get(key)['confidence'] == 0.9
+
+def test_title_model_trains_on_cached_decisions():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = os.path.join(cache_dir, 'decisions.jsonl')
+        cache = LLMDecisionCache(cache_path)
+        for i in range(40):
+            for title, action in ((f'Evolving Skies Booster Box Factory Sealed {i}', 'keep'),
+                                  (f'Evolving Skies Booster Box Code Cards Only {i}', 'remove')):
+                cache.put(LLMDecisionCache.make_key(title, 100 + i, 'booster_box', 'v1'), {'action': action},
+                          title, 'booster_box')
+
+        assert not ListingPreClassifier().train(LLMDecisionCache(cache_path), min_training_examples=100)
+
+        pre_classifier = ListingPreClassifier(decision_cache=LLMDecisionCache(cache_path))
+        assert pre_classifier.title_model is not None
+
+        keep, remove = pre_classifier.title_model.predict_proba([('Evolving Skies Booster Box Factory Sealed', 'booster_box'),
+                                                                 ('Evolving Skies Code Cards Only', 'booster_box')])
+        assert keep > 0.8 and remove < 0.2
+
+def _put_decisions(cache, start, count, product_type='booster_box'):
+    for i in range(start, start + count):
+        for title, action in ((f'Evolving Skies Booster Box Factory Sealed {i}', 'keep'),
+                              (f'Evolving Skies Booster Box Code Cards Only {i}', 'remove')):
+            cache.put(LLMDecisionCache.make_key(title, 100 + i, product_type, 'v1'), {'action': action},
+                      title, product_type)
+
+def test_title_model_is_persisted_and_retrained_only_on_growth():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = os.path.join(cache_dir, 'decisions.jsonl')
+        cache = LLMDecisionCache(cache_path)
+        _put_decisions(cache, 0, 40)
+
+        first = ListingPreClassifier(decision_cache=cache, retrain_every=50)
+        assert first.title_model is not None and os.path.exists(first.model_path)
+
+        # A new process loads the saved weights instead of fitting again
+        second = ListingPreClassifier(decision_cache=LLMDecisionCache(cache_path), retrain_every=50)
+        assert not second.refresh()
+        assert (second.title_model.weights == first.title_model.weights).all()
+
+        # Classifying retrains only once enough new decisions have been cached
+        _put_decisions(second.decision_cache, 40, 20)
+        assert not second.refresh()
+        _put_decisions(second.decision_cache, 60, 10)
+        second.classify(_listings(), 'booster_box')
+        assert second._trained_on == 140 and not second.refresh()
+
+def test_training_uses_the_most_recent_decisions_only():
+    cache = LLMDecisionCache(None)
+    _put_decisions(cache, 0, 40, product_type='elite_trainer_box')
+    _put_decisions(cache, 40, 30)
+    pre_classifier = ListingPreClassifier(decision_cache=cache, max_training_examples=60)
+    assert pre_classifier.model_path is None  # Memory-only caches don't persist the model
+
+    # Only the 60 newest (booster box) decisions are fit: the older type's token never occurs
+    model = pre_classifier.title_model
+    column = zlib.crc32(b'__type_elite_trainer_box') % model.n_features
+    assert math.isclose(model.idf[column], math.log(61) + 1)
+
+if __name__ == "__main__":
+    test_rule_signals_alone_never_keep_locally()
+    test_confident_listings_are_decided_locally()
+    test_only_uncertain_listings_reach_the_llm()
+    test_local_decisions_are_recorded_for_training_only()
+    test_title_model_trains_on_cached_decisions()
+    test_title_model_is_persisted_and_retrained_only_on_growth()
+    test_training_uses_the_most_recent_decisions_only()
+    print("✅ All pre-classifier tests passed")
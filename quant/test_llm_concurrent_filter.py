@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test concurrent, cached LLM listing classification against a local stub model
+"""
+
+import sys
+import os
+import time
+import asyncio
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quant.llm_enhanced_filter import LLMEnhancedFilter, MinuteBudget
+from quant.llm_decision_cache import LLMDecisionCache, normalize_title, price_bucket
+from tests.stub_gemini_model import StubGeminiModel, stub_answer
+
+def _listings(count):
+    return [{'title': f'Brilliant Stars Booster Box #{i}' if i % 3 else f'Brilliant Stars 4 Packs #{i}',
+             'description': '', 'price': 120.0 + i} for i in range(count)]
+
+def test_batch_runs_calls_concurrently_within_limit():
+    model = StubGeminiModel(delay=0.05)
+    llm_filter = LLMEnhancedFilter(model=model, decision_cache=LLMDecisionCache(None))
+
+    started = time.perf_counter()
+    results = llm_filter.batch_filter_listings(_listings(20), 'booster_box', max_concurrent=5)
+    elapsed = time.perf_counter() - started
+
+    assert model.calls == 20
+    assert model.max_active == 5
+    assert elapsed < 20 * 0.05 / 2  # sequential calls would take a full second
+    assert len(results['kept']) == 13 and len(results['removed']) == 7
+    assert results['api_calls'] == 20
+
+def test_decisions_are_cached_across_runs():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = os.path.join(cache_dir, 'decisions.jsonl')
+        listings = _listings(6)
+        # Same sale relisted with different spacing/case and a price in the same bucket
+        listings.append({'title': '  brilliant stars BOOSTER BOX   #1 ', 'price': 121.5})
+
+        first = LLMEnhancedFilter(model=StubGeminiModel(delay=0), decision_cache=LLMDecisionCache(cache_path))
+        results = first.batch_filter_listings(listings, 'booster_box')
+        assert results['api_calls'] == 6
+        assert results['cache_hits'] == 1
+
+        model = StubGeminiModel(delay=0)
+        second = LLMEnhancedFilter(model=model, decision_cache=LLMDecisionCache(cache_path))
+        results = second.batch_filter_listings(_listings(6), 'booster_box')
+        assert model.calls == 0
+        assert results['cache_hits'] == 6
+        assert [l['filter_decision'].action for l in results['kept']] == ['keep'] * 4
+
+        # A different expected type is a different decision
+        assert second.analyze_listing('Brilliant Stars Booster Box #1', '', 121.0, 'elite_trainer_box').action == 'keep'
+        assert model.calls == 1
+
+def test_failed_responses_are_flagged_and_not_cached():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = LLMDecisionCache(os.path.join(cache_dir, 'decisions.jsonl'))
+        llm_filter = LLMEnhancedFilter(model=StubGeminiModel(delay=0, fail_on='#2'), decision_cache=cache)
+
+        results = llm_filter.batch_filter_listings(_listings(3), 'booster_box')
+        assert [l['title'] for l in results['flagged']] == ['Brilliant Stars Booster Box #2']
+        assert results['flagged'][0]['filter_decision'].reason.startswith('LLM analysis failed')
+        assert len(cache) == 2
+
+def test_batched_prompts_map_results_back_by_id():
+    model = StubGeminiModel(delay=0)
+    llm_filter = LLMEnhancedFilter(model=model, decision_cache=LLMDecisionCache(None))
+
+    results = llm_filter.batch_filter_listings(_listings(25), 'booster_box', listings_per_prompt=10)
+
+    assert model.batch_sizes == [10, 10, 5]
+    assert results['api_calls'] == 3
+    for listing in results['kept'] + results['removed']:
+        assert listing['filter_decision'].reason == ('stub remove' if 'Packs' in listing['title'] else 'stub keep')
+    assert len(results['kept']) == 16 and len(results['removed']) == 9
+
+def test_malformed_batches_are_split_and_retried():
+    model = StubGeminiModel(delay=0, max_batch_ok=3)
+    llm_filter = LLMEnhancedFilter(model=model, decision_cache=LLMDecisionCache(None))
+
+    decisions, stats = asyncio.run(llm_filter.analyze_listings_async(_listings(8), 'booster_box', listings_per_prompt=8))
+
+    # 8 -> 4 + 4 -> 2 + 2 + 2 + 2
+    assert model.batch_sizes == [8, 4, 4, 2, 2, 2, 2]
+    assert stats['batch_splits'] == 3
+    assert [d.action for d in decisions] == [stub_answer(l['title'])['action'] for l in _listings(8)]
+
+def test_listings_missing_from_a_batch_response_are_retried():
+    model = StubGeminiModel(delay=0, skip_first=True)
+    llm_filter = LLMEnhancedFilter(model=model, decision_cache=LLMDecisionCache(None))
+
+    decisions, stats = asyncio.run(llm_filter.analyze_listings_async(_listings(5), 'booster_box', listings_per_prompt=5))
+
+    assert model.calls == 2  # the batch, then a single prompt for the skipped listing
+    assert model.batch_sizes == [5]
+    assert all(d.reason.startswith('stub') for d in decisions)
+
+def test_batch_filter_works_inside_a_running_event_loop():
+    llm_filter = LLMEnhancedFilter(model=StubGeminiModel(delay=0), decision_cache=LLMDecisionCache(None))
+
+    async def handler():
+        # e.g. an async web handler calling the sync API
+        return llm_filter.batch_filter_listings(_listings(6), 'booster_box')
+
+    results = asyncio.run(handler())
+    assert len(results['kept']) == 4 and len(results['removed']) == 2
+
+def test_minute_budget_waits_for_tokens():
+    async def spend():
+        budget = MinuteBudget(requests_per_minute=600, tokens_per_minute=60_000)
+        await budget.acquire(60_000)
+        started = time.perf_counter()
+        await budget.acquire(100)  # refills at 1000 tokens/second
+        return time.perf_counter() - started
+
+    assert 0.05 < asyncio.run(spend()) < 0.5
+
+def test_cache_key_normalization():
+    assert normalize_title('  Charizard   V\tPSA 10 ') == 'charizard v psa 10'
+    assert price_bucket(100.0) == price_bucket(102.0)
+    assert price_bucket(100.0) != price_bucket(120.0)
+    assert price_bucket(0) == price_bucket(None) == -1
+
+if __name__ == "__main__":
+    test_batch_runs_calls_concurrently_within_limit()
+    test_decisions_are_cached_across_runs()
+    test_failed_responses_are_flagged_and_not_cached()
+    test_batched_prompts_map_results_back_by_id()
+    test_malformed_batches_are_split_and_retried()
+    test_listings_missing_from_a_batch_response_are_retried()
+    test_batch_filter_works_inside_a_running_event_loop()
+    test_minute_budget_waits_for_tokens()
+    test_cache_key_normalization()
+    print("✅ All concurrent LLM filter tests passed")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test the array-based EnhancedOutlierFilter engine against the loop implementation
+"""
+
+import sys
+import os
+import io
+import time
+import random
+import contextlib
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quant.enhanced_outlier_filter import EnhancedOutlierFilter
+
+PRODUCTS = [
+    {'name': 'Charizard Base Set', 'type': 'card'},
+    {'name': 'Brilliant Stars Booster Box', 'type': 'sealed'},
+    {'name': 'Evolving Skies Elite Trainer Box', 'type': 'sealed'},
+    {'name': 'Lost Origin Theme Deck', 'type': 'sealed'},
+]
+
+TITLES = [
+    'Pokemon Brilliant Stars Booster Box Sealed',
+    'Evolving Skies Elite Trainer Box ETB',
+    'Charizard Base Set Holo 4/102',
+    'Charizard PROXY custom card',
+    'Empty booster box - no packs',
+    '3 packs Brilliant Stars',
+    'Lost Origin Theme Deck damaged',
+    'Lost Origin Theme Deck',
+    'Booster Box 36 packs',
+    'single pack opened',
+]
+
+def _random_points(count, seed):
+    rng = random.Random(seed)
+    points = []
+    for i in range(count):
+        point = {
+            'id': i,
+            'price': rng.choice([rng.randint(1, 400), round(rng.lognormvariate(4.5, 0.6), 2), rng.uniform(0, 2000)]),
+            'source': rng.choice(['ebay', 'ebay', 'pricecharting']),
+            'condition_category': rng.choice(['raw', 'graded', 'sealed', None]),
+        }
+        if rng.random() < 0.8:
+            point['title'] = rng.choice(TITLES)
+        if rng.random() < 0.02:
+            del point['source']
+        points.append(point)
+    return points
+
+def _filter_both(points, product_info):
+    filter_system = EnhancedOutlierFilter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return filter_system.filter_price_data(points, product_info), filter_system.filter_price_data_batch(points, product_info)
+
+def _assert_same(expected, actual):
+    assert [id(p) for p in actual['filtered_data']] == [id(p) for p in expected['filtered_data']]
+    for key in ('removed_suspicious', 'removed_statistical'):
+        assert [(id(r['point']), r['reason'], r.get('group')) for r in actual[key]] == \
+            [(id(r['point']), r['reason'], r.get('group')) for r in expected[key]]
+    assert actual['original_count'] == expected['original_count']
+    assert actual['final_count'] == expected['final_count']
+    assert actual['filter_summary'] == expected['filter_summary']
+
+def test_batch_engine_matches_loop_implementation():
+    for seed in range(20):
+        for product_info in PRODUCTS:
+            count = random.Random(seed).choice([0, 3, 4, 5, 6, 7, 12, 50, 500])
+            expected, actual = _filter_both(_random_points(count, seed), product_info)
+            _assert_same(expected, actual)
+
+def test_batch_engine_handles_tiny_and_tied_groups():
+    points = [{'price': 100, 'source': 'ebay', 'condition_category': 'raw'} for _ in range(6)]
+    points += [{'price': 100.0, 'source': 'ebay', 'condition_category': 'graded'}, {'price': 5000, 'source': 'ebay', 'condition_category': 'graded'}]
+    points += [{'price': 1.0, 'source': 'ebay', 'condition_category': 'raw'}]
+    expected, actual = _filter_both(points, PRODUCTS[0])
+    _assert_same(expected, actual)
+    assert len(actual['removed_statistical']) == 1
+
+def benchmark_filters(count=200_000):
+    points = _random_points(count, seed=7)
+    filter_system = EnhancedOutlierFilter()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        filter_system.filter_price_data(points, PRODUCTS[1])
+        loop_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        filter_system.filter_price_data_batch(points, PRODUCTS[1])
+        batch_time = time.perf_counter() - started
+
+    return loop_time, batch_time
+
+if __name__ == "__main__":
+    test_batch_engine_matches_loop_implementation()
+    test_batch_engine_handles_tiny_and_tied_groups()
+    print("✅ Batch engine matches the loop implementation")
+
+    loop_time, batch_time = benchmark_filters(1_000_000)
+    print(f"Loop:    {loop_time:.2f} s for 1M points")
+    print(f"Batch:   {batch_time:.2f} s for 1M points")
+    print(f"Speedup: {loop_time / batch_time:.1f}x")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test the chunked price series upsert path
+"""
+
+import sys
+import os
+import io
+import contextlib
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quant.price_data_service import PriceDataService, PRICE_SERIES_CONFLICT_KEY
+from tests.fake_supabase import FakeSupabase
+
+def _client():
+    client = FakeSupabase({'pokequant_price_series': []})
+    # Postgres rejects the whole statement when one row breaks a constraint
+    client.fail_on = lambda query: (Exception("check constraint violated")
+                                    if any(row['price'] < 0 for row in query.payload) else None)
+    return client
+
+def _calls(client):
+    return [(len(query.payload), query.on_conflict) for query in client.queries]
+
+def _stored(client):
+    return {tuple(row[column] for column in PRICE_SERIES_CONFLICT_KEY.split(',')): row
+            for row in client.tables['pokequant_price_series']}
+
+def _points(count, bad_index=None):
+    points = []
+    for day in range(count):
+        points.append({
+            'price_date': f"2024-{1 + day // 28:02d}-{1 + day % 28:02d}",
+            'price': -1.0 if day == bad_index else 100.0 + day,
+            'condition_category': 'raw',
+            'data_confidence': 0.9,
+            'listing_count': 3
+        })
+    return points
+
+def _service(chunk_size):
+    service = PriceDataService(upsert_chunk_size=chunk_size)
+    service.supabase = _client()
+    return service
+
+def test_points_are_upserted_in_chunks():
+    service = _service(chunk_size=100)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = service._store_price_series('product-1', _points(250), 'ebay')
+
+    assert report == {'stored': 250, 'failed_chunks': [], 'failed_rows': 0}
+    assert _calls(service.supabase) == [(100, PRICE_SERIES_CONFLICT_KEY), (100, PRICE_SERIES_CONFLICT_KEY), (50, PRICE_SERIES_CONFLICT_KEY)]
+    assert len(_stored(service.supabase)) == 250
+
+def test_failed_chunk_falls_back_to_rows():
+    service = _service(chunk_size=100)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = service._store_price_series('product-1', _points(250, bad_index=120), 'ebay')
+
+    assert report['stored'] == 249
+    assert report['failed_rows'] == 1
+    assert report['failed_chunks'] == [{'start': 100, 'end': 200, 'error': 'check constraint violated'}]
+    # 3 chunk calls + 100 row-level retries for the failed chunk only
+    assert len(_calls(service.supabase)) == 103
+
+def test_duplicate_points_keep_last_value():
+    service = _service(chunk_size=100)
+    points = _points(2)
+    points.append(dict(points[0], price=555.0))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = service._store_price_series('product-1', points, 'pricecharting')
+
+    assert report['stored'] == 2
+    stored = _stored(service.supabase)[('product-1', points[0]['price_date'], 'pricecharting', 'raw')]
+    assert stored['price'] == 555.0
+
+if __name__ == "__main__":
+    test_points_are_upserted_in_chunks()
+    test_failed_chunk_falls_back_to_rows()
+    test_duplicate_points_keep_last_value()
+    print("✅ All bulk upsert tests passed")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test the local columnar price series cache
+"""
+
+import sys
+import os
+import io
+import tempfile
+import contextlib
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quant.price_series_cache import PriceSeriesCache
+from quant.price_data_service import PriceDataService
+from tests.fake_supabase import FakeSupabase
+
+def _client(rows):
+    return FakeSupabase({'pokequant_price_series': rows})
+
+def _requests(client):
+    """Each price series request: 'count', or the updated_at a delta started from (None = full fetch)"""
+    return ['count' if query.count else query.condition('gt') for query in client.queries]
+
+def _rows_served(client):
+    return sum(len(query.data) for query in client.queries if not query.count)
+
+def _row(product_id, day, price, updated_at, source='ebay', condition='raw'):
+    return {
+        'id': f"{product_id}-{day}-{source}-{condition}",
+        'pokequant_product_id': product_id,
+        'price_date': f"2024-03-{day:02d}",
+        'price': price,
+        'source': source,
+        'condition_category': condition,
+        'data_confidence': 0.8,
+        'listing_count': 2,
+        'created_at': "2024-03-01T00:00:00+00:00",
+        'updated_at': updated_at,
+    }
+
+def test_delta_sync_only_pulls_rows_past_watermark():
+    rows = [_row('p1', day, 100.0 + day, f"2024-03-{day:02d}T12:00:00+00:00") for day in range(1, 21)]
+    client = _client(rows)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PriceSeriesCache(cache_dir, sync_interval_seconds=0, supabase_client=client, page_size=8)
+        arrays = cache.get_arrays('p1')
+        assert len(arrays['price']) == 20
+        assert arrays['price_date'].dtype == np.dtype('datetime64[D]')
+        assert _rows_served(client) == 20
+
+        # A re-aggregated point and a new day arrive
+        client.tables['pokequant_price_series'].append(_row('p1', 21, 121.0, "2024-03-25T12:00:00+00:00"))
+        client.tables['pokequant_price_series'][4] = _row('p1', 5, 999.0, "2024-03-25T12:00:01+00:00")
+
+        # New process: partition loads from disk and only the delta is fetched
+        client.queries = []
+        fresh = PriceSeriesCache(cache_dir, sync_interval_seconds=0, supabase_client=client, page_size=8)
+        arrays = fresh.get_arrays('p1')
+
+        assert _rows_served(client) == 3  # 2 new + the last row again inside the overlap window
+        assert len(arrays['price']) == 21
+        assert arrays['price'][4] == 999.0
+        assert str(arrays['price_date'][-1]) == '2024-03-21'
+
+def test_recent_sync_skips_supabase_and_days_back_filters():
+    client = _client([_row('p2', 1, 10.0, "2024-03-01T00:00:00+00:00")])
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PriceSeriesCache(cache_dir, sync_interval_seconds=3600, supabase_client=client)
+        cache.get_arrays('p2')
+        cache.get_arrays('p2')
+        assert _requests(client) == [None]  # First sync is a full fetch, nothing to reconcile
+
+        assert len(cache.get_arrays('p2', days_back=30)['price']) == 0
+
+        cache.mark_stale('p2')
+        cache.get_arrays('p2')
+        assert _requests(client)[1:] == ['2024-02-29T23:55:00+00:00', 'count']
+
+def test_price_data_service_reads_through_cache():
+    rows = [_row('p3', day, 50.0, f"2024-03-{day:02d}T00:00:00+00:00") for day in range(1, 4)]
+    rows.append(_row('p3', 2, 70.0, "2024-03-02T00:00:00+00:00", source='pricecharting', condition='market'))
+    client = _client(rows)
+
+    with tempfile.TemporaryDirectory() as cache_dir, contextlib.redirect_stdout(io.StringIO()):
+        service = PriceDataService(price_cache=PriceSeriesCache(cache_dir, supabase_client=client))
+
+        series = service.get_price_series('p3')
+        assert service.calculate_data_quality_score('p3') > 0
+        assert _requests(client) == [None]  # second read served locally
+
+    assert series['success']
+    assert series['summary']['total_data_points'] == 4
+    assert len(series['organized_data']['ebay']['raw']) == 3
+    assert series['organized_data']['pricecharting']['market'][0]['price'] == 70.0
+    assert series['summary']['date_range'] == {'start': '2024-03-01', 'end': '2024-03-03'}
+
+def test_rows_deleted_upstream_are_dropped():
+    rows = [_row(product_id, day, 10.0 * day, f"2024-03-{day:02d}T12:00:00+00:00")
+            for product_id in ('p4', 'p5') for day in range(1, 11)]
+    client = _client(rows)
+
+    with tempfile.TemporaryDirectory() as cache_dir, contextlib.redirect_stdout(io.StringIO()):
+        cache = PriceSeriesCache(cache_dir, sync_interval_seconds=0, supabase_client=client)
+        cache.sync_many(['p4', 'p5'])
+
+        # p4 is cleaned and re-aggregated from fewer points; p5 only gets an update
+        client.tables['pokequant_price_series'] = [row for row in client.tables['pokequant_price_series'] if row['pokequant_product_id'] != 'p4']
+        client.tables['pokequant_price_series'] += [_row('p4', day, 1.0, "2024-03-20T00:00:00+00:00") for day in (2, 3)]
+        client.tables['pokequant_price_series'][0] = _row('p5', 1, 11.0, "2024-03-20T00:00:00+00:00")
+
+        # A delta alone would keep the deleted points; the count check notices and refetches p4
+        client.queries = []
+        cache.sync_many(['p4', 'p5'])
+        assert _requests(client).count('count') == 3  # chunk total, then p4 and p5 one by one
+        assert cache.get_arrays('p4')['price'].tolist() == [1.0, 1.0]
+        assert cache.get_arrays('p5')['price'][0] == 11.0 and len(cache.get_arrays('p5')['price']) == 10
+
+        # Deletes in another process: the next reader's partition on disk is reconciled too
+        client.tables['pokequant_price_series'] = [row for row in client.tables['pokequant_price_series'] if row['price_date'] != '2024-03-05']
+        fresh = PriceSeriesCache(cache_dir, sync_interval_seconds=0, supabase_client=client)
+        assert len(fresh.get_arrays('p5')['price']) == 9
+
+        # Cleaning jobs that delete rows drop the partition straight away
+        fresh.invalidate('p5')
+        assert not os.path.exists(os.path.join(cache_dir, 'p5.npz'))
+
+if __name__ == "__main__":
+    test_delta_sync_only_pulls_rows_past_watermark()
+    test_recent_sync_skips_supabase_and_days_back_filters()
+    test_price_data_service_reads_through_cache()
+    test_rows_deleted_upstream_are_dropped()
+    print("✅ All price series cache tests passed")
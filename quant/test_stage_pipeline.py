@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test the stage DAG executor and the overlapped analyze_product pipeline
+"""
+
+import sys
+import os
+import io
+import time
+import threading
+import contextlib
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quant.stage_pipeline import Stage, StagePipeline, StopPipeline
+import quant.pokequant_main as pokequant_main
+
+def _meet(barrier, value):
+    """Stage that only returns once every party of barrier is running at the same time"""
+    def run(outputs):
+        barrier.wait()  # Raises BrokenBarrierError on timeout, i.e. if the stages ran one after the other
+        return value
+    return run
+
+def test_independent_stages_overlap_and_dependencies_wait():
+    both_running = threading.Barrier(2, timeout=5)
+    events = []
+
+    def record(name):
+        def run(outputs):
+            events.append(f"{name} started")
+            both_running.wait()
+            events.append(f"{name} finished")
+            return {name: True}
+        return run
+
+    def merge(outputs):
+        events.append('merge started')
+        return {**outputs['ebay'], **outputs['pricecharting']}
+
+    run = StagePipeline([
+        Stage('ebay', record('ebay')),
+        Stage('pricecharting', record('pricecharting')),
+        Stage('merge', merge, ('ebay', 'pricecharting')),
+    ]).run()
+
+    assert run.outputs['merge'] == {'ebay': True, 'pricecharting': True}
+    # Both scrapes were running before either finished, and the merge waited for both
+    assert set(events[:2]) == {'ebay started', 'pricecharting started'}
+    assert events[-1] == 'merge started'
+    assert set(run.wall_times) == {'ebay', 'pricecharting', 'merge'}
+    assert all(stage['wall_time_seconds'] >= 0 for stage in run.timed_outputs().values())
+
+def test_skipped_and_stopped_stages():
+    ran = []
+
+    def note(name, stop=False):
+        def run(outputs):
+            ran.append(name)
+            if stop:
+                raise StopPipeline('cached', {'status': 'hit'})
+            return {'status': name}
+        return run
+
+    run = StagePipeline([
+        Stage('a', note('a')),
+        Stage('b', note('b'), ('a',), when=lambda outputs: False, skipped={'status': 'skipped'}),
+        Stage('c', note('c', stop=True), ('b',)),
+        Stage('d', note('d'), ('c',)),
+    ]).run()
+
+    assert ran == ['a', 'c']
+    assert run.outputs == {'a': {'status': 'a'}, 'b': {'status': 'skipped'}, 'c': {'status': 'hit'}}
+    assert run.stopped_by == 'c' and run.stop_reason == 'cached'
+
+def test_errors_propagate_after_running_stages_finish_and_bad_graphs_are_rejected():
+    finished = threading.Event()
+
+    def slow(outputs):
+        time.sleep(0.1)
+        finished.set()
+        return {}
+
+    def broken(outputs):
+        raise RuntimeError('supabase down')
+
+    try:
+        StagePipeline([Stage('slow', slow), Stage('broken', broken), Stage('after', slow, ('broken',))]).run()
+        assert False, 'expected the stage error'
+    except RuntimeError as e:
+        assert str(e) == 'supabase down'
+    assert finished.is_set()
+
+    for stages in ([Stage('a', slow, ('b',)), Stage('b', slow, ('a',))], [Stage('a', slow, ('missing',))]):
+        try:
+            StagePipeline(stages)
+            assert False, 'expected a graph error'
+        except ValueError:
+            pass
+
+def test_cold_analysis_scrapes_both_sources_at_once():
+    orchestrator = pokequant_main.PokeQuantOrchestrator(parse_workers=0)
+    product = {'type': 'card', 'id': '42', 'name': 'Charizard V', 'set_name': 'Brilliant Stars',
+               'display_name': 'Charizard V - Brilliant Stars'}
+    points = [{'price': 100.0 + i, 'price_date': f"2024-01-{i + 1:02d}", 'source': 'ebay'} for i in range(12)]
+
+    orchestrator._find_product = lambda name: {'found': True, 'product': product, 'all_matches': [product], 'match_count': 1}
+    orchestrator.freshness_checker.check_product_freshness = lambda name: {'is_fresh': False, 'recommended_action': 'scrape_both'}
+    orchestrator.price_data_service.ensure_product_exists = lambda *args: 'pq-42'
+    orchestrator._analysis_input_fingerprint = lambda pokequant_product_id: 'fingerprint-42'
+    orchestrator._check_cached_analysis = lambda pokequant_product_id, product, fingerprint: None
+    # Each scrape waits for the other, so the analysis only completes if they run at once
+    both_scraping = threading.Barrier(2, timeout=5)
+    orchestrator._collect_ebay_data = _meet(both_scraping, {'ebay_scraping': {'status': 'success'}})
+    orchestrator._collect_pricecharting_data = _meet(both_scraping, {'pricecharting_scraping': {'status': 'success'}})
+    orchestrator._prepare_analysis_data = lambda product_info, pokequant_product_id: {
+        'success': True, 'prices': [p['price'] for p in points], 'price_series': points, 'quality_score': 0.5,
+        'summary': {'sources': ['ebay'], 'total_data_points': len(points),
+                    'date_range': {'start': '2024-01-01', 'end': '2024-01-12'}},
+        'organized_data': {}, 'pokequant_product_id': pokequant_product_id}
+    orchestrator._store_analysis_results = lambda pokequant_product_id, analysis: True
+
+    record_product_demand = pokequant_main.record_product_demand
+    pokequant_main.record_product_demand = lambda product_type, product_id: None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = orchestrator.analyze_product('Charizard V')
+    finally:
+        pokequant_main.record_product_demand = record_product_demand
+
+    stages = result['stages']
+    assert result['success'] and result['final_analysis']['recommendation']['recommendation']
+    assert stages['data_collection']['success'] and stages['storage']['success']
+    assert result['final_analysis']['analysis_metadata']['input_fingerprint'] == 'fingerprint-42'
+    assert stages['ebay_collection']['ebay_scraping']['status'] == 'success'
+    assert stages['pricecharting_collection']['pricecharting_scraping']['status'] == 'success'
+    assert all('wall_time_seconds' in stage for stage in stages.values())
+
+if __name__ == "__main__":
+    test_independent_stages_overlap_and_dependencies_wait()
+    test_skipped_and_stopped_stages()
+    test_errors_propagate_after_running_stages_finish_and_bad_graphs_are_rejected()
+    test_cold_analysis_scrapes_both_sources_at_once()
+    print("✅ All stage pipeline tests passed")
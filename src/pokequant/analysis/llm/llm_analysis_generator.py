@@ -10,6 +10,9 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 import google.generativeai as genai
 
+# Bump whenever the analysis prompt changes so stored enhanced analyses are recomputed
+PROMPT_VERSION = "v1"
+
 class LLMAnalysisGenerator:
     """LLM-powered generator for investment analysis and insights"""
     
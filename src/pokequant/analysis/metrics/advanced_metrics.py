@@ -14,6 +14,10 @@ import warnings
 
 warnings.filterwarnings('ignore')
 
+# Normal quantiles for parametric VaR, computed once rather than per series
+Z_95 = stats.norm.ppf(0.05)
+Z_99 = stats.norm.ppf(0.01)
+
 class AdvancedMetricsCalculator:
     """Advanced quantitative metrics calculator for Pokemon card/sealed product investments"""
     
@@ -69,6 +73,356 @@ class AdvancedMetricsCalculator:
         
         return metrics
     
+    def calculate_metrics_from_arrays(self, prices: np.ndarray, dates: np.ndarray) -> Dict[str, Any]:
+        """
+        Array-native equivalent of calculate_comprehensive_metrics
+        
+        Works on NumPy arrays directly (no DataFrame), computing the shared intermediates
+        once - returns, running maximum, return moments, positive/negative masks - and
+        rolling statistics from cumulative sums. Returns the same metric dict.
+        
+        Args:
+            prices: Prices, in any order
+            dates: Matching dates (datetime64 or ISO date strings)
+        
+        Returns:
+            Dict containing all calculated metrics
+        """
+        
+        prices = np.asarray(prices, dtype=np.float64)
+        if len(prices) < 2:
+            return self._empty_metrics()
+        
+        dates = np.asarray(dates).astype('datetime64[ns]')
+        order = np.argsort(dates, kind='stable')
+        prices = prices[order]
+        dates = dates[order]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = prices[1:] / prices[:-1]
+            returns = np.concatenate(([0.0], ratios - 1))
+            log_returns = np.concatenate(([0.0], np.log(ratios)))
+        
+        # Same rows the DataFrame path drops: undefined (0/0) changes count as 0, infinite ones are removed
+        returns[np.isnan(returns)] = 0.0
+        log_returns[np.isnan(log_returns)] = 0.0
+        keep = np.isfinite(returns) & np.isfinite(log_returns) & np.isfinite(prices) & ~np.isnat(dates)
+        if not keep.all():
+            prices, dates, returns = prices[keep], dates[keep], returns[keep]
+        
+        if len(prices) < 2:
+            return self._empty_metrics()
+        
+        n = len(returns)
+        mean_return = returns.mean()
+        deviations = returns - mean_return
+        m2 = np.dot(deviations, deviations) / n
+        positive = returns > 0
+        negative = returns < 0
+        
+        series = {
+            'n': n,
+            'prices': prices,
+            'dates': dates,
+            'returns': returns,
+            'deviations': deviations,
+            'mean_return': mean_return,
+            'std_return': np.sqrt(m2 * n / (n - 1)),
+            'm2': m2,
+            'wins': returns[positive],
+            'losses': returns[negative],
+            'days_held': int((dates[-1] - dates[0]) // np.timedelta64(1, 'D')),
+        }
+        
+        return {
+            'returns_analysis': self._array_returns_metrics(series),
+            'risk_metrics': self._array_risk_metrics(series),
+            'performance_metrics': self._array_performance_metrics(series),
+            'technical_indicators': self._array_technical_indicators(series),
+            'value_at_risk': self._array_var_metrics(series),
+            'statistical_properties': self._array_statistical_properties(series),
+            'time_series_analysis': self._array_time_series_metrics(series),
+            'market_timing': self._array_market_timing_metrics(series)
+        }
+    
+    @staticmethod
+    def _sample_std(values: np.ndarray) -> float:
+        """Sample standard deviation like pandas' std (NaN for fewer than two values)"""
+        return values.std(ddof=1) if len(values) > 1 else np.nan
+    
+    @staticmethod
+    def _last_ema(prices: np.ndarray, span: int) -> float:
+        """Final value of pandas' ewm(span=span).mean() (adjusted weights)"""
+        decay = 1 - 2 / (span + 1)
+        weights = decay ** np.arange(len(prices) - 1, -1, -1, dtype=np.float64)
+        return np.dot(weights, prices) / weights.sum()
+    
+    @staticmethod
+    def _rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+        """Sample std of every full window, from cumulative sums of the centered values"""
+        centered = values - values.mean()
+        sums = np.concatenate(([0.0], np.cumsum(centered)))
+        squares = np.concatenate(([0.0], np.cumsum(centered * centered)))
+        window_sums = sums[window:] - sums[:-window]
+        window_squares = squares[window:] - squares[:-window]
+        variance = (window_squares - window_sums * window_sums / window) / (window - 1)
+        return np.sqrt(np.maximum(variance, 0.0))
+    
+    def _array_returns_metrics(self, series: Dict[str, Any]) -> Dict[str, Any]:
+        prices = series['prices']
+        returns = series['returns']
+        days_held = series['days_held']
+        
+        total_return = (prices[-1] / prices[0]) - 1
+        years_held = max(days_held / 365.25, 1/365.25)  # Minimum 1 day
+        cagr = (prices[-1] / prices[0]) ** (1/years_held) - 1
+        annualized_volatility = series['std_return'] * np.sqrt(365.25)
+        
+        return {
+            'total_return': round(total_return * 100, 2),
+            'cagr': round(cagr * 100, 2),
+            'annualized_volatility': round(annualized_volatility * 100, 2),
+            'daily_return_avg': round(series['mean_return'] * 100, 4),
+            'daily_volatility': round(series['std_return'] * 100, 2),
+            'years_held': round(years_held, 2),
+            'days_held': days_held,
+            'best_single_day': round(returns.max() * 100, 2),
+            'worst_single_day': round(returns.min() * 100, 2)
+        }
+    
+    def _array_risk_metrics(self, series: Dict[str, Any]) -> Dict[str, Any]:
+        prices = series['prices']
+        dates = series['dates']
+        std_return = series['std_return']
+        wins, losses = series['wins'], series['losses']
+        
+        excess_returns = series['mean_return'] - (self.risk_free_rate / 365.25)
+        sharpe_ratio = excess_returns / std_return * np.sqrt(365.25) if std_return > 0 else 0
+        
+        # Maximum drawdown against the running peak
+        running_max = np.maximum.accumulate(prices)
+        drawdown = (prices - running_max) / running_max
+        max_dd_end = int(np.argmin(drawdown))
+        max_drawdown = drawdown[max_dd_end]
+        max_dd_start = int(np.argmax(prices[:max_dd_end + 1]))
+        max_dd_duration = int((dates[max_dd_end] - dates[max_dd_start]) // np.timedelta64(1, 'D'))
+        
+        recovery_to_peak = None
+        if max_dd_end < len(prices) - 1:
+            recovered = prices[max_dd_end:] >= prices[max_dd_start]
+            if recovered.any():
+                recovery_idx = max_dd_end + int(np.argmax(recovered))
+                recovery_to_peak = int((dates[recovery_idx] - dates[max_dd_end]) // np.timedelta64(1, 'D'))
+        
+        downside_deviation = self._sample_std(losses) * np.sqrt(365.25) if len(losses) > 0 else 0
+        sortino_ratio = (series['mean_return'] * 365.25 - self.risk_free_rate) / downside_deviation if downside_deviation > 0 else 0
+        
+        cagr = (prices[-1] / prices[0]) ** (365.25 / max(series['days_held'], 1)) - 1
+        calmar_ratio = cagr / abs(max_drawdown) if max_drawdown < 0 else 0
+        
+        return {
+            'sharpe_ratio': round(sharpe_ratio, 3),
+            'sortino_ratio': round(sortino_ratio, 3),
+            'calmar_ratio': round(calmar_ratio, 3),
+            'max_drawdown_pct': round(max_drawdown * 100, 2),
+            'max_drawdown_duration_days': max_dd_duration,
+            'recovery_to_peak_days': recovery_to_peak,
+            'downside_deviation': round(downside_deviation * 100, 2),
+            'upside_capture': round(wins.mean() * 100, 2) if len(wins) > 0 else 0,
+            'downside_capture': round(losses.mean() * 100, 2) if len(losses) > 0 else 0
+        }
+    
+    def _array_performance_metrics(self, series: Dict[str, Any]) -> Dict[str, Any]:
+        prices = series['prices']
+        wins, losses = series['wins'], series['losses']
+        mean_return = series['mean_return']
+        total_periods = series['n']
+        
+        win_rate = len(wins) / total_periods * 100
+        avg_win = wins.mean() if len(wins) > 0 else 0
+        avg_loss = losses.mean() if len(losses) > 0 else 0
+        profit_factor = abs(avg_win * len(wins) / (avg_loss * len(losses))) if len(losses) > 0 and avg_loss < 0 else float('inf')
+        return_consistency = 1 - (series['std_return'] / abs(mean_return)) if mean_return != 0 else 0
+        price_stability = 1 - (prices.std(ddof=1) / prices.mean())
+        
+        return {
+            'win_rate_pct': round(win_rate, 2),
+            'avg_win_pct': round(avg_win * 100, 2),
+            'avg_loss_pct': round(avg_loss * 100, 2),
+            'profit_factor': round(profit_factor, 2) if profit_factor != float('inf') else 999,
+            'return_consistency': round(return_consistency, 3),
+            'price_stability': round(price_stability, 3),
+            'winning_periods': len(wins),
+            'losing_periods': total_periods - len(wins),
+            'total_periods': total_periods
+        }
+    
+    def _array_technical_indicators(self, series: Dict[str, Any]) -> Dict[str, Any]:
+        prices = series['prices']
+        if series['n'] < 20:
+            return {}
+        
+        # Only the latest window of each indicator is reported, so only that window is computed
+        current_price = prices[-1]
+        last_20 = prices[-20:]
+        sma_10_current = prices[-10:].mean()
+        sma_20_current = last_20.mean()
+        ema_10_current = self._last_ema(prices, 10)
+        ema_20_current = self._last_ema(prices, 20)
+        
+        # Bollinger Bands
+        std_20 = last_20.std(ddof=1)
+        upper_band = sma_20_current + (std_20 * 2)
+        lower_band = sma_20_current - (std_20 * 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bb_position = (current_price - lower_band) / (upper_band - lower_band)
+            
+            # RSI over the last 14 price changes
+            delta = np.diff(prices[-15:])
+            gain = np.where(delta > 0, delta, 0).mean()
+            loss = np.where(delta < 0, -delta, 0).mean()
+            rsi = 100 - (100 / (1 + gain / loss))
+        
+        momentum_10 = (current_price / prices[-10] - 1) * 100
+        momentum_20 = (current_price / prices[-20] - 1) * 100
+        
+        return {
+            'sma_10_signal': 'bullish' if current_price > sma_10_current else 'bearish',
+            'sma_20_signal': 'bullish' if current_price > sma_20_current else 'bearish',
+            'ema_10_signal': 'bullish' if current_price > ema_10_current else 'bearish',
+            'ema_20_signal': 'bullish' if current_price > ema_20_current else 'bearish',
+            'bollinger_position': round(bb_position, 3),
+            'bollinger_signal': 'overbought' if bb_position > 0.8 else 'oversold' if bb_position < 0.2 else 'neutral',
+            'rsi_current': round(rsi, 2) if not np.isnan(rsi) else 50,
+            'rsi_signal': 'overbought' if rsi > 70 else 'oversold' if rsi < 30 else 'neutral',
+            'momentum_10d_pct': round(momentum_10, 2),
+            'momentum_20d_pct': round(momentum_20, 2),
+            'trend_strength': 'strong' if abs(momentum_20) > 10 else 'moderate' if abs(momentum_20) > 5 else 'weak'
+        }
+    
+    def _array_var_metrics(self, series: Dict[str, Any]) -> Dict[str, Any]:
+        returns = series['returns']
+        if series['n'] < 10:
+            return {}
+        
+        var_95, var_99 = np.percentile(returns, [5, 1])
+        parametric_var_95 = series['mean_return'] + Z_95 * series['std_return']
+        parametric_var_99 = series['mean_return'] + Z_99 * series['std_return']
+        
+        # Expected Shortfall (Conditional VaR) - never empty, the percentiles lie within the returns
+        es_95 = returns[returns <= var_95].mean()
+        es_99 = returns[returns <= var_99].mean()
+        
+        current_price = series['prices'][-1]
+        
+        return {
+            'var_95_pct': round(var_95 * 100, 2),
+            'var_99_pct': round(var_99 * 100, 2),
+            'parametric_var_95_pct': round(parametric_var_95 * 100, 2),
+            'parametric_var_99_pct': round(parametric_var_99 * 100, 2),
+            'expected_shortfall_95_pct': round(es_95 * 100, 2),
+            'expected_shortfall_99_pct': round(es_99 * 100, 2),
+            'dollar_var_95': round(current_price * var_95, 2),
+            'dollar_var_99': round(current_price * var_99, 2)
+        }
+    
+    def _array_statistical_properties(self, series: Dict[str, Any]) -> Dict[str, Any]:
+        returns = series['returns']
+        deviations = series['deviations']
+        n = series['n']
+        m2 = series['m2']
+        if n < 10:
+            return {}
+        
+        # Biased moments, as scipy's skew / kurtosis compute them
+        with np.errstate(divide='ignore', invalid='ignore'):
+            squared = deviations * deviations
+            skewness = np.dot(squared, deviations) / n / m2 ** 1.5
+            kurtosis = np.dot(squared, squared) / n / (m2 * m2) - 3
+        
+        # Jarque-Bera statistic; its chi-squared (2 dof) p-value is exp(-JB / 2)
+        jarque_bera_stat = n / 6 * (skewness ** 2 + kurtosis ** 2 / 4)
+        jarque_bera_p = np.exp(-jarque_bera_stat / 2)
+        is_normal = bool(jarque_bera_p > 0.05)
+        
+        # Lag-1 autocorrelation
+        lagged, current = returns[:-1] - returns[:-1].mean(), returns[1:] - returns[1:].mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            autocorr_lag1 = np.dot(lagged, current) / np.sqrt(np.dot(lagged, lagged) * np.dot(current, current))
+        
+        return {
+            'mean_return_pct': round(series['mean_return'] * 100, 4),
+            'median_return_pct': round(np.median(returns) * 100, 4),
+            'std_return_pct': round(series['std_return'] * 100, 2),
+            'skewness': round(skewness, 3),
+            'kurtosis': round(kurtosis, 3),
+            'is_normal_distribution': is_normal,
+            'jarque_bera_pvalue': round(jarque_bera_p, 4),
+            'autocorrelation_lag1': round(autocorr_lag1, 3),
+            'distribution_type': 'normal' if is_normal else 'fat-tailed' if kurtosis > 3 else 'thin-tailed'
+        }
+    
+    def _array_time_series_metrics(self, series: Dict[str, Any]) -> Dict[str, Any]:
+        returns = series['returns']
+        n = series['n']
+        if n < 30:
+            return {}
+        
+        # Mean return per calendar month / quarter present in the data
+        months = series['dates'].astype('datetime64[M]').astype(np.int64) % 12 + 1
+        month_totals = np.bincount(months, weights=returns, minlength=13)
+        month_counts = np.bincount(months, minlength=13)
+        month_keys = np.flatnonzero(month_counts)
+        monthly_returns = month_totals[month_keys] / month_counts[month_keys]
+        
+        quarters = (months - 1) // 3 + 1
+        quarter_totals = np.bincount(quarters, weights=returns, minlength=5)
+        quarter_counts = np.bincount(quarters, minlength=5)
+        quarter_keys = np.flatnonzero(quarter_counts)
+        quarterly_returns = quarter_totals[quarter_keys] / quarter_counts[quarter_keys]
+        
+        # Volatility clustering (GARCH-like measure)
+        volatility_clustering = self._sample_std(self._rolling_std(returns, 10))
+        
+        return {
+            'best_month': int(month_keys[np.argmax(monthly_returns)]),
+            'worst_month': int(month_keys[np.argmin(monthly_returns)]),
+            'best_quarter': int(quarter_keys[np.argmax(quarterly_returns)]),
+            'worst_quarter': int(quarter_keys[np.argmin(quarterly_returns)]),
+            'monthly_volatility': round(self._sample_std(monthly_returns) * 100, 2),
+            'quarterly_volatility': round(self._sample_std(quarterly_returns) * 100, 2),
+            'volatility_clustering': round(volatility_clustering, 4),
+            'data_frequency': 'daily' if n > 100 else 'weekly' if n > 20 else 'monthly'
+        }
+    
+    def _array_market_timing_metrics(self, series: Dict[str, Any]) -> Dict[str, Any]:
+        prices = series['prices']
+        if series['n'] < 20:
+            return {}
+        
+        current_price = prices[-1]
+        prices_30d = prices[-30:]
+        prices_90d = prices[-90:]
+        
+        low_30d, high_30d = prices_30d.min(), prices_30d.max()
+        low_90d, high_90d = prices_90d.min(), prices_90d.max()
+        position_30d = (current_price - low_30d) / (high_30d - low_30d) if high_30d != low_30d else 0.5
+        position_90d = (current_price - low_90d) / (high_90d - low_90d) if high_90d != low_90d else 0.5
+        
+        support_level, resistance_level = np.quantile(prices_90d, [0.25, 0.75])
+        entry_signal = 'buy' if position_90d < 0.3 else 'sell' if position_90d > 0.7 else 'hold'
+        
+        return {
+            'position_30d_range': round(position_30d, 3),
+            'position_90d_range': round(position_90d, 3),
+            'support_level': round(support_level, 2),
+            'resistance_level': round(resistance_level, 2),
+            'entry_signal': entry_signal,
+            'distance_to_support_pct': round((current_price - support_level) / support_level * 100, 2),
+            'distance_to_resistance_pct': round((resistance_level - current_price) / current_price * 100, 2),
+            'market_timing_score': round(1 - position_90d, 2)  # Higher score = better entry timing
+        }
+    
     def _calculate_returns_metrics(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Calculate comprehensive returns-based metrics"""
         
@@ -358,6 +712,7 @@ class AdvancedMetricsCalculator:
         worst_quarter = quarterly_returns.idxmin()
         
         # Volatility clustering (GARCH-like measure)
+        returns = df['returns']
         volatility_clustering = returns.rolling(window=10).std().std() if len(df) >= 10 else 0
         
         return {
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test and benchmark the array-native metrics path against the DataFrame implementation
+"""
+
+import sys
+import os
+import math
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from advanced_metrics import AdvancedMetricsCalculator
+
+def _synthetic_series(count, seed, min_length=2, max_length=400):
+    """Random-walk price series with gaps between dates, some flat stretches and jumps"""
+    rng = np.random.default_rng(seed)
+    series = []
+    for _ in range(count):
+        length = int(rng.integers(min_length, max_length + 1))
+        steps = rng.normal(0.001, rng.uniform(0.005, 0.08), length)
+        steps[rng.random(length) < 0.1] = 0.0
+        prices = np.round(rng.uniform(5, 500) * np.exp(np.cumsum(steps)), 2)
+        gaps = rng.integers(1, 8, length)
+        dates = np.datetime64('2022-01-01') + np.cumsum(gaps).astype('timedelta64[D]')
+        shuffle = rng.permutation(length)
+        series.append((prices[shuffle], dates[shuffle]))
+    return series
+
+def _price_points(prices, dates):
+    return [{'price': float(price), 'price_date': str(date)} for price, date in zip(prices, dates)]
+
+def _assert_same(expected, actual, path='metrics'):
+    if isinstance(expected, dict):
+        assert isinstance(actual, dict) and expected.keys() == actual.keys(), f"{path}: {expected!r} != {actual!r}"
+        for key in expected:
+            _assert_same(expected[key], actual[key], f"{path}.{key}")
+    elif isinstance(expected, float) or isinstance(actual, float):
+        if math.isnan(expected) or math.isnan(actual):
+            assert math.isnan(expected) and math.isnan(actual), f"{path}: {expected!r} != {actual!r}"
+        else:
+            # Both sides round; summation order may move a value across a rounding boundary
+            assert math.isclose(expected, actual, rel_tol=1e-9, abs_tol=0.0101), f"{path}: {expected!r} != {actual!r}"
+    else:
+        assert expected == actual, f"{path}: {expected!r} != {actual!r}"
+
+def test_array_path_matches_dataframe_path():
+    calculator = AdvancedMetricsCalculator()
+    for prices, dates in _synthetic_series(150, seed=3):
+        expected = calculator.calculate_comprehensive_metrics(_price_points(prices, dates))
+        actual = calculator.calculate_metrics_from_arrays(prices, dates)
+        _assert_same(expected, actual)
+
+def test_array_path_edge_cases():
+    calculator = AdvancedMetricsCalculator()
+    dates = np.datetime64('2024-01-01') + np.arange(40).astype('timedelta64[D]')
+
+    # Flat prices: zero volatility, undefined RSI / Bollinger position, no drawdown
+    flat = np.full(40, 100.0)
+    _assert_same(calculator.calculate_comprehensive_metrics(_price_points(flat, dates)),
+                 calculator.calculate_metrics_from_arrays(flat, dates))
+
+    # A zero price makes infinite (log) returns into and out of it; both rows are dropped on both paths
+    with_zero = np.linspace(50, 90, 40)
+    with_zero[25] = 0.0
+    metrics = calculator.calculate_metrics_from_arrays(with_zero, dates)
+    assert metrics['performance_metrics']['total_periods'] == 38
+    _assert_same(calculator.calculate_comprehensive_metrics(_price_points(with_zero, dates)), metrics)
+
+    assert calculator.calculate_metrics_from_arrays(np.array([10.0]), dates[:1])['data_quality'] == 'insufficient_data'
+    assert calculator.calculate_metrics_from_arrays(np.array([]), np.array([], dtype='datetime64[D]'))['data_quality'] == 'insufficient_data'
+
+    # ISO date strings work as well as datetime64
+    strings = np.array([str(date) for date in dates[:25]])
+    _assert_same(calculator.calculate_metrics_from_arrays(with_zero[:25], dates[:25]),
+                 calculator.calculate_metrics_from_arrays(with_zero[:25], strings))
+
+def benchmark_metrics(count=300, seed=11):
+    """Time both paths over count synthetic series (30-365 points each)"""
+    calculator = AdvancedMetricsCalculator()
+    series = _synthetic_series(count, seed, min_length=30, max_length=365)
+    points = [_price_points(prices, dates) for prices, dates in series]
+
+    started = time.perf_counter()
+    for price_data in points:
+        calculator.calculate_comprehensive_metrics(price_data)
+    frame_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for prices, dates in series:
+        calculator.calculate_metrics_from_arrays(prices, dates)
+    array_time = time.perf_counter() - started
+
+    return frame_time, array_time
+
+if __name__ == "__main__":
+    test_array_path_matches_dataframe_path()
+    test_array_path_edge_cases()
+    print("✅ Array path matches the DataFrame implementation")
+
+    frame_time, array_time = benchmark_metrics(10_000)
+    print(f"DataFrame: {frame_time:.2f} s for 10k series")
+    print(f"Arrays:    {array_time:.2f} s for 10k series")
+    print(f"Speedup:   {frame_time / array_time:.1f}x")
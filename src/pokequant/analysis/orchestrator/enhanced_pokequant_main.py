@@ -7,18 +7,23 @@ Advanced quantitative analysis with sophisticated metrics and LLM insights
 import sys
 import os
 import argparse
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Any, Optional
 
+import numpy as np
+
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from supabase_client import supabase
 from quant.freshness_checker import DataFreshnessChecker
 from quant.price_data_service import PriceDataService
-from quant.enhanced_outlier_filter import apply_enhanced_filtering
+from quant.price_series_cache import PriceSeriesCache
+from quant.enhanced_outlier_filter import apply_enhanced_filtering, FILTER_VERSION
 from quant.advanced_metrics import AdvancedMetricsCalculator
-from quant.llm_analysis_generator import generate_llm_enhanced_analysis
+from quant.llm_analysis_generator import generate_llm_enhanced_analysis, PROMPT_VERSION as ANALYSIS_PROMPT_VERSION
+from quant.stage_pipeline import Stage, StagePipeline, StopPipeline
+from quant.analysis_cache import AnalysisResultCache, analysis_fingerprint
 
 # Optional LLM-enhanced filtering
 try:
@@ -34,11 +39,16 @@ from ebay_search import eBaySearcher
 from ebay_parser import eBayParser
 from ebay_to_supabase import eBaySupabaseUploader
 from pricecharting_scraper import PriceChartingScraper
+from refresh_scheduler import record_product_demand
+from product_name_index import ProductNameIndex
+
+# Bump whenever the advanced metrics or recommendation logic changes so stored analyses are recomputed
+ENHANCED_ANALYSIS_VERSION = '2.0'
 
 class EnhancedPokeQuantOrchestrator:
     """Enhanced PokeQuant orchestrator with advanced quantitative analysis"""
     
-    def __init__(self, max_age_days: int = 7, analysis_cache_hours: int = 24, 
+    def __init__(self, max_age_days: int = 7, analysis_cache_hours: Optional[int] = 24, 
                  use_llm: bool = False, enable_advanced_metrics: bool = True):
         self.max_age_days = max_age_days
         self.analysis_cache_hours = analysis_cache_hours
@@ -46,8 +56,14 @@ class EnhancedPokeQuantOrchestrator:
         self.enable_advanced_metrics = enable_advanced_metrics
         
         self.supabase = supabase
-        self.freshness_checker = DataFreshnessChecker(max_age_days)
-        self.price_data_service = PriceDataService()
+        # Card / sealed names resolved in memory instead of with ilike scans
+        self.name_index = ProductNameIndex(self.supabase)
+        self.freshness_checker = DataFreshnessChecker(max_age_days, name_index=self.name_index)
+        # Local price series cache - repeated reads only fetch rows newer than each product's watermark
+        self.price_data_service = PriceDataService(price_cache=PriceSeriesCache())
+        # Stored analyses reused until their price data, filter, metrics or prompt version changes,
+        # or they are older than analysis_cache_hours
+        self.analysis_cache = AnalysisResultCache(self.supabase, max_age_hours=analysis_cache_hours)
         
         # Initialize advanced metrics calculator
         if enable_advanced_metrics:
@@ -87,95 +103,32 @@ class EnhancedPokeQuantOrchestrator:
         }
         
         try:
-            # Stage 1: Find and identify the product
-            print("\n📍 Stage 1: Product Identification")
-            product_info = self._find_product(product_name)
-            result['stages']['product_identification'] = product_info
+            run = StagePipeline(self._enhanced_stages(product_name, force_refresh, force_analysis, result['timestamp'])).run()
+            outputs = run.outputs
             
-            if not product_info['found']:
+            result['stages'] = {name: output for name, output in run.timed_outputs().items() if name != 'final_analysis'}
+            result['wall_time_seconds'] = round(run.wall_time, 3)
+            
+            if run.stopped_by == 'product_identification':
                 result['error'] = f"Product '{product_name}' not found in database"
                 return result
-            
-            # Get or create the pokequant_product_id
-            product = product_info['product']
-            pokequant_product_id = self.price_data_service.ensure_product_exists(
-                product['type'], product['id'], product['name'], product.get('set_name')
-            )
-            
-            # Stage 1.5: Check for cached analysis
-            if not force_analysis:
-                print("\n🔍 Stage 1.5: Checking for Enhanced Cached Analysis")
-                cached_analysis = self._check_cached_analysis(pokequant_product_id)
-                if cached_analysis:
-                    print(f"   ✅ Using cached enhanced analysis from {cached_analysis['analysis_metadata']['analysis_date']}")
-                    result['used_cached_analysis'] = True
-                    result['success'] = True
-                    result['final_analysis'] = cached_analysis
-                    return result
-                else:
-                    print("   💾 No recent cached analysis found, proceeding with full enhanced analysis")
-            
-            # Stage 2: Check data freshness
-            print("\n📅 Stage 2: Data Freshness Check")
-            freshness_info = self.freshness_checker.check_product_freshness(product_name)
-            result['stages']['freshness_check'] = freshness_info
-            
-            # Stage 3: Data collection (if needed)
-            if force_refresh or not freshness_info['is_fresh']:
-                print("\n🔄 Stage 3: Data Collection")
-                collection_result = self._collect_fresh_data(product_info, freshness_info)
-                result['stages']['data_collection'] = collection_result
-            else:
-                print("\n✅ Stage 3: Using cached data (fresh enough)")
-                result['stages']['data_collection'] = {'status': 'skipped', 'reason': 'data_is_fresh'}
-            
-            # Stage 4: Load and prepare data for analysis
-            print("\n📊 Stage 4: Enhanced Data Preparation")
-            analysis_data = self._prepare_enhanced_analysis_data(product_info)
-            result['stages']['data_preparation'] = analysis_data
-            
-            if not analysis_data['success']:
+            if run.stopped_by == 'cached_analysis':
+                result['used_cached_analysis'] = True
+                result['success'] = True
+                result['final_analysis'] = outputs['cached_analysis']['analysis']
+                return result
+            if run.stopped_by == 'data_preparation':
                 result['error'] = "Insufficient data for enhanced analysis"
                 return result
             
-            # Stage 5: Advanced Quantitative Analysis
-            print("\n🧮 Stage 5: Advanced Quantitative Analysis")
-            advanced_analysis = self._perform_advanced_quantitative_analysis(analysis_data)
-            result['stages']['advanced_quantitative_analysis'] = advanced_analysis
-            
-            # Stage 6: LLM-Enhanced Insights (if enabled)
-            if self._use_llm_flag and os.getenv('GEMINI_API_KEY'):
-                print("\n🤖 Stage 6: LLM-Enhanced Analysis")
-                llm_analysis = self._generate_llm_insights(product_info, advanced_analysis)
-                result['stages']['llm_analysis'] = llm_analysis
-            else:
-                print("\n⚠️ Stage 6: LLM Analysis (Skipped - API key not available or disabled)")
-                result['stages']['llm_analysis'] = {'status': 'skipped', 'reason': 'llm_not_available'}
-            
-            # Stage 7: Generate Enhanced Recommendations
-            print("\n💡 Stage 7: Enhanced Investment Recommendation")
-            enhanced_recommendation = self._generate_enhanced_recommendation(
-                advanced_analysis, 
-                result['stages'].get('llm_analysis', {})
-            )
-            result['stages']['enhanced_recommendation'] = enhanced_recommendation
-            
-            # Stage 8: Compile Final Enhanced Analysis
-            print("\n📋 Stage 8: Compiling Enhanced Analysis")
-            final_analysis = self._compile_enhanced_analysis(result)
-            result['final_analysis'] = final_analysis
-            
-            # Stage 9: Store Enhanced Analysis Results
-            print("\n💾 Stage 9: Storing Enhanced Analysis")
-            storage_success = self._store_enhanced_analysis_results(pokequant_product_id, final_analysis)
-            result['stages']['storage'] = {'success': storage_success}
-            
+            result['final_analysis'] = outputs['final_analysis']
             result['success'] = True
             
             print(f"\n✅ Enhanced PokeQuant Analysis Complete!")
-            print(f"   📊 Advanced Metrics: {len(advanced_analysis.get('metrics', {}))} categories")
-            print(f"   🤖 LLM Insights: {'✓' if result['stages']['llm_analysis'].get('enhanced_insights') else '✗'}")
-            print(f"   💾 Results Cached: {'✓' if storage_success else '✗'}")
+            print(f"   📊 Advanced Metrics: {len(outputs['advanced_quantitative_analysis'].get('metrics', {}))} categories")
+            print(f"   🤖 LLM Insights: {'✓' if outputs['llm_analysis'].get('enhanced_insights') else '✗'}")
+            print(f"   💾 Results Cached: {'✓' if outputs['storage']['success'] else '✗'}")
+            print(f"   ⏱️ Wall time: {run.wall_time:.1f}s")
             
             return result
             
@@ -184,38 +137,144 @@ class EnhancedPokeQuantOrchestrator:
             print(f"\n❌ Enhanced analysis failed: {e}")
             return result
     
+    def _enhanced_stages(self, product_name: str, force_refresh: bool, force_analysis: bool,
+                         timestamp: str) -> List[Stage]:
+        """
+        analyze_product_enhanced as a stage DAG (the freshness check overlaps identification)
+        
+        A stored analysis is only reused when the freshness check finds the data fresh.
+        """
+        
+        def needs_collection(outputs):
+            return force_refresh or not outputs['freshness_check']['is_fresh']
+        
+        def identify(outputs):
+            print("\n📍 Stage 1: Product Identification")
+            product_info = self._find_product(product_name)
+            if not product_info['found']:
+                raise StopPipeline('not_found', product_info)
+            
+            # Products people ask about get refreshed sooner by the scrape scheduler
+            record_product_demand(product_info['product']['type'], product_info['product']['id'])
+            return product_info
+        
+        def check_freshness(outputs):
+            print("\n📅 Stage 2: Data Freshness Check")
+            return self.freshness_checker.check_product_freshness(product_name)
+        
+        def register(outputs):
+            product = outputs['product_identification']['product']
+            pokequant_product_id = self.price_data_service.ensure_product_exists(
+                product['type'], product['id'], product['name'], product.get('set_name')
+            )
+            return {'pokequant_product_id': pokequant_product_id}
+        
+        def check_cache(outputs):
+            print("\n🔍 Stage 1.5: Checking for Enhanced Cached Analysis")
+            if needs_collection(outputs):
+                # A stored analysis only reflects the data collected so far; stale data is scraped first
+                print("   🔄 Data is stale, collecting before analysis")
+                return {'status': 'skipped', 'reason': 'data_is_stale'}
+            fingerprint = self._analysis_input_fingerprint(outputs['product_registration']['pokequant_product_id'])
+            cached_analysis = self._check_cached_analysis(fingerprint)
+            if cached_analysis:
+                print(f"   ✅ Using cached enhanced analysis from {cached_analysis['analysis_metadata']['analysis_date']}")
+                raise StopPipeline('cached_analysis', {'status': 'hit', 'analysis': cached_analysis})
+            print("   💾 No cached analysis for the current inputs, proceeding with full enhanced analysis")
+            return {'status': 'miss', 'input_fingerprint': fingerprint}
+        
+        def collect(outputs):
+            if needs_collection(outputs):
+                print("\n🔄 Stage 3: Data Collection")
+                return self._collect_fresh_data(outputs['product_identification'], outputs['freshness_check'])
+            print("\n✅ Stage 3: Using cached data (fresh enough)")
+            return {'status': 'skipped', 'reason': 'data_is_fresh'}
+        
+        def prepare(outputs):
+            print("\n📊 Stage 4: Enhanced Data Preparation")
+            fingerprint = outputs['cached_analysis'].get('input_fingerprint')
+            if fingerprint is None or outputs['data_collection'].get('status') != 'skipped':
+                # Taken before the series is loaded, so data written meanwhile invalidates this result
+                fingerprint = self._analysis_input_fingerprint(outputs['product_registration']['pokequant_product_id'])
+            analysis_data = self._prepare_enhanced_analysis_data(outputs['product_identification'])
+            if not analysis_data['success']:
+                raise StopPipeline('insufficient_data', analysis_data)
+            analysis_data['input_fingerprint'] = fingerprint
+            return analysis_data
+        
+        def analyze(outputs):
+            print("\n🧮 Stage 5: Advanced Quantitative Analysis")
+            return self._perform_advanced_quantitative_analysis(outputs['data_preparation'])
+        
+        def llm_insights(outputs):
+            if self._llm_insights_enabled():
+                print("\n🤖 Stage 6: LLM-Enhanced Analysis")
+                return self._generate_llm_insights(outputs['product_identification'], outputs['advanced_quantitative_analysis'])
+            print("\n⚠️ Stage 6: LLM Analysis (Skipped - API key not available or disabled)")
+            return {'status': 'skipped', 'reason': 'llm_not_available'}
+        
+        def recommend(outputs):
+            print("\n💡 Stage 7: Enhanced Investment Recommendation")
+            return self._generate_enhanced_recommendation(outputs['advanced_quantitative_analysis'], outputs['llm_analysis'])
+        
+        def compile_analysis(outputs):
+            print("\n📋 Stage 8: Compiling Enhanced Analysis")
+            return self._compile_enhanced_analysis({'stages': outputs, 'timestamp': timestamp, 'used_cached_analysis': False})
+        
+        def store(outputs):
+            print("\n💾 Stage 9: Storing Enhanced Analysis")
+            stored = self._store_enhanced_analysis_results(outputs['product_registration']['pokequant_product_id'],
+                                                           outputs['final_analysis'])
+            return {'success': stored}
+        
+        return [
+            Stage('product_identification', identify),
+            Stage('freshness_check', check_freshness),
+            Stage('product_registration', register, ('product_identification',)),
+            Stage('cached_analysis', check_cache, ('product_registration', 'freshness_check'),
+                  when=lambda outputs: not force_analysis, skipped={'status': 'skipped', 'reason': 'force_analysis'}),
+            Stage('data_collection', collect, ('cached_analysis', 'freshness_check')),
+            Stage('data_preparation', prepare, ('data_collection',)),
+            Stage('advanced_quantitative_analysis', analyze, ('data_preparation',)),
+            Stage('llm_analysis', llm_insights, ('advanced_quantitative_analysis',)),
+            Stage('enhanced_recommendation', recommend, ('llm_analysis',)),
+            Stage('final_analysis', compile_analysis, ('enhanced_recommendation',)),
+            # Not overlapped with the LLM stage: the stored recommendation is the one combined with the LLM's
+            Stage('storage', store, ('final_analysis',)),
+        ]
+    
     def _find_product(self, product_name: str) -> Dict[str, Any]:
         """Find product in database (shared with original implementation)"""
         
         # First check sealed products
-        sealed_result = self.supabase.table('sealed_products').select('*').ilike('name', f'%{product_name}%').execute()
+        sealed_results = self.name_index.search(product_name, 'sealed', limit=1)
         
-        if sealed_result.data:
-            product = sealed_result.data[0]
+        if sealed_results:
+            product = sealed_results[0]
             return {
                 'found': True,
                 'product': {
                     'id': str(product['id']),
-                    'name': product['name'],
+                    'name': product['product_name'],
                     'type': 'sealed',
                     'set_name': product.get('set_name'),
-                    'display_name': product['name']
+                    'display_name': product['product_name']
                 }
             }
         
         # Check Pokemon cards
-        card_result = self.supabase.table('pokemon_cards').select('*, pokemon_sets!inner(name)').ilike('name', f'%{product_name}%').execute()
+        card_results = self.name_index.search(product_name, 'card', limit=1)
         
-        if card_result.data:
-            card = card_result.data[0]
+        if card_results:
+            card = card_results[0]
             return {
                 'found': True,
                 'product': {
                     'id': str(card['id']),
-                    'name': card['name'],
+                    'name': card['card_name'],
                     'type': 'card',
-                    'set_name': card['pokemon_sets']['name'],
-                    'display_name': f"{card['name']} ({card['pokemon_sets']['name']})"
+                    'set_name': card.get('set_name'),
+                    'display_name': f"{card['card_name']} ({card.get('set_name')})"
                 }
             }
         
@@ -338,8 +397,10 @@ class EnhancedPokeQuantOrchestrator:
         print(f"   🧮 Calculating advanced metrics for {len(price_series)} price points...")
         
         try:
-            # Calculate comprehensive metrics
-            advanced_metrics = self.advanced_metrics.calculate_comprehensive_metrics(price_series)
+            # Calculate comprehensive metrics straight from price / date arrays
+            prices = np.array([point['price'] for point in price_series], dtype=np.float64)
+            dates = np.array([str(point['price_date'])[:10] for point in price_series], dtype='datetime64[D]')
+            advanced_metrics = self.advanced_metrics.calculate_metrics_from_arrays(prices, dates)
             
             # Generate investment grade
             investment_grade = self.advanced_metrics.generate_investment_grade(advanced_metrics)
@@ -479,7 +540,9 @@ class EnhancedPokeQuantOrchestrator:
                 'analysis_date': result['timestamp'],
                 'analysis_type': 'enhanced_quantitative',
                 'cached': result['used_cached_analysis'],
-                'llm_enhanced': stages.get('llm_analysis', {}).get('enhanced_insights', False)
+                'llm_enhanced': stages.get('llm_analysis', {}).get('enhanced_insights', False),
+                'analysis_version': ENHANCED_ANALYSIS_VERSION,
+                'input_fingerprint': stages['data_preparation'].get('input_fingerprint')
             },
             'data_summary': stages['data_preparation'].get('data_summary', {}),
             'advanced_metrics': stages.get('advanced_quantitative_analysis', {}).get('metrics', {}),
@@ -511,25 +574,39 @@ class EnhancedPokeQuantOrchestrator:
             'performance_rating': grade.get('grade', 'N/A')
         }
     
-    def _check_cached_analysis(self, pokequant_product_id: str) -> Optional[Dict[str, Any]]:
-        """Check for cached enhanced analysis"""
+    def _llm_insights_enabled(self) -> bool:
+        return bool(self._use_llm_flag and os.getenv('GEMINI_API_KEY'))
+    
+    def _analysis_input_fingerprint(self, pokequant_product_id: str) -> Optional[str]:
+        """Fingerprint of the inputs an enhanced analysis would use now (None if it can't be read)"""
         
         try:
-            cutoff_time = datetime.now() - timedelta(hours=self.analysis_cache_hours)
-            
-            # Look for enhanced analysis (analysis_version >= 2.0)
-            result = self.supabase.table('pokequant_analyses').select('*').eq('pokequant_product_id', pokequant_product_id).gte('analysis_date', cutoff_time.isoformat()).gte('analysis_version', '2.0').order('analysis_date', desc=True).limit(1).execute()
-            
-            if not result.data:
+            watermark = self.analysis_cache.price_watermarks([pokequant_product_id]).get(pokequant_product_id)
+        except Exception as e:
+            print(f"   ⚠️ Error reading price data watermark: {e}")
+            return None
+        
+        prompt_version = ANALYSIS_PROMPT_VERSION if self._llm_insights_enabled() else None
+        return analysis_fingerprint(pokequant_product_id, watermark, FILTER_VERSION, ENHANCED_ANALYSIS_VERSION, prompt_version)
+    
+    def _check_cached_analysis(self, fingerprint: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The stored enhanced analysis computed from exactly the current inputs, if any"""
+        
+        if not fingerprint:
+            return None
+        
+        try:
+            analysis_row = self.analysis_cache.get(fingerprint)
+            if not analysis_row:
                 return None
             
-            analysis_row = result.data[0]
-            
             # Reconstruct analysis from stored data
             return {
                 'analysis_metadata': {
                     'analysis_date': analysis_row['analysis_date'],
                     'analysis_type': 'enhanced_quantitative',
+                    'analysis_version': analysis_row['analysis_version'],
+                    'input_fingerprint': fingerprint,
                     'cached': True
                 },
                 'advanced_metrics': analysis_row['metrics'],
@@ -555,14 +632,19 @@ class EnhancedPokeQuantOrchestrator:
                 'metrics': advanced_metrics,
                 'recommendation': recommendation.get('recommendation'),
                 'confidence_score': recommendation.get('confidence', 0.0),
-                'analysis_version': '2.0',  # Enhanced version
+                'analysis_version': ENHANCED_ANALYSIS_VERSION,
                 'data_range_start': data_summary.get('date_range', {}).get('start'),
                 'data_range_end': data_summary.get('date_range', {}).get('end'),
-                'total_data_points': data_summary.get('total_data_points', 0)
+                'total_data_points': data_summary.get('total_data_points', 0),
+                'input_fingerprint': analysis.get('analysis_metadata', {}).get('input_fingerprint')
             }
             
             result = self.supabase.table('pokequant_analyses').insert(analysis_data).execute()
             
+            if result.data:
+                stored_row = dict(result.data[0])
+                stored_row.setdefault('analysis_date', analysis['analysis_metadata']['analysis_date'])
+                self.analysis_cache.put(stored_row)
             return bool(result.data)
             
         except Exception as e:
@@ -577,7 +659,8 @@ def main():
     parser.add_argument('--force-refresh', action='store_true', help='Force data refresh')
     parser.add_argument('--force-analysis', action='store_true', help='Force analysis')
     parser.add_argument('--max-age', type=int, default=7, help='Maximum age in days before data is stale')
-    parser.add_argument('--cache-hours', type=int, default=24, help='Cache analysis results for hours')
+    parser.add_argument('--cache-hours', type=int, default=24,
+                        help='Recompute cached analyses older than this many hours even if their inputs are unchanged')
     parser.add_argument('--use-llm', action='store_true', help='Enable LLM-enhanced analysis')
     parser.add_argument('--disable-advanced', action='store_true', help='Disable advanced metrics')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
@@ -0,0 +1,8 @@
+-- Fingerprint-keyed analysis cache
+-- The orchestrator reuses a stored analysis only when the fingerprint of its inputs
+-- (price watermark, filter / metrics / prompt versions) matches; older rows without one
+-- are recomputed once
+
+ALTER TABLE pokequant_analyses ADD COLUMN IF NOT EXISTS input_fingerprint VARCHAR;
+
+CREATE INDEX IF NOT EXISTS idx_pokequant_analyses_fingerprint ON pokequant_analyses(input_fingerprint, analysis_date DESC);
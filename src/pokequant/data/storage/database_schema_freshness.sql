@@ -0,0 +1,23 @@
+-- Per-product eBay listing freshness summary
+-- Read by FreshnessSnapshot so catalog-wide freshness checks are a few paged requests
+-- instead of a count and a latest-listing query per product
+
+CREATE INDEX IF NOT EXISTS idx_ebay_sold_listings_card_created ON ebay_sold_listings(card_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_ebay_sealed_listings_product_created ON ebay_sealed_listings(sealed_product_id, created_at);
+
+CREATE OR REPLACE VIEW ebay_listing_freshness AS
+SELECT 'card' AS product_type,
+       card_id::text AS product_id,
+       COUNT(*) AS listing_count,
+       MAX(created_at) AS last_update
+FROM ebay_sold_listings
+WHERE card_id IS NOT NULL
+GROUP BY card_id
+UNION ALL
+SELECT 'sealed' AS product_type,
+       sealed_product_id::text AS product_id,
+       COUNT(*) AS listing_count,
+       MAX(created_at) AS last_update
+FROM ebay_sealed_listings
+WHERE sealed_product_id IS NOT NULL
+GROUP BY sealed_product_id;
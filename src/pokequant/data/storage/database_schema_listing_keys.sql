@@ -0,0 +1,12 @@
+-- Normalized listing keys for eBay listings
+-- Apply in order: step 1, run listing_key_backfill.py for both tables, then step 2
+
+-- 1. Item ID column on card listings (ebay_sealed_listings already has item_id)
+ALTER TABLE ebay_sold_listings ADD COLUMN IF NOT EXISTS item_id VARCHAR;
+
+CREATE INDEX IF NOT EXISTS idx_ebay_sold_listings_listing_url ON ebay_sold_listings(listing_url);
+CREATE INDEX IF NOT EXISTS idx_ebay_sealed_listings_listing_url ON ebay_sealed_listings(listing_url);
+
+-- 2. Unique item IDs - needs the backfill to have collapsed existing duplicates first.
+-- The uploader upserts on item_id, which requires this constraint.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ebay_sold_listings_item_id ON ebay_sold_listings(item_id);
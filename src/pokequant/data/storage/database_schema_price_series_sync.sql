@@ -0,0 +1,16 @@
+-- Change tracking for the local price series cache
+-- created_at keeps meaning "first written"; updated_at moves on every write and is the
+-- watermark PriceSeriesCache delta syncs past. Apply before deploying the writer that sets it.
+
+ALTER TABLE pokequant_price_series ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+-- Rows written so far carry their last write time in created_at
+UPDATE pokequant_price_series SET updated_at = created_at WHERE created_at IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_pokequant_price_series_product_updated ON pokequant_price_series(pokequant_product_id, updated_at);
+
+-- Writers that don't set updated_at themselves still move the watermark
+DROP TRIGGER IF EXISTS update_pokequant_price_series_updated_at ON pokequant_price_series;
+CREATE TRIGGER update_pokequant_price_series_updated_at
+    BEFORE UPDATE ON pokequant_price_series
+    FOR EACH ROW EXECUTE FUNCTION update_pokequant_updated_at_column();
@@ -213,7 +213,8 @@ class CardSelector:
         print(f"📋 Getting cards batch: size={batch_size}, offset={offset}")
         
         try:
-            query = self.supabase.table("pokemon_cards").select("*")
+            # Ordered so consecutive batches neither overlap nor skip cards
+            query = self.supabase.table("pokemon_cards").select("*").order("id")
             
             # Apply offset and limit
             if offset > 0:
@@ -0,0 +1,101 @@
+"""
+Chart Extractor
+Single-pass extraction of PriceCharting chart series into NumPy arrays
+"""
+
+import re
+import json
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# PriceCharting pages assign every condition's series in one object literal:
+#   VGPC.chart_data = {"used": [[1646118000000, 40854], ...], "graded": [...], ...};
+CHART_DATA_MARKER = re.compile(r'VGPC\.chart_data\s*=\s*')
+
+# [13-digit millisecond timestamp, price in cents] pairs, for pages without the marker
+TIMESTAMP_PAIR = re.compile(r'\[(\d{13}),(\d+)\]')
+
+_decoder = json.JSONDecoder()
+
+@dataclass
+class ChartData:
+    """
+    Chart series as parallel int64 arrays: millisecond timestamps and prices in cents
+
+    Series keep PriceCharting's names ('used', 'cib', 'new', 'graded', 'boxonly',
+    'manualonly') and page order; zero prices (no sales that month) are kept here
+    and dropped by to_records.
+    """
+    series: Dict[str, Tuple[np.ndarray, np.ndarray]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return sum(len(timestamps) for timestamps, _ in self.series.values())
+
+    def dates(self, name: str) -> np.ndarray:
+        """UTC calendar dates of a series as datetime64[D]"""
+        return self.series[name][0].astype('datetime64[ms]').astype('datetime64[D]')
+
+    def prices(self, name: str) -> np.ndarray:
+        """Prices of a series in dollars"""
+        return self.series[name][1] / 100.0
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        The list-of-dicts form returned by PriceChartingScraper._extract_chart_data_advanced:
+        every series flattened in page order, zero prices skipped
+        """
+        records = []
+        for name, (timestamps, cents) in self.series.items():
+            keep = cents > 0
+            timestamps, cents = timestamps[keep], cents[keep]
+            dates = timestamps.astype('datetime64[ms]').astype('datetime64[D]').astype(str)
+            records.extend(
+                {'timestamp': ts, 'date': date, 'price': price, 'raw_price_cents': raw, 'series': name}
+                for ts, date, price, raw in zip(timestamps.tolist(), dates.tolist(), (cents / 100.0).tolist(), cents.tolist())
+            )
+        return records
+
+def _pairs_to_arrays(pairs: List[Any]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """[[timestamp, price], ...] -> (timestamps, prices), or None if it isn't a chart series"""
+    if not isinstance(pairs, list):
+        return None
+    try:
+        array = np.asarray(pairs, dtype=np.float64)
+    except (ValueError, TypeError):
+        return None
+    if array.ndim != 2 or array.shape[1] != 2:
+        return None
+    # Prices are whole cents in practice; round instead of truncating any stray float
+    return array[:, 0].astype(np.int64), np.rint(array[:, 1]).astype(np.int64)
+
+def extract_chart_data(html_content: str) -> Optional[ChartData]:
+    """
+    Locate the chart data block once and decode just that block
+
+    Finds the VGPC.chart_data assignment with one search, then decodes the object
+    literal in place with a raw JSON decoder that stops at its closing brace - the
+    rest of the page is never scanned. Pages without the block fall back to a single
+    pass of the timestamp-pair pattern. Returns None when neither finds a series.
+    """
+    marker = CHART_DATA_MARKER.search(html_content)
+    if marker:
+        try:
+            decoded, _ = _decoder.raw_decode(html_content, marker.end())
+        except ValueError:
+            decoded = None
+
+        if isinstance(decoded, dict):
+            chart = ChartData()
+            for name, pairs in decoded.items():
+                arrays = _pairs_to_arrays(pairs)
+                if arrays is not None and len(arrays[0]):
+                    chart.series[name] = arrays
+            if chart.series:
+                return chart
+
+    pairs = np.array(TIMESTAMP_PAIR.findall(html_content), dtype=np.int64)
+    if len(pairs):
+        return ChartData({'unknown': (pairs[:, 0], pairs[:, 1])})
+    return None
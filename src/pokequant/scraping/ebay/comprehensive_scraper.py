@@ -8,7 +8,8 @@ import sys
 import os
 import time
 import json
-from typing import List, Dict, Any, Optional
+import socket
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import argparse
 
@@ -19,38 +20,51 @@ from card_selector import CardSelector
 from search_generator import SearchGenerator
 from ebay_search import eBaySearcher
 from ebay_parser import eBayParser
+from parse_executor import ParallelPageParser
 from ebay_to_supabase import eBaySupabaseUploader
 from market_analyzer import MarketAnalyzer
+from refresh_scheduler import RefreshScheduler
+from scrape_journal import ScrapeJournal, ScrapeUnit
 
 class ComprehensiveeBayScraper:
     """Comprehensive eBay scraper that gets ALL available data"""
     
-    def __init__(self):
+    def __init__(self, parse_workers: Optional[int] = None, journal_path: str = "data/scrape_journal.db"):
         # Initialize components
         self.card_selector = CardSelector()
         self.search_generator = SearchGenerator()
         self.ebay_searcher = eBaySearcher()
         self.parser = eBayParser()
+        self.page_parser = ParallelPageParser(max_workers=parse_workers)
         self.uploader = eBaySupabaseUploader()
         self.analyzer = MarketAnalyzer()
         
+        # Page-level run journal - lets runs resume and be shared by several workers
+        self.journal = ScrapeJournal(journal_path)
+        
         # Comprehensive scraping configuration - NO LIMITS!
         self.cards_per_batch = 3           # Small batches for stability
         self.searches_per_card = 3         # All 3 search strategies
         self.delay_between_searches = 6.0  # Longer delays to avoid rate limits
         self.delay_between_cards = 3.0
         self.delay_between_batches = 10.0  # Rest between batches
+        self.delay_between_pages = 2.0
         
         # MAXIMUM data collection settings
         self.max_pages_per_search = 50     # Get up to 50 pages (3000 listings per search)
         self.max_listings_per_search = None  # No limit on listings
         
+        # Orders incremental updates and keeps them within the shared hourly request budget
+        self.scheduler = RefreshScheduler(self.uploader.supabase, freshness=self.uploader.freshness,
+                                          requests_per_product=self.searches_per_card)
+        
         # Progress tracking
         self.total_cards_processed = 0
         self.total_listings_collected = 0
         self.start_time = None
         
-    def run_comprehensive_scrape(self, mode: str = "initial", max_cards: int = None, offset: int = 0) -> Dict[str, Any]:
+    def run_comprehensive_scrape(self, mode: str = "initial", max_cards: int = None, offset: int = 0,
+                                 resume_run_id: str = None, worker_id: str = None) -> Dict[str, Any]:
         """
         Run comprehensive scraping
         
@@ -58,92 +72,81 @@ class ComprehensiveeBayScraper:
             mode: "initial" (get all data) or "incremental" (get new data only)
             max_cards: Maximum cards to process (None = all cards)
             offset: Starting offset for card selection
+            resume_run_id: Continue (or join as another worker) a journaled run, in the mode it was started in
+            worker_id: Name this worker's claims in the journal (default: host and pid)
         """
         
+        if resume_run_id:
+            journaled_mode = self.journal.run_mode(resume_run_id)
+            if journaled_mode is None:
+                print(f"❌ No journaled run '{resume_run_id}' in {self.journal.db_path}")
+                return self._create_empty_results()
+            mode = journaled_mode
+        
         print(f"🌟 STARTING COMPREHENSIVE EBAY SCRAPING")
         print(f"📊 Mode: {mode.upper()}")
-        print(f"🎯 Max cards: {max_cards if max_cards else 'ALL'}")
-        print(f"⏭️ Starting offset: {offset}")
+        if resume_run_id:
+            print(f"♻️ Resuming run: {resume_run_id}")
+        else:
+            print(f"🎯 Max cards: {max_cards if max_cards else 'ALL'}")
+            print(f"⏭️ Starting offset: {offset}")
         print("=" * 80)
         
         self.start_time = time.time()
         
         if mode == "initial":
-            return self._run_initial_comprehensive_scrape(max_cards, offset)
+            return self._run_initial_comprehensive_scrape(max_cards, offset, resume_run_id, worker_id)
         elif mode == "incremental":
-            return self._run_incremental_scrape(max_cards, offset)
+            return self._run_incremental_scrape(max_cards, offset, resume_run_id, worker_id)
         else:
             raise ValueError(f"Unknown mode: {mode}")
     
-    def _run_initial_comprehensive_scrape(self, max_cards: int = None, offset: int = 0) -> Dict[str, Any]:
-        """Initial comprehensive scrape - get ALL available data"""
+    def _run_initial_comprehensive_scrape(self, max_cards: int = None, offset: int = 0,
+                                          resume_run_id: str = None, worker_id: str = None) -> Dict[str, Any]:
+        """Initial comprehensive scrape - get ALL available data, journaled page by page"""
         
         print("🔍 INITIAL COMPREHENSIVE SCRAPE")
         print("⚠️ This will collect ALL available eBay data - may take days/weeks!")
         print("📈 No limits on pages, listings, or data age")
         print()
         
-        # Get all cards from database
-        all_cards = self._get_all_cards_for_scraping(max_cards, offset)
-        
-        if not all_cards:
-            print("❌ No cards found to scrape")
-            return self._create_empty_results()
+        if resume_run_id:
+            run_id = resume_run_id
+        else:
+            # Get all cards from database
+            all_cards = self._get_all_cards_for_scraping(max_cards, offset)
+            
+            if not all_cards:
+                print("❌ No cards found to scrape")
+                return self._create_empty_results()
+            
+            print(f"🎯 Found {len(all_cards)} cards to scrape comprehensively")
+            run_id = self._plan_run(all_cards, {'max_cards': max_cards, 'offset': offset})
         
-        print(f"🎯 Found {len(all_cards)} cards to scrape comprehensively")
+        return self._run_journaled(run_id, 'initial', worker_id)
+    
+    def _run_journaled(self, run_id: str, mode: str, worker_id: str = None) -> Dict[str, Any]:
+        """Work a journaled run alongside any other workers, then report on the whole run"""
         
-        # Process in batches
-        batch_size = self.cards_per_batch
-        total_batches = (len(all_cards) + batch_size - 1) // batch_size
+        print(f"📓 Run ID: {run_id} (continue with --resume {run_id})")
+        self._work_run(run_id, worker_id or f"{socket.gethostname()}-{os.getpid()}")
         
+        # Results cover every worker that has contributed to the run
+        progress = self.journal.progress(run_id)
         overall_results = {
-            'mode': 'initial',
-            'total_cards_found': len(all_cards),
-            'total_cards_processed': 0,
-            'total_searches_executed': 0,
-            'total_listings_found': 0,
-            'total_listings_uploaded': 0,
-            'failed_cards': [],
-            'errors': [],
-            'batch_results': []
+            'mode': mode,
+            'run_id': run_id,
+            'total_cards_found': progress['total_cards'],
+            'total_cards_processed': progress['cards_finished'],
+            'total_searches_executed': progress['searches_executed'],
+            'total_listings_found': progress['listings_found'],
+            'total_listings_uploaded': progress['listings_uploaded'],
+            'failed_cards': sorted({unit['card_id'] for unit in progress['failed_units']}),
+            'errors': [f"Card {unit['card_id']} '{unit['search_terms']}' page {unit['page']}: {unit['error']}"
+                       for unit in progress['failed_units']],
+            'units': progress['units']
         }
         
-        for batch_num in range(total_batches):
-            start_idx = batch_num * batch_size
-            end_idx = min(start_idx + batch_size, len(all_cards))
-            batch_cards = all_cards[start_idx:end_idx]
-            
-            print(f"\n{'='*80}")
-            print(f"📦 BATCH {batch_num + 1}/{total_batches}")
-            print(f"🎯 Processing cards {start_idx + 1} to {end_idx}")
-            print(f"⏱️ Estimated time remaining: {self._estimate_time_remaining(batch_num, total_batches)}")
-            print(f"{'='*80}")
-            
-            batch_results = self._process_comprehensive_batch(batch_cards, batch_num + 1)
-            overall_results['batch_results'].append(batch_results)
-            
-            # Aggregate results
-            overall_results['total_cards_processed'] += batch_results['cards_processed']
-            overall_results['total_searches_executed'] += batch_results['searches_executed']
-            overall_results['total_listings_found'] += batch_results['listings_found']
-            overall_results['total_listings_uploaded'] += batch_results['listings_uploaded']
-            overall_results['failed_cards'].extend(batch_results['failed_cards'])
-            overall_results['errors'].extend(batch_results['errors'])
-            
-            # Progress update
-            self.total_cards_processed = overall_results['total_cards_processed']
-            self.total_listings_collected = overall_results['total_listings_uploaded']
-            
-            print(f"\n📊 PROGRESS UPDATE:")
-            print(f"   Cards processed: {self.total_cards_processed}/{len(all_cards)}")
-            print(f"   Listings collected: {self.total_listings_collected}")
-            print(f"   Success rate: {(self.total_cards_processed / len(all_cards)) * 100:.1f}%")
-            
-            # Rest between batches (except last batch)
-            if batch_num < total_batches - 1:
-                print(f"😴 Resting {self.delay_between_batches}s between batches...")
-                time.sleep(self.delay_between_batches)
-        
         # Final processing
         overall_results['processing_time'] = time.time() - self.start_time
         self._save_comprehensive_results(overall_results)
@@ -151,27 +154,170 @@ class ComprehensiveeBayScraper:
         
         return overall_results
     
-    def _run_incremental_scrape(self, max_cards: int = None, offset: int = 0) -> Dict[str, Any]:
-        """Incremental scrape - only get new data since last update"""
+    def _plan_run(self, cards: List[Dict[str, Any]], params: Dict[str, Any], mode: str = "initial") -> str:
+        """Journal a new run: one page-1 unit per (card, search term)"""
         
-        print("🔄 INCREMENTAL SCRAPE")
-        print("📅 Only collecting new listings since last update")
-        print()
+        search_terms = {}
+        for card in cards:
+            search_plan = self.search_generator.generate_batch_search_plan([card])
+            if search_plan and search_plan.get('search_plans'):
+                search_terms[str(card['id'])] = search_plan['search_plans'][0].get('search_terms', [])[:self.searches_per_card]
+            else:
+                print(f"⚠️ No search plans generated for {card.get('card_name', 'Unknown')}")
+        
+        return self.journal.create_run(mode, cards, search_terms, params)
+    
+    def _work_run(self, run_id: str, worker_id: str, poll_seconds: float = 30) -> int:
+        """
+        Claim and scrape units until the run has none left; returns units this worker finished
+        
+        Each page is handed to the parse stage as soon as it is fetched and finished (uploaded and
+        journaled) after the next unit's fetch, so parse workers run while the next request waits.
+        While other workers (or a killed one whose claims haven't expired yet) hold claims, this
+        worker polls every poll_seconds, since finishing those may queue further pages.
+        """
         
-        # Get cards that need updates (based on last_updated timestamp)
-        cards_needing_updates = self._get_cards_needing_updates(max_cards, offset)
+        units_done = 0
+        unit = None
+        in_flight = None  # (card, unit, html, PendingParse) parsing behind the current fetch
+        waiting = False
+        try:
+            while True:
+                unit = self.journal.claim(run_id, worker_id)
+                if unit is None:
+                    if in_flight is None:
+                        if not self.journal.open_claims(run_id):
+                            break
+                        if not waiting:
+                            print(f"⏳ Waiting for pages claimed by other workers (expire after {self.journal.claim_timeout_seconds:.0f}s)")
+                            waiting = True
+                        time.sleep(poll_seconds)
+                        continue
+                    # Finishing the last page may queue the next page of its search
+                    units_done += self._finish_unit(*in_flight)
+                    in_flight = None
+                    continue
+                
+                waiting = False
+                card = self.journal.get_card(run_id, unit.card_id)
+                print(f"\n🔎 {card.get('card_name', 'Unknown')}: '{unit.search_terms}' page {unit.page} (attempt {unit.attempts})")
+                
+                fetched = None
+                try:
+                    html = self._fetch_unit(unit)
+                    fetched = (card, unit, html, self.page_parser.submit_pages([html], card.get('card_name')))
+                except Exception as e:
+                    print(f"    ❌ Page failed: {e}")
+                    self.journal.fail(unit, str(e))
+                    self._check_card_finished(card, unit.run_id, unit.card_id)
+                
+                if in_flight is not None:
+                    units_done += self._finish_unit(*in_flight)
+                in_flight = fetched
+                
+                time.sleep(self.delay_between_pages)
+        except KeyboardInterrupt:
+            # Let a resume pick up the claimed pages straight away (release leaves finished units alone)
+            for claimed in (in_flight[1] if in_flight else None, unit):
+                if claimed is not None:
+                    self.journal.release(claimed)
+            raise
+        
+        # Cards whose last claim expired into failed were never finished by a worker
+        for card_id in self.journal.unfinished_cards(run_id):
+            self._check_card_finished(self.journal.get_card(run_id, card_id), run_id, card_id)
+        
+        return units_done
+    
+    def _finish_unit(self, card: Dict[str, Any], unit: ScrapeUnit, html: str, pending_parse: Any) -> int:
+        """Upload a fetched page's listings and journal the unit; returns 1 if it completed"""
+        
+        completed = 0
+        try:
+            found, uploaded, has_next_page = self._scrape_unit(card, unit, html, pending_parse)
+            self.journal.complete(unit, found, uploaded, has_next_page)
+            completed = 1
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            print(f"    ❌ Page failed: {e}")
+            self.journal.fail(unit, str(e))
+        
+        self._check_card_finished(card, unit.run_id, unit.card_id)
+        return completed
+    
+    def _check_card_finished(self, card: Dict[str, Any], run_id: str, card_id: str):
+        """Update the market summary and progress once every unit for the card is finished"""
+        
+        card_name = card.get('card_name', 'Unknown')
+        if self.journal.finish_card(run_id, card_id):
+            if self.journal.run_mode(run_id) == 'incremental':
+                # Incremental cards come from the refresh scheduler, which charged them up front
+                self.scheduler.settle(self.journal.card_pages(run_id, card_id))
+            try:
+                self.analyzer.update_market_summary(card['id'])
+                print(f"📊 Market summary updated for {card_name}")
+            except Exception as e:
+                print(f"⚠️ Market summary failed: {e}")
+            
+            progress = self.journal.progress(run_id)
+            self.total_cards_processed = progress['cards_finished']
+            self.total_listings_collected = progress['listings_uploaded']
+            print(f"\n📊 PROGRESS UPDATE:")
+            print(f"   Cards processed: {self.total_cards_processed}/{progress['total_cards']}")
+            print(f"   Listings collected: {self.total_listings_collected}")
+            print(f"   Pages left: {progress['units']['pending'] + progress['units']['claimed']}")
+    
+    def _fetch_unit(self, unit: ScrapeUnit) -> str:
+        """Fetch one unit's search page"""
         
-        if not cards_needing_updates:
-            print("✅ All cards are up to date!")
-            return self._create_empty_results()
+        html = self.ebay_searcher.fetch_listings_page(self.ebay_searcher.build_search_url(unit.search_terms, unit.page))
+        if not html:
+            raise Exception("Failed to fetch page")
+        return html
+    
+    def _scrape_unit(self, card: Dict[str, Any], unit: ScrapeUnit, html: str, pending_parse: Any) -> Tuple[int, int, bool]:
+        """Upload one fetched, parsing search page; returns (found, uploaded, has_next_page)"""
+        
+        page_result = pending_parse.results()[0]
+        if not page_result.success:
+            raise Exception(f"Parse error: {page_result.error}")
+        
+        listings = page_result.listings
+        uploaded = 0
+        if listings:
+            print(f"    📄 {card.get('card_name', 'Unknown')} page {unit.page}: {len(listings)} listings")
+            if not self.uploader.upload_targeted_listings(listings, card['id'], unit.search_terms):
+                raise Exception("Upload failed")
+            uploaded = len(listings)  # Simplified - duplicates are filtered by the uploader
+        
+        has_next_page = unit.page < self.max_pages_per_search and not self.ebay_searcher._is_last_page(html)
+        return len(listings), uploaded, has_next_page
+    
+    def _run_incremental_scrape(self, max_cards: int = None, offset: int = 0,
+                                resume_run_id: str = None, worker_id: str = None) -> Dict[str, Any]:
+        """Incremental scrape - only get new data since last update, journaled like the initial scrape"""
         
-        print(f"🎯 Found {len(cards_needing_updates)} cards needing updates")
+        print("🔄 INCREMENTAL SCRAPE")
+        print("📅 Only collecting new listings since last update")
+        print()
         
-        # Use date-filtered searches for incremental updates
-        # This would require modifying eBay search to include date filters
-        # For now, we'll use the same comprehensive approach but with duplicate filtering
+        if resume_run_id:
+            run_id = resume_run_id
+        else:
+            # Get cards that need updates (based on last_updated timestamp)
+            cards_needing_updates = self._get_cards_needing_updates(max_cards, offset)
+            
+            if not cards_needing_updates:
+                print("✅ All cards are up to date!")
+                return self._create_empty_results()
+            
+            print(f"🎯 Found {len(cards_needing_updates)} cards needing updates")
+            
+            # Same searches as the initial scrape; the uploader drops listings already stored
+            run_id = self._plan_run(cards_needing_updates, {'max_cards': max_cards, 'offset': offset}, mode="incremental")
         
-        return self._process_incremental_cards(cards_needing_updates)
+        return self._run_journaled(run_id, 'incremental', worker_id)
     
     def _get_all_cards_for_scraping(self, max_cards: int = None, offset: int = 0) -> List[Dict[str, Any]]:
         """Get all cards from database for comprehensive scraping"""
@@ -190,181 +336,22 @@ class ComprehensiveeBayScraper:
             print(f"❌ Error getting cards: {e}")
             return []
     
-    def _process_comprehensive_batch(self, cards: List[Dict[str, Any]], batch_num: int) -> Dict[str, Any]:
-        """Process a batch of cards comprehensively"""
-        
-        batch_results = {
-            'batch_number': batch_num,
-            'cards_processed': 0,
-            'searches_executed': 0,
-            'listings_found': 0,
-            'listings_uploaded': 0,
-            'failed_cards': [],
-            'errors': []
-        }
-        
-        for card_idx, card in enumerate(cards, 1):
-            card_id = card['id']
-            card_name = card.get('card_name', 'Unknown')
-            
-            print(f"\n🎯 Processing {card_idx}/{len(cards)}: {card_name} (ID: {card_id})")
-            
-            try:
-                card_results = self._process_single_card_comprehensive(card)
-                
-                # Aggregate results
-                batch_results['cards_processed'] += 1
-                batch_results['searches_executed'] += card_results['searches_executed']
-                batch_results['listings_found'] += card_results['listings_found']
-                batch_results['listings_uploaded'] += card_results['listings_uploaded']
-                
-                if not card_results['success']:
-                    batch_results['failed_cards'].append(card_id)
-                
-                batch_results['errors'].extend(card_results['errors'])
-                
-                # Update market summary after each successful card
-                if card_results['listings_uploaded'] > 0:
-                    try:
-                        self.analyzer.update_market_summary(card_id)
-                        print(f"📊 Market summary updated for {card_name}")
-                    except Exception as e:
-                        print(f"⚠️ Market summary failed: {e}")
-                
-                # Rest between cards
-                if card_idx < len(cards):
-                    print(f"⏳ Waiting {self.delay_between_cards}s before next card...")
-                    time.sleep(self.delay_between_cards)
-                    
-            except Exception as e:
-                print(f"❌ Error processing {card_name}: {e}")
-                batch_results['failed_cards'].append(card_id)
-                batch_results['errors'].append(f"Card {card_name}: {e}")
-        
-        return batch_results
-    
-    def _process_single_card_comprehensive(self, card: Dict[str, Any]) -> Dict[str, Any]:
-        """Process a single card comprehensively - get ALL available data"""
-        
-        card_id = card['id']
-        card_name = card.get('card_name', 'Unknown')
-        
-        card_results = {
-            'success': False,
-            'searches_executed': 0,
-            'listings_found': 0,
-            'listings_uploaded': 0,
-            'errors': []
-        }
-        
-        try:
-            # NO SKIP LOGIC - always scrape for comprehensive mode
-            existing_count = self.uploader.get_card_listing_count(card_id)
-            if existing_count > 0:
-                print(f"📊 {card_name} has {existing_count} existing listings - collecting more")
-            
-            # Generate all 3 search strategies
-            search_plan = self.search_generator.generate_batch_search_plan([card])
-            
-            if not search_plan or not search_plan.get('search_plans'):
-                print(f"⚠️ No search plans generated for {card_name}")
-                card_results['errors'].append(f"No search plans for card {card_id}")
-                return card_results
-            
-            card_search_plan = search_plan['search_plans'][0]
-            search_terms_list = card_search_plan.get('search_terms', [])
-            
-            print(f"🔍 Executing {len(search_terms_list)} comprehensive searches for {card_name}")
-            
-            all_listings = []
-            
-            # Execute each search comprehensively
-            for search_num, search_terms in enumerate(search_terms_list, 1):
-                try:
-                    print(f"  🔎 Search {search_num}/{len(search_terms_list)}: '{search_terms}'")
-                    
-                    # COMPREHENSIVE search - get ALL pages available
-                    search_results = self.ebay_searcher.search_sold_listings(
-                        search_terms,
-                        max_pages=self.max_pages_per_search,  # Up to 50 pages
-                        max_results=self.max_listings_per_search  # No limit
-                    )
-                    
-                    card_results['searches_executed'] += 1
-                    
-                    if not search_results:
-                        print(f"    ⚠️ No results for search: {search_terms}")
-                        continue
-                    
-                    # Parse all listings from all pages
-                    parsed_listings = []
-                    for page_num, html_content in enumerate(search_results, 1):
-                        try:
-                            page_listings = self.parser.parse_listing_html(html_content, card_name)
-                            parsed_listings.extend(page_listings)
-                            print(f"    📄 Page {page_num}: {len(page_listings)} listings")
-                        except Exception as e:
-                            print(f"    ⚠️ Parse error page {page_num}: {e}")
-                            card_results['errors'].append(f"Parse error {search_terms} page {page_num}: {e}")
-                    
-                    if parsed_listings:
-                        print(f"    ✅ Total found: {len(parsed_listings)} listings")
-                        card_results['listings_found'] += len(parsed_listings)
-                        
-                        # Upload to Supabase
-                        upload_success = self.uploader.upload_targeted_listings(
-                            parsed_listings, 
-                            card_id, 
-                            search_terms
-                        )
-                        
-                        if upload_success:
-                            # Count actual uploaded (after duplicate filtering)
-                            uploaded_count = len(parsed_listings)  # Simplified for now
-                            card_results['listings_uploaded'] += uploaded_count
-                            print(f"    💾 Uploaded: {uploaded_count} listings")
-                        else:
-                            card_results['errors'].append(f"Upload failed for {search_terms}")
-                        
-                        all_listings.extend(parsed_listings)
-                    
-                    # Rate limiting between searches
-                    if search_num < len(search_terms_list):
-                        print(f"    ⏳ Waiting {self.delay_between_searches}s before next search...")
-                        time.sleep(self.delay_between_searches)
-                        
-                except Exception as e:
-                    print(f"    ❌ Search failed: {e}")
-                    card_results['errors'].append(f"Search '{search_terms}' failed: {e}")
-            
-            # Success if we uploaded any listings
-            card_results['success'] = card_results['listings_uploaded'] > 0
-            
-            if card_results['success']:
-                print(f"✅ {card_name}: {card_results['listings_uploaded']} total listings collected")
-            else:
-                print(f"⚠️ {card_name}: No new listings collected")
-            
-            return card_results
-            
-        except Exception as e:
-            print(f"❌ Error processing card {card_name}: {e}")
-            card_results['errors'].append(f"Card processing error: {e}")
-            return card_results
-    
-    def _get_cards_needing_updates(self, max_cards: int = None, offset: int = 0) -> List[Dict[str, Any]]:
-        """Get cards that need incremental updates based on last_updated timestamp"""
+    def _get_cards_needing_updates(self, max_cards: int = None, offset: int = 0,
+                                   page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Get the cards most worth updating within the request budget
         
-        # This would query cards where last_updated is older than X days
-        # For now, return all cards (simplified)
-        return self._get_all_cards_for_scraping(max_cards, offset)
-    
-    def _process_incremental_cards(self, cards: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Process cards for incremental updates"""
+        The whole catalog from offset on is read page by page; the scheduler keeps the
+        cards that are stale or in demand and ranks them by volatility, velocity and demand.
+        """
         
-        # For now, use same comprehensive approach
-        # In future, this would use date-filtered eBay searches
-        return self._process_comprehensive_batch(cards, 1)
+        all_cards = []
+        while True:
+            page = self._get_all_cards_for_scraping(page_size, offset + len(all_cards))
+            all_cards.extend(page)
+            if len(page) < page_size:
+                break
+        return self.scheduler.prioritize(all_cards, 'card', max_products=max_cards)
     
     def _estimate_time_remaining(self, current_batch: int, total_batches: int) -> str:
         """Estimate remaining processing time"""
@@ -452,6 +439,11 @@ def main():
     parser.add_argument("--max-cards", type=int, help="Maximum cards to process (default: ALL)")
     parser.add_argument("--offset", type=int, default=0, help="Starting offset for card selection")
     parser.add_argument("--test", action="store_true", help="Test mode with 3 cards")
+    parser.add_argument("--mode", choices=["initial", "incremental"], default="initial",
+                        help="initial: every card, all pages; incremental: cards the refresh scheduler finds due (a resumed run keeps its own mode)")
+    parser.add_argument("--parse-workers", type=int, help="Worker processes for HTML parsing (default: one per core)")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Resume a journaled run, skipping finished pages (also how extra workers join a run)")
+    parser.add_argument("--worker-id", help="Name for this worker in the run journal (default: host and pid)")
     
     args = parser.parse_args()
     
@@ -468,25 +460,15 @@ def main():
     print("  • May take days/weeks for full database")
     print("=" * 50)
     
-    # For now, use the existing targeted scraper with modified settings
-    # This is a simplified version - the full implementation would be more complex
-    
-    from targeted_scraper import TargetedeBayScraper
-    
-    scraper = TargetedeBayScraper()
-    
-    # Override settings for comprehensive scraping
-    scraper.cards_per_batch = 3
-    scraper.searches_per_card = 3
-    scraper.delay_between_searches = 6.0
-    scraper.delay_between_cards = 3.0
-    scraper.max_listings_per_search = 200  # Increased from 30
+    scraper = ComprehensiveeBayScraper(parse_workers=args.parse_workers)
     
     try:
-        results = scraper.run_targeted_scraping(
-            selection_strategy="all_cards",
+        results = scraper.run_comprehensive_scrape(
+            mode=args.mode,
             max_cards=args.max_cards,
-            offset=args.offset
+            offset=args.offset,
+            resume_run_id=args.resume,
+            worker_id=args.worker_id
         )
         
         print(f"\n🎉 COMPREHENSIVE SCRAPING COMPLETE!")
@@ -494,9 +476,11 @@ def main():
         print(f"📈 Listings collected: {results.get('total_listings_uploaded', 0)}")
         
     except KeyboardInterrupt:
-        print(f"\n⏹️ Scraping interrupted by user")
+        print(f"\n⏹️ Scraping interrupted by user - finished pages are journaled, continue with --resume <run_id>")
     except Exception as e:
         print(f"\n❌ Scraping failed: {e}")
+    finally:
+        scraper.page_parser.shutdown()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
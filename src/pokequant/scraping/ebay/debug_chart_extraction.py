@@ -49,7 +49,6 @@ def debug_chart_extraction():
     # Get the raw HTML
     print("📄 Fetching raw HTML...")
     try:
-        pricecharting_scraper._rate_limit()
         response = pricecharting_scraper.session.get(pricecharting_url)
         
         if response.status_code != 200:
@@ -8,14 +8,77 @@ from typing import List, Dict, Any, Optional
 import re
 from datetime import datetime
 from listing_quality_filter_fixed import ListingQualityFilterFixed
+from utils import extract_item_id, canonical_listing_url
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+def _class_xpath(tag: str, class_name: str) -> str:
+    """XPath matching a tag with an exact class token (same as BeautifulSoup's class_=)"""
+    return f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+if LXML_AVAILABLE:
+    # Compiled once - the fast backend runs these for every listing on every page
+    _FAST_XPATHS = {
+        # Result containers (same substring matching as the re.compile() class lookups)
+        'main_ul': etree.XPath(".//ul[contains(@class, 'srp-results')]"),
+        'main_div': etree.XPath(".//div[@id='srp-river-results']"),
+        'card_li': etree.XPath(".//li[contains(@class, 's-card')]"),
+        'item_li': etree.XPath(".//li[contains(@class, 's-item')]"),
+        'item_div': etree.XPath(".//div[contains(@class, 's-item')]"),
+        # s-card structure
+        'card_title': etree.XPath(_class_xpath('div', 's-card__title')),
+        'card_price': etree.XPath(_class_xpath('span', 's-card__price')),
+        'card_link': etree.XPath(_class_xpath('a', 'su-link')),
+        'card_subtitle': etree.XPath(_class_xpath('div', 's-card__subtitle')),
+        'card_attribute_row': etree.XPath(_class_xpath('div', 's-card__attribute-row')),
+        'card_caption': etree.XPath(_class_xpath('div', 's-card__caption')),
+        'styled_text': etree.XPath(_class_xpath('span', 'su-styled-text')),
+        # s-item structure
+        'item_title': etree.XPath(_class_xpath('div', 's-item__title')),
+        'item_price': etree.XPath(_class_xpath('span', 's-item__price')),
+        'item_link': etree.XPath(_class_xpath('a', 's-item__link')),
+        'item_subtitle': etree.XPath(_class_xpath('div', 's-item__subtitle')),
+        'secondary_info': etree.XPath(_class_xpath('span', 'SECONDARY_INFO')),
+        'item_purchase_options': etree.XPath(_class_xpath('span', 's-item__purchase-options')),
+        'item_bids': etree.XPath(_class_xpath('span', 's-item__bids')),
+        'item_shipping': etree.XPath(_class_xpath('span', 's-item__shipping')),
+        'span': etree.XPath('.//span'),
+        'img': etree.XPath('.//img'),
+        # Text nodes as BeautifulSoup's get_text() sees them (comments and script/style contents skipped)
+        'text_nodes': etree.XPath('.//text()[not(parent::script or parent::style or parent::template)]',
+                                  smart_strings=False),
+    }
+    
+    # Same order as the date_selectors used by get_sold_date_from_listing
+    _FAST_DATE_XPATHS = [
+        etree.XPath(_class_xpath('span', 's-item__ended-date')),
+        etree.XPath(_class_xpath('span', 's-item__time-left')),
+        etree.XPath(_class_xpath('div', 's-item__detail--primary')),
+        etree.XPath(_class_xpath('span', 's-item__time-end')),
+        etree.XPath(".//span[contains(@class, 'sold')]"),
+        etree.XPath(".//span[contains(@class, 'date')]"),
+    ]
 
 class eBayParser:
     """Parses eBay listing HTML to extract structured data"""
     
-    def __init__(self, enable_quality_filter: bool = True):
+    def __init__(self, enable_quality_filter: bool = True, fast_parser: bool = False):
+        """
+        Args:
+            enable_quality_filter: Run parsed listings through ListingQualityFilterFixed
+            fast_parser: Use the lxml backend (same listing dicts, much less CPU per page)
+        """
         # Initialize quality filter
         self.quality_filter = ListingQualityFilterFixed() if enable_quality_filter else None
         
+        if fast_parser and not LXML_AVAILABLE:
+            print("⚠️ lxml not installed - falling back to BeautifulSoup parser")
+        self.fast_parser = fast_parser and LXML_AVAILABLE
+        
         # Patterns for extracting card info from titles
         self.grading_pattern = re.compile(r'\b(PSA|BGS|CGC|CBCS)\s*(\d+(?:\.\d+)?)\b', re.IGNORECASE)
         self.card_number_pattern = re.compile(r'\b(\d+)/(\d+)\b')
@@ -28,9 +91,18 @@ class eBayParser:
             'celebrations': r'\b(celebrations|CELEB)\b',
             'fusion strike': r'\b(fusion\s*strike|FST)\b'
         }
+        self.sold_date_patterns = [
+            re.compile(r'Sold\s+([A-Za-z]{3}\s+\d{1,2}(?:,\s*\d{4})?)', re.IGNORECASE),
+            re.compile(r'Ended\s+([A-Za-z]{3}\s+\d{1,2}(?:,\s*\d{4})?)', re.IGNORECASE),
+            re.compile(r'(\d{1,2}/\d{1,2}/\d{2,4})\s*sold', re.IGNORECASE),
+            re.compile(r'sold\s*(\d{1,2}/\d{1,2}/\d{2,4})', re.IGNORECASE)
+        ]
     
     def parse_listing_html(self, html: str, expected_card_name: str = None, is_sealed_product: bool = False) -> List[Dict[str, Any]]:
         """Parse HTML page and extract all listings"""
+        if self.fast_parser:
+            return self._parse_listing_html_fast(html, expected_card_name, is_sealed_product)
+        
         soup = BeautifulSoup(html, 'html.parser')
         print("🔍 Parsing eBay HTML...")
         
@@ -58,11 +130,16 @@ class eBayParser:
                 listings = soup.find_all('div', {'class': re.compile(r's-item')})
             print(f"📊 Found {len(listings)} listing containers (fallback method)")
         
+        return self._finish_parsed_listings(listings, self.extract_listing_data, expected_card_name, is_sealed_product)
+    
+    def _finish_parsed_listings(self, listings: List[Any], extract_func, expected_card_name: str = None,
+                                is_sealed_product: bool = False) -> List[Dict[str, Any]]:
+        """Extract data from listing containers, add title metadata and apply the quality filter"""
         parsed_listings = []
         
         for i, listing in enumerate(listings):
             try:
-                listing_data = self.extract_listing_data(listing)
+                listing_data = extract_func(listing)
                 if listing_data and listing_data.get('title'):  # Only include if we got valid data
                     # Parse title for card metadata
                     card_info = self.parse_title_for_card_info(listing_data['title'])
@@ -93,6 +170,8 @@ class eBayParser:
             'price': 0.0,
             'sold_date': None,
             'listing_url': '',
+            'item_id': None,
+            'canonical_url': '',
             'image_url': '',
             'is_auction': False,
             'bids': 0,
@@ -202,11 +281,190 @@ class eBayParser:
             # Extract sold date (for sold listings) - common for both structures
             data['sold_date'] = self.get_sold_date_from_listing(listing_element)
             
+            # Normalized identity - raw URLs carry tracking parameters that change between page loads
+            data['item_id'] = extract_item_id(data['listing_url'])
+            data['canonical_url'] = canonical_listing_url(data['listing_url'])
+            
         except Exception as e:
             print(f"⚠️ Error extracting listing data: {e}")
         
         return data
     
+    def _parse_listing_html_fast(self, html: str, expected_card_name: str = None, is_sealed_product: bool = False) -> List[Dict[str, Any]]:
+        """lxml version of parse_listing_html - same container lookup order and listing dicts"""
+        print("🔍 Parsing eBay HTML (fast parser)...")
+        
+        if isinstance(html, str) and html.lstrip().startswith('<?xml'):
+            html = html.encode('utf-8')  # lxml refuses str input with an encoding declaration
+        # Plain etree elements - lxml.html's custom element classes add a lookup per node
+        root = etree.fromstring(html, etree.HTMLParser()) if html and html.strip() else None
+        
+        if root is None:
+            listings = []
+            print("📊 Found 0 listing containers (fallback method)")
+        else:
+            main_container = self._first(_FAST_XPATHS['main_ul'](root))
+            if main_container is None:
+                main_container = self._first(_FAST_XPATHS['main_div'](root))
+            search_root = main_container if main_container is not None else root
+            
+            listings = _FAST_XPATHS['card_li'](search_root)
+            if not listings:
+                listings = _FAST_XPATHS['item_li'](search_root)
+            if not listings:
+                listings = _FAST_XPATHS['item_div'](search_root)
+            
+            if main_container is not None:
+                print(f"📊 Found {len(listings)} listing containers in main results")
+            else:
+                print(f"📊 Found {len(listings)} listing containers (fallback method)")
+        
+        return self._finish_parsed_listings(listings, self._extract_listing_data_fast, expected_card_name, is_sealed_product)
+    
+    @staticmethod
+    def _first(elements: List[Any]) -> Optional[Any]:
+        return elements[0] if elements else None
+    
+    @staticmethod
+    def _element_text(element, strip: bool = False) -> str:
+        """Match BeautifulSoup's get_text() / get_text(strip=True) for an lxml element"""
+        parts = _FAST_XPATHS['text_nodes'](element)
+        if strip:
+            return ''.join(part.strip() for part in parts)
+        return ''.join(parts)
+    
+    def _extract_listing_data_fast(self, listing_element) -> Dict[str, Any]:
+        """lxml version of extract_listing_data"""
+        xp = _FAST_XPATHS
+        text = self._element_text
+        data = {
+            'title': '',
+            'price': 0.0,
+            'sold_date': None,
+            'listing_url': '',
+            'item_id': None,
+            'canonical_url': '',
+            'image_url': '',
+            'is_auction': False,
+            'bids': 0,
+            'condition': '',
+            'shipping': ''
+        }
+        
+        try:
+            is_new_structure = 's-card' in listing_element.get('class', '').split()
+            
+            if is_new_structure:
+                title_elem = self._first(xp['card_title'](listing_element))
+                if title_elem is not None:
+                    title_span = self._first(xp['styled_text'](title_elem))
+                    if title_span is not None:
+                        data['title'] = text(title_span, strip=True)
+                
+                price_elem = self._first(xp['card_price'](listing_element))
+                if price_elem is not None:
+                    data['price'] = self.clean_price(text(price_elem, strip=True))
+                
+                link_elem = self._first(xp['card_link'](listing_element))
+                if link_elem is not None:
+                    data['listing_url'] = link_elem.get('href', '')
+                
+                subtitle_elem = self._first(xp['card_subtitle'](listing_element))
+                if subtitle_elem is not None:
+                    condition_span = self._first(xp['styled_text'](subtitle_elem))
+                    if condition_span is not None:
+                        data['condition'] = text(condition_span, strip=True)
+                
+                for row in xp['card_attribute_row'](listing_element):
+                    row_text = text(row, strip=True)
+                    lowered = row_text.lower()
+                    if 'bid' in lowered or 'auction' in lowered:
+                        data['is_auction'] = True
+                        bids_match = re.search(r'(\d+)\s+bid', lowered)
+                        if bids_match:
+                            data['bids'] = int(bids_match.group(1))
+                    elif 'delivery' in lowered or 'shipping' in lowered:
+                        data['shipping'] = row_text
+            
+            else:
+                title_elem = self._first(xp['item_title'](listing_element))
+                if title_elem is not None:
+                    title_span = self._first(xp['span'](title_elem))
+                    if title_span is not None:
+                        data['title'] = text(title_span, strip=True)
+                
+                price_elem = self._first(xp['item_price'](listing_element))
+                if price_elem is not None:
+                    data['price'] = self.clean_price(text(price_elem, strip=True))
+                
+                link_elem = self._first(xp['item_link'](listing_element))
+                if link_elem is not None:
+                    data['listing_url'] = link_elem.get('href', '')
+                
+                subtitle_elem = self._first(xp['item_subtitle'](listing_element))
+                if subtitle_elem is not None:
+                    condition_span = self._first(xp['secondary_info'](subtitle_elem))
+                    if condition_span is not None:
+                        data['condition'] = text(condition_span, strip=True)
+                
+                purchase_options = self._first(xp['item_purchase_options'](listing_element))
+                if purchase_options is not None:
+                    options_text = text(purchase_options, strip=True).lower()
+                    data['is_auction'] = 'bid' in options_text or 'auction' in options_text
+                
+                bids_elem = self._first(xp['item_bids'](listing_element))
+                if bids_elem is not None:
+                    bids_match = re.search(r'(\d+)', text(bids_elem, strip=True))
+                    if bids_match:
+                        data['bids'] = int(bids_match.group(1))
+                
+                shipping_elem = self._first(xp['item_shipping'](listing_element))
+                if shipping_elem is not None:
+                    data['shipping'] = text(shipping_elem, strip=True)
+            
+            img_elem = self._first(xp['img'](listing_element))
+            if img_elem is not None:
+                data['image_url'] = img_elem.get('data-defer-load') or img_elem.get('src', '')
+            
+            data['sold_date'] = self._get_sold_date_fast(listing_element, is_new_structure)
+            data['item_id'] = extract_item_id(data['listing_url'])
+            data['canonical_url'] = canonical_listing_url(data['listing_url'])
+            
+        except Exception as e:
+            print(f"⚠️ Error extracting listing data: {e}")
+        
+        return data
+    
+    def _get_sold_date_fast(self, listing_element, is_new_structure: bool) -> Optional[str]:
+        """lxml version of get_sold_date_from_listing"""
+        try:
+            if is_new_structure:
+                caption_elem = self._first(_FAST_XPATHS['card_caption'](listing_element))
+                if caption_elem is not None:
+                    sold_span = self._first(_FAST_XPATHS['styled_text'](caption_elem))
+                    if sold_span is not None:
+                        date_text = self._element_text(sold_span, strip=True)
+                        if 'sold' in date_text.lower():
+                            return date_text
+            else:
+                for date_xpath in _FAST_DATE_XPATHS:
+                    date_elem = self._first(date_xpath(listing_element))
+                    if date_elem is not None:
+                        date_text = self._element_text(date_elem, strip=True)
+                        if any(word in date_text.lower() for word in ['sold', 'ended']):
+                            return date_text
+            
+            listing_text = self._element_text(listing_element)
+            for pattern in self.sold_date_patterns:
+                match = pattern.search(listing_text)
+                if match:
+                    return match.group(1) if match.lastindex else match.group(0)
+            
+        except Exception as e:
+            print(f"⚠️ Error extracting sold date: {e}")
+        
+        return None
+    
     def parse_title_for_card_info(self, title: str) -> Dict[str, Any]:
         """Extract card metadata from eBay title"""
         card_info = {
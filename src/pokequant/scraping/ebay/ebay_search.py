@@ -4,7 +4,9 @@ Handles eBay search URLs + pagination for sold listings
 """
 
 import requests
-from typing import List, Dict, Any, Optional
+import asyncio
+import aiohttp
+from typing import List, Dict, Any, Optional, Callable
 from urllib.parse import urlencode
 import sys
 import os
@@ -13,14 +15,31 @@ import os
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
-from utils import rate_limit_delay, retry_with_backoff
+from utils import rate_limit_delay, retry_with_backoff, async_retry_with_backoff, HostRateLimiter
 
 class eBaySearcher:
     """Handles eBay search URL construction and fetching"""
     
     BASE_URL = "https://www.ebay.com/sch/i.html"
     
-    def __init__(self):
+    def __init__(self, base_url: str = None, requests_per_second: float = 0.5, burst: float = 1.0,
+                 host_budgets: Dict[str, Dict[str, float]] = None):
+        """
+        Args:
+            base_url: Override the eBay search endpoint (e.g. a local stub server)
+            requests_per_second: Default per-host budget for the async fetch mode
+            burst: Token bucket capacity per host for the async fetch mode
+            host_budgets: Optional per-host overrides for the async fetch mode
+        """
+        if base_url:
+            self.BASE_URL = base_url
+        
+        # Async fetch mode settings (sync mode keeps its fixed delays)
+        self.rate_limiter = HostRateLimiter(requests_per_second, burst, host_budgets)
+        self.max_retries = 3
+        self.retry_base_delay = 1.0
+        self.request_timeout = 10
+        
         self.session = requests.Session()
         # Set user agent to avoid blocking
         self.session.headers.update({
@@ -76,7 +95,8 @@ class eBaySearcher:
             print(f"❌ Failed to fetch page: {e}")
             return None
     
-    def search_sold_listings(self, keywords: str, max_pages: int = 5, max_results: int = None, **filters) -> List[str]:
+    def search_sold_listings(self, keywords: str, max_pages: int = 5, max_results: int = None,
+                             on_page: Callable[[str], Any] = None, **filters) -> List[str]:
         """
         Search for sold listings and return HTML pages
         
@@ -84,6 +104,7 @@ class eBaySearcher:
             keywords: Search terms
             max_pages: Maximum pages to fetch (default 5, set to 50+ for comprehensive)
             max_results: Maximum total results (None = no limit)
+            on_page: Called with each page as soon as it is fetched (e.g. PendingParse.add)
             **filters: Additional search filters
         """
         print(f"🔍 COMPREHENSIVE SEARCH: '{keywords}'")
@@ -103,6 +124,8 @@ class eBaySearcher:
             
             if html:
                 html_pages.append(html)
+                if on_page:
+                    on_page(html)
                 
                 # Estimate results on this page (60 per page typically)
                 page_results = 60  # eBay default items per page
@@ -116,14 +139,7 @@ class eBaySearcher:
                     break
                 
                 # Check if this is the last page (multiple indicators)
-                end_indicators = [
-                    "Next page" not in html,
-                    len(html) < 10000,  # Very small page
-                    "No exact matches found" in html,
-                    "0 results" in html.lower()
-                ]
-                
-                if any(end_indicators):
+                if self._is_last_page(html):
                     print(f"🏁 Reached end of results at page {page}")
                     break
             else:
@@ -141,6 +157,114 @@ class eBaySearcher:
         
         return html_pages
     
+    def _is_last_page(self, html: str) -> bool:
+        """Check whether a results page is the last one for its search"""
+        end_indicators = [
+            "Next page" not in html,
+            len(html) < 10000,  # Very small page
+            "No exact matches found" in html,
+            "0 results" in html.lower()
+        ]
+        return any(end_indicators)
+    
+    async def fetch_listings_page_async(self, session: aiohttp.ClientSession, search_url: str) -> Optional[str]:
+        """Async version of fetch_listings_page - waits for the host's token bucket before each attempt"""
+        async def _fetch():
+            await self.rate_limiter.acquire(search_url)
+            print(f"📡 Fetching: {search_url}")
+            async with session.get(search_url) as response:
+                text = await response.text()
+                response.raise_for_status()
+                
+                if "blocked" in text.lower() or response.status == 429:
+                    raise Exception("Rate limited by eBay")
+                
+                return text
+        
+        try:
+            html = await async_retry_with_backoff(_fetch, max_retries=self.max_retries, base_delay=self.retry_base_delay)
+            print(f"✅ Successfully fetched {len(html)} characters")
+            return html
+        except Exception as e:
+            print(f"❌ Failed to fetch page: {e}")
+            return None
+    
+    async def search_sold_listings_async(self, session: aiohttp.ClientSession, keywords: str, max_pages: int = 5,
+                                         max_results: int = None, on_page: Callable[[str], Any] = None,
+                                         **filters) -> List[str]:
+        """
+        Async version of search_sold_listings
+        
+        Pages of one search are fetched in order (the end of results is only known after each page),
+        while pacing comes from the per-host token bucket instead of fixed sleeps.
+        """
+        html_pages = []
+        total_results_found = 0
+        
+        for page in range(1, max_pages + 1):
+            search_url = self.build_search_url(keywords, page, **filters)
+            html = await self.fetch_listings_page_async(session, search_url)
+            
+            if not html:
+                print(f"⚠️ Failed to fetch page {page} for '{keywords}', stopping")
+                break
+            
+            html_pages.append(html)
+            if on_page:
+                on_page(html)
+            total_results_found += 60  # eBay default items per page
+            
+            if max_results and total_results_found >= max_results:
+                break
+            
+            if self._is_last_page(html):
+                break
+        
+        print(f"📦 '{keywords}': {len(html_pages)} pages collected")
+        return html_pages
+    
+    async def search_many_sold_listings_async(self, search_terms: List[str], max_pages: int = 5,
+                                              max_results: int = None, max_concurrent: int = 8,
+                                              **filters) -> Dict[str, List[str]]:
+        """Run many searches at once, sharing one connection pool and the per-host budgets"""
+        semaphore = asyncio.Semaphore(max_concurrent)
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+        headers = dict(self.session.headers)
+        
+        async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
+            async def _run(keywords: str) -> List[str]:
+                async with semaphore:
+                    return await self.search_sold_listings_async(session, keywords, max_pages, max_results, **filters)
+            
+            results = await asyncio.gather(*(_run(terms) for terms in search_terms))
+        
+        return dict(zip(search_terms, results))
+    
+    def search_many_sold_listings(self, search_terms: List[str], max_pages: int = 5, max_results: int = None,
+                                  max_concurrent: int = 8, **filters) -> Dict[str, List[str]]:
+        """
+        Search for sold listings for many search terms concurrently
+        
+        Args:
+            search_terms: Search strings to run
+            max_pages: Maximum pages to fetch per search
+            max_results: Maximum total results per search (None = no limit)
+            max_concurrent: Maximum searches in flight at once
+            **filters: Additional search filters
+            
+        Returns:
+            Dict mapping each search term to its list of HTML pages (in page order)
+        """
+        print(f"🔍 CONCURRENT SEARCH: {len(search_terms)} search terms (max {max_concurrent} in flight)")
+        
+        results = asyncio.run(self.search_many_sold_listings_async(
+            search_terms, max_pages, max_results, max_concurrent, **filters
+        ))
+        
+        total_pages = sum(len(pages) for pages in results.values())
+        print(f"📦 CONCURRENT COLLECTION COMPLETE: {total_pages} pages for {len(results)} searches")
+        return results
+    
     def search_specific_card(self, card_name: str, set_name: str = "", **filters) -> List[str]:
         """Search for a specific card with set name"""
         # Build targeted search query
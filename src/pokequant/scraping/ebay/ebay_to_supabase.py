@@ -6,13 +6,16 @@ Handles uploading parsed eBay data to Supabase with direct card_id foreign keys
 import sys
 import os
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import re
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from supabase_client import supabase
+from utils import extract_item_id, canonical_listing_url, listing_key
+from listing_index import ListingIdentityIndex
+from freshness_snapshot import FreshnessSnapshot
 
 class eBaySupabaseUploader:
     """Handles uploading eBay data to Supabase with targeted approach"""
@@ -20,6 +23,8 @@ class eBaySupabaseUploader:
     def __init__(self):
         self.supabase = supabase
         self.batch_size = 25  # Conservative batch size for rate limiting
+        self.listing_index = ListingIdentityIndex(self.supabase)
+        self.freshness = FreshnessSnapshot(self.supabase)
     
     def parse_ebay_date(self, date_string: str) -> Optional[str]:
         """Parse eBay date strings into ISO format"""
@@ -179,7 +184,8 @@ class eBaySupabaseUploader:
                 'card_id': card_id,
                 'title': listing.get('title', '').strip(),
                 'price': float(listing.get('price', 0)),
-                'listing_url': listing.get('listing_url', '').strip(),
+                'listing_url': canonical_listing_url(listing.get('listing_url', '')),
+                'item_id': listing.get('item_id') or extract_item_id(listing.get('listing_url', '')),
                 'search_terms': search_terms,
                 'created_at': datetime.now().isoformat(),
                 
@@ -235,7 +241,8 @@ class eBaySupabaseUploader:
                 'sealed_product_id': sealed_product_id,
                 'title': listing.get('title', '').strip(),
                 'price': float(listing.get('price', 0)),
-                'listing_url': listing.get('listing_url', '').strip(),
+                'listing_url': canonical_listing_url(listing.get('listing_url', '')),
+                'item_id': listing.get('item_id') or extract_item_id(listing.get('listing_url', '')),
                 'search_terms': search_terms,
                 'created_at': datetime.now().isoformat(),
                 
@@ -271,103 +278,68 @@ class eBaySupabaseUploader:
     
     def _filter_duplicates(self, listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Filter out listings that already exist in database AND remove internal duplicates"""
-        if not listings:
-            return []
-        
-        try:
-            # STEP 1: Remove internal duplicates within this batch
-            seen_urls = set()
-            deduplicated_listings = []
-            internal_duplicates = 0
-            
-            for listing in listings:
-                url = listing.get('listing_url', '')
-                if url and url not in seen_urls:
-                    seen_urls.add(url)
-                    deduplicated_listings.append(listing)
-                elif url:
-                    internal_duplicates += 1
-            
-            if internal_duplicates > 0:
-                print(f"🔍 Removed {internal_duplicates} internal duplicates from batch")
-            
-            # STEP 2: Check against database for existing listings
-            # Process in smaller chunks to avoid 414 Request-URI Too Large error
-            chunk_size = 10
-            new_listings = []
-            
-            for i in range(0, len(deduplicated_listings), chunk_size):
-                chunk = deduplicated_listings[i:i + chunk_size]
-                chunk_urls = [listing['listing_url'] for listing in chunk if listing.get('listing_url')]
-                
-                if chunk_urls:
-                    result = self.supabase.table("ebay_sold_listings").select("listing_url").in_("listing_url", chunk_urls).execute()
-                    existing_urls = set(row['listing_url'] for row in result.data) if result.data else set()
-                    
-                    for listing in chunk:
-                        if listing.get('listing_url') not in existing_urls:
-                            new_listings.append(listing)
-                else:
-                    new_listings.extend(chunk)
-            
-            database_duplicates = len(deduplicated_listings) - len(new_listings)
-            if database_duplicates > 0:
-                print(f"🔍 Found {database_duplicates} existing listings in database")
-            
-            total_filtered = len(listings) - len(new_listings)
-            if total_filtered > 0:
-                print(f"📊 Total filtered: {total_filtered} duplicates ({internal_duplicates} internal + {database_duplicates} database)")
-            
-            return new_listings
-            
-        except Exception as e:
-            print(f"⚠️ Error checking duplicates: {e}")
-            # If duplicate check fails, return all listings (better than losing data)
-            return listings
+        return self._filter_existing_listings(listings, "ebay_sold_listings")
     
     def _filter_sealed_duplicates(self, listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Filter out sealed product listings that already exist in database AND remove internal duplicates"""
+        return self._filter_existing_listings(listings, "ebay_sealed_listings")
+    
+    def _filter_existing_listings(self, listings: List[Dict[str, Any]], table_name: str) -> List[Dict[str, Any]]:
+        """
+        Remove internal duplicates and listings already stored in table_name
+        
+        Known item IDs are rejected from the local listing index without a query. Only the
+        listings the index has not seen are verified, with one query per upload batch.
+        """
         if not listings:
             return []
         
         try:
-            # STEP 1: Remove internal duplicates within this batch
-            seen_urls = set()
+            # STEP 1: Remove internal duplicates within this batch (by item ID, else canonical URL)
+            seen_keys = set()
             deduplicated_listings = []
             internal_duplicates = 0
             
             for listing in listings:
-                url = listing.get('listing_url', '')
-                if url and url not in seen_urls:
-                    seen_urls.add(url)
+                key = listing.get('item_id') or listing_key(listing.get('listing_url', ''))
+                if key and key not in seen_keys:
+                    seen_keys.add(key)
                     deduplicated_listings.append(listing)
-                elif url:
+                elif key:
                     internal_duplicates += 1
             
             if internal_duplicates > 0:
                 print(f"🔍 Removed {internal_duplicates} internal duplicates from batch")
             
-            # STEP 2: Check against sealed listings database for existing listings
-            chunk_size = 10
-            new_listings = []
+            # STEP 2: O(1) lookups against the local index of stored item IDs
+            unverified = [
+                listing for listing in deduplicated_listings
+                if not self.listing_index.contains(table_name, listing.get('item_id'))
+            ]
+            index_duplicates = len(deduplicated_listings) - len(unverified)
             
-            for i in range(0, len(deduplicated_listings), chunk_size):
-                chunk = deduplicated_listings[i:i + chunk_size]
-                chunk_urls = [listing['listing_url'] for listing in chunk if listing.get('listing_url')]
+            # STEP 3: Exact check of the remaining listings against the database - rows another
+            # process inserted since the index was loaded are caught (and indexed) here.
+            # Stored URLs are canonical, so the short canonical form is what we look up.
+            new_listings = []
+            for i in range(0, len(unverified), self.batch_size):
+                chunk = unverified[i:i + self.batch_size]
+                chunk_urls = [canonical_listing_url(listing['listing_url']) for listing in chunk if listing.get('listing_url')]
                 
                 if chunk_urls:
-                    result = self.supabase.table("ebay_sealed_listings").select("listing_url").in_("listing_url", chunk_urls).execute()
+                    result = self.supabase.table(table_name).select("listing_url").in_("listing_url", chunk_urls).execute()
                     existing_urls = set(row['listing_url'] for row in result.data) if result.data else set()
+                    self.listing_index.add(table_name, (extract_item_id(url) for url in existing_urls))
                     
                     for listing in chunk:
-                        if listing.get('listing_url') not in existing_urls:
+                        if canonical_listing_url(listing.get('listing_url', '')) not in existing_urls:
                             new_listings.append(listing)
                 else:
                     new_listings.extend(chunk)
             
             database_duplicates = len(deduplicated_listings) - len(new_listings)
             if database_duplicates > 0:
-                print(f"🔍 Found {database_duplicates} existing listings in database")
+                print(f"🔍 Found {database_duplicates} existing listings in database ({index_duplicates} from local index)")
             
             total_filtered = len(listings) - len(new_listings)
             if total_filtered > 0:
@@ -376,17 +348,38 @@ class eBaySupabaseUploader:
             return new_listings
             
         except Exception as e:
-            print(f"⚠️ Error checking sealed duplicates: {e}")
+            print(f"⚠️ Error checking duplicates: {e}")
             # If duplicate check fails, return all listings (better than losing data)
             return listings
     
+    def _write_listing_batch(self, table_name: str, batch: List[Dict[str, Any]]):
+        """
+        Write one batch - rows with an item ID are upserted on it, so a sale that slipped past
+        the duplicate filter (e.g. a concurrent writer) is skipped instead of stored twice
+        """
+        keyed = [listing for listing in batch if listing.get('item_id')]
+        unkeyed = [listing for listing in batch if not listing.get('item_id')]
+        
+        result = None
+        if keyed:
+            result = self.supabase.table(table_name).upsert(keyed, on_conflict="item_id", ignore_duplicates=True).execute()
+        if unkeyed:
+            unkeyed_result = self.supabase.table(table_name).insert(unkeyed).execute()
+            if result is None:
+                result = unkeyed_result
+            else:
+                result.data = (result.data or []) + (unkeyed_result.data or [])
+        
+        return result
+    
     def _batch_upload_listings(self, listings: List[Dict[str, Any]]) -> bool:
-        """Upload listings in batches with error handling"""
+        """Upload listings in batches with error handling (True unless every batch failed)"""
         if not listings:
             return True
         
         total_batches = (len(listings) + self.batch_size - 1) // self.batch_size
         successful_uploads = 0
+        failed_batches = 0
         
         for i in range(0, len(listings), self.batch_size):
             batch = listings[i:i + self.batch_size]
@@ -395,31 +388,35 @@ class eBaySupabaseUploader:
             print(f"📦 Uploading batch {batch_num}/{total_batches} ({len(batch)} listings)...")
             
             try:
-                result = self.supabase.table("ebay_sold_listings").insert(batch).execute()
+                result = self._write_listing_batch("ebay_sold_listings", batch)
                 
-                if result.data:
-                    successful_uploads += len(batch)
-                    print(f"✅ Batch {batch_num} uploaded successfully")
-                else:
-                    print(f"❌ Batch {batch_num} failed - no data returned")
+                # Upserts skip rows whose item ID is already stored, so only returned rows were inserted
+                inserted = result.data or []
+                successful_uploads += len(inserted)
+                self.listing_index.add("ebay_sold_listings", (listing.get('item_id') for listing in batch))
+                if inserted:
+                    self.freshness.record_listings('card', inserted)
+                print(f"✅ Batch {batch_num} uploaded: {len(inserted)} inserted, {len(batch) - len(inserted)} already stored")
                     
             except Exception as e:
+                failed_batches += 1
                 print(f"❌ Batch {batch_num} failed: {e}")
                 # Continue with remaining batches
                 continue
         
         success_rate = (successful_uploads / len(listings)) * 100
-        print(f"📊 Upload complete: {successful_uploads}/{len(listings)} listings ({success_rate:.1f}% success rate)")
+        print(f"📊 Upload complete: {successful_uploads}/{len(listings)} listings inserted ({success_rate:.1f}%)")
         
-        return successful_uploads > 0
+        return failed_batches < total_batches
     
     def _batch_upload_sealed_listings(self, listings: List[Dict[str, Any]]) -> bool:
-        """Upload sealed product listings in batches with error handling"""
+        """Upload sealed product listings in batches with error handling (True unless every batch failed)"""
         if not listings:
             return True
         
         total_batches = (len(listings) + self.batch_size - 1) // self.batch_size
         successful_uploads = 0
+        failed_batches = 0
         
         for i in range(0, len(listings), self.batch_size):
             batch = listings[i:i + self.batch_size]
@@ -428,23 +425,26 @@ class eBaySupabaseUploader:
             print(f"📦 Uploading batch {batch_num}/{total_batches} ({len(batch)} listings)...")
             
             try:
-                result = self.supabase.table("ebay_sealed_listings").insert(batch).execute()
+                result = self._write_listing_batch("ebay_sealed_listings", batch)
                 
-                if result.data:
-                    successful_uploads += len(batch)
-                    print(f"✅ Batch {batch_num} uploaded successfully")
-                else:
-                    print(f"❌ Batch {batch_num} failed - no data returned")
+                # Upserts skip rows whose item ID is already stored, so only returned rows were inserted
+                inserted = result.data or []
+                successful_uploads += len(inserted)
+                self.listing_index.add("ebay_sealed_listings", (listing.get('item_id') for listing in batch))
+                if inserted:
+                    self.freshness.record_listings('sealed', inserted)
+                print(f"✅ Batch {batch_num} uploaded: {len(inserted)} inserted, {len(batch) - len(inserted)} already stored")
                     
             except Exception as e:
+                failed_batches += 1
                 print(f"❌ Batch {batch_num} failed: {e}")
                 # Continue with remaining batches
                 continue
         
         success_rate = (successful_uploads / len(listings)) * 100
-        print(f"📊 Upload complete: {successful_uploads}/{len(listings)} listings ({success_rate:.1f}% success rate)")
+        print(f"📊 Upload complete: {successful_uploads}/{len(listings)} listings inserted ({success_rate:.1f}%)")
         
-        return successful_uploads > 0
+        return failed_batches < total_batches
     
     def get_card_listing_count(self, card_id: int) -> int:
         """Get count of existing listings for a specific card"""
@@ -572,34 +572,44 @@ class eBaySupabaseUploader:
             print(f"⚠️ Error getting last update for card {card_id}: {e}")
             return None
     
-    def get_cards_needing_updates(self, days_threshold: int = 7, limit: int = None) -> List[Dict[str, Any]]:
+    def get_cards_needing_updates(self, days_threshold: int = 7, limit: int = None,
+                                  page_size: int = 1000) -> List[Dict[str, Any]]:
         """
         Get cards that need updates based on last scraping timestamp
         
         Args:
             days_threshold: Cards not updated in X days need updates
-            limit: Maximum cards to return
+            limit: Maximum cards to check (None = the whole catalog)
+            page_size: Cards per request (PostgREST caps a response at 1000 rows)
         """
         try:
-            # Get all cards with their last update times
-            cutoff_date = datetime.now() - timedelta(days=days_threshold)
-            
-            # Query cards that either have no listings or haven't been updated recently
-            query = self.supabase.table("pokemon_cards").select("id, card_name, set_name, number")
-            
-            if limit:
-                query = query.limit(limit)
-            
-            all_cards_result = query.execute()
-            
-            if not all_cards_result.data:
+            now = datetime.now(timezone.utc)
+            cutoff_date = now - timedelta(days=days_threshold)
+            
+            # Page through the catalog; one unpaged select would stop at the server's row cap
+            all_cards = []
+            while True:
+                start = len(all_cards)
+                size = page_size if limit is None else min(page_size, limit - start)
+                if size <= 0:
+                    break
+                result = self.supabase.table("pokemon_cards").select("id, card_name, set_name, number") \
+                    .order("id").range(start, start + size - 1).execute()
+                page = result.data or []
+                all_cards.extend(page)
+                if len(page) < size:
+                    break
+            
+            if not all_cards:
                 return []
             
+            # Last updates come from one catalog-wide snapshot instead of a query per card
+            self.freshness.ensure_fresh()
             cards_needing_updates = []
             
-            for card in all_cards_result.data:
+            for card in all_cards:
                 card_id = card['id']
-                last_update = self.get_card_last_update(card_id)
+                last_update = self.freshness.last_update('card', card_id)
                 
                 # Card needs update if:
                 # 1. Never been scraped (last_update is None)
@@ -611,7 +621,7 @@ class eBaySupabaseUploader:
                 
                 if needs_update:
                     card['last_update'] = last_update.isoformat() if last_update else None
-                    card['days_since_update'] = (datetime.now() - last_update).days if last_update else None
+                    card['days_since_update'] = (now - last_update).days if last_update else None
                     cards_needing_updates.append(card)
             
             print(f"📅 Found {len(cards_needing_updates)} cards needing updates (>{days_threshold} days old)")
@@ -34,8 +34,7 @@ class EnhancedComprehensiveScraper:
         
         # Configuration
         self.max_listings_per_search = 50
-        self.delay_between_searches = 5.0
-        self.delay_between_items = 3.0
+        self.max_concurrent_searches = 8  # Pacing comes from the searcher's per-host token bucket
     
     def run_enhanced_scraping(self, strategy: str = "curated", max_items: int = 3, 
                             test_mode: bool = True) -> Dict[str, Any]:
@@ -158,6 +157,17 @@ class EnhancedComprehensiveScraper:
         max_pages = 1 if test_mode else 2
         max_results = 20 if test_mode else self.max_listings_per_search
         
+        # Fetch the pages of every planned search at once, then parse and upload item by item
+        all_search_terms = list(dict.fromkeys(
+            terms for item_plan in search_plan['search_plans'] for terms in item_plan['search_terms']
+        ))
+        pages_by_search = self.ebay_searcher.search_many_sold_listings(
+            all_search_terms,
+            max_pages=max_pages,
+            max_results=max_results,
+            max_concurrent=self.max_concurrent_searches
+        )
+        
         for item_plan in search_plan['search_plans']:
             item_name = item_plan['item_name']
             item_type = item_plan['item_type']
@@ -179,12 +189,7 @@ class EnhancedComprehensiveScraper:
                 try:
                     print(f"  🔎 Search {search_num}/{len(search_terms_list)}: '{search_terms}'")
                     
-                    # Execute eBay search with enhanced terms
-                    search_results = self.ebay_searcher.search_sold_listings(
-                        search_terms,
-                        max_pages=max_pages,
-                        max_results=max_results
-                    )
+                    search_results = pages_by_search.get(search_terms, [])
                     
                     item_results['searches_executed'] += 1
                     results['total_searches_executed'] += 1
@@ -242,11 +247,6 @@ class EnhancedComprehensiveScraper:
                         'listings_found': len(all_listings),
                         'pages_processed': len(search_results)
                     })
-                    
-                    # Rate limiting between searches
-                    if search_num < len(search_terms_list):
-                        print(f"    ⏳ Waiting {self.delay_between_searches}s...")
-                        time.sleep(self.delay_between_searches)
                         
                 except Exception as e:
                     print(f"    ❌ Search failed: {e}")
@@ -258,9 +258,6 @@ class EnhancedComprehensiveScraper:
             # Item processing complete
             print(f"✅ {item_name}: {item_results['listings_found']} found, {item_results['listings_uploaded']} uploaded")
             results['item_results'].append(item_results)
-            
-            # Rate limiting between items
-            time.sleep(self.delay_between_items)
         
         return results
     
@@ -42,7 +42,6 @@ def find_chart_data():
     print(f"🔗 URL: {pricecharting_url}")
     
     # Get the HTML
-    pricecharting_scraper._rate_limit()
     response = pricecharting_scraper.session.get(pricecharting_url)
     html_content = response.text
     
@@ -0,0 +1,199 @@
+"""
+Freshness Snapshot
+Catalog-wide (listing count, latest created_at) per product, cached locally with a TTL
+"""
+
+import os
+import json
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple, Optional, Any
+
+# Per-product summary view from database_schema_freshness.sql
+FRESHNESS_SUMMARY_VIEW = 'ebay_listing_freshness'
+
+# product_type -> (listings table, product id column)
+LISTING_TABLES = {
+    'card': ('ebay_sold_listings', 'card_id'),
+    'sealed': ('ebay_sealed_listings', 'sealed_product_id'),
+}
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse a Supabase timestamp into an aware datetime (naive values are taken as UTC)"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+class FreshnessSnapshot:
+    """
+    In-memory map of (product_type, product_id) -> (listing count, last update)
+
+    Built from the ebay_listing_freshness summary view in a few paged requests, or, if
+    the view isn't installed, by paging through just the id/created_at columns of both
+    listings tables. The snapshot is written to disk and reused until it is older than
+    ttl_seconds, so freshness lookups never query per product.
+    """
+
+    def __init__(self, supabase_client: Any, cache_path: str = "data/freshness_snapshot.json",
+                 ttl_seconds: float = 900, page_size: int = 1000):
+        """
+        Args:
+            supabase_client: Client used to build the snapshot
+            cache_path: JSON file the snapshot is persisted to (None = memory only)
+            ttl_seconds: Rebuild the snapshot once it is older than this
+            page_size: Rows per request while building
+        """
+        self.supabase = supabase_client
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self.page_size = page_size
+
+        self.generated_at: Optional[float] = None
+        self._products: Dict[Tuple[str, str], Tuple[int, Optional[datetime]]] = {}
+
+    def is_fresh(self) -> bool:
+        """Whether the snapshot in memory is within its TTL"""
+        return self.generated_at is not None and time.time() - self.generated_at < self.ttl_seconds
+
+    def ensure_fresh(self):
+        """Load the snapshot from disk, or rebuild it if it has expired"""
+        if self.is_fresh():
+            return
+        if not self._load_file() or not self.is_fresh():
+            self.refresh()
+
+    def refresh(self) -> int:
+        """Rebuild the snapshot from the database; returns the number of products seen"""
+        print("📅 Building freshness snapshot...")
+        products = self._fetch_summary_view()
+        if products is None:
+            products = {}
+            for product_type in LISTING_TABLES:
+                products.update(self._scan_listings(product_type))
+
+        self._products = products
+        self.generated_at = time.time()
+        self._save_file()
+        print(f"📅 Freshness snapshot covers {len(products)} products")
+        return len(products)
+
+    def get(self, product_type: str, product_id: Any) -> Tuple[int, Optional[datetime]]:
+        """(listing count, last update) for a product - (0, None) if it has no listings"""
+        self.ensure_fresh()
+        return self._products.get((product_type, str(product_id)), (0, None))
+
+    def record_listings(self, product_type: str, rows: List[Dict[str, Any]]):
+        """
+        Count listings this process just stored, so a product scraped a moment ago doesn't
+        look stale until the snapshot expires
+
+        Only updates a snapshot that is already loaded (or can be read from disk); a
+        rebuild picks the rows up anyway.
+        """
+        if not rows or (not self.is_fresh() and not self._load_file()):
+            return
+
+        id_column = LISTING_TABLES[product_type][1]
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            if row.get(id_column) is None:
+                continue
+            key = (product_type, str(row[id_column]))
+            count, last_update = self._products.get(key, (0, None))
+            created_at = parse_timestamp(row.get('created_at')) or now
+            self._products[key] = (count + 1, max(last_update, created_at) if last_update else created_at)
+        self._save_file()
+
+    def last_update(self, product_type: str, product_id: Any) -> Optional[datetime]:
+        return self.get(product_type, product_id)[1]
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def _fetch_summary_view(self) -> Optional[Dict[Tuple[str, str], Tuple[int, Optional[datetime]]]]:
+        """Read the grouped summary view, or None if it isn't available"""
+        products = {}
+        start = 0
+        try:
+            while True:
+                result = self.supabase.table(FRESHNESS_SUMMARY_VIEW).select(
+                    'product_type, product_id, listing_count, last_update'
+                ).range(start, start + self.page_size - 1).execute()
+                rows = result.data or []
+
+                for row in rows:
+                    products[(row['product_type'], str(row['product_id']))] = (
+                        int(row.get('listing_count') or 0), parse_timestamp(row.get('last_update'))
+                    )
+
+                if len(rows) < self.page_size:
+                    return products
+                start += self.page_size
+        except Exception as e:
+            print(f"⚠️ Freshness summary view unavailable, scanning listings instead: {e}")
+            return None
+
+    def _scan_listings(self, product_type: str) -> Dict[Tuple[str, str], Tuple[int, Optional[datetime]]]:
+        """Group one listings table by product client-side, reading only two columns"""
+        table_name, id_column = LISTING_TABLES[product_type]
+        counts: Dict[str, int] = {}
+        latest: Dict[str, datetime] = {}
+        start = 0
+
+        while True:
+            result = self.supabase.table(table_name).select(f'{id_column}, created_at').order('id').range(
+                start, start + self.page_size - 1
+            ).execute()
+            rows = result.data or []
+
+            for row in rows:
+                if row.get(id_column) is None:
+                    continue
+                product_id = str(row[id_column])
+                counts[product_id] = counts.get(product_id, 0) + 1
+                created_at = parse_timestamp(row.get('created_at'))
+                if created_at and (product_id not in latest or created_at > latest[product_id]):
+                    latest[product_id] = created_at
+
+            if len(rows) < self.page_size:
+                break
+            start += self.page_size
+
+        return {(product_type, product_id): (count, latest.get(product_id))
+                for product_id, count in counts.items()}
+
+    def _load_file(self) -> bool:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+
+        try:
+            with open(self.cache_path, 'r') as f:
+                stored = json.load(f)
+            self._products = {
+                tuple(key.split(':', 1)): (count, parse_timestamp(last_update))
+                for key, (count, last_update) in stored['products'].items()
+            }
+            self.generated_at = stored['generated_at']
+            return True
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Ignoring unreadable freshness snapshot: {e}")
+            return False
+
+    def _save_file(self):
+        if not self.cache_path:
+            return
+
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        stored = {
+            'generated_at': self.generated_at,
+            'products': {f"{product_type}:{product_id}": [count, last_update.isoformat() if last_update else None]
+                         for (product_type, product_id), (count, last_update) in self._products.items()}
+        }
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(stored, f)
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,170 @@
+"""
+HTTP Cache
+On-disk cache for GET requests with per-page-class TTLs and ETag / Last-Modified revalidation
+"""
+
+import os
+import re
+import json
+import gzip
+import time
+import hashlib
+import requests
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Statuses worth caching: pages, and the 404s from probing product URL formats
+CACHEABLE_STATUSES = (200, 404)
+
+# Response headers kept with a cached body
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+# Anchored to the repo root so the cache doesn't depend on the working directory
+DEFAULT_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                 '..', '..', '..', '..', 'data', 'http_cache'))
+
+class HTTPCache:
+    """
+    Gzip-compressed response store under cache_dir, one file per URL
+
+    Each file holds a JSON metadata line (status, headers, validators, stored time)
+    followed by the body. Files are written to a temp file and renamed, so
+    concurrent scrapers never read a half-written entry.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.gz")
+
+    def get(self, url: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """(metadata, body) for a URL, or None if it isn't cached"""
+        path = self._path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                return meta, f.read()
+        except (OSError, ValueError, EOFError):
+            return None  # Truncated or corrupt entry - treat as a miss
+
+    def put(self, url: str, meta: Dict[str, Any], body: bytes):
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, 'wb') as f:
+            f.write(json.dumps(meta).encode('utf-8') + b'\n')
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def touch(self, url: str, meta: Dict[str, Any]):
+        """Record a successful revalidation - the stored body is fresh again"""
+        cached = self.get(url)
+        if cached:
+            self.put(url, meta, cached[1])
+
+    def clear(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                os.remove(os.path.join(root, name))
+
+class CachedSession(requests.Session):
+    """
+    requests.Session whose GETs are served from an HTTPCache while fresh
+
+    A cached response younger than its page class TTL is returned without touching
+    the network. Once it is older, the request is sent with If-None-Match /
+    If-Modified-Since and a 304 answer reuses the stored body. The rate_limit
+    callback runs before every request that actually goes to the network, so
+    cache hits are never slowed down.
+    """
+
+    def __init__(self, cache: Optional[HTTPCache], page_ttls: List[Tuple[str, float]] = None,
+                 default_ttl: float = 3600, rate_limit: Callable[[], None] = None):
+        """
+        Args:
+            cache: Response store (None = no caching, only rate limiting)
+            page_ttls: (URL regex, TTL seconds) pairs, first match wins
+            default_ttl: TTL for URLs no pattern matches
+            rate_limit: Called before each network request
+        """
+        super().__init__()
+        self.cache = cache
+        self.page_ttls = [(re.compile(pattern), ttl) for pattern, ttl in (page_ttls or [])]
+        self.default_ttl = default_ttl
+        self.rate_limit = rate_limit
+        self.cache_stats = {'hits': 0, 'revalidated': 0, 'misses': 0}
+
+    def ttl_for(self, url: str) -> float:
+        for pattern, ttl in self.page_ttls:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def request(self, method, url, *args, **kwargs):
+        if self.cache is None or method.upper() != 'GET' or kwargs.get('params') or kwargs.get('stream'):
+            return self._send(method, url, *args, **kwargs)
+
+        cached = self.cache.get(url)
+        if cached:
+            meta, body = cached
+            if time.time() - meta['stored_at'] < self.ttl_for(url):
+                self.cache_stats['hits'] += 1
+                return self._cached_response(url, meta, body)
+
+            headers = dict(kwargs.pop('headers', None) or {})
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+            response = self._send(method, url, *args, headers=headers, **kwargs)
+
+            if response.status_code == 304:
+                self.cache_stats['revalidated'] += 1
+                meta = dict(meta, stored_at=time.time(),
+                            etag=response.headers.get('ETag', meta.get('etag')),
+                            last_modified=response.headers.get('Last-Modified', meta.get('last_modified')))
+                self.cache.touch(url, meta)
+                return self._cached_response(url, meta, body)
+        else:
+            response = self._send(method, url, *args, **kwargs)
+
+        self.cache_stats['misses'] += 1
+        if response.status_code in CACHEABLE_STATUSES:
+            self._store(url, response)
+        return response
+
+    def _send(self, method, url, *args, **kwargs):
+        if self.rate_limit:
+            self.rate_limit()
+        return super().request(method, url, *args, **kwargs)
+
+    def _store(self, url: str, response: requests.Response):
+        meta = {
+            'url': url,
+            'final_url': response.url,
+            'status': response.status_code,
+            'headers': {name: response.headers[name] for name in STORED_HEADERS if name in response.headers},
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': time.time(),
+        }
+        try:
+            self.cache.put(url, meta, response.content)
+        except OSError as e:
+            print(f"⚠️ Could not cache {url}: {e}")
+
+    @staticmethod
+    def _cached_response(url: str, meta: Dict[str, Any], body: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = meta['status']
+        response.headers = CaseInsensitiveDict(meta.get('headers', {}))
+        response.url = meta.get('final_url', url)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response.from_cache = True
+        return response
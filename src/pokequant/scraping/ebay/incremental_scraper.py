@@ -21,6 +21,7 @@ from ebay_search import eBaySearcher
 from ebay_parser import eBayParser
 from ebay_to_supabase import eBaySupabaseUploader
 from market_analyzer import MarketAnalyzer
+from refresh_scheduler import RefreshScheduler
 
 class IncrementaleBayScraper:
     """Incremental eBay scraper - only gets new data since last update"""
@@ -45,6 +46,11 @@ class IncrementaleBayScraper:
         self.max_pages_per_search = 10     # Usually new data is in first few pages
         self.days_threshold = 7            # Cards not updated in 7 days need updates
         
+        # Most valuable stale cards first, within the shared hourly eBay request budget
+        self.scheduler = RefreshScheduler(self.uploader.supabase, freshness=self.uploader.freshness,
+                                          requests_per_product=self.searches_per_card,
+                                          max_age_days=self.days_threshold)
+        
         # Progress tracking
         self.total_cards_processed = 0
         self.total_new_listings = 0
@@ -69,16 +75,23 @@ class IncrementaleBayScraper:
         
         self.start_time = time.time()
         
-        # Get cards that need updates
+        # Get cards that need updates, then keep the highest-priority ones the request budget allows
         cards_needing_updates = self.uploader.get_cards_needing_updates(
-            days_threshold=self.days_threshold,
-            limit=max_cards
+            days_threshold=self.days_threshold
         )
         
         if not cards_needing_updates:
             print("✅ All cards are up to date!")
             return self._create_empty_results()
         
+        self.scheduler.max_age_days = self.days_threshold
+        cards_needing_updates = self.scheduler.prioritize(cards_needing_updates, 'card', max_products=max_cards)
+        
+        if not cards_needing_updates:
+            wait_minutes = self.scheduler.seconds_until_budget() / 60
+            print(f"⏸️ Hourly request budget spent - next card can run in {wait_minutes:.0f} minutes")
+            return self._create_empty_results()
+        
         print(f"🎯 Found {len(cards_needing_updates)} cards needing updates")
         
         # Show some examples
@@ -171,6 +184,7 @@ class IncrementaleBayScraper:
             
             try:
                 card_results = self._process_single_card_incremental(card)
+                self.scheduler.settle(card_results['pages_fetched'])
                 
                 # Aggregate results
                 batch_results['cards_processed'] += 1
@@ -212,6 +226,7 @@ class IncrementaleBayScraper:
         card_results = {
             'success': False,
             'searches_executed': 0,
+            'pages_fetched': 0,  # eBay requests made, settled against the refresh budget
             'listings_found': 0,
             'new_listings': 0,
             'errors': []
@@ -250,6 +265,7 @@ class IncrementaleBayScraper:
                     )
                     
                     card_results['searches_executed'] += 1
+                    card_results['pages_fetched'] += max(len(search_results or []), 1)
                     
                     if not search_results:
                         print(f"    ⚠️ No results for search: {search_terms}")
@@ -62,7 +62,6 @@ def investigate_chart_periods():
         print(f"🧪 Testing URL {i+1}: {url}")
         
         try:
-            pricecharting_scraper._rate_limit()
             response = pricecharting_scraper.session.get(url)
             
             if response.status_code == 200:
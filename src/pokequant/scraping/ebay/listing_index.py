@@ -0,0 +1,103 @@
+"""
+Listing Identity Index
+Persistent local set of eBay item IDs already stored in each listings table
+"""
+
+import os
+from array import array
+from typing import Dict, Set, Iterable, Optional, Any
+
+from utils import extract_item_id
+
+class ListingIdentityIndex:
+    """
+    On-disk hash set of known eBay item IDs, one file per table
+
+    Each file is an append-only run of unsigned 64-bit item IDs. It is loaded into
+    memory once per run, and IDs are appended as listings are inserted. A missing
+    file is rebuilt from the table's listing URLs on first use.
+    """
+
+    def __init__(self, supabase_client: Any, index_dir: str = "data/listing_index"):
+        """
+        Args:
+            supabase_client: Client used to rebuild an index from its table
+            index_dir: Directory holding the per-table index files
+        """
+        self.supabase = supabase_client
+        self.index_dir = index_dir
+        self._known: Dict[str, Set[int]] = {}
+
+    def _path(self, table_name: str) -> str:
+        return os.path.join(self.index_dir, f"{table_name}.ids")
+
+    def _load(self, table_name: str) -> Set[int]:
+        """Load a table's index (once per run), rebuilding it from the database if needed"""
+        if table_name in self._known:
+            return self._known[table_name]
+
+        path = self._path(table_name)
+        if os.path.exists(path):
+            ids = array('Q')
+            with open(path, 'rb') as f:
+                data = f.read()
+            # Ignore a trailing partial record from an interrupted append
+            ids.frombytes(data[:len(data) - len(data) % ids.itemsize])
+            self._known[table_name] = set(ids)
+            print(f"📇 Loaded {len(self._known[table_name])} known listings for {table_name}")
+        else:
+            self.rebuild_from_database(table_name)
+
+        return self._known[table_name]
+
+    def rebuild_from_database(self, table_name: str, page_size: int = 1000) -> int:
+        """Rebuild a table's index from its stored listing URLs"""
+        print(f"📇 Building listing index for {table_name}...")
+        known = set()
+        start = 0
+
+        try:
+            while True:
+                result = self.supabase.table(table_name).select("listing_url").range(start, start + page_size - 1).execute()
+                rows = result.data or []
+
+                for row in rows:
+                    item_id = extract_item_id(row.get('listing_url', ''))
+                    if item_id:
+                        known.add(int(item_id))
+
+                if len(rows) < page_size:
+                    break
+                start += page_size
+        except Exception as e:
+            # Keep what we have - unknown IDs still get verified against the database
+            print(f"⚠️ Could not finish building index for {table_name}: {e}")
+
+        self._known[table_name] = known
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self._path(table_name), 'wb') as f:
+            array('Q', sorted(known)).tofile(f)
+
+        print(f"📇 Indexed {len(known)} listings for {table_name}")
+        return len(known)
+
+    def contains(self, table_name: str, item_id: Optional[str]) -> bool:
+        """Check whether an item ID is already known for a table"""
+        if not item_id:
+            return False
+        return int(item_id) in self._load(table_name)
+
+    def add(self, table_name: str, item_ids: Iterable[Optional[str]]):
+        """Record item IDs as stored in a table (persisted immediately)"""
+        known = self._load(table_name)
+        new_ids = array('Q')
+
+        for item_id in item_ids:
+            if item_id and int(item_id) not in known:
+                known.add(int(item_id))
+                new_ids.append(int(item_id))
+
+        if new_ids:
+            os.makedirs(self.index_dir, exist_ok=True)
+            with open(self._path(table_name), 'ab') as f:
+                new_ids.tofile(f)
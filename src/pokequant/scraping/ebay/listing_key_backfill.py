@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Listing Key Backfill
+Collapses duplicate eBay listings (same sale stored under different tracking URLs)
+and backfills item_id / canonical listing_url on existing rows
+"""
+
+import sys
+import os
+import argparse
+from typing import List, Dict, Any, Optional
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from supabase_client import supabase
+from utils import extract_item_id, canonical_listing_url, listing_key
+
+LISTING_TABLES = ["ebay_sold_listings", "ebay_sealed_listings"]
+
+class ListingKeyBackfill:
+    """Walks a listings table in id order, keeping the oldest row per listing key"""
+
+    def __init__(self, table_name: str, batch_size: int = 500, dry_run: bool = False, supabase_client: Any = None):
+        """
+        Args:
+            table_name: ebay_sold_listings or ebay_sealed_listings
+            batch_size: Rows read (and duplicate ids deleted) per request
+            dry_run: Report what would change without writing
+            supabase_client: Client to use (defaults to the shared client)
+        """
+        if table_name not in LISTING_TABLES:
+            raise ValueError(f"Unknown listings table: {table_name}")
+
+        self.table_name = table_name
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.supabase = supabase_client or supabase
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the backfill and return counts
+
+        Duplicates are deleted while scanning and kept rows are normalized afterwards:
+        item_id is UNIQUE, so a kept row can only take its item_id once every later
+        duplicate that may already hold it is gone.
+        """
+        mode = "DRY RUN" if self.dry_run else "LIVE"
+        print(f"🔑 Listing key backfill for {self.table_name} ({mode})")
+
+        stats = {
+            'success': False,
+            'table': self.table_name,
+            'rows_scanned': 0,
+            'duplicates_removed': 0,
+            'rows_updated': 0,
+            'errors': []
+        }
+        kept_ids_by_key: Dict[str, Any] = {}
+        updates_by_id: Dict[Any, Dict[str, Any]] = {}
+        last_id = None
+
+        try:
+            # Pass 1: keep the oldest row per listing key, delete the rest
+            while True:
+                rows = self._fetch_batch(last_id)
+                if not rows:
+                    break
+
+                stats['rows_scanned'] += len(rows)
+                last_id = rows[-1]['id']
+                duplicate_ids = []
+
+                for row in rows:
+                    url = row.get('listing_url') or ''
+                    key = listing_key(url)
+
+                    if not key:
+                        continue
+
+                    if key in kept_ids_by_key:
+                        duplicate_ids.append(row['id'])
+                        continue
+
+                    kept_ids_by_key[key] = row['id']
+                    updates = self._row_updates(row)
+                    if updates:
+                        updates_by_id[row['id']] = updates
+
+                if duplicate_ids:
+                    if not self.dry_run:
+                        self.supabase.table(self.table_name).delete().in_('id', duplicate_ids).execute()
+                    stats['duplicates_removed'] += len(duplicate_ids)
+
+                print(f"   📦 Scanned {stats['rows_scanned']} rows - {stats['duplicates_removed']} duplicates")
+
+                if len(rows) < self.batch_size:
+                    break
+
+            # Pass 2: normalize the kept rows
+            for row_id, updates in updates_by_id.items():
+                if not self.dry_run:
+                    try:
+                        self.supabase.table(self.table_name).update(updates).eq('id', row_id).execute()
+                    except Exception as e:
+                        stats['errors'].append(f"Update failed for row {row_id}: {e}")
+                        continue
+                stats['rows_updated'] += 1
+
+            stats['success'] = True
+
+        except Exception as e:
+            print(f"❌ Backfill failed for {self.table_name}: {e}")
+            stats['errors'].append(str(e))
+
+        print(f"✅ {self.table_name}: removed {stats['duplicates_removed']} duplicates, updated {stats['rows_updated']} rows")
+        return stats
+
+    def _fetch_batch(self, last_id: Optional[Any]) -> List[Dict[str, Any]]:
+        """Keyset pagination on id, so deleting rows doesn't shift the pages"""
+        query = self.supabase.table(self.table_name).select('id, listing_url, item_id')
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        result = query.order('id').limit(self.batch_size).execute()
+        return result.data or []
+
+    def _row_updates(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Fields that need normalizing on a kept row"""
+        url = row.get('listing_url') or ''
+        updates = {}
+
+        canonical_url = canonical_listing_url(url)
+        if canonical_url and canonical_url != url:
+            updates['listing_url'] = canonical_url
+
+        item_id = extract_item_id(url)
+        if item_id and row.get('item_id') != item_id:
+            updates['item_id'] = item_id
+
+        return updates
+
+def main():
+    """Command line interface for the listing key backfill"""
+
+    parser = argparse.ArgumentParser(description="Collapse duplicate eBay listings and backfill listing keys")
+    parser.add_argument("--table", choices=LISTING_TABLES, help="Only process this table (default: both)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per request")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing")
+
+    args = parser.parse_args()
+
+    tables = [args.table] if args.table else LISTING_TABLES
+    for table_name in tables:
+        ListingKeyBackfill(table_name, batch_size=args.batch_size, dry_run=args.dry_run).run()
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ Improved version that handles both cards and sealed products
 """
 
 import re
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional
 from dataclasses import dataclass
 
 @dataclass
@@ -14,6 +14,45 @@ class FilterResult:
     reason: str
     confidence: float  # 0.0 to 1.0
 
+def _required_literal(pattern: str) -> str:
+    """
+    Longest lowercase literal every match of pattern must contain ('' if none can be proven)
+    
+    Only looks at the top level of the pattern: groups, classes and escapes end a literal
+    run, and a character made optional by ?, * or {} is dropped from it.
+    """
+    runs, current = [], ''
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            runs.append(current)
+            current = ''
+            i += 2
+            continue
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif depth == 0 and char == '|':
+            return ''  # Top-level alternation - no single required literal
+        elif depth == 0 and char in '?*{':
+            current = current[:-1]
+            if char == '{':
+                i = pattern.find('}', i)
+                if i == -1:
+                    return ''
+        elif depth == 0 and char not in '+.^$':
+            current += char.lower()
+            i += 1
+            continue
+        runs.append(current)
+        current = ''
+        i += 1
+    runs.append(current)
+    return max(runs, key=len)
+
 class ListingQualityFilterFixed:
     """Improved filter for eBay listings supporting cards and sealed products"""
     
@@ -177,6 +216,53 @@ class ListingQualityFilterFixed:
             'charizard', 'pikachu', 'blastoise', 'venusaur', 'mewtwo', 'mew',
             'lugia', 'rayquaza', 'umbreon', 'espeon', 'lucario', 'garchomp'
         ]
+        
+        self._compile_matchers()
+    
+    def _compile_matchers(self):
+        """
+        Compile the pattern lists once (call again after editing the lists)
+        
+        Invalid patterns are also joined into one alternation, so titles that match none of
+        them (most listings) clear that stage in a single scan. Every pattern is stored with
+        a literal its matches must contain; for ASCII titles a plain substring test on that
+        literal skips most regex calls.
+        """
+        self._invalid_entries = [
+            (category, pattern, _required_literal(pattern), re.compile(pattern, re.IGNORECASE))
+            for category, patterns in self.invalid_patterns.items()
+            for pattern in patterns
+        ]
+        all_invalid = [entry[1] for entry in self._invalid_entries]
+        self._invalid_any = re.compile('|'.join(f'(?:{pattern})' for pattern in all_invalid), re.IGNORECASE) if all_invalid else None
+        
+        self._indicator_entries = [(pattern, _required_literal(pattern), re.compile(pattern, re.IGNORECASE))
+                                   for pattern in self.pokemon_indicators]
+        self._valid_entries = [(pattern, _required_literal(pattern), re.compile(pattern, re.IGNORECASE))
+                               for pattern in self.valid_patterns]
+    
+    def _first_invalid_match(self, title: str) -> Optional[Tuple[str, str]]:
+        """(category, pattern) of the first invalid pattern matching title, in declaration order"""
+        if self._invalid_any is None or not self._invalid_any.search(title):
+            return None
+        
+        # The literal shortcut only holds for ASCII titles (IGNORECASE folds e.g. 'ſ' to 's')
+        use_literals = title.isascii()
+        folded = title.lower()
+        for category, pattern, literal, compiled in self._invalid_entries:
+            if use_literals and literal not in folded:
+                continue
+            if compiled.search(title):
+                return category, pattern
+        return None
+    
+    @staticmethod
+    def _matched_patterns(entries: List[Tuple[str, str, re.Pattern]], title: str) -> List[str]:
+        """Every pattern from entries that matches somewhere in title, in list order"""
+        if title.isascii():
+            folded = title.lower()
+            return [pattern for pattern, literal, compiled in entries if literal in folded and compiled.search(title)]
+        return [pattern for pattern, _, compiled in entries if compiled.search(title)]
     
     def filter_listing(self, listing: Dict[str, Any], expected_item_name: str = None, 
                       is_sealed_product: bool = False) -> FilterResult:
@@ -198,10 +284,10 @@ class ListingQualityFilterFixed:
             return FilterResult(False, "No title", 1.0)
         
         # Check for invalid patterns
-        for category, patterns in self.invalid_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, title, re.IGNORECASE):
-                    return FilterResult(False, f"Invalid: {category} - matched '{pattern}'", 0.9)
+        invalid_match = self._first_invalid_match(title)
+        if invalid_match:
+            category, pattern = invalid_match
+            return FilterResult(False, f"Invalid: {category} - matched '{pattern}'", 0.9)
         
         # Price validation
         if price <= 0:
@@ -217,10 +303,7 @@ class ListingQualityFilterFixed:
                 return FilterResult(False, f"Item name mismatch: expected '{expected_item_name}' not well matched", 0.8)
         
         # Check for Pokemon indicators (more flexible for sealed products)
-        pokemon_indicators_found = []
-        for indicator_pattern in self.pokemon_indicators:
-            if re.search(indicator_pattern, title, re.IGNORECASE):
-                pokemon_indicators_found.append(indicator_pattern)
+        pokemon_indicators_found = self._matched_patterns(self._indicator_entries, title)
         
         # Check for specific Pokemon names
         pokemon_names_found = []
@@ -240,10 +323,7 @@ class ListingQualityFilterFixed:
             confidence += 0.2
         
         # Check for valid patterns
-        valid_score = 0
-        for pattern in self.valid_patterns:
-            if re.search(pattern, title, re.IGNORECASE):
-                valid_score += 1
+        valid_score = len(self._matched_patterns(self._valid_entries, title))
         
         if valid_score > 0:
             confidence += min(valid_score * 0.05, 0.2)
@@ -0,0 +1,174 @@
+"""
+Parallel Parse Stage
+Fans eBay result pages out to a process pool so CPU-bound parsing scales across cores
+"""
+
+import io
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, Future
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+from ebay_parser import eBayParser
+
+# One parser per worker process, built by the pool initializer
+_worker_parser: Optional[eBayParser] = None
+
+@dataclass
+class PageParseResult:
+    """Parse outcome for one page (listings are empty when error is set)"""
+    page_num: int
+    listings: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+def _init_worker(enable_quality_filter: bool, fast_parser: bool):
+    global _worker_parser
+    _worker_parser = eBayParser(enable_quality_filter=enable_quality_filter, fast_parser=fast_parser)
+
+def _pack_listings(listings: List[Dict[str, Any]]) -> Tuple[Optional[Tuple[str, ...]], List[Any]]:
+    """Pack listing dicts as (columns, rows of tuples) - far smaller to pickle than repeated dict keys"""
+    if not listings:
+        return None, []
+
+    columns = tuple(listings[0].keys())
+    if any(tuple(listing.keys()) != columns for listing in listings):
+        return None, listings  # Mixed shapes - ship the dicts as they are
+
+    return columns, [tuple(listing.values()) for listing in listings]
+
+def _unpack_listings(columns: Optional[Tuple[str, ...]], rows: List[Any]) -> List[Dict[str, Any]]:
+    if columns is None:
+        return rows
+    return [dict(zip(columns, row)) for row in rows]
+
+def _parse_page_bytes(page_bytes: bytes, expected_card_name: Optional[str],
+                      is_sealed_product: bool) -> Tuple[Optional[Tuple[str, ...]], List[Any], Optional[str]]:
+    """Worker entry point - parse one page with this process's parser"""
+    return _parse_with(_worker_parser, page_bytes, expected_card_name, is_sealed_product)
+
+def _parse_with(parser: eBayParser, page_bytes: bytes, expected_card_name: Optional[str],
+                is_sealed_product: bool) -> Tuple[Optional[Tuple[str, ...]], List[Any], Optional[str]]:
+    """Parse one page and return packed listing records or an error"""
+    try:
+        html = page_bytes.decode('utf-8', errors='replace')
+        # Keep the per-listing parser/filter output from interleaving across workers
+        with contextlib.redirect_stdout(io.StringIO()):
+            listings = parser.parse_listing_html(html, expected_card_name, is_sealed_product)
+        columns, rows = _pack_listings(listings)
+        return columns, rows, None
+    except Exception as e:
+        return None, [], f"{type(e).__name__}: {e}"
+
+class PendingParse:
+    """Handle for pages submitted to the parse stage - results() blocks and returns them in page order"""
+
+    def __init__(self, submit_page: Callable[[bytes], Any]):
+        self._submit_page = submit_page
+        self._futures: List[Any] = []
+
+    def add(self, html_page: Any):
+        """Queue the next page (str or bytes) - pass as a fetch callback so pages parse while later ones download"""
+        page_bytes = html_page.encode('utf-8') if isinstance(html_page, str) else html_page
+        self._futures.append(self._submit_page(page_bytes))
+
+    def done(self) -> bool:
+        return all(not isinstance(f, Future) or f.done() for f in self._futures)
+
+    def results(self) -> List[PageParseResult]:
+        results = []
+        for page_num, outcome in enumerate(self._futures, 1):
+            try:
+                columns, rows, error = outcome.result() if isinstance(outcome, Future) else outcome
+            except Exception as e:
+                # Worker crash or pickling failure only costs this page
+                columns, rows, error = None, [], f"{type(e).__name__}: {e}"
+
+            if error:
+                results.append(PageParseResult(page_num=page_num, error=error))
+            else:
+                results.append(PageParseResult(page_num=page_num, listings=_unpack_listings(columns, rows)))
+
+        return results
+
+class ParallelPageParser:
+    """Parses eBay HTML pages in a process pool, returning results in page order with per-page errors"""
+
+    def __init__(self, max_workers: Optional[int] = None, enable_quality_filter: bool = True,
+                 fast_parser: bool = False):
+        """
+        Args:
+            max_workers: Worker processes (None = one per core, 0 or 1 = parse inline without a pool)
+            enable_quality_filter: Run listings through the quality filter inside the workers
+            fast_parser: Use the lxml parser backend in the workers
+        """
+        self.max_workers = max_workers
+        self.enable_quality_filter = enable_quality_filter
+        self.fast_parser = fast_parser
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inline_parser: Optional[eBayParser] = None
+
+    @property
+    def parallel(self) -> bool:
+        return self.max_workers is None or self.max_workers > 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.enable_quality_filter, self.fast_parser)
+            )
+        return self._executor
+
+    def start(self, expected_card_name: str = None, is_sealed_product: bool = False) -> PendingParse:
+        """
+        Open an empty parse for one search - add() each page as its fetch completes
+
+        Args:
+            expected_card_name: Passed through to the quality filter
+            is_sealed_product: Passed through to the quality filter
+        """
+        if not self.parallel:
+            if self._inline_parser is None:
+                self._inline_parser = eBayParser(self.enable_quality_filter, self.fast_parser)
+            parser = self._inline_parser
+            return PendingParse(lambda page: _parse_with(parser, page, expected_card_name, is_sealed_product))
+
+        executor = self._get_executor()
+        return PendingParse(lambda page: executor.submit(_parse_page_bytes, page, expected_card_name, is_sealed_product))
+
+    def submit_pages(self, html_pages: List[Any], expected_card_name: str = None,
+                     is_sealed_product: bool = False) -> PendingParse:
+        """
+        Queue pages for parsing and return immediately so fetching can continue
+
+        Args:
+            html_pages: Raw pages (str or bytes), in page order
+            expected_card_name: Passed through to the quality filter
+            is_sealed_product: Passed through to the quality filter
+        """
+        pending = self.start(expected_card_name, is_sealed_product)
+        for page in html_pages:
+            pending.add(page)
+        return pending
+
+    def parse_pages(self, html_pages: List[Any], expected_card_name: str = None,
+                    is_sealed_product: bool = False) -> List[PageParseResult]:
+        """Parse pages and wait for all of them (results in page order)"""
+        return self.submit_pages(html_pages, expected_card_name, is_sealed_product).results()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        return False
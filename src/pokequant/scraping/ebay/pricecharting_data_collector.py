@@ -55,23 +55,27 @@ class PriceChartingDataCollector:
             print(f"🎯 [{i}/{self.total_targets}] Processing: {target_name} ({target_type})")
             
             try:
-                # Search for the target on PriceCharting
-                if target_type == 'card':
-                    pricecharting_url = self.pricecharting_scraper.search_card_on_pricecharting(
-                        target.get('card_name', ''),
-                        target.get('set_name', ''),
-                        target
-                    )
-                else:
-                    pricecharting_url = self.pricecharting_scraper.search_sealed_product_on_pricecharting(
-                        target.get('product_name', '')
-                    )
+                # Find the target on PriceCharting (URL index first, search if it isn't indexed)
+                product_type = 'card' if target_type == 'card' else 'sealed'
+                pricecharting_url = self.pricecharting_scraper.resolve_product_url(
+                    product_type,
+                    target.get('id'),
+                    target_name,
+                    target.get('set_name', ''),
+                    card_data=target if target_type == 'card' else None
+                )
                 
                 if pricecharting_url:
                     print(f"  ✅ Found PriceCharting page: {pricecharting_url}")
                     
                     # Scrape the price history data
-                    price_data = self.pricecharting_scraper.scrape_price_history(pricecharting_url)
+                    price_data = self.pricecharting_scraper.scrape_product(
+                        product_type,
+                        target.get('id'),
+                        target_name,
+                        target.get('set_name', ''),
+                        card_data=target if target_type == 'card' else None
+                    )
                     
                     if price_data:
                         # Add metadata
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+PriceCharting URL Index
+Persistent map of card / sealed product IDs to their resolved PriceCharting product pages
+"""
+
+import sys
+import os
+import json
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from freshness_snapshot import parse_timestamp
+
+# Anchored to the repo root so the index doesn't depend on the working directory
+DEFAULT_INDEX_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                  '..', '..', '..', '..', 'data', 'pricecharting_url_index.json'))
+
+class PriceChartingURLIndex:
+    """
+    JSON store of resolved PriceCharting URLs keyed by (product_type, product_id)
+
+    Each entry keeps the URL, the confidence of the search match that found it, the
+    query used, and when it was resolved and last verified (a successful scrape of
+    the page). Entries not verified within ttl_days are treated as missing so the
+    product is searched for again; a 404 invalidates an entry straight away.
+    """
+
+    def __init__(self, index_path: str = DEFAULT_INDEX_PATH, ttl_days: int = 90):
+        """
+        Args:
+            index_path: JSON file holding the index (None = in memory only)
+            ttl_days: Re-resolve entries not verified for this long
+        """
+        self.index_path = index_path
+        self.ttl_days = ttl_days
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+
+    @staticmethod
+    def _key(product_type: str, product_id: Any) -> str:
+        return f"{product_type}:{product_id}"
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.index_path or not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable PriceCharting URL index: {e}")
+            return {}
+
+    def get(self, product_type: str, product_id: Any) -> Optional[Dict[str, Any]]:
+        """The entry for a product, or None if it was never resolved or has expired"""
+        entry = self._entries.get(self._key(product_type, product_id))
+        if entry is None:
+            return None
+        verified_at = parse_timestamp(entry.get('verified_at') or entry['resolved_at'])
+        if datetime.now(timezone.utc) - verified_at > timedelta(days=self.ttl_days):
+            return None
+        return entry
+
+    def put(self, product_type: str, product_id: Any, url: str, confidence: float, query: str = None):
+        now = datetime.now(timezone.utc).isoformat()
+        self._entries[self._key(product_type, product_id)] = {
+            'url': url,
+            'confidence': round(confidence, 3),
+            'query': query,
+            'resolved_at': now,
+            'verified_at': now,
+        }
+        self._dirty = True
+
+    def verify(self, product_type: str, product_id: Any):
+        """Note that the indexed page was just scraped successfully"""
+        entry = self._entries.get(self._key(product_type, product_id))
+        if entry:
+            entry['verified_at'] = datetime.now(timezone.utc).isoformat()
+            self._dirty = True
+
+    def invalidate(self, product_type: str, product_id: Any):
+        if self._entries.pop(self._key(product_type, product_id), None) is not None:
+            self._dirty = True
+
+    def low_confidence(self, threshold: float = 0.5) -> List[Tuple[str, Dict[str, Any]]]:
+        """Entries whose search match was weak - worth a manual look"""
+        return sorted(((key, entry) for key, entry in self._entries.items() if entry['confidence'] < threshold),
+                      key=lambda item: item[1]['confidence'])
+
+    def save(self):
+        if not self.index_path or not self._dirty:
+            return
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def resolve_catalog(scraper: Any, items: List[Tuple[str, Dict[str, Any]]], force: bool = False,
+                    save_every: int = 25) -> Dict[str, Any]:
+    """
+    Batch resolver: make sure every (product_type, item) has an index entry
+
+    Args:
+        scraper: PriceChartingScraper with a url_index
+        items: ('card' | 'sealed', card or sealed product row) pairs
+        force: Search again even for products that already have a current entry
+        save_every: Persist the index after this many searches
+    """
+    index = scraper.url_index
+    results = {'already_indexed': 0, 'resolved': 0, 'not_found': 0, 'low_confidence': []}
+
+    for i, (product_type, item) in enumerate(items, 1):
+        if not force and index.get(product_type, item['id']):
+            results['already_indexed'] += 1
+            continue
+
+        name = item.get('card_name', item.get('product_name', 'Unknown'))
+        print(f"🧭 [{i}/{len(items)}] Resolving {product_type} {item['id']}: {name}")
+        url = scraper.resolve_product_url(product_type, item['id'], name, item.get('set_name'),
+                                          card_data=item if product_type == 'card' else None, force=True)
+        if url:
+            results['resolved'] += 1
+            entry = index.get(product_type, item['id'])
+            if entry['confidence'] < 0.5:
+                results['low_confidence'].append({'product_type': product_type, 'product_id': item['id'],
+                                                  'name': name, 'url': url, 'confidence': entry['confidence']})
+        else:
+            results['not_found'] += 1
+
+        if (results['resolved'] + results['not_found']) % save_every == 0:
+            index.save()
+
+    index.save()
+    return results
+
+def main():
+    """Pre-populate the PriceCharting URL index for the catalog"""
+
+    from card_selector import CardSelector
+    from pricecharting_scraper import PriceChartingScraper
+
+    parser = argparse.ArgumentParser(description="Resolve PriceCharting URLs for the whole catalog")
+    parser.add_argument("--cards", choices=["all", "curated", "none"], default="all", help="Which cards to resolve")
+    parser.add_argument("--no-sealed", action="store_true", help="Skip sealed products")
+    parser.add_argument("--limit", type=int, help="Resolve at most this many cards")
+    parser.add_argument("--force", action="store_true", help="Search again even for current entries")
+    args = parser.parse_args()
+
+    selector = CardSelector()
+    scraper = PriceChartingScraper()
+
+    items: List[Tuple[str, Dict[str, Any]]] = []
+    if args.cards == "all":
+        offset, batch_size = 0, 1000
+        while args.limit is None or offset < args.limit:
+            batch = selector.get_all_cards_batch(batch_size=batch_size, offset=offset)
+            items.extend(('card', card) for card in batch)
+            if len(batch) < batch_size:
+                break
+            offset += batch_size
+        if args.limit is not None:
+            items = items[:args.limit]
+    elif args.cards == "curated":
+        items.extend(('card', card) for card in selector.get_curated_investment_targets())
+    if not args.no_sealed:
+        items.extend(('sealed', product) for product in selector.get_sealed_products_list())
+
+    print(f"🧭 Resolving PriceCharting URLs for {len(items)} products ({len(scraper.url_index)} already indexed)")
+    results = resolve_catalog(scraper, items, force=args.force)
+
+    print(f"\n{'='*60}")
+    print("🧭 PRICECHARTING URL INDEX")
+    print(f"{'='*60}")
+    print(f"Already indexed: {results['already_indexed']}")
+    print(f"Resolved: {results['resolved']}")
+    print(f"Not found: {results['not_found']}")
+    if results['low_confidence']:
+        print(f"\n⚠️ Low-confidence matches ({len(results['low_confidence'])}):")
+        for match in results['low_confidence'][:20]:
+            print(f"  - {match['name']} -> {match['url']} ({match['confidence']:.2f})")
+
+if __name__ == "__main__":
+    main()
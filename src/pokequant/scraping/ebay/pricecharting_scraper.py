@@ -8,7 +8,6 @@ import sys
 import os
 import time
 import json
-import requests
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import re
@@ -18,13 +17,49 @@ from bs4 import BeautifulSoup
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from supabase_client import supabase
+from http_cache import HTTPCache, CachedSession, DEFAULT_CACHE_DIR
+from pricecharting_index import PriceChartingURLIndex, DEFAULT_INDEX_PATH
+from chart_extractor import ChartData, extract_chart_data
+
+# Older chart variable layouts; the first valid match of each is used, in this order
+FALLBACK_CHART_PATTERNS = [
+    r'chartData\s*=\s*(\[.*?\]);',
+    r'priceData\s*=\s*(\[.*?\]);',
+    r'historyData\s*=\s*(\[.*?\]);',
+    r'data:\s*(\[.*?\])',
+    r'series:\s*\[\s*{\s*data:\s*(\[.*?\])',
+    r'"data":\s*(\[.*?\])',
+    r'price_history\s*=\s*(\[.*?\]);',
+]
+
+# All of them as one alternation of lookaheads, so the page is scanned once but patterns can
+# still match overlapping text (a series block is also a data: block); group p<i> is pattern i
+FALLBACK_CHART_PATTERN = re.compile('|'.join(
+    f'(?=(?P<p{index}>{pattern}))' for index, pattern in enumerate(FALLBACK_CHART_PATTERNS)
+), re.DOTALL)
 
 class PriceChartingScraper:
     """Scraper for PriceCharting historical data"""
     
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 url_index_path: Optional[str] = DEFAULT_INDEX_PATH):
+        """
+        Args:
+            cache_dir: On-disk HTTP cache for search and product pages (None = always fetch)
+            url_index_path: Resolved product URL index (None = keep it in memory for this run)
+        """
         self.base_url = "https://www.pricecharting.com"
-        self.session = requests.Session()
+        
+        # Search results barely move, chart pages pick up new sales during the day;
+        # only requests that reach the network are rate limited
+        self.session = CachedSession(
+            HTTPCache(cache_dir) if cache_dir else None,
+            page_ttls=[
+                (r'/search-products', 3 * 86400),
+                (r'/(game|console|product)/', 6 * 3600),
+            ],
+            rate_limit=self._rate_limit
+        )
         
         # Headers to mimic browser
         self.session.headers.update({
@@ -40,6 +75,13 @@ class PriceChartingScraper:
         self.delay_between_requests = 2.0
         self.last_request_time = 0
         
+        # Products resolved once are scraped straight from their page afterwards
+        self.url_index = PriceChartingURLIndex(url_index_path)
+        
+        # Set by the search methods / scrape_price_history for the most recent call
+        self.last_match_confidence = 0.0
+        self.last_status_code = None
+        
     def _get_card_search_term(self, card: Dict[str, Any]) -> str:
         """Generate proper search term for a card: card name + card number"""
         card_name = card.get('card_name', '').strip()
@@ -68,7 +110,6 @@ class PriceChartingScraper:
         print(f"🔍 Searching PriceCharting for: {query}")
         
         try:
-            self._rate_limit()
             response = self.session.get(search_url)
             
             if response.status_code == 200:
@@ -99,7 +140,6 @@ class PriceChartingScraper:
                             # Try each possible URL format
                             for test_url in possible_urls:
                                 try:
-                                    self._rate_limit()
                                     test_response = self.session.get(test_url)
                                     
                                     if test_response.status_code == 200:
@@ -120,6 +160,7 @@ class PriceChartingScraper:
                                         
                                         if has_chart:
                                             print(f"  ✅ Found product page with chart: {test_url}")
+                                            self.last_match_confidence = 0.9  # Top search result with a chart
                                             return test_url
                                             
                                 except Exception as e:
@@ -143,6 +184,7 @@ class PriceChartingScraper:
                         if matches >= len(search_words) - 1:
                             full_url = self.base_url + href if href.startswith('/') else href
                             print(f"  ✅ Found product page: {full_url}")
+                            self.last_match_confidence = 0.8 * matches / max(len(search_words), 1)
                             return full_url
                 
                 print(f"  ⚠️ No product page found for {query}")
@@ -162,7 +204,6 @@ class PriceChartingScraper:
         print(f"📦 Searching PriceCharting for sealed product: {search_query}")
         
         try:
-            self._rate_limit()
             response = self.session.get(search_url)
             
             if response.status_code == 200:
@@ -190,7 +231,6 @@ class PriceChartingScraper:
                             
                             for test_url in possible_urls:
                                 try:
-                                    self._rate_limit()
                                     test_response = self.session.get(test_url)
                                     
                                     if test_response.status_code == 200:
@@ -200,6 +240,7 @@ class PriceChartingScraper:
                                         
                                         if has_chart:
                                             print(f"  ✅ Found sealed product page: {test_url}")
+                                            self.last_match_confidence = 0.9
                                             return test_url
                                             
                                 except Exception as e:
@@ -212,14 +253,77 @@ class PriceChartingScraper:
             print(f"  ❌ Error searching for {product_name}: {e}")
             return None
     
-    def scrape_price_history(self, pricecharting_url: str) -> Dict[str, Any]:
-        """Scrape price history chart data from a PriceCharting product page"""
+    def resolve_product_url(self, product_type: str, product_id: Any, name: str, set_name: str = None,
+                            card_data: Dict[str, Any] = None, force: bool = False) -> Optional[str]:
+        """
+        PriceCharting product page for a card or sealed product, from the URL index when possible
+        
+        Args:
+            product_type: 'card' or 'sealed'
+            product_id: Card or sealed product ID
+            name: Card or product name to search for
+            set_name: Card set name
+            card_data: Full card row (better search terms)
+            force: Search even if the index has a current entry
+        """
+        entry = None if force else self.url_index.get(product_type, product_id)
+        if entry:
+            return entry['url']
+        
+        self.last_match_confidence = 0.0
+        if product_type == 'card':
+            query = self._get_card_search_term(card_data) if card_data else name
+            url = self.search_card_on_pricecharting(name, set_name, card_data=card_data)
+        else:
+            query = name
+            url = self.search_sealed_product_on_pricecharting(name)
+        
+        if url:
+            self.url_index.put(product_type, product_id, url, self.last_match_confidence, query)
+        return url
+    
+    def scrape_product(self, product_type: str, product_id: Any, name: str, set_name: str = None,
+                       card_data: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Scrape a product's price history through the URL index
+        
+        The indexed page is scraped directly; if it has gone (404) the product is
+        searched for again once.
+        """
+        for attempt in range(2):
+            url = self.resolve_product_url(product_type, product_id, name, set_name, card_data, force=attempt > 0)
+            if not url:
+                break
+            
+            price_data = self.scrape_price_history(url)
+            if price_data:
+                self.url_index.verify(product_type, product_id)
+                self.url_index.save()
+                return price_data
+            if self.last_status_code not in (404, 410):
+                break
+            
+            print(f"  ♻️ Indexed page is gone, searching again for {name}")
+            self.url_index.invalidate(product_type, product_id)
+        
+        self.url_index.save()
+        return {}
+    
+    def scrape_price_history(self, pricecharting_url: str, as_arrays: bool = False) -> Dict[str, Any]:
+        """
+        Scrape price history chart data from a PriceCharting product page
+        
+        Args:
+            pricecharting_url: Product page URL
+            as_arrays: Also return the chart series as a ChartData under 'chart_arrays'
+        """
         
         print(f"📈 Scraping price chart from: {pricecharting_url}")
         
+        self.last_status_code = None
         try:
-            self._rate_limit()
             response = self.session.get(pricecharting_url)
+            self.last_status_code = response.status_code
             
             if response.status_code != 200:
                 print(f"  ❌ Failed to load page: {response.status_code}")
@@ -248,6 +352,8 @@ class PriceChartingScraper:
                 'price_tables': price_tables,
                 'scraped_at': datetime.now().isoformat()
             }
+            if as_arrays:
+                result['chart_arrays'] = self.extract_chart_arrays(html_content)
             
             print(f"  ✅ Successfully scraped chart data")
             print(f"    Current prices: {len(current_prices)} found")
@@ -336,108 +442,46 @@ class PriceChartingScraper:
         chart_data = []
         
         try:
-            # Look for timestamp-price pairs in the format [timestamp, price]
-            timestamp_pattern = r'\[(\d{13}),(\d+)\]'
-            matches = re.findall(timestamp_pattern, html_content)
+            # Chart series block (or [timestamp, price] pairs) in a single pass
+            chart = extract_chart_data(html_content)
             
-            if matches:
-                print(f"    📊 Found {len(matches)} timestamp-price pairs")
-                
-                for timestamp_str, price_str in matches:
-                    try:
-                        timestamp = int(timestamp_str)
-                        price_cents = int(price_str)
-                        
-                        # Convert timestamp to date
-                        from datetime import datetime
-                        date = datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d')
-                        
-                        # Convert price from cents to dollars
-                        price_dollars = price_cents / 100.0
-                        
-                        # Skip zero prices (often invalid data points)
-                        if price_dollars > 0:
-                            chart_entry = {
-                                'timestamp': timestamp,
-                                'date': date,
-                                'price': price_dollars,
-                                'raw_price_cents': price_cents
-                            }
-                            chart_data.append(chart_entry)
-                    except (ValueError, TypeError):
-                        continue
-                
+            if chart is not None:
+                print(f"    📊 Found {len(chart)} timestamp-price pairs")
+                chart_data = chart.to_records()
                 print(f"    📈 Extracted {len(chart_data)} valid price points")
                 return chart_data
             
-            # Fallback: Look for other JavaScript variable patterns (original logic)
-            js_patterns = [
-                r'chartData\s*=\s*(\[.*?\]);',
-                r'priceData\s*=\s*(\[.*?\]);',
-                r'historyData\s*=\s*(\[.*?\]);',
-                r'data:\s*(\[.*?\])',
-                r'series:\s*\[\s*{\s*data:\s*(\[.*?\])',
-                r'"data":\s*(\[.*?\])',
-                r'price_history\s*=\s*(\[.*?\]);'
-            ]
-            
-            for pattern in js_patterns:
-                matches = re.findall(pattern, html_content, re.DOTALL)
-                for match in matches:
-                    try:
-                        import json
-                        data = json.loads(match)
-                        
-                        if isinstance(data, list) and len(data) > 0:
-                            # Check if this looks like chart data
-                            first_item = data[0]
-                            if isinstance(first_item, (list, dict)):
-                                # Parse the data to extract proper date-price pairs
-                                parsed_data = self._parse_historical_data_array(data)
-                                chart_data.extend(parsed_data)
-                                print(f"    📊 Found chart data pattern: {len(parsed_data)} valid data points")
-                                break
-                                
-                    except json.JSONDecodeError:
-                        continue
+            # Fallback: other JavaScript variable patterns, all tried in one scan of the page
+            found = {}  # pattern index -> parsed points of its first chart-like match
+            scanned_to = {}  # pattern index -> end of its last match, as a findall per pattern would skip
+            for match in FALLBACK_CHART_PATTERN.finditer(html_content):
+                index = int(match.lastgroup[1:])
+                if index in found or match.start() < scanned_to.get(index, 0):
+                    continue
+                scanned_to[index] = match.end(match.lastgroup)
+                
+                try:
+                    data = json.loads(match.group(FALLBACK_CHART_PATTERN.groupindex[match.lastgroup] + 1))
+                except json.JSONDecodeError:
+                    continue
+                
+                # Check if this looks like chart data
+                if isinstance(data, list) and data and isinstance(data[0], (list, dict)):
+                    found[index] = self._parse_historical_data_array(data)
             
-            # Look for embedded data in script tags
-            script_pattern = r'<script[^>]*>(.*?)</script>'
-            scripts = re.findall(script_pattern, html_content, re.DOTALL)
-            
-            for script in scripts:
-                if 'chart' in script.lower() or 'price' in script.lower():
-                    # Look for timestamp-price patterns in this specific script
-                    script_matches = re.findall(timestamp_pattern, script)
-                    if script_matches and not chart_data:  # Only if we haven't found data yet
-                        for timestamp_str, price_str in script_matches:
-                            try:
-                                timestamp = int(timestamp_str)
-                                price_cents = int(price_str)
-                                
-                                from datetime import datetime
-                                date = datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d')
-                                price_dollars = price_cents / 100.0
-                                
-                                if price_dollars > 0:
-                                    chart_data.append({
-                                        'timestamp': timestamp,
-                                        'date': date,
-                                        'price': price_dollars,
-                                        'raw_price_cents': price_cents
-                                    })
-                            except (ValueError, TypeError):
-                                continue
-                        
-                        if chart_data:
-                            print(f"    📊 Found {len(chart_data)} chart points in script")
-                            break
+            for index in sorted(found):
+                chart_data.extend(found[index])
+                print(f"    📊 Found chart data pattern: {len(found[index])} valid data points")
                         
         except Exception as e:
             print(f"    ⚠️ Error extracting chart data: {e}")
         
         return chart_data
     
+    def extract_chart_arrays(self, html_content: str) -> Optional[ChartData]:
+        """Array-native chart series (int64 timestamps and cents per condition), or None"""
+        return extract_chart_data(html_content)
+    
     def _parse_historical_data_array(self, data_array: List[Any]) -> List[Dict[str, Any]]:
         """Parse historical data array to extract clean date-price pairs"""
         parsed_data = []
@@ -630,24 +674,18 @@ class PriceChartingScraper:
             set_name = card.get('set_name', '')
             
             try:
-                # Search for the card - pass full card data for better search terms
-                pc_url = self.search_card_on_pricecharting(card_name, set_name, card_data=card)
+                # Indexed URL when known, otherwise search with the full card data for better terms
+                price_data = self.scrape_product('card', card.get('id'), card_name, set_name, card_data=card)
                 
-                if pc_url:
-                    # Scrape price history
-                    price_data = self.scrape_price_history(pc_url)
-                    
-                    if price_data:
-                        card_result = {
-                            'card_id': card.get('id'),
-                            'card_name': card_name,
-                            'set_name': set_name,
-                            'pricecharting_data': price_data
-                        }
-                        results['cards'].append(card_result)
-                        results['successful_scrapes'] += 1
-                    else:
-                        results['failed_scrapes'] += 1
+                if price_data:
+                    card_result = {
+                        'card_id': card.get('id'),
+                        'card_name': card_name,
+                        'set_name': set_name,
+                        'pricecharting_data': price_data
+                    }
+                    results['cards'].append(card_result)
+                    results['successful_scrapes'] += 1
                 else:
                     results['failed_scrapes'] += 1
                 
@@ -665,24 +703,18 @@ class PriceChartingScraper:
             product_name = product.get('product_name', 'Unknown')
             
             try:
-                # Search for the product
-                pc_url = self.search_sealed_product_on_pricecharting(product_name)
+                # Indexed URL when known, otherwise search for the product
+                price_data = self.scrape_product('sealed', product.get('id'), product_name)
                 
-                if pc_url:
-                    # Scrape price history
-                    price_data = self.scrape_price_history(pc_url)
-                    
-                    if price_data:
-                        product_result = {
-                            'product_id': product.get('id'),
-                            'product_name': product_name,
-                            'product_type': product.get('product_type', ''),
-                            'pricecharting_data': price_data
-                        }
-                        results['sealed_products'].append(product_result)
-                        results['successful_scrapes'] += 1
-                    else:
-                        results['failed_scrapes'] += 1
+                if price_data:
+                    product_result = {
+                        'product_id': product.get('id'),
+                        'product_name': product_name,
+                        'product_type': product.get('product_type', ''),
+                        'pricecharting_data': price_data
+                    }
+                    results['sealed_products'].append(product_result)
+                    results['successful_scrapes'] += 1
                 else:
                     results['failed_scrapes'] += 1
                 
@@ -694,6 +726,10 @@ class PriceChartingScraper:
                 results['errors'].append(error_msg)
                 results['failed_scrapes'] += 1
         
+        results['http_cache'] = dict(self.session.cache_stats)
+        print(f"🗄️ HTTP cache: {results['http_cache']['hits']} hits, {results['http_cache']['revalidated']} revalidated, "
+              f"{results['http_cache']['misses']} fetched")
+        
         return results
     
     def save_historical_data(self, results: Dict[str, Any]):
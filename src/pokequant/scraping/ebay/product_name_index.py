@@ -0,0 +1,274 @@
+"""
+Product Name Index
+In-memory token / trigram index of card and sealed product names, cached locally with a TTL
+"""
+
+import os
+import re
+import json
+import time
+import threading
+import unicodedata
+from typing import Dict, List, Any, Optional, Set
+
+# product_type -> (source table, name column, columns kept per product)
+CATALOG_TABLES = {
+    'card': ('pokemon_cards', 'card_name', 'id, card_name, card_number, set_name, rarity'),
+    'sealed': ('sealed_products', 'product_name', 'id, product_name, set_name, product_type'),
+}
+
+# Anchored to the repo root so the cached index doesn't depend on the working directory
+DEFAULT_CACHE_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                  '..', '..', '..', '..', 'data', 'product_name_index.json'))
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents (Pokémon -> pokemon) and collapse punctuation to single spaces"""
+    text = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', ' ', text.lower()).strip()
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class ProductNameIndex:
+    """
+    Resolves product names locally instead of with ilike('%name%') scans
+
+    Card and sealed product names are loaded once into an inverted index (trigram ->
+    products) and written to disk. A search returns the products whose normalized name
+    contains the query - what the ilike query matched - ranked exact, prefix, whole-word,
+    then substring, shortest name first. When nothing contains the query, names sharing
+    enough trigrams with it are returned instead, so small typos still resolve.
+
+    The index tops itself up with rows added since the last load (both tables have serial
+    IDs) once it is older than ttl_seconds, and is rebuilt from scratch after
+    rebuild_seconds to pick up renames and deletions. If it can't be built, searches fall
+    back to the ilike query.
+    """
+
+    def __init__(self, supabase_client: Any, cache_path: str = DEFAULT_CACHE_PATH,
+                 ttl_seconds: float = 3600, rebuild_seconds: float = 7 * 86400, page_size: int = 1000,
+                 min_similarity: float = 0.5):
+        """
+        Args:
+            supabase_client: Client used to load the catalog
+            cache_path: JSON file the catalog names are persisted to (None = memory only)
+            ttl_seconds: Fetch newly added products once the index is older than this
+            rebuild_seconds: Reload the whole catalog once the index is older than this
+            page_size: Rows per request while loading
+            min_similarity: Trigram similarity a fuzzy match needs when no name contains the query
+        """
+        self.supabase = supabase_client
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.page_size = page_size
+        self.min_similarity = min_similarity
+
+        self.built_at: Optional[float] = None
+        self.refreshed_at: Optional[float] = None
+        self._rows: Dict[str, List[Dict[str, Any]]] = {product_type: [] for product_type in CATALOG_TABLES}
+        self._names: Dict[str, List[str]] = {product_type: [] for product_type in CATALOG_TABLES}
+        self._postings: Dict[str, Dict[str, Set[int]]] = {product_type: {} for product_type in CATALOG_TABLES}
+        self._lock = threading.Lock()
+        self._loaded_file = False
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self._rows.values())
+
+    def is_fresh(self) -> bool:
+        return self.refreshed_at is not None and time.time() - self.refreshed_at < self.ttl_seconds
+
+    def ensure_fresh(self) -> bool:
+        """Load, top up or rebuild the index as needed; returns whether it can serve searches"""
+        with self._lock:
+            if self.is_fresh():
+                return True
+            if not self._loaded_file:
+                self._loaded_file = True
+                self._load_file()
+                if self.is_fresh():
+                    return True
+
+            try:
+                if self.built_at is None or time.time() - self.built_at >= self.rebuild_seconds:
+                    self._rebuild()
+                else:
+                    self._refresh()
+            except Exception as e:
+                print(f"⚠️ Could not update product name index: {e}")
+                return self.built_at is not None
+            return True
+
+    def refresh(self) -> int:
+        """Add products created since the index was loaded (run after a catalog sync); returns how many"""
+        with self._lock:
+            if not self._loaded_file:
+                self._loaded_file = True
+                self._load_file()
+            if self.built_at is None:
+                return self._rebuild()
+            return self._refresh()
+
+    def rebuild(self) -> int:
+        """Reload the whole catalog; returns the number of products indexed"""
+        with self._lock:
+            self._loaded_file = True
+            return self._rebuild()
+
+    def search(self, query: str, product_type: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Products of one type matching a name, best match first
+
+        Args:
+            query: Name (or part of one) to look for
+            product_type: 'card' or 'sealed'
+            limit: Maximum number of products returned
+
+        Returns:
+            Rows shaped like the source table's (id, card_name / product_name, set_name, ...)
+        """
+        if not self.ensure_fresh():
+            return self._scan(query, product_type, limit)
+
+        needle = normalize_name(query)
+        names = self._names[product_type]
+        rows = self._rows[product_type]
+        if not needle:
+            return [dict(row) for row in rows[:limit]]
+
+        candidates = self._candidates(product_type, trigrams(needle)) if len(needle) >= 3 else range(len(names))
+        matches = [i for i in candidates if needle in names[i]]
+
+        if matches:
+            def rank(i):
+                name = names[i]
+                if name == needle:
+                    kind = 0
+                elif name.startswith(needle):
+                    kind = 1
+                elif f" {needle} " in f" {name} ":
+                    kind = 2
+                else:
+                    kind = 3
+                return kind, len(name), i
+            return [dict(rows[i]) for i in sorted(matches, key=rank)[:limit]]
+
+        return [dict(rows[i]) for i in self._similar(product_type, needle)[:limit]]
+
+    def _candidates(self, product_type: str, query_grams: Set[str]) -> Set[int]:
+        """Products containing every trigram of the query (a superset of the substring matches)"""
+        postings = self._postings[product_type]
+        lists = sorted((postings.get(gram, set()) for gram in query_grams), key=len)
+        if not lists or not lists[0]:
+            return set()
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return candidates
+
+    def _similar(self, product_type: str, needle: str) -> List[int]:
+        """Products whose names share at least min_similarity of their trigrams with the query"""
+        query_grams = trigrams(needle)
+        if not query_grams:
+            return []
+
+        shared: Dict[int, int] = {}
+        postings = self._postings[product_type]
+        for gram in query_grams:
+            for i in postings.get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+
+        names = self._names[product_type]
+        scored = []
+        for i, count in shared.items():
+            similarity = count / (len(query_grams) + len(trigrams(names[i])) - count)
+            if similarity >= self.min_similarity:
+                scored.append((-similarity, len(names[i]), i))
+        return [i for _, _, i in sorted(scored)]
+
+    def _scan(self, query: str, product_type: str, limit: int) -> List[Dict[str, Any]]:
+        """The ilike query the index replaces, for when the index can't be built"""
+        table, name_column, _ = CATALOG_TABLES[product_type]
+        result = self.supabase.table(table).select('*').ilike(name_column, f'%{query}%').limit(limit).execute()
+        return result.data or []
+
+    def _add_rows(self, product_type: str, rows: List[Dict[str, Any]]):
+        name_column = CATALOG_TABLES[product_type][1]
+        postings = self._postings[product_type]
+        for row in rows:
+            i = len(self._rows[product_type])
+            name = normalize_name(row.get(name_column))
+            self._rows[product_type].append(row)
+            self._names[product_type].append(name)
+            for gram in trigrams(name):
+                postings.setdefault(gram, set()).add(i)
+
+    def _fetch_rows(self, product_type: str, after_id: int) -> List[Dict[str, Any]]:
+        """Page through products with an ID above after_id, in ID order"""
+        table, _, columns = CATALOG_TABLES[product_type]
+        rows = []
+        start = 0
+        while True:
+            result = self.supabase.table(table).select(columns).gt('id', after_id).order('id').range(
+                start, start + self.page_size - 1).execute()
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < self.page_size:
+                return rows
+            start += self.page_size
+
+    def _rebuild(self) -> int:
+        print("🔤 Building product name index...")
+        fetched = {product_type: self._fetch_rows(product_type, 0) for product_type in CATALOG_TABLES}
+
+        for product_type, rows in fetched.items():
+            self._rows[product_type], self._names[product_type], self._postings[product_type] = [], [], {}
+            self._add_rows(product_type, rows)
+
+        self.built_at = self.refreshed_at = time.time()
+        self._save_file()
+        print(f"🔤 Product name index covers {len(self)} products")
+        return len(self)
+
+    def _refresh(self) -> int:
+        added = 0
+        for product_type in CATALOG_TABLES:
+            last_id = max((int(row['id']) for row in self._rows[product_type]), default=0)
+            rows = self._fetch_rows(product_type, last_id)
+            self._add_rows(product_type, rows)
+            added += len(rows)
+
+        self.refreshed_at = time.time()
+        self._save_file()
+        if added:
+            print(f"🔤 Added {added} new products to the name index")
+        return added
+
+    def _load_file(self) -> bool:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path, 'r') as f:
+                stored = json.load(f)
+            for product_type in CATALOG_TABLES:
+                self._rows[product_type], self._names[product_type], self._postings[product_type] = [], [], {}
+                self._add_rows(product_type, stored['products'].get(product_type, []))
+            self.built_at = stored['built_at']
+            self.refreshed_at = stored['refreshed_at']
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Ignoring unreadable product name index: {e}")
+            return False
+
+    def _save_file(self):
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'built_at': self.built_at, 'refreshed_at': self.refreshed_at, 'products': self._rows}, f)
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,314 @@
+"""
+Refresh Scheduler
+Orders scrape work by staleness, price volatility, listing velocity and user demand,
+and hands it out within a global eBay request budget per hour
+"""
+
+import os
+import json
+import math
+import heapq
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Tuple
+
+# Advisory file locks (POSIX only - elsewhere the shared files are written unlocked)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from freshness_snapshot import FreshnessSnapshot, parse_timestamp
+
+# analyze_product calls are appended here by record_product_demand
+DEMAND_LOG_PATH = "data/product_demand.jsonl"
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive lock on path + '.lock' while reading and rewriting a shared file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def record_product_demand(product_type: str, product_id: Any, path: str = DEMAND_LOG_PATH):
+    """Note that a user asked about a product, so the scheduler refreshes it sooner"""
+    try:
+        with file_lock(path), open(path, 'a') as f:
+            f.write(json.dumps({'product_type': product_type, 'product_id': str(product_id),
+                                'at': datetime.now(timezone.utc).isoformat()}) + '\n')
+    except OSError as e:
+        print(f"⚠️ Could not record product demand: {e}")
+
+class RefreshScheduler:
+    """
+    Max-heap of products scored by how stale they are and how much a refresh is worth
+
+    priority = staleness * (1 + volatility + velocity + demand), where staleness is the
+    data age in units of max_age_days (capped, never-scraped products get the cap),
+    volatility is the stdev of daily log price changes in pokequant_price_series,
+    velocity is eBay listings per day and demand is recent analyze_product calls,
+    all over the last window_days. A just-refreshed product scores ~0 however volatile
+    it is, and a dead bulk card still rises to the top once it is stale enough.
+
+    Only products that are due are queued: stale ones (older than max_age_days or never
+    scraped) and ones users asked about. Products scoring min_priority or less are never
+    handed out, so a just-refreshed product isn't scraped again because it is in demand.
+
+    Work is emitted only while the rolling one-hour request budget (shared by every
+    scraper through budget_path) has room for it. Each emitted product is charged
+    requests_per_product up front; scrapers then settle() it with the page requests
+    the product actually took.
+    """
+
+    def __init__(self, supabase_client: Any, freshness: Optional[FreshnessSnapshot] = None,
+                 requests_per_hour: int = 600, requests_per_product: int = 3, max_age_days: int = 7,
+                 window_days: int = 30, demand_log_path: str = DEMAND_LOG_PATH,
+                 budget_path: str = "data/refresh_budget.json", page_size: int = 1000,
+                 demand_compact_lines: int = 10000, min_priority: float = 0.25):
+        """
+        Args:
+            supabase_client: Client used to read price series and product ids
+            freshness: Catalog freshness snapshot (built from supabase_client if not given)
+            requests_per_hour: Global eBay request budget
+            requests_per_product: Requests charged up front per emitted product (one page per search)
+            max_age_days: Data age that counts as one unit of staleness
+            window_days: Look-back window for volatility, velocity and demand
+            demand_log_path: JSONL file written by record_product_demand
+            budget_path: JSON file of recent request charges (None = this process only)
+            page_size: Rows per request while loading signals
+            demand_compact_lines: Drop demand entries older than window_days once the log is this long
+            min_priority: Queued products scoring this or less stay queued instead of being handed out
+        """
+        self.supabase = supabase_client
+        self.freshness = freshness if freshness is not None else FreshnessSnapshot(supabase_client)
+        self.requests_per_hour = requests_per_hour
+        self.requests_per_product = requests_per_product
+        self.max_age_days = max_age_days
+        self.window_days = window_days
+        self.demand_log_path = demand_log_path
+        self.budget_path = budget_path
+        self.page_size = page_size
+        self.demand_compact_lines = demand_compact_lines
+        self.min_priority = min_priority
+
+        self.max_staleness = 4.0
+        self.weights = {'volatility': 20.0, 'velocity': 1.0, 'demand': 1.0}
+
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._counter = 0
+        self._signals: Optional[Dict[str, Dict]] = None
+        self._charges: List[Tuple[float, int]] = self._load_charges()
+
+    def schedule(self, products: List[Dict[str, Any]], product_type: str = 'card', id_key: str = 'id') -> int:
+        """Score the products that are due (stale or in demand) and push them onto the heap; returns how many were queued"""
+        signals = self._load_signals()
+        self.freshness.ensure_fresh()
+        now = datetime.now(timezone.utc)
+        queued = 0
+
+        for product in products:
+            key = (product_type, str(product[id_key]))
+            _, last_update = self.freshness.get(*key)
+            if last_update is None:
+                staleness = self.max_staleness
+            else:
+                staleness = min((now - last_update).total_seconds() / 86400 / self.max_age_days, self.max_staleness)
+
+            pokequant_product_id = signals['product_ids'].get(key)
+            volatility = signals['volatility'].get(pokequant_product_id, 0.0)
+            velocity = signals['velocity'].get(pokequant_product_id, 0.0)
+            demand = signals['demand'].get(key, 0)
+            if staleness < 1 and not demand:
+                continue
+
+            components = {
+                'staleness': staleness,
+                'volatility': self.weights['volatility'] * volatility,
+                'velocity': self.weights['velocity'] * math.log1p(velocity),
+                'demand': self.weights['demand'] * math.log1p(demand),
+            }
+            priority = staleness * (1 + components['volatility'] + components['velocity'] + components['demand'])
+
+            product['refresh_priority'] = priority
+            product['refresh_components'] = components
+            self._counter += 1
+            heapq.heappush(self._heap, (-priority, self._counter, product))
+            queued += 1
+
+        return queued
+
+    def next_batch(self, max_products: int = None) -> List[Dict[str, Any]]:
+        """Pop the highest-priority products the remaining hourly budget can pay for"""
+        with self._budget_lock():
+            affordable = self.remaining_budget() // self.requests_per_product
+            if max_products is not None:
+                affordable = min(affordable, max_products)
+
+            batch = []
+            while self._heap and len(batch) < affordable and -self._heap[0][0] > self.min_priority:
+                batch.append(heapq.heappop(self._heap)[2])
+            if batch:
+                self._add_charge(len(batch) * self.requests_per_product)
+        return batch
+
+    def prioritize(self, products: List[Dict[str, Any]], product_type: str = 'card', id_key: str = 'id',
+                   max_products: int = None) -> List[Dict[str, Any]]:
+        """Schedule products and return the ones to scrape now, most valuable first"""
+        queued = self.schedule(products, product_type, id_key)
+        batch = self.next_batch(max_products)
+        print(f"🗓️ Scheduled {len(batch)} of {len(products)} products "
+              f"({len(products) - queued} not due, {len(self._heap)} deferred, {self.remaining_budget()} requests left this hour)")
+        return batch
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def remaining_budget(self) -> int:
+        self._charges = self._merged_charges()
+        return max(self.requests_per_hour - sum(requests for _, requests in self._charges), 0)
+
+    def seconds_until_budget(self, requests: int = None) -> float:
+        """How long until `requests` (default: one product) fit in the hourly budget"""
+        needed = (requests or self.requests_per_product) - self.remaining_budget()
+        for at, charged in self._charges:
+            if needed <= 0:
+                break
+            needed -= charged
+            if needed <= 0:
+                return max(at + 3600 - time.time(), 0.0)
+        return 0.0
+
+    def charge(self, requests: int):
+        """Count requests against the hourly budget"""
+        with self._budget_lock():
+            self._add_charge(requests)
+
+    def settle(self, requests_made: int):
+        """Replace a product's up-front charge with the requests (pages fetched) it actually made"""
+        if requests_made != self.requests_per_product:
+            self.charge(requests_made - self.requests_per_product)
+
+    def _add_charge(self, requests: int):
+        self._charges.append((time.time(), requests))
+        self._save_charges()
+
+    def _budget_lock(self):
+        return file_lock(self.budget_path) if self.budget_path else nullcontext()
+
+    def _load_signals(self) -> Dict[str, Dict]:
+        """Read product ids, price series statistics and demand once per scheduler"""
+        if self._signals is not None:
+            return self._signals
+
+        since = datetime.now(timezone.utc) - timedelta(days=self.window_days)
+        signals = {'product_ids': {}, 'volatility': {}, 'velocity': {}, 'demand': {}}
+
+        try:
+            for row in self._paged('pokequant_products', 'id, product_type, product_id'):
+                signals['product_ids'][(row['product_type'], str(row['product_id']))] = row['id']
+
+            # (pokequant_product_id, condition_category) -> [(price_date, price)]
+            series: Dict[Tuple[str, str], List[Tuple[str, float]]] = {}
+            for row in self._paged('pokequant_price_series', 'pokequant_product_id, price_date, price, condition_category, listing_count',
+                                   gte=('price_date', since.date().isoformat())):
+                product_id = row['pokequant_product_id']
+                series.setdefault((product_id, row.get('condition_category')), []).append((row['price_date'], float(row['price'])))
+                signals['velocity'][product_id] = signals['velocity'].get(product_id, 0) + (row.get('listing_count') or 1) / self.window_days
+
+            # Raw and graded prices differ by design, so use the condition with the most points
+            longest: Dict[str, int] = {}
+            for (product_id, _), points in series.items():
+                if len(points) > longest.get(product_id, 0):
+                    longest[product_id] = len(points)
+                    signals['volatility'][product_id] = self._log_return_stdev(points)
+        except Exception as e:
+            print(f"⚠️ Could not load price series signals, scheduling on staleness and demand: {e}")
+
+        signals['demand'] = self._load_demand(since)
+        self._signals = signals
+        return signals
+
+    def _paged(self, table_name: str, columns: str, gte: Tuple[str, str] = None):
+        start = 0
+        while True:
+            query = self.supabase.table(table_name).select(columns)
+            if gte:
+                query = query.gte(*gte)
+            rows = query.order('id').range(start, start + self.page_size - 1).execute().data or []
+            yield from rows
+            if len(rows) < self.page_size:
+                return
+            start += self.page_size
+
+    @staticmethod
+    def _log_return_stdev(points: List[Tuple[str, float]]) -> float:
+        prices = [price for _, price in sorted(points) if price > 0]
+        returns = [math.log(b / a) for a, b in zip(prices, prices[1:])]
+        if len(returns) < 2:
+            return 0.0
+        mean = sum(returns) / len(returns)
+        return math.sqrt(sum((r - mean) ** 2 for r in returns) / (len(returns) - 1))
+
+    def _load_demand(self, since: datetime) -> Dict[Tuple[str, str], int]:
+        demand: Dict[Tuple[str, str], int] = {}
+        if not self.demand_log_path or not os.path.exists(self.demand_log_path):
+            return demand
+
+        with file_lock(self.demand_log_path):
+            recent = []
+            line_count = 0
+            with open(self.demand_log_path, 'r') as f:
+                for line in f:
+                    line_count += 1
+                    try:
+                        entry = json.loads(line)
+                        if parse_timestamp(entry['at']) >= since:
+                            key = (entry['product_type'], str(entry['product_id']))
+                            demand[key] = demand.get(key, 0) + 1
+                            recent.append(line)
+                    except (ValueError, KeyError):
+                        continue  # Skip a torn last line from an interrupted write
+
+            # Entries outside the window never count again - rewrite the log without them
+            if line_count >= self.demand_compact_lines and len(recent) < line_count:
+                tmp_path = f"{self.demand_log_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    f.writelines(line if line.endswith('\n') else line + '\n' for line in recent)
+                os.replace(tmp_path, self.demand_log_path)
+        return demand
+
+    def _load_charges(self) -> List[Tuple[float, int]]:
+        if not self.budget_path or not os.path.exists(self.budget_path):
+            return []
+        try:
+            with open(self.budget_path, 'r') as f:
+                return [(float(at), int(requests)) for at, requests in json.load(f)]
+        except (ValueError, TypeError) as e:
+            print(f"⚠️ Ignoring unreadable request budget file: {e}")
+            return []
+
+    def _merged_charges(self) -> List[Tuple[float, int]]:
+        """This process's charges plus any other scraper's from the shared file, last hour only"""
+        cutoff = time.time() - 3600
+        return sorted({(at, requests) for at, requests in self._load_charges() + self._charges if at > cutoff})
+
+    def _save_charges(self):
+        """Merge and rewrite the shared budget file (callers hold the budget lock)"""
+        if not self.budget_path:
+            return
+
+        self._charges = self._merged_charges()
+        tmp_path = f"{self.budget_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._charges, f)
+        os.replace(tmp_path, self.budget_path)
@@ -0,0 +1,270 @@
+"""
+Scrape Journal
+Durable SQLite (WAL) record of comprehensive scrape runs, one row per (card, search term, page) unit
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    params TEXT,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS run_cards (
+    run_id TEXT NOT NULL,
+    card_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    card TEXT NOT NULL,
+    summary_updated INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, card_id)
+);
+
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    card_id TEXT NOT NULL,
+    card_seq INTEGER NOT NULL,
+    search_terms TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending, claimed, done, failed
+    worker TEXT,
+    claimed_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    listings_found INTEGER NOT NULL DEFAULT 0,
+    listings_uploaded INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    UNIQUE (run_id, card_id, search_terms, page)
+);
+
+CREATE INDEX IF NOT EXISTS idx_units_claim ON units(run_id, status, card_seq, id);
+"""
+
+@dataclass
+class ScrapeUnit:
+    """One page of one search for one card"""
+    id: int
+    run_id: str
+    card_id: str
+    search_terms: str
+    page: int
+    attempts: int
+
+class ScrapeJournal:
+    """
+    SQLite journal that lets a comprehensive scrape resume and be shared by workers
+
+    A run is planned as page-1 units for every (card, search term). Workers claim the
+    next pending unit inside an IMMEDIATE transaction, so two workers never get the
+    same unit, and completing a page enqueues the next one in the same transaction.
+    Claims older than claim_timeout_seconds are treated as abandoned by a dead worker
+    and handed out again (or left failed once they have used max_attempts); failed units
+    are retried up to max_attempts times.
+    """
+
+    def __init__(self, db_path: str = "data/scrape_journal.db", claim_timeout_seconds: float = 1800,
+                 max_attempts: int = 3):
+        """
+        Args:
+            db_path: SQLite database file shared by every worker on this host
+            claim_timeout_seconds: Reclaim units a worker has held longer than this
+            max_attempts: Attempts per unit before it is left failed
+        """
+        self.db_path = db_path
+        self.claim_timeout_seconds = claim_timeout_seconds
+        self.max_attempts = max_attempts
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database write lock up front"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def create_run(self, mode: str, cards: List[Dict[str, Any]], search_terms: Dict[str, List[str]],
+                   params: Dict[str, Any] = None, run_id: str = None) -> str:
+        """
+        Record a new run and its page-1 units
+
+        Args:
+            mode: Scrape mode the run belongs to
+            cards: Cards in processing order (stored so a resume doesn't depend on offsets)
+            search_terms: card_id -> search terms for that card
+            params: Anything worth keeping about how the run was started
+        """
+        run_id = run_id or f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO runs (run_id, mode, params, created_at) VALUES (?, ?, ?, ?)",
+                         (run_id, mode, json.dumps(params or {}, default=str), time.time()))
+            for seq, card in enumerate(cards):
+                card_id = str(card['id'])
+                conn.execute("INSERT OR IGNORE INTO run_cards (run_id, card_id, seq, card) VALUES (?, ?, ?, ?)",
+                             (run_id, card_id, seq, json.dumps(card, default=str)))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO units (run_id, card_id, card_seq, search_terms, page) VALUES (?, ?, ?, ?, 1)",
+                    [(run_id, card_id, seq, terms) for terms in search_terms.get(card_id, [])]
+                )
+        return run_id
+
+    def run_exists(self, run_id: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone() is not None
+
+    def run_mode(self, run_id: str) -> Optional[str]:
+        """Mode the run was created with, or None if there is no such run"""
+        row = self._conn.execute("SELECT mode FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return row['mode'] if row else None
+
+    def card_pages(self, run_id: str, card_id: str) -> int:
+        """Pages fetched for a card so far, counting each attempt of a unit"""
+        row = self._conn.execute("SELECT COALESCE(SUM(attempts), 0) AS pages FROM units WHERE run_id = ? AND card_id = ?",
+                                 (run_id, card_id)).fetchone()
+        return row['pages']
+
+    def get_card(self, run_id: str, card_id: str) -> Dict[str, Any]:
+        row = self._conn.execute("SELECT card FROM run_cards WHERE run_id = ? AND card_id = ?", (run_id, card_id)).fetchone()
+        return json.loads(row['card'])
+
+    def claim(self, run_id: str, worker_id: str) -> Optional[ScrapeUnit]:
+        """
+        Claim the next unit of work, or None when nothing is left to hand out
+
+        Expired claims that already used every attempt are left failed rather than handed out again.
+        None doesn't mean the run is over - see open_claims().
+        """
+        now = time.time()
+        expired = now - self.claim_timeout_seconds
+        with self._transaction() as conn:
+            conn.execute(
+                """UPDATE units SET status = 'failed', error = ?
+                   WHERE run_id = ? AND status = 'claimed' AND claimed_at < ? AND attempts >= ?""",
+                (f"Claim expired after {self.max_attempts} attempts", run_id, expired, self.max_attempts)
+            )
+            row = conn.execute(
+                """SELECT id, run_id, card_id, search_terms, page, attempts FROM units
+                   WHERE run_id = ? AND (status = 'pending' OR (status = 'claimed' AND claimed_at < ? AND attempts < ?))
+                   ORDER BY card_seq, id LIMIT 1""",
+                (run_id, expired, self.max_attempts)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE units SET status = 'claimed', worker = ?, claimed_at = ?, attempts = attempts + 1 WHERE id = ?",
+                         (worker_id, now, row['id']))
+        return ScrapeUnit(row['id'], row['run_id'], row['card_id'], row['search_terms'], row['page'], row['attempts'] + 1)
+
+    def open_claims(self, run_id: str) -> int:
+        """
+        Claims still held by a worker (live, or dead but not yet expired) - each may queue the
+        next page of its search, so a worker that finds nothing to claim waits while any remain
+        """
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM units WHERE run_id = ? AND status = 'claimed' AND claimed_at >= ?",
+            (run_id, time.time() - self.claim_timeout_seconds)
+        ).fetchone()[0]
+
+    def unfinished_cards(self, run_id: str) -> List[str]:
+        """Cards whose units are all finished but whose follow-up work hasn't run (e.g. a claim expired into failed)"""
+        return [row['card_id'] for row in self._conn.execute(
+            """SELECT card_id FROM run_cards WHERE run_id = ? AND summary_updated = 0 AND NOT EXISTS (
+                   SELECT 1 FROM units WHERE units.run_id = run_cards.run_id AND units.card_id = run_cards.card_id
+                   AND units.status IN ('pending', 'claimed'))
+               ORDER BY seq""",
+            (run_id,)
+        )]
+
+    def complete(self, unit: ScrapeUnit, listings_found: int = 0, listings_uploaded: int = 0, has_next_page: bool = False):
+        """Mark a unit done and, if the search has more pages, enqueue the next one"""
+        with self._transaction() as conn:
+            conn.execute("UPDATE units SET status = 'done', listings_found = ?, listings_uploaded = ?, error = NULL WHERE id = ?",
+                         (listings_found, listings_uploaded, unit.id))
+            if has_next_page:
+                conn.execute(
+                    """INSERT OR IGNORE INTO units (run_id, card_id, card_seq, search_terms, page)
+                       SELECT run_id, card_id, card_seq, search_terms, page + 1 FROM units WHERE id = ?""",
+                    (unit.id,)
+                )
+
+    def fail(self, unit: ScrapeUnit, error: str):
+        """Record a failed attempt; the unit goes back to pending until it runs out of attempts"""
+        status = 'pending' if unit.attempts < self.max_attempts else 'failed'
+        with self._transaction() as conn:
+            conn.execute("UPDATE units SET status = ?, error = ? WHERE id = ?", (status, error, unit.id))
+
+    def release(self, unit: ScrapeUnit):
+        """Give back an unfinished claim without counting it as an attempt"""
+        with self._transaction() as conn:
+            conn.execute("UPDATE units SET status = 'pending', worker = NULL, attempts = attempts - 1 WHERE id = ? AND status = 'claimed'",
+                         (unit.id,))
+
+    def finish_card(self, run_id: str, card_id: str) -> bool:
+        """
+        True exactly once per card, for the worker that finds all its units finished -
+        that worker does the per-card follow-up work (market summary)
+        """
+        with self._transaction() as conn:
+            open_units = conn.execute(
+                "SELECT COUNT(*) FROM units WHERE run_id = ? AND card_id = ? AND status IN ('pending', 'claimed')",
+                (run_id, card_id)
+            ).fetchone()[0]
+            if open_units:
+                return False
+            updated = conn.execute(
+                "UPDATE run_cards SET summary_updated = 1 WHERE run_id = ? AND card_id = ? AND summary_updated = 0",
+                (run_id, card_id)
+            ).rowcount
+        return updated == 1
+
+    def progress(self, run_id: str) -> Dict[str, Any]:
+        """Unit counts by status and totals across every worker of the run"""
+        counts = {status: 0 for status in ('pending', 'claimed', 'done', 'failed')}
+        for row in self._conn.execute("SELECT status, COUNT(*) AS n FROM units WHERE run_id = ? GROUP BY status", (run_id,)):
+            counts[row['status']] = row['n']
+
+        totals = self._conn.execute(
+            """SELECT COALESCE(SUM(listings_found), 0) AS found, COALESCE(SUM(listings_uploaded), 0) AS uploaded,
+                      COUNT(DISTINCT CASE WHEN page = 1 AND status IN ('done', 'failed') THEN card_id || char(31) || search_terms END) AS searches
+               FROM units WHERE run_id = ?""",
+            (run_id,)
+        ).fetchone()
+        cards = self._conn.execute(
+            "SELECT COUNT(*) AS total, COALESCE(SUM(summary_updated), 0) AS finished FROM run_cards WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        failed = self._conn.execute(
+            "SELECT card_id, search_terms, page, error FROM units WHERE run_id = ? AND status = 'failed' ORDER BY card_seq, id",
+            (run_id,)
+        ).fetchall()
+
+        return {
+            'units': counts,
+            'total_cards': cards['total'],
+            'cards_finished': cards['finished'],
+            'searches_executed': totals['searches'],
+            'listings_found': totals['found'],
+            'listings_uploaded': totals['uploaded'],
+            'failed_units': [dict(row) for row in failed],
+        }
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,253 @@
+"""
+Scrape Queue
+Shared SQLite (WAL) work queue of (item, search term) jobs for multi-process scraping on one host
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    item_type TEXT NOT NULL,                  -- card or sealed
+    item_id TEXT NOT NULL,
+    search_terms TEXT NOT NULL,
+    item TEXT NOT NULL,
+    priority REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',   -- pending, leased, done, failed
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    heartbeat_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    pages_fetched INTEGER NOT NULL DEFAULT 0,
+    listings_found INTEGER NOT NULL DEFAULT 0,
+    listings_uploaded INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL,
+    UNIQUE (item_type, item_id, search_terms)
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs(status, priority DESC, id);
+
+CREATE TABLE IF NOT EXISTS rate_limits (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+@dataclass
+class ScrapeJob:
+    """One search term for one card or sealed product"""
+    id: int
+    item_type: str
+    item_id: str
+    search_terms: str
+    item: Dict[str, Any]
+    attempts: int
+    lease_owner: str
+
+class ScrapeQueue:
+    """
+    Work queue shared by every scrape worker process
+
+    Workers lease the highest-priority pending job inside an IMMEDIATE transaction, so
+    a job is only ever held by one worker. A lease lasts lease_seconds and is extended
+    by heartbeats while the job runs; a worker that dies stops heartbeating and its job
+    is leased again once the lease expires. Failed jobs go back to pending until they
+    have used max_attempts.
+
+    The same database holds a token bucket per rate limit name, which caps the total
+    request rate of all workers together.
+
+    The queue is single-host only: WAL mode relies on shared memory next to the database
+    file, which does not work over a network filesystem (NFS, SMB), so every worker must
+    run on the machine whose local disk holds db_path.
+    """
+
+    def __init__(self, db_path: str = "data/scrape_queue.db", lease_seconds: float = 120, max_attempts: int = 3):
+        """
+        Args:
+            db_path: SQLite database file on local disk, shared by every worker on this host
+            lease_seconds: How long a lease lasts without a heartbeat
+            max_attempts: Attempts per job before it is left failed
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Heartbeats run on a background thread of the worker, hence check_same_thread
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database write lock up front"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def enqueue(self, items: List[Dict[str, Any]], search_terms: Dict[str, List[str]], item_type: str = 'card',
+                priority: float = 0) -> int:
+        """
+        Add one job per (item, search term); returns how many jobs became pending
+
+        A job that is already pending or leased is left alone, so the coordinator can
+        re-run the same strategy safely; a finished or failed job is queued again.
+
+        Args:
+            items: Cards or sealed products to scrape
+            search_terms: item id -> search terms for that item
+            item_type: 'card' or 'sealed'
+            priority: Higher priorities are leased first
+        """
+        now = time.time()
+        queued = 0
+        with self._transaction() as conn:
+            for item in items:
+                item_id = str(item['id'])
+                for terms in search_terms.get(item_id, []):
+                    queued += conn.execute(
+                        """INSERT INTO jobs (item_type, item_id, search_terms, item, priority, enqueued_at)
+                           VALUES (?, ?, ?, ?, ?, ?)
+                           ON CONFLICT (item_type, item_id, search_terms) DO UPDATE SET
+                               status = 'pending', item = excluded.item, priority = excluded.priority,
+                               attempts = 0, error = NULL, lease_owner = NULL, lease_expires_at = NULL,
+                               enqueued_at = excluded.enqueued_at, finished_at = NULL
+                           WHERE jobs.status IN ('done', 'failed')""",
+                        (item_type, item_id, terms, json.dumps(item, default=str), priority, now)
+                    ).rowcount
+        return queued
+
+    def lease(self, worker_id: str) -> Optional[ScrapeJob]:
+        """Lease the next job, or None when nothing is available"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                """SELECT id, item_type, item_id, search_terms, item, attempts FROM jobs
+                   WHERE status = 'pending' OR (status = 'leased' AND lease_expires_at < ?)
+                   ORDER BY priority DESC, id LIMIT 1""",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                """UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires_at = ?, heartbeat_at = ?,
+                       attempts = attempts + 1 WHERE id = ?""",
+                (worker_id, now + self.lease_seconds, now, row['id'])
+            )
+        return ScrapeJob(row['id'], row['item_type'], row['item_id'], row['search_terms'], json.loads(row['item']),
+                         row['attempts'] + 1, worker_id)
+
+    def heartbeat(self, job: ScrapeJob) -> bool:
+        """Extend the job's lease; False if the lease expired and another worker took the job"""
+        now = time.time()
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, heartbeat_at = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (now + self.lease_seconds, now, job.id, job.lease_owner)
+            ).rowcount == 1
+
+    def complete(self, job: ScrapeJob, pages_fetched: int = 0, listings_found: int = 0, listings_uploaded: int = 0) -> bool:
+        """Mark a job done; False (and no change) if this worker no longer holds the lease"""
+        with self._transaction() as conn:
+            return conn.execute(
+                """UPDATE jobs SET status = 'done', pages_fetched = ?, listings_found = ?, listings_uploaded = ?,
+                       error = NULL, lease_expires_at = NULL, finished_at = ?
+                   WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+                (pages_fetched, listings_found, listings_uploaded, time.time(), job.id, job.lease_owner)
+            ).rowcount == 1
+
+    def fail(self, job: ScrapeJob, error: str) -> bool:
+        """Record a failed attempt; the job goes back to pending until it runs out of attempts"""
+        status = 'pending' if job.attempts < self.max_attempts else 'failed'
+        with self._transaction() as conn:
+            return conn.execute(
+                """UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires_at = NULL,
+                       finished_at = CASE WHEN ? = 'failed' THEN ? END
+                   WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+                (status, error, status, time.time(), job.id, job.lease_owner)
+            ).rowcount == 1
+
+    def release(self, job: ScrapeJob):
+        """Give back a lease without counting it as an attempt (e.g. on shutdown)"""
+        with self._transaction() as conn:
+            conn.execute(
+                """UPDATE jobs SET status = 'pending', lease_owner = NULL, lease_expires_at = NULL, attempts = attempts - 1
+                   WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+                (job.id, job.lease_owner)
+            )
+
+    def acquire_request(self, name: str, requests_per_second: float, burst: float = 1.0) -> float:
+        """
+        Take one request from the shared token bucket `name`
+
+        Returns 0 when the request may go ahead now, otherwise the seconds to wait
+        before asking again (nothing is taken in that case).
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT tokens, updated_at FROM rate_limits WHERE name = ?", (name,)).fetchone()
+            tokens = burst if row is None else min(burst, row['tokens'] + (now - row['updated_at']) * requests_per_second)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / requests_per_second
+            if wait == 0.0:
+                tokens -= 1
+            conn.execute(
+                "INSERT INTO rate_limits (name, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (name, tokens, now)
+            )
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status, totals, and the workers currently holding leases"""
+        counts = {status: 0 for status in ('pending', 'leased', 'done', 'failed')}
+        for row in self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row['status']] = row['n']
+
+        totals = self._conn.execute(
+            """SELECT COALESCE(SUM(pages_fetched), 0) AS pages, COALESCE(SUM(listings_found), 0) AS found,
+                      COALESCE(SUM(listings_uploaded), 0) AS uploaded FROM jobs"""
+        ).fetchone()
+        workers = self._conn.execute(
+            "SELECT lease_owner, COUNT(*) AS n FROM jobs WHERE status = 'leased' AND lease_expires_at >= ? GROUP BY lease_owner",
+            (time.time(),)
+        ).fetchall()
+
+        return {
+            'jobs': counts,
+            'pages_fetched': totals['pages'],
+            'listings_found': totals['found'],
+            'listings_uploaded': totals['uploaded'],
+            'active_workers': {row['lease_owner']: row['n'] for row in workers},
+        }
+
+    def failed_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT item_type, item_id, search_terms, attempts, error FROM jobs WHERE status = 'failed' ORDER BY id LIMIT ?",
+            (limit,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Distributed Scrape Worker
+Coordinator and worker commands for scraping with many processes off a shared ScrapeQueue
+
+    python scrape_worker.py enqueue --strategy curated       # coordinator
+    python scrape_worker.py work --workers 4 --rate 1.0      # worker processes
+    python scrape_worker.py status
+
+Every command must run on the host that holds the queue database (see ScrapeQueue).
+"""
+
+import sys
+import os
+import time
+import socket
+import argparse
+import threading
+import multiprocessing
+from typing import List, Dict, Any, Tuple
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrape_queue import ScrapeQueue, ScrapeJob
+
+# Name of the token bucket every worker draws eBay requests from
+EBAY_RATE_LIMIT = 'ebay'
+
+STRATEGIES = ['sample', 'high-value', 'sets', 'pokemon', 'curated', 'sealed', 'all']
+
+class _Heartbeat:
+    """Extends a job's lease in the background until stopped; notes if the lease was lost"""
+
+    def __init__(self, queue: ScrapeQueue, job: ScrapeJob, interval: float):
+        self.queue = queue
+        self.job = job
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.queue.heartbeat(self.job):
+                    self.lost = True
+                    return
+            except Exception as e:
+                print(f"⚠️ Heartbeat failed for job {self.job.id}: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+class ScrapeWorker:
+    """
+    Leases (item, search term) jobs and scrapes every page of each one
+
+    Each page request first takes a token from the queue's shared bucket, so adding
+    workers raises throughput until the global requests_per_second is reached.
+    """
+
+    def __init__(self, queue: ScrapeQueue, searcher: Any = None, page_parser: Any = None, uploader: Any = None,
+                 requests_per_second: float = 0.5, burst: float = 1.0, max_pages: int = 50,
+                 worker_id: str = None, heartbeat_seconds: float = None):
+        """
+        Args:
+            queue: Shared job queue
+            searcher: eBaySearcher (defaults to the live site)
+            page_parser: ParallelPageParser (defaults to parsing inline in this process)
+            uploader: eBaySupabaseUploader
+            requests_per_second: Global request rate shared by all workers
+            burst: Requests the shared bucket allows back to back
+            max_pages: Pages fetched per search at most
+            worker_id: Lease owner name (default: host and pid)
+            heartbeat_seconds: Heartbeat interval (default: a third of the lease)
+        """
+        if searcher is None:
+            from ebay_search import eBaySearcher
+            searcher = eBaySearcher()
+        if page_parser is None:
+            from parse_executor import ParallelPageParser
+            page_parser = ParallelPageParser(max_workers=1)
+        if uploader is None:
+            from ebay_to_supabase import eBaySupabaseUploader
+            uploader = eBaySupabaseUploader()
+
+        self.queue = queue
+        self.searcher = searcher
+        self.page_parser = page_parser
+        self.uploader = uploader
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_pages = max_pages
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_seconds = heartbeat_seconds or queue.lease_seconds / 3
+
+        self.jobs_done = 0
+        self.jobs_failed = 0
+
+    def run(self, max_jobs: int = None, exit_when_empty: bool = True, poll_seconds: float = 5.0) -> Dict[str, Any]:
+        """
+        Work until the queue is drained (or max_jobs are finished)
+
+        With exit_when_empty the worker still waits while other workers hold leases,
+        so jobs of a worker that dies mid-job are picked up once their lease expires.
+        """
+        print(f"👷 Worker {self.worker_id} started ({self.requests_per_second} req/s shared)")
+
+        while max_jobs is None or self.jobs_done + self.jobs_failed < max_jobs:
+            job = self.queue.lease(self.worker_id)
+            if job is None:
+                if exit_when_empty and self.queue.stats()['jobs']['leased'] == 0:
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            try:
+                self.process(job)
+            except KeyboardInterrupt:
+                self.queue.release(job)
+                raise
+
+        print(f"🏁 Worker {self.worker_id} finished: {self.jobs_done} jobs done, {self.jobs_failed} failed")
+        return {'worker_id': self.worker_id, 'jobs_done': self.jobs_done, 'jobs_failed': self.jobs_failed}
+
+    def process(self, job: ScrapeJob) -> bool:
+        """Scrape one job under a heartbeat; True if it was completed"""
+        item_name = job.item.get('card_name', job.item.get('product_name', 'Unknown'))
+        print(f"🔎 [{self.worker_id}] {item_name}: '{job.search_terms}' (attempt {job.attempts})")
+
+        with _Heartbeat(self.queue, job, self.heartbeat_seconds) as heartbeat:
+            try:
+                pages, found, uploaded = self._scrape_job(job, heartbeat)
+            except Exception as e:
+                print(f"    ❌ Job {job.id} failed: {e}")
+                self.queue.fail(job, str(e))
+                self.jobs_failed += 1
+                return False
+
+        if heartbeat.lost or not self.queue.complete(job, pages, found, uploaded):
+            print(f"    ⚠️ Lost the lease on job {job.id} - another worker has it now")
+            return False
+
+        self.jobs_done += 1
+        return True
+
+    def _scrape_job(self, job: ScrapeJob, heartbeat: _Heartbeat) -> Tuple[int, int, int]:
+        """
+        Fetch, parse and upload every page of the job's search; returns (pages, found, uploaded)
+
+        Each page goes to the parse stage as soon as it is fetched and is uploaded after the
+        next request, so a parse pool works on one page while the worker waits on the next.
+        """
+        is_sealed = job.item_type == 'sealed'
+        item_name = job.item.get('card_name', job.item.get('product_name'))
+        pages = found = 0
+        in_flight = None  # (page, PendingParse) of the page parsing behind the current fetch
+
+        for page in range(1, self.max_pages + 1):
+            if heartbeat.lost:
+                break
+
+            self._wait_for_request()
+            html = self.searcher.fetch_listings_page(self.searcher.build_search_url(job.search_terms, page))
+            if not html:
+                raise Exception(f"Failed to fetch page {page}")
+            pages += 1
+
+            parsing = (page, self.page_parser.submit_pages([html], item_name, is_sealed_product=is_sealed))
+            if in_flight:
+                found += self._upload_page(job, *in_flight)
+            in_flight = parsing
+
+            if self.searcher._is_last_page(html):
+                break
+
+        if in_flight:
+            found += self._upload_page(job, *in_flight)
+
+        return pages, found, found  # Simplified - duplicates are filtered by the uploader
+
+    def _upload_page(self, job: ScrapeJob, page: int, pending: Any) -> int:
+        """Wait for one page's parse and upload its listings; returns how many there were"""
+        page_result = pending.results()[0]
+        if not page_result.success:
+            raise Exception(f"Parse error page {page}: {page_result.error}")
+
+        listings = page_result.listings
+        if listings:
+            if job.item_type == 'sealed':
+                success = self.uploader.upload_sealed_product_listings(listings, job.item['id'], job.search_terms)
+            else:
+                success = self.uploader.upload_targeted_listings(listings, job.item['id'], job.search_terms)
+            if not success:
+                raise Exception(f"Upload failed for page {page}")
+
+        return len(listings)
+
+    def _wait_for_request(self):
+        """Block until the shared bucket grants this worker one request"""
+        while True:
+            wait = self.queue.acquire_request(EBAY_RATE_LIMIT, self.requests_per_second, self.burst)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+def select_items(selector: Any, strategy: str, limit: int = None, names: List[str] = None,
+                 offset: int = 0) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Pick items with a CardSelector strategy; returns (item_type, item) pairs
+
+    Args:
+        selector: CardSelector
+        strategy: One of STRATEGIES
+        limit: Cards for 'sample' and 'all'
+        names: Set names for 'sets', Pokémon names for 'pokemon'
+        offset: Starting offset for 'all'
+    """
+    if strategy == 'sample':
+        cards = selector.get_sample_cards(limit or 10)
+    elif strategy == 'high-value':
+        cards = selector.get_high_value_cards()
+    elif strategy == 'sets':
+        cards = selector.get_cards_by_set(names or [])
+    elif strategy == 'pokemon':
+        cards = selector.get_cards_by_pokemon(names or [])
+    elif strategy == 'curated':
+        cards = selector.get_curated_investment_targets()
+        return [('card', card) for card in cards] + [('sealed', product) for product in selector.get_sealed_products_list()]
+    elif strategy == 'sealed':
+        return [('sealed', product) for product in selector.get_sealed_products_list()]
+    elif strategy == 'all':
+        cards = selector.get_all_cards_batch(batch_size=limit or 10000, offset=offset)
+    else:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    return [('card', card) for card in cards]
+
+def enqueue_strategy(queue: ScrapeQueue, selector: Any, search_generator: Any, strategy: str,
+                     searches_per_item: int = 3, priority: float = 0, **selection) -> int:
+    """Coordinator: select items, generate their search terms and queue one job per term"""
+    items = select_items(selector, strategy, **selection)
+    print(f"🧭 Strategy '{strategy}' selected {len(items)} items")
+
+    queued = 0
+    for item_type in ('card', 'sealed'):
+        typed = [item for kind, item in items if kind == item_type]
+        if not typed:
+            continue
+        plan = search_generator.generate_batch_search_plan(typed, max_terms_per_item=searches_per_item)
+        search_terms = {str(item_plan['item_id']): item_plan['search_terms'] for item_plan in plan['search_plans']}
+        queued += queue.enqueue(typed, search_terms, item_type=item_type, priority=priority)
+
+    print(f"📥 Queued {queued} jobs ({queue.stats()['jobs']['pending']} pending in {queue.db_path})")
+    return queued
+
+def _worker_process(db_path: str, requests_per_second: float, burst: float, max_pages: int, worker_id: str):
+    worker = ScrapeWorker(ScrapeQueue(db_path), requests_per_second=requests_per_second, burst=burst,
+                          max_pages=max_pages, worker_id=worker_id)
+    worker.run()
+
+def _print_status(queue: ScrapeQueue):
+    stats = queue.stats()
+    print(f"📊 SCRAPE QUEUE: {queue.db_path}")
+    for status, count in stats['jobs'].items():
+        print(f"   {status}: {count}")
+    print(f"   Pages fetched: {stats['pages_fetched']}")
+    print(f"   Listings uploaded: {stats['listings_uploaded']}")
+    for worker_id, leased in stats['active_workers'].items():
+        print(f"   👷 {worker_id}: {leased} leased")
+    for job in queue.failed_jobs(10):
+        print(f"   ❌ {job['item_type']} {job['item_id']} '{job['search_terms']}': {job['error']}")
+
+def main():
+    """Command line interface for distributed scraping"""
+
+    parser = argparse.ArgumentParser(description="Multi-process eBay scraping off a shared work queue (single host)")
+    parser.add_argument("--queue", default="data/scrape_queue.db", help="Shared queue database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Coordinator: queue jobs from a CardSelector strategy")
+    enqueue_parser.add_argument("--strategy", choices=STRATEGIES, default="curated")
+    enqueue_parser.add_argument("--limit", type=int, help="Cards for the sample and all strategies")
+    enqueue_parser.add_argument("--offset", type=int, default=0, help="Starting offset for the all strategy")
+    enqueue_parser.add_argument("--names", nargs="+", help="Set names (sets) or Pokémon names (pokemon)")
+    enqueue_parser.add_argument("--searches-per-item", type=int, default=3)
+    enqueue_parser.add_argument("--priority", type=float, default=0, help="Higher priorities are scraped first")
+
+    work_parser = subparsers.add_parser("work", help="Scrape queued jobs until the queue is drained")
+    work_parser.add_argument("--workers", type=int, default=1, help="Worker processes on this host")
+    work_parser.add_argument("--rate", type=float, default=0.5, help="Global eBay requests per second across all workers")
+    work_parser.add_argument("--burst", type=float, default=1.0)
+    work_parser.add_argument("--max-pages", type=int, default=50)
+    work_parser.add_argument("--worker-id", help="Worker name prefix (default: host and pid)")
+
+    subparsers.add_parser("status", help="Show queue progress")
+
+    args = parser.parse_args()
+    queue = ScrapeQueue(args.queue)
+
+    if args.command == "enqueue":
+        from card_selector import CardSelector
+        from search_generator import SearchGenerator
+        enqueue_strategy(queue, CardSelector(), SearchGenerator(), args.strategy,
+                         searches_per_item=args.searches_per_item, priority=args.priority,
+                         limit=args.limit, names=args.names, offset=args.offset)
+    elif args.command == "work":
+        prefix = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        processes = [
+            multiprocessing.Process(target=_worker_process,
+                                    args=(args.queue, args.rate, args.burst, args.max_pages, f"{prefix}-{i}"))
+            for i in range(args.workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            print("\n⏹️ Workers interrupted - leased jobs are released and stay queued")
+            for process in processes:
+                process.join()
+        _print_status(queue)
+    else:
+        _print_status(queue)
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,7 @@ from card_selector import CardSelector
 from search_generator import SearchGenerator
 from ebay_search import eBaySearcher
 from ebay_parser import eBayParser
+from parse_executor import ParallelPageParser
 from ebay_to_supabase import eBaySupabaseUploader
 from market_analyzer import MarketAnalyzer
 from listing_quality_filter_fixed import ListingQualityFilterFixed
@@ -26,12 +27,13 @@ from listing_quality_filter_fixed import ListingQualityFilterFixed
 class TargetedeBayScraper:
     """Targeted eBay scraper with multiple selection strategies"""
     
-    def __init__(self):
+    def __init__(self, parse_workers: Optional[int] = None):
         # Initialize components
         self.card_selector = CardSelector()
         self.search_generator = SearchGenerator()
         self.ebay_searcher = eBaySearcher()
         self.parser = eBayParser()
+        self.page_parser = ParallelPageParser(max_workers=parse_workers)
         self.uploader = eBaySupabaseUploader()
         self.analyzer = MarketAnalyzer()
         
@@ -259,11 +261,13 @@ class TargetedeBayScraper:
                     try:
                         print(f"  🔎 Search {search_num}/{len(search_terms_list)}: '{search_terms}'")
                         
-                        # Search eBay
+                        # Search eBay (each page is parsed while the next one downloads)
+                        pending_parse = self.page_parser.start()
                         search_results = self.ebay_searcher.search_sold_listings(
                             search_terms,
                             max_pages=2,  # Conservative for targeted scraping
-                            max_results=self.max_listings_per_search
+                            max_results=self.max_listings_per_search,
+                            on_page=pending_parse.add
                         )
                         
                         batch_results['searches_executed'] += 1
@@ -272,11 +276,14 @@ class TargetedeBayScraper:
                             print(f"    ⚠️ No results for search: {search_terms}")
                             continue
                         
-                        # Parse all listings from all pages
+                        # Collect listings from all pages
                         all_listings = []
-                        for page_html in search_results:
-                            page_listings = self.parser.parse_listing_html(page_html)
-                            all_listings.extend(page_listings)
+                        for page_result in pending_parse.results():
+                            if page_result.success:
+                                all_listings.extend(page_result.listings)
+                            else:
+                                print(f"    ⚠️ Parse error page {page_result.page_num}: {page_result.error}")
+                                batch_results['errors'].append(f"Parse error {search_terms} page {page_result.page_num}: {page_result.error}")
                         
                         if all_listings:
                             print(f"    ✅ Found {len(all_listings)} listings")
@@ -418,10 +425,11 @@ def main():
     parser.add_argument("--pokemon-name", help="Pokemon name (for by_pokemon strategy)")
     parser.add_argument("--comprehensive", action="store_true", help="Use comprehensive scraping settings")
     parser.add_argument("--offset", type=int, default=0, help="Starting offset for card selection")
+    parser.add_argument("--parse-workers", type=int, help="Worker processes for HTML parsing (default: one per core)")
     
     args = parser.parse_args()
     
-    scraper = TargetedeBayScraper()
+    scraper = TargetedeBayScraper(parse_workers=args.parse_workers)
     
     try:
         results = scraper.run_targeted_scraping(
@@ -442,6 +450,8 @@ def main():
         print(f"\n⏹️ Scraping interrupted by user")
     except Exception as e:
         print(f"\n❌ Scraping failed: {e}")
+    finally:
+        scraper.page_parser.shutdown()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Test the async concurrent page fetcher against a local stub server
+"""
+
+import sys
+import os
+import io
+import time
+import contextlib
+import threading
+import asyncio
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+EBAY_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(EBAY_DIR)
+sys.path.append(os.path.abspath(os.path.join(EBAY_DIR, '..', '..', '..', '..')))
+
+from ebay_search import eBaySearcher
+from enhanced_comprehensive_scraper import EnhancedComprehensiveScraper
+from utils import TokenBucket
+
+PAGES_PER_TERM = 3
+FILLER = "x" * 12000  # keep stub pages above the "very small page" end indicator
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Serves fake search pages; the last page omits 'Next page'"""
+
+    fail_once = set()
+    failed = set()
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        keywords = params.get('_nkw', [''])[0]
+        page = int(params.get('_pgn', ['1'])[0])
+
+        key = (keywords, page)
+        if keywords in self.fail_once and key not in self.failed:
+            self.failed.add(key)
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        body = f"<html>{keywords} page {page} {FILLER}"
+        if page < PAGES_PER_TERM:
+            body += " Next page"
+        body += "</html>"
+
+        data = body.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def _start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def test_search_many_returns_pages_per_term_in_order():
+    server = _start_server()
+    try:
+        searcher = eBaySearcher(base_url=f"http://127.0.0.1:{server.server_address[1]}/sch/i.html",
+                                requests_per_second=1000, burst=1000)
+        terms = ["charizard base set", "pikachu promo", "mewtwo gx"]
+
+        results = searcher.search_many_sold_listings(terms, max_pages=5, max_concurrent=3)
+
+        assert list(results.keys()) == terms
+        for term in terms:
+            pages = results[term]
+            assert len(pages) == PAGES_PER_TERM
+            for i, html in enumerate(pages, start=1):
+                assert f"{term} page {i}" in html
+    finally:
+        server.shutdown()
+
+def test_retry_on_server_error():
+    _StubHandler.fail_once = {"flaky card"}
+    _StubHandler.failed = set()
+    server = _start_server()
+    try:
+        searcher = eBaySearcher(base_url=f"http://127.0.0.1:{server.server_address[1]}/sch/i.html",
+                                requests_per_second=1000, burst=1000)
+        searcher.retry_base_delay = 0.01
+
+        results = searcher.search_many_sold_listings(["flaky card"], max_pages=5)
+
+        assert len(results["flaky card"]) == PAGES_PER_TERM
+        assert len(_StubHandler.failed) == PAGES_PER_TERM
+    finally:
+        _StubHandler.fail_once = set()
+        server.shutdown()
+
+def test_max_results_stops_early():
+    server = _start_server()
+    try:
+        searcher = eBaySearcher(base_url=f"http://127.0.0.1:{server.server_address[1]}/sch/i.html",
+                                requests_per_second=1000, burst=1000)
+        results = searcher.search_many_sold_listings(["umbreon vmax"], max_pages=5, max_results=60)
+        assert len(results["umbreon vmax"]) == 1
+    finally:
+        server.shutdown()
+
+def test_searcher_can_be_reused_across_event_loops():
+    server = _start_server()
+    try:
+        # A single-token bucket makes concurrent fetches wait on its lock in both runs
+        searcher = eBaySearcher(base_url=f"http://127.0.0.1:{server.server_address[1]}/sch/i.html",
+                                requests_per_second=200, burst=1)
+        searcher.max_retries = 1
+        terms = ["charizard base set", "pikachu promo", "mewtwo gx"]
+
+        for _ in range(2):
+            results = searcher.search_many_sold_listings(terms, max_pages=5, max_concurrent=3)
+            assert [len(results[term]) for term in terms] == [PAGES_PER_TERM] * len(terms)
+    finally:
+        server.shutdown()
+
+def test_enhanced_scraper_fetches_every_planned_search_concurrently():
+    class _PageParser:
+        def parse_listing_html(self, html):
+            return [{'title': html[6:html.index(' page ')], 'price': 10.0}]
+
+    class _Uploader:
+        def __init__(self):
+            self.uploads = []
+
+        def upload_targeted_listings(self, listings, card_id, search_terms):
+            self.uploads.append((card_id, search_terms, len(listings)))
+            return True
+
+    server = _start_server()
+    try:
+        scraper = EnhancedComprehensiveScraper.__new__(EnhancedComprehensiveScraper)
+        scraper.ebay_searcher = eBaySearcher(base_url=f"http://127.0.0.1:{server.server_address[1]}/sch/i.html",
+                                             requests_per_second=1000, burst=1000)
+        scraper.parser = _PageParser()
+        scraper.uploader = _Uploader()
+        scraper.max_listings_per_search = 500
+        scraper.max_concurrent_searches = 4
+        plan = {'search_plans': [
+            {'item_name': 'Charizard', 'item_type': 'card', 'item_id': 4, 'search_terms': ["charizard base set", "charizard 4/102"]},
+            {'item_name': 'Pikachu', 'item_type': 'card', 'item_id': 25, 'search_terms': ["pikachu promo", "charizard base set"]},
+        ]}
+
+        calls = []
+        search_many = scraper.ebay_searcher.search_many_sold_listings
+        scraper.ebay_searcher.search_many_sold_listings = lambda terms, **kwargs: calls.append(terms) or search_many(terms, **kwargs)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = scraper._execute_ebay_searches(plan, test_mode=False)
+
+        # One concurrent fetch covers every distinct search of every item
+        assert calls == [["charizard base set", "charizard 4/102", "pikachu promo"]]
+        assert results['total_searches_executed'] == 4 and not results['failed_searches']
+        charizard, pikachu = results['item_results']
+        assert [detail['pages_processed'] for detail in charizard['search_details']] == [2, 2]
+        assert pikachu['listings_found'] == 4
+        assert scraper.uploader.uploads[-1] == (25, "charizard base set", 2)
+    finally:
+        server.shutdown()
+
+def test_token_bucket_paces_requests():
+    async def _run():
+        bucket = TokenBucket(rate=20, capacity=1)
+        start = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(_run())
+    # First token is free, the other four wait ~50ms each
+    assert elapsed >= 0.15
+
+if __name__ == "__main__":
+    test_search_many_returns_pages_per_term_in_order()
+    test_retry_on_server_error()
+    test_max_results_stops_early()
+    test_searcher_can_be_reused_across_event_loops()
+    test_enhanced_scraper_fetches_every_planned_search_concurrently()
+    test_token_bucket_paces_requests()
+    print("✅ All async search tests passed")
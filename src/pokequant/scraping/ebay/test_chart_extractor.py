@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test the single-pass PriceCharting chart extractor against a saved product page
+"""
+
+import sys
+import os
+import io
+import re
+import json
+import contextlib
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from chart_extractor import extract_chart_data
+from pricecharting_scraper import PriceChartingScraper, FALLBACK_CHART_PATTERNS
+
+SAVED_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'debug_html_charizard_v.html')
+
+def _legacy_records(html):
+    """What the old findall-and-loop extractor produced (dates in UTC)"""
+    records = []
+    for timestamp, cents in re.findall(r'\[(\d{13}),(\d+)\]', html):
+        if int(cents) > 0:
+            records.append({'timestamp': int(timestamp), 'raw_price_cents': int(cents), 'price': int(cents) / 100.0,
+                            'date': datetime.fromtimestamp(int(timestamp) / 1000, timezone.utc).strftime('%Y-%m-%d')})
+    return records
+
+def test_saved_page_matches_the_legacy_extractor():
+    with open(SAVED_PAGE) as f:
+        html = f.read()
+
+    chart = extract_chart_data(html)
+    assert list(chart.series) == ['boxonly', 'cib', 'graded', 'manualonly', 'new', 'used']
+    timestamps, cents = chart.series['used']
+    assert timestamps.dtype == np.int64 and cents.dtype == np.int64
+    assert chart.dates('used')[1] == np.datetime64('2022-03-01')
+
+    records = chart.to_records()
+    assert [{k: v for k, v in record.items() if k != 'series'} for record in records] == _legacy_records(html)
+
+def test_decoding_stops_at_the_chart_block():
+    html = ('<script>VGPC.chart_data = {"used": [[1646118000000, 40854], [1648792800000, 0]], "new": []};'
+            ' var other = [[1700000000000, 99]];</script>')
+    chart = extract_chart_data(html)
+
+    assert list(chart.series) == ['used']  # empty series dropped, later arrays ignored
+    assert chart.prices('used').tolist() == [408.54, 0.0]
+    assert [record['price'] for record in chart.to_records()] == [408.54]
+
+def test_pages_without_the_block_fall_back_to_timestamp_pairs():
+    chart = extract_chart_data('<script>var prices = [[1646118000000,1250],[1648792800000,1300]];</script>')
+    assert chart.series['unknown'][1].tolist() == [1250, 1300]
+    assert extract_chart_data('<html>' + 'no chart here ' * 1000 + '</html>') is None
+
+def _legacy_fallback_records(scraper, html):
+    """What the old pattern-by-pattern fallback produced: the first chart-like match of each pattern"""
+    records = []
+    for pattern in FALLBACK_CHART_PATTERNS:
+        for match in re.findall(pattern, html, re.DOTALL):
+            try:
+                data = json.loads(match)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, list) and data and isinstance(data[0], (list, dict)):
+                records.extend(scraper._parse_historical_data_array(data))
+                break
+    return records
+
+def _sale(day, price):
+    # Dict entries: the lazy patterns stop at the first ], so nested lists never decode
+    return f'{{"date": "2023-01-{day:02d}", "price": "${price}"}}'
+
+def test_fallback_patterns_match_the_legacy_extractor():
+    scraper = PriceChartingScraper(cache_dir=None, url_index_path=None)
+    pages = [
+        # Three data: blocks - only the first counts
+        f"<script>a = {{data: [{_sale(1, 10)}]}}; b = {{data: [{_sale(2, 20)}]}}; c = {{data: [{_sale(3, 30)}]}};</script>",
+        # A series block is a data: block as well, so both patterns take it
+        f"<script>chart({{series: [{{data: [{_sale(4, 40)}]}}]}});</script>",
+        # Not chart data, then bad JSON, then the one to use
+        f"<script>x = {{data: [1, 2]}}; y = {{data: [oops]}}; z = {{data: [{_sale(5, 50)}]}};</script>",
+        # Patterns apply in their own order, not page order
+        f'<script>{{"data": [{_sale(8, 12)}]}}; chartData = [{_sale(6, 60)}];'
+        f' price_history = [{_sale(7, 70)}];</script>',
+        '<html>no chart here</html>',
+    ]
+    for html in pages:
+        assert extract_chart_data(html) is None
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert scraper._extract_chart_data_advanced(html) == _legacy_fallback_records(scraper, html)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        prices = [[record['price'] for record in scraper._extract_chart_data_advanced(html)] for html in pages]
+    assert prices == [[10.0], [40.0, 40.0], [50.0], [60.0, 12.0, 70.0], []]
+
+if __name__ == "__main__":
+    test_saved_page_matches_the_legacy_extractor()
+    test_decoding_stops_at_the_chart_block()
+    test_pages_without_the_block_fall_back_to_timestamp_pairs()
+    test_fallback_patterns_match_the_legacy_extractor()
+    print("✅ All chart extractor tests passed")
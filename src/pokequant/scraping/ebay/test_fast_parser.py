@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test and benchmark the lxml fast parser backend against the BeautifulSoup parser
+"""
+
+import sys
+import os
+import io
+import glob
+import timeit
+import contextlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ebay_parser import eBayParser
+
+EBAY_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(EBAY_DIR, '..', '..', '..', '..'))
+SAMPLE_HTML = os.path.join(REPO_ROOT, 'data', 'raw_html', 'sample_search_results.html')
+
+def _load(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+def _parse_quietly(parser: eBayParser, html: str, expected_card_name: str = None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return parser.parse_listing_html(html, expected_card_name)
+
+def test_fast_parser_matches_soup_parser_on_saved_pages():
+    pages = [SAMPLE_HTML] + glob.glob(os.path.join(EBAY_DIR, 'data', 'raw_html', '*.html')) + \
+        glob.glob(os.path.join(EBAY_DIR, 'debug_*.html'))
+
+    for path in pages:
+        html = _load(path)
+        for enable_filter in (False, True):
+            expected = _parse_quietly(eBayParser(enable_filter), html, 'Charizard')
+            actual = _parse_quietly(eBayParser(enable_filter, fast_parser=True), html, 'Charizard')
+            assert actual == expected, f"Mismatch for {os.path.basename(path)} (filter={enable_filter})"
+
+def test_fast_parser_handles_s_card_structure():
+    html = """
+    <html><body><ul class="srp-results srp-list">
+      <li class="s-card s-card--horizontal">
+        <div class="s-card__caption"><span class="su-styled-text">Sold  Jun 3, 2025</span></div>
+        <div class="s-card__title"><span class="su-styled-text">Charizard <!-- x -->VMAX 020/189 PSA 10</span></div>
+        <div class="s-card__subtitle"><span class="su-styled-text">Pre-Owned</span></div>
+        <span class="s-card__price">$1,234.50</span>
+        <div class="s-card__attribute-row">3 bids</div>
+        <div class="s-card__attribute-row">+$5.00 delivery</div>
+        <a class="su-link" href="https://www.ebay.com/itm/123456789012">link</a>
+        <img src="https://i.ebayimg.com/a.jpg">
+        <script>var ignored = "Sold Jan 1";</script>
+      </li>
+    </ul></body></html>
+    """
+    expected = _parse_quietly(eBayParser(False), html)
+    actual = _parse_quietly(eBayParser(False, fast_parser=True), html)
+
+    assert actual == expected
+    assert actual[0]['price'] == 1234.50
+    assert actual[0]['bids'] == 3
+    assert actual[0]['grading_company'] == 'PSA'
+
+def test_fast_parser_empty_page():
+    assert _parse_quietly(eBayParser(False, fast_parser=True), '') == []
+
+def benchmark_parsers(number: int = 3, repeat: int = 3):
+    """Time both backends on the saved search page (parsing only, quality filter off)"""
+    html = _load(SAMPLE_HTML)
+    soup_parser = eBayParser(enable_quality_filter=False)
+    fast_parser = eBayParser(enable_quality_filter=False, fast_parser=True)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        soup_time = min(timeit.repeat(lambda: soup_parser.parse_listing_html(html), number=number, repeat=repeat)) / number
+        fast_time = min(timeit.repeat(lambda: fast_parser.parse_listing_html(html), number=number, repeat=repeat)) / number
+
+    return soup_time, fast_time
+
+def test_fast_parser_speedup():
+    soup_time, fast_time = benchmark_parsers()
+    assert soup_time / fast_time >= 5, f"Only {soup_time / fast_time:.1f}x faster"
+
+if __name__ == "__main__":
+    test_fast_parser_matches_soup_parser_on_saved_pages()
+    test_fast_parser_handles_s_card_structure()
+    test_fast_parser_empty_page()
+
+    soup_time, fast_time = benchmark_parsers()
+    print(f"BeautifulSoup: {soup_time * 1000:.1f} ms/page")
+    print(f"lxml:          {fast_time * 1000:.1f} ms/page")
+    print(f"Speedup:       {soup_time / fast_time:.1f}x")
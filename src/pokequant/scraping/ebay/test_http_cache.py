@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test the PriceCharting HTTP cache: fresh hits skip the network and the rate limit,
+stale entries revalidate with ETag / Last-Modified, bodies are stored compressed
+"""
+
+import sys
+import os
+import io
+import gzip
+import tempfile
+import threading
+import contextlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from http_cache import HTTPCache, CachedSession
+from pricecharting_scraper import PriceChartingScraper
+
+CHART_PAGE = "<html><h1 id='product_name'>Charizard V</h1><script>VGPC.chart_data = {};</script>" + "<p>sale</p>" * 2000 + "</html>"
+
+class _StubPriceChartingHandler(BaseHTTPRequestHandler):
+    """Serves one chart page with validators; answers 304 when the client's copy is current"""
+
+    requests = []
+
+    def do_GET(self):
+        conditional = self.headers.get('If-None-Match') == '"v1"'
+        self.requests.append((self.path, conditional))
+
+        if self.path.startswith('/game/') and conditional:
+            self.send_response(304)
+            self.send_header('ETag', '"v1"')
+            self.end_headers()
+            return
+        if not self.path.startswith('/game/'):
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        data = CHART_PAGE.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Last-Modified', 'Wed, 14 Oct 2026 08:00:00 GMT')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@contextlib.contextmanager
+def _stub_server():
+    _StubPriceChartingHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubPriceChartingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+
+def _scraper(cache_dir, base_url):
+    scraper = PriceChartingScraper(cache_dir=cache_dir)
+    scraper.base_url = base_url
+    scraper.delay_between_requests = 0
+    return scraper
+
+def test_repeated_scrapes_are_cache_hits():
+    with tempfile.TemporaryDirectory() as cache_dir, _stub_server() as base_url, contextlib.redirect_stdout(io.StringIO()):
+        first = _scraper(cache_dir, base_url).scrape_price_history(f"{base_url}/game/charizard-v")
+
+        # A new scraper (the next curated run) is served from disk
+        scraper = _scraper(cache_dir, base_url)
+        rate_limited = []
+        scraper.session.rate_limit = lambda: rate_limited.append(1)
+        second = scraper.scrape_price_history(f"{base_url}/game/charizard-v")
+
+    assert len(_StubPriceChartingHandler.requests) == 1
+    assert not rate_limited
+    assert scraper.session.cache_stats == {'hits': 1, 'revalidated': 0, 'misses': 0}
+    assert second['product_info'] == first['product_info']
+
+def test_stale_entries_are_revalidated_with_validators():
+    with tempfile.TemporaryDirectory() as cache_dir, _stub_server() as base_url:
+        url = f"{base_url}/game/charizard-v"
+        session = CachedSession(HTTPCache(cache_dir), page_ttls=[(r'/game/', 0)])
+        assert session.get(url).status_code == 200
+
+        response = session.get(url)
+        assert response.status_code == 200 and response.from_cache
+        assert response.text == CHART_PAGE
+        assert _StubPriceChartingHandler.requests == [('/game/charizard-v', False), ('/game/charizard-v', True)]
+        assert session.cache_stats == {'hits': 0, 'revalidated': 1, 'misses': 1}
+
+def test_bodies_are_compressed_and_page_classes_get_their_own_ttl():
+    with tempfile.TemporaryDirectory() as cache_dir, _stub_server() as base_url:
+        scraper = _scraper(cache_dir, base_url)
+        scraper.session.get(f"{base_url}/game/charizard-v")
+        scraper.session.get(f"{base_url}/console/12345")  # probed URL format that doesn't exist
+
+        files = [os.path.join(root, name) for root, _, names in os.walk(cache_dir) for name in names]
+        assert len(files) == 2
+        page_file = max(files, key=os.path.getsize)
+        assert os.path.getsize(page_file) < len(CHART_PAGE) / 10
+        with gzip.open(page_file, 'rb') as f:
+            assert f.read().endswith(CHART_PAGE.encode())
+
+        assert scraper.session.get(f"{base_url}/console/12345").status_code == 404
+        assert len(_StubPriceChartingHandler.requests) == 2
+
+    assert scraper.session.ttl_for(f"{base_url}/search-products?q=charizard") == 3 * 86400
+    assert scraper.session.ttl_for(f"{base_url}/game/charizard-v") == 6 * 3600
+
+if __name__ == "__main__":
+    test_repeated_scrapes_are_cache_hits()
+    test_stale_entries_are_revalidated_with_validators()
+    test_bodies_are_compressed_and_page_classes_get_their_own_ttl()
+    print("✅ All HTTP cache tests passed")
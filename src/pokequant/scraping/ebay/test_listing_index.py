@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test the persistent listing identity index and index-backed duplicate filtering
+"""
+
+import sys
+import os
+import io
+import tempfile
+import contextlib
+
+EBAY_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(EBAY_DIR)
+sys.path.append(os.path.abspath(os.path.join(EBAY_DIR, '..', '..', '..', '..')))
+
+from listing_index import ListingIdentityIndex
+from ebay_to_supabase import eBaySupabaseUploader
+from tests.fake_supabase import FakeSupabase
+
+def _selects(client):
+    return sum(1 for _, action in client.requests if action == 'select')
+
+def _listing(item_id, tracking='abc'):
+    return {'title': f'Charizard {item_id}', 'price': 10.0,
+            'listing_url': f'https://www.ebay.com/itm/{item_id}?_trkparms={tracking}'}
+
+def _uploader(client, index_dir):
+    uploader = eBaySupabaseUploader()
+    uploader.supabase = client
+    uploader.listing_index = ListingIdentityIndex(client, index_dir)
+    return uploader
+
+def test_index_rebuilds_from_database_and_persists():
+    client = FakeSupabase({'ebay_sold_listings': [{'listing_url': _listing(100000000 + i)['listing_url']} for i in range(2500)]})
+
+    with tempfile.TemporaryDirectory() as index_dir, contextlib.redirect_stdout(io.StringIO()):
+        index = ListingIdentityIndex(client, index_dir)
+        assert index.contains('ebay_sold_listings', '100000042')
+        assert not index.contains('ebay_sold_listings', '999999999')
+        assert _selects(client) == 3  # paged rebuild
+
+        index.add('ebay_sold_listings', ['999999999', None])
+
+        reloaded = ListingIdentityIndex(client, index_dir)
+        assert reloaded.contains('ebay_sold_listings', '999999999')
+        assert reloaded.contains('ebay_sold_listings', '100002499')
+        assert _selects(client) == 3  # loaded from disk, no new queries
+
+def test_known_listings_skip_database_queries():
+    client = FakeSupabase({'ebay_sold_listings': []})
+
+    with tempfile.TemporaryDirectory() as index_dir, contextlib.redirect_stdout(io.StringIO()):
+        uploader = _uploader(client, index_dir)
+        first = [_listing(200000000 + i) for i in range(50)]
+        assert uploader.upload_targeted_listings(first, card_id=1, search_terms='charizard')
+        assert len(client.tables['ebay_sold_listings']) == 50
+
+        # Same sales seen again (new tracking params) plus 5 new ones
+        client.requests = []
+        again = [_listing(200000000 + i, tracking='xyz') for i in range(50)] + [_listing(300000000 + i) for i in range(5)]
+        new_listings = uploader._filter_duplicates([uploader._prepare_listing_for_db(l, 1, 'charizard') for l in again])
+
+        assert [l['item_id'] for l in new_listings] == [str(300000000 + i) for i in range(5)]
+        assert _selects(client) == 1  # one verification query for the 5 unknown listings
+
+def test_rows_from_other_writers_are_verified_and_indexed():
+    client = FakeSupabase({'ebay_sealed_listings': []})
+
+    with tempfile.TemporaryDirectory() as index_dir, contextlib.redirect_stdout(io.StringIO()):
+        uploader = _uploader(client, index_dir)
+        uploader.listing_index.contains('ebay_sealed_listings', '1')  # load the (empty) index
+
+        # Another worker inserts after our index was loaded
+        client.tables['ebay_sealed_listings'].append({'listing_url': 'https://www.ebay.com/itm/400000001', 'item_id': '400000001'})
+
+        prepared = [uploader._prepare_sealed_listing_for_db(_listing(400000001), 7, 'booster box')]
+        assert uploader._filter_sealed_duplicates(prepared) == []
+        assert uploader.listing_index.contains('ebay_sealed_listings', '400000001')
+
+if __name__ == "__main__":
+    test_index_rebuilds_from_database_and_persists()
+    test_known_listings_skip_database_queries()
+    test_rows_from_other_writers_are_verified_and_indexed()
+    print("✅ All listing index tests passed")
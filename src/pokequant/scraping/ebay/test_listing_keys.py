@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test normalized listing keys in the parser, uploader and backfill tool
+"""
+
+import sys
+import os
+import io
+import tempfile
+import contextlib
+
+EBAY_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(EBAY_DIR)
+sys.path.append(os.path.abspath(os.path.join(EBAY_DIR, '..', '..', '..', '..')))
+
+from utils import extract_item_id, canonical_listing_url, listing_key
+from ebay_parser import eBayParser
+from listing_index import ListingIdentityIndex
+from ebay_to_supabase import eBaySupabaseUploader
+from listing_key_backfill import ListingKeyBackfill
+from tests.fake_supabase import FakeSupabase
+
+def _listing(item_id, tracking='abc'):
+    return {'title': f'Charizard {item_id}', 'price': 10.0,
+            'listing_url': f'https://www.ebay.com/itm/{item_id}?_trkparms={tracking}'}
+
+def _uploader(client, index_dir):
+    uploader = eBaySupabaseUploader()
+    uploader.supabase = client
+    uploader.listing_index = ListingIdentityIndex(client, index_dir)
+    return uploader
+
+def test_item_id_and_canonical_url():
+    assert extract_item_id('https://www.ebay.com/itm/123456789012?hash=item1&_trkparms=abc') == '123456789012'
+    assert extract_item_id('https://www.ebay.com/itm/charizard-vmax-psa-10/123456789012') == '123456789012'
+    assert extract_item_id('https://cgi.ebay.com/ws/eBayISAPI.dll?ViewItem&item=123456789012') == '123456789012'
+    assert extract_item_id('https://www.ebay.com/sch/i.html?_nkw=charizard') is None
+
+    assert canonical_listing_url('https://www.ebay.com/itm/123456789012?_trkparms=abc#x') == 'https://www.ebay.com/itm/123456789012'
+    assert canonical_listing_url('https://www.ebay.com/p/555?iid=1') == 'https://www.ebay.com/p/555'
+    assert listing_key('https://www.ebay.com/itm/123456789012?a=1') == listing_key('https://www.ebay.com/itm/123456789012?a=2')
+
+def test_parser_emits_item_id_and_canonical_url():
+    html = """
+    <ul class="srp-results"><li class="s-item">
+      <div class="s-item__title"><span>Charizard Base Set 4/102</span></div>
+      <span class="s-item__price">$300.00</span>
+      <a class="s-item__link" href="https://www.ebay.com/itm/123456789012?_trkparms=abc&hash=item1">x</a>
+    </li></ul>
+    """
+    for fast_parser in (False, True):
+        with contextlib.redirect_stdout(io.StringIO()):
+            listings = eBayParser(enable_quality_filter=False, fast_parser=fast_parser).parse_listing_html(html)
+        assert listings[0]['item_id'] == '123456789012'
+        assert listings[0]['canonical_url'] == 'https://www.ebay.com/itm/123456789012'
+
+def test_uploader_stores_canonical_key_and_upserts_on_item_id():
+    client = FakeSupabase({'ebay_sold_listings': []})
+
+    with tempfile.TemporaryDirectory() as index_dir, contextlib.redirect_stdout(io.StringIO()):
+        uploader = _uploader(client, index_dir)
+        listings = [_listing(500000001, 'a'), _listing(500000001, 'b'), _listing(500000002)]
+        assert uploader.upload_targeted_listings(listings, card_id=3, search_terms='pikachu')
+
+    rows = client.tables['ebay_sold_listings']
+    assert [row['item_id'] for row in rows] == ['500000001', '500000002']
+    assert rows[0]['listing_url'] == 'https://www.ebay.com/itm/500000001'
+
+def test_upserts_count_only_the_rows_they_insert():
+    stored = {'item_id': '500000001', 'listing_url': 'https://www.ebay.com/itm/500000001', 'card_id': 3}
+    client = FakeSupabase({'ebay_sold_listings': [dict(stored)]})
+    fresh = {'item_id': '500000002', 'listing_url': 'https://www.ebay.com/itm/500000002', 'card_id': 3}
+
+    with tempfile.TemporaryDirectory() as index_dir, contextlib.redirect_stdout(io.StringIO()) as output:
+        uploader = _uploader(client, index_dir)
+        # Rows a concurrent writer stored after the duplicate check: the upsert skips them
+        assert uploader._batch_upload_listings([dict(stored)])
+        assert uploader._batch_upload_listings([dict(stored), fresh])
+
+    assert len(client.tables['ebay_sold_listings']) == 2
+    log = output.getvalue()
+    assert 'failed' not in log
+    assert '0 inserted, 1 already stored' in log and '1 inserted, 1 already stored' in log
+    assert 'Upload complete: 1/2 listings inserted' in log
+
+def _unique_item_id(query):
+    """ebay_*_listings.item_id is UNIQUE"""
+    item_id = (query.payload or {}).get('item_id') if query.action == 'update' else None
+    row_id = query.condition('eq', 'id')
+    if item_id and any(row['item_id'] == item_id and row['id'] != row_id for row in query.client.tables[query.table]):
+        return Exception(f"duplicate key value violates unique constraint (item_id)=({item_id})")
+    return None
+
+def test_backfill_collapses_duplicates_and_normalizes_rows():
+    rows = [
+        {'id': 1, 'listing_url': 'https://www.ebay.com/itm/600000001?_trkparms=a', 'item_id': None},
+        {'id': 2, 'listing_url': 'https://www.ebay.com/itm/600000002', 'item_id': '600000002'},
+        # A later duplicate already holding the item_id the kept row 1 is about to get
+        {'id': 3, 'listing_url': 'https://www.ebay.com/itm/charizard/600000001?_trkparms=b', 'item_id': '600000001'},
+        {'id': 4, 'listing_url': 'https://www.ebay.com/itm/600000002?hash=x', 'item_id': None},
+        {'id': 5, 'listing_url': 'https://www.ebay.com/itm/600000003', 'item_id': None},
+    ]
+    client = FakeSupabase({'ebay_sold_listings': rows})
+    client.fail_on = _unique_item_id
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        dry = ListingKeyBackfill('ebay_sold_listings', batch_size=2, dry_run=True, supabase_client=client).run()
+        assert dry['duplicates_removed'] == 2 and len(client.tables['ebay_sold_listings']) == 5
+
+        stats = ListingKeyBackfill('ebay_sold_listings', batch_size=2, supabase_client=client).run()
+
+    assert stats['success'] and stats['errors'] == []
+    assert stats['duplicates_removed'] == 2
+    remaining = client.tables['ebay_sold_listings']
+    assert [row['id'] for row in remaining] == [1, 2, 5]
+    assert [row['item_id'] for row in remaining] == ['600000001', '600000002', '600000003']
+    assert remaining[0]['listing_url'] == 'https://www.ebay.com/itm/600000001'
+
+if __name__ == "__main__":
+    test_item_id_and_canonical_url()
+    test_parser_emits_item_id_and_canonical_url()
+    test_uploader_stores_canonical_key_and_upserts_on_item_id()
+    test_upserts_count_only_the_rows_they_insert()
+    test_backfill_collapses_duplicates_and_normalizes_rows()
+    print("✅ All listing key tests passed")
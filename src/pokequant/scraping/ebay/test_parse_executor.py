@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test the process-pool parse stage
+"""
+
+import sys
+import os
+import io
+import contextlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ebay_parser import eBayParser
+from parse_executor import ParallelPageParser
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..'))
+SAMPLE_HTML = os.path.join(REPO_ROOT, 'data', 'raw_html', 'sample_search_results.html')
+
+def _sample_page() -> str:
+    with open(SAMPLE_HTML, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+def _serial_parse(pages, expected_card_name=None):
+    parser = eBayParser()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [parser.parse_listing_html(page, expected_card_name) for page in pages]
+
+def test_parallel_results_match_serial_and_keep_page_order():
+    sample = _sample_page()
+    # Make each page distinguishable so ordering mistakes show up
+    pages = [sample.replace('Charizard', f'Charizard P{i}') for i in range(4)]
+
+    with ParallelPageParser(max_workers=2) as page_parser:
+        results = page_parser.parse_pages(pages, 'Charizard')
+
+    assert [r.page_num for r in results] == [1, 2, 3, 4]
+    assert all(r.success for r in results)
+    assert [r.listings for r in results] == _serial_parse(pages, 'Charizard')
+
+def test_bad_page_does_not_affect_other_pages():
+    sample = _sample_page()
+    pages = [sample, b'\xff\xfe not html at all', sample]
+
+    with ParallelPageParser(max_workers=2, enable_quality_filter=False) as page_parser:
+        results = page_parser.parse_pages(pages)
+
+    assert results[0].success and results[2].success
+    assert len(results[0].listings) > 0
+    assert results[0].listings == results[2].listings
+    assert results[1].listings == []
+
+def test_worker_error_is_isolated_to_its_page():
+    page_parser = ParallelPageParser(max_workers=1)
+    # Not bytes or str - decoding fails inside the parse call for this page only
+    results = page_parser.parse_pages([_sample_page(), 12345])
+
+    assert results[0].success
+    assert not results[1].success
+    assert 'AttributeError' in results[1].error
+
+def test_pages_added_while_fetching_parse_in_the_background():
+    sample = _sample_page()
+    pages = [sample.replace('Charizard', f'Charizard P{i}') for i in range(3)]
+
+    with ParallelPageParser(max_workers=2) as page_parser:
+        pending = page_parser.start('Charizard')
+        for page in pages:
+            pending.add(page)  # as the fetcher's on_page callback would
+        results = pending.results()
+
+    assert [r.page_num for r in results] == [1, 2, 3]
+    assert [r.listings for r in results] == _serial_parse(pages, 'Charizard')
+    assert page_parser._executor is None  # shut down on exit
+
+def test_inline_mode_matches_serial():
+    page = _sample_page()
+    results = ParallelPageParser(max_workers=1).parse_pages([page])
+    assert results[0].listings == _serial_parse([page])[0]
+
+if __name__ == "__main__":
+    test_parallel_results_match_serial_and_keep_page_order()
+    test_bad_page_does_not_affect_other_pages()
+    test_worker_error_is_isolated_to_its_page()
+    test_pages_added_while_fetching_parse_in_the_background()
+    test_inline_mode_matches_serial()
+    print("✅ All parse executor tests passed")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test the PriceCharting URL index: indexed products skip the search, a 404
+re-resolves once, and the batch resolver only searches for unindexed products
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import threading
+import contextlib
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pricecharting_index import PriceChartingURLIndex, resolve_catalog
+from pricecharting_scraper import PriceChartingScraper
+
+class _StubPriceChartingHandler(BaseHTTPRequestHandler):
+    """Search results point at one product ID; only its /game/ URL format exists"""
+
+    product_id = '123'
+    requests = []
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        self.requests.append(path)
+
+        if path == '/search-products':
+            body = f"<html><table><tr><td><a href='/offers?product={self.product_id}'>Buy</a></td></tr></table></html>"
+        elif path == f'/game/{self.product_id}':
+            body = f"<html><h1 id='product_name'>Product {self.product_id}</h1><div id='chart'></div></html>"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        data = body.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@contextlib.contextmanager
+def _stub_server():
+    _StubPriceChartingHandler.product_id = '123'
+    _StubPriceChartingHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubPriceChartingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+
+def _scraper(index_path, base_url):
+    scraper = PriceChartingScraper(cache_dir=None, url_index_path=index_path)
+    scraper.base_url = base_url
+    scraper.delay_between_requests = 0
+    return scraper
+
+CARD = {'id': 42, 'card_name': 'Charizard V', 'card_number': '154', 'set_name': 'Brilliant Stars'}
+
+def test_indexed_products_are_scraped_without_searching():
+    with tempfile.TemporaryDirectory() as directory, _stub_server() as base_url, contextlib.redirect_stdout(io.StringIO()):
+        index_path = os.path.join(directory, 'index.json')
+        first = _scraper(index_path, base_url).scrape_product('card', 42, 'Charizard V', card_data=CARD)
+        assert '/search-products' in _StubPriceChartingHandler.requests
+
+        _StubPriceChartingHandler.requests = []
+        second = _scraper(index_path, base_url).scrape_product('card', 42, 'Charizard V', card_data=CARD)
+        with open(index_path) as f:
+            entry = json.load(f)['card:42']
+
+    assert first['url'] == second['url'] == f"{base_url}/game/123"
+    assert _StubPriceChartingHandler.requests == ['/game/123']
+    assert entry['confidence'] == 0.9 and entry['query'] == 'Charizard V 154'
+
+def test_gone_pages_are_resolved_again():
+    with tempfile.TemporaryDirectory() as directory, _stub_server() as base_url, contextlib.redirect_stdout(io.StringIO()):
+        scraper = _scraper(os.path.join(directory, 'index.json'), base_url)
+        scraper.scrape_product('sealed', 7, 'Evolving Skies Booster Box')
+
+        _StubPriceChartingHandler.product_id = '456'  # PriceCharting moved the product
+        data = scraper.scrape_product('sealed', 7, 'Evolving Skies Booster Box')
+
+    assert data['url'] == f"{base_url}/game/456"
+    assert scraper.url_index.get('sealed', 7)['url'] == f"{base_url}/game/456"
+
+def test_entries_expire_after_the_ttl():
+    index = PriceChartingURLIndex(None, ttl_days=30)
+    index.put('card', 1, 'https://www.pricecharting.com/game/1', 0.9)
+    assert index.get('card', 1)
+
+    index._entries['card:1']['verified_at'] = (datetime.now(timezone.utc) - timedelta(days=31)).isoformat()
+    assert index.get('card', 1) is None
+    index.verify('card', 1)
+    assert index.get('card', 1)
+
+def test_batch_resolver_only_searches_unindexed_products():
+    with tempfile.TemporaryDirectory() as directory, _stub_server() as base_url, contextlib.redirect_stdout(io.StringIO()):
+        scraper = _scraper(os.path.join(directory, 'index.json'), base_url)
+        scraper.url_index.put('card', 1, f"{base_url}/game/1", 0.9)
+        items = [('card', {'id': 1, 'card_name': 'Pikachu'}), ('card', CARD),
+                 ('sealed', {'id': 7, 'product_name': 'Booster Box', 'product_type': 'Booster Box'})]
+
+        results = resolve_catalog(scraper, items)
+        searches = _StubPriceChartingHandler.requests.count('/search-products')
+        saved = PriceChartingURLIndex(os.path.join(directory, 'index.json'))
+
+    assert results['already_indexed'] == 1 and results['resolved'] == 2 and results['not_found'] == 0
+    assert searches == 2
+    assert len(saved) == 3
+
+if __name__ == "__main__":
+    test_indexed_products_are_scraped_without_searching()
+    test_gone_pages_are_resolved_again()
+    test_entries_expire_after_the_ttl()
+    test_batch_resolver_only_searches_unindexed_products()
+    print("✅ All PriceCharting URL index tests passed")
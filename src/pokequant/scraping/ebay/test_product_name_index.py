@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the product name index: ilike-equivalent matches ranked best first, persistence
+with incremental top-ups, and the ilike fallback when the catalog can't be loaded
+"""
+
+import sys
+import os
+import io
+import time
+import tempfile
+import contextlib
+
+EBAY_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(EBAY_DIR)
+sys.path.append(os.path.abspath(os.path.join(EBAY_DIR, '..', '..', '..', '..')))
+
+from product_name_index import ProductNameIndex
+from tests.fake_supabase import FakeSupabase
+
+def _requests(client):
+    """Each catalog request: ('table', 'ilike') for a fallback search, else ('table', ID it reads past)"""
+    return [(query.table, 'ilike' if query.condition('ilike') else query.condition('gt', 'id')) for query in client.queries]
+
+def _catalog():
+    cards = ['Charizard ex', 'Charizard', 'Dark Charizard', 'Charizard V', 'Pikachu', 'Flabébé', "Farfetch'd"]
+    return {
+        'pokemon_cards': [{'id': i, 'card_name': name, 'set_name': 'Test Set', 'card_number': str(i)}
+                          for i, name in enumerate(cards, 1)],
+        'sealed_products': [{'id': 1, 'product_name': 'Evolving Skies Booster Box', 'set_name': 'Evolving Skies',
+                             'product_type': 'Booster Box'}],
+    }
+
+def test_matches_are_what_ilike_finds_ranked_best_first():
+    index = ProductNameIndex(FakeSupabase(_catalog()), cache_path=None)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        names = [card['card_name'] for card in index.search('charizard', 'card')]
+    assert names == ['Charizard', 'Charizard V', 'Charizard ex', 'Dark Charizard']
+    assert [card['card_name'] for card in index.search('CHARIZARD V', 'card')] == ['Charizard V']
+    assert index.search('charizard', 'card', limit=1)[0]['card_number'] == '2'
+
+    # Accents and punctuation don't get in the way; typos fall back to trigram similarity
+    assert index.search('Flabebe', 'card')[0]['card_name'] == 'Flabébé'
+    assert index.search("farfetch'd", 'card')[0]['id'] == 7
+    assert index.search('Pikachuu', 'card')[0]['card_name'] == 'Pikachu'
+    assert index.search('Blastoise', 'card') == []
+    assert index.search('booster box', 'sealed')[0]['product_type'] == 'Booster Box'
+    assert index.search('booster box', 'card') == []
+
+def test_index_is_persisted_and_topped_up_with_new_products():
+    client = FakeSupabase(_catalog())
+
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        path = os.path.join(directory, 'index.json')
+        ProductNameIndex(client, cache_path=path).search('pikachu', 'card')
+        assert _requests(client) == [('pokemon_cards', 0), ('sealed_products', 0)]
+
+        # Another process reuses the file without touching the catalog
+        client.queries = []
+        reloaded = ProductNameIndex(client, cache_path=path)
+        assert reloaded.search('pikachu', 'card')[0]['id'] == 5
+        assert _requests(client) == []
+
+        # A catalog sync adds a card; refresh only asks for IDs past the newest indexed one
+        client.tables['pokemon_cards'].append({'id': 8, 'card_name': 'Pikachu VMAX', 'set_name': 'Vivid Voltage', 'card_number': '44'})
+        assert reloaded.refresh() == 1
+        assert _requests(client) == [('pokemon_cards', 7), ('sealed_products', 1)]
+        assert [card['card_name'] for card in reloaded.search('pikachu', 'card')] == ['Pikachu', 'Pikachu VMAX']
+
+        # Once the TTL runs out a search tops the index up by itself
+        expiring = ProductNameIndex(client, cache_path=path, ttl_seconds=60)
+        expiring.ensure_fresh()
+        expiring.refreshed_at = time.time() - 61
+        client.queries = []
+        expiring.search('pikachu', 'card')
+        assert _requests(client) == [('pokemon_cards', 8), ('sealed_products', 1)]
+
+def test_searches_fall_back_to_ilike_without_an_index():
+    client = FakeSupabase(_catalog())
+    index = ProductNameIndex(client, cache_path=None)
+
+    client.fail_on = lambda query: ConnectionError('catalog unavailable')
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert not index.ensure_fresh()
+    client.fail_on = None
+    client.queries = []
+    index.ensure_fresh = lambda: False  # still unreachable as far as the index knows
+
+    assert [card['card_name'] for card in index.search('charizard', 'card', limit=2)] == ['Charizard ex', 'Charizard']
+    assert _requests(client) == [('pokemon_cards', 'ilike')]
+
+if __name__ == "__main__":
+    test_matches_are_what_ilike_finds_ranked_best_first()
+    test_index_is_persisted_and_topped_up_with_new_products()
+    test_searches_fall_back_to_ilike_without_an_index()
+    print("✅ All product name index tests passed")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test and benchmark the compiled pattern matchers in ListingQualityFilterFixed
+against per-pattern re.search scans
+"""
+
+import sys
+import os
+import io
+import re
+import glob
+import random
+import timeit
+import contextlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ebay_parser import eBayParser
+from listing_quality_filter_fixed import ListingQualityFilterFixed
+
+EBAY_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(EBAY_DIR, '..', '..', '..', '..'))
+
+WORDS = ['pokemon', 'pokémon', 'charizard', 'v', 'vmax', '154/172', 'psa', '10', 'lot', 'of', '5', 'bulk', 'cards',
+         'damaged', 'creased', 'as', 'is', 'proxy', 'binder', 'coins', 'mystery', 'box', 'booster', 'etb', 'elite',
+         'trainer', 'yu-gi-oh', 'mtg', 'holo', 'near', 'mint', 'nm', 'sealed', 'brilliant', 'stars', 'alt', 'art',
+         '3x', 'card', 'and', 'more', 'base', 'set', 'shadowless', 'tcg', 'etc', 'PSA', 'Lot', 'HOLO']
+
+def _saved_titles():
+    parser = eBayParser(enable_quality_filter=False, fast_parser=True)
+    pages = [os.path.join(REPO_ROOT, 'data', 'raw_html', 'sample_search_results.html')] + \
+        glob.glob(os.path.join(EBAY_DIR, 'data', 'raw_html', '*.html')) + glob.glob(os.path.join(EBAY_DIR, 'debug_*.html'))
+
+    titles = []
+    for path in pages:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f, contextlib.redirect_stdout(io.StringIO()):
+                titles.extend(listing['title'] for listing in parser.parse_listing_html(f.read()) if listing.get('title'))
+    return titles
+
+def _corpus(count=3000, seed=3):
+    rng = random.Random(seed)
+    synthetic = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 12))) for _ in range(count)]
+    return [title.lower() for title in _saved_titles()] + synthetic
+
+def _reference_scan(quality_filter, title):
+    """What filter_listing computed before the matchers were compiled"""
+    first_invalid = None
+    for category, patterns in quality_filter.invalid_patterns.items():
+        for pattern in patterns:
+            if first_invalid is None and re.search(pattern, title, re.IGNORECASE):
+                first_invalid = (category, pattern)
+
+    indicators = [pattern for pattern in quality_filter.pokemon_indicators if re.search(pattern, title, re.IGNORECASE)]
+    valid_score = sum(1 for pattern in quality_filter.valid_patterns if re.search(pattern, title, re.IGNORECASE))
+    return first_invalid, indicators, valid_score
+
+def _compiled_scan(quality_filter, title):
+    return (quality_filter._first_invalid_match(title),
+            quality_filter._matched_patterns(quality_filter._indicator_entries, title),
+            len(quality_filter._matched_patterns(quality_filter._valid_entries, title)))
+
+def test_compiled_matchers_match_per_pattern_scans():
+    quality_filter = ListingQualityFilterFixed()
+    for title in _corpus():
+        assert _compiled_scan(quality_filter, title) == _reference_scan(quality_filter, title), title
+
+def test_rejection_reasons_are_unchanged():
+    quality_filter = ListingQualityFilterFixed()
+    cases = {
+        "34 card lot mixed condition vintage": "Invalid: lots - matched '\\b\\d+\\s*(card|pokemon)\\s*lot\\b'",
+        # 'damaged' appears first in the title but 'lots' patterns are checked first
+        "damaged charizard lot of 5": "Invalid: lots - matched '\\blot\\s*of\\s*\\d+'",
+        "charizard v damaged creased water damage as is": "Invalid: damaged - matched '\\bdamaged\\b'",
+        "pokemon charizard v 154/172 brilliant stars alt art nm": "Passed quality checks",
+    }
+    for title, reason in cases.items():
+        assert quality_filter.filter_listing({'title': title, 'price': 25.0}).reason == reason
+
+    listings = [{'title': title, 'price': 25.0} for title in cases]
+    valid, stats = quality_filter.filter_listings_batch(listings)
+    assert len(valid) == 1 and valid[0]['quality_score'] == quality_filter.filter_listing(listings[3]).confidence
+    assert stats == {'Invalid': 3}
+
+def test_edited_patterns_take_effect_after_recompiling():
+    quality_filter = ListingQualityFilterFixed()
+    quality_filter.invalid_patterns['fake'].append(r'\bgold\s*metal\b')
+    quality_filter._compile_matchers()
+    result = quality_filter.filter_listing({'title': 'Pokemon Charizard Gold Metal Card', 'price': 20.0})
+    assert result.reason == "Invalid: fake - matched '\\bgold\\s*metal\\b'"
+
+def benchmark_matchers(number=3, repeat=3):
+    quality_filter = ListingQualityFilterFixed()
+    titles = _corpus()
+
+    reference_time = min(timeit.repeat(lambda: [_reference_scan(quality_filter, t) for t in titles], number=number, repeat=repeat))
+    compiled_time = min(timeit.repeat(lambda: [_compiled_scan(quality_filter, t) for t in titles], number=number, repeat=repeat))
+    per_title = number * len(titles)
+    return reference_time / per_title, compiled_time / per_title
+
+if __name__ == "__main__":
+    test_compiled_matchers_match_per_pattern_scans()
+    test_rejection_reasons_are_unchanged()
+    test_edited_patterns_take_effect_after_recompiling()
+    print("✅ Compiled matchers match the per-pattern scans")
+
+    reference_time, compiled_time = benchmark_matchers()
+    print(f"Per-pattern re.search: {reference_time * 1e6:.1f} µs/title")
+    print(f"Compiled matchers:     {compiled_time * 1e6:.1f} µs/title")
+    print(f"Speedup:               {reference_time / compiled_time:.1f}x")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test the refresh scheduler's priority order and hourly request budget
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import contextlib
+import multiprocessing
+from datetime import datetime, timedelta, timezone
+
+EBAY_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(EBAY_DIR)
+sys.path.append(os.path.abspath(os.path.join(EBAY_DIR, '..', '..', '..', '..')))
+
+from freshness_snapshot import FreshnessSnapshot
+from refresh_scheduler import RefreshScheduler, record_product_demand
+from ebay_to_supabase import eBaySupabaseUploader
+from tests.fake_supabase import FakeSupabase
+
+NOW = datetime.now(timezone.utc)
+
+def _days_ago(days):
+    return (NOW - timedelta(days=days)).isoformat()
+
+def _series(pokequant_product_id, prices, listing_count=1):
+    return [{'pokequant_product_id': pokequant_product_id, 'price_date': (NOW - timedelta(days=len(prices) - i)).date().isoformat(),
+             'price': price, 'condition_category': 'raw', 'listing_count': listing_count} for i, price in enumerate(prices)]
+
+def _client():
+    listings = [
+        {'id': 1, 'card_id': 1, 'created_at': _days_ago(10)},   # volatile chase card
+        {'id': 2, 'card_id': 2, 'created_at': _days_ago(10)},   # dead bulk common
+        {'id': 3, 'card_id': 3, 'created_at': _days_ago(0.1)},  # volatile but just scraped
+        {'id': 4, 'card_id': 5, 'created_at': _days_ago(10)},   # bulk common people keep asking about
+    ]
+    products = [{'id': f'pq-{card_id}', 'product_type': 'card', 'product_id': str(card_id)} for card_id in (1, 2, 3, 5)]
+    swings = [100, 130, 95, 140, 90, 150, 100]
+    series = _series('pq-1', swings, listing_count=4) + _series('pq-2', [1.0] * 7) + _series('pq-3', swings, listing_count=4)
+    return FakeSupabase({'ebay_sold_listings': listings, 'ebay_sealed_listings': [],
+                         'pokequant_products': products, 'pokequant_price_series': series}, create_missing_tables=False)
+
+def _scheduler(client, directory, **kwargs):
+    return RefreshScheduler(client, freshness=FreshnessSnapshot(client, cache_path=None),
+                            demand_log_path=os.path.join(directory, 'demand.jsonl'),
+                            budget_path=os.path.join(directory, 'budget.json'), **kwargs)
+
+def test_priority_order():
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(10):
+            record_product_demand('card', 5, path=os.path.join(directory, 'demand.jsonl'))
+
+        scheduler = _scheduler(_client(), directory)
+        cards = [{'id': card_id, 'card_name': f'Card {card_id}'} for card_id in (2, 3, 4, 1, 5)]
+        order = [card['id'] for card in scheduler.prioritize(cards, 'card')]
+
+    # Volatile and stale > in demand > never scraped > dead common; the just-scraped card isn't due
+    assert order == [1, 5, 4, 2]
+    assert cards[3]['refresh_components']['volatility'] > 0
+    assert 'refresh_priority' not in cards[1]
+
+def test_hourly_budget_is_shared_between_schedulers():
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        first = _scheduler(_client(), directory, requests_per_hour=10, requests_per_product=3)
+        batch = first.prioritize([{'id': card_id} for card_id in range(1, 6)], 'card')
+        assert len(batch) == 3 and len(first) == 1  # card 3 was just scraped, so it is not queued
+        assert first.remaining_budget() == 1
+
+        second = _scheduler(_client(), directory, requests_per_hour=10, requests_per_product=3)
+        assert second.prioritize([{'id': 9}], 'card') == []
+        assert 3500 < second.seconds_until_budget() <= 3600
+
+        with open(os.path.join(directory, 'budget.json')) as f:
+            assert sum(requests for _, requests in json.load(f)) == 9
+
+def test_missing_price_series_falls_back_to_staleness():
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        client = _client()
+        del client.tables['pokequant_price_series']
+        scheduler = _scheduler(client, directory)
+        order = [card['id'] for card in scheduler.prioritize([{'id': 3}, {'id': 1}, {'id': 4}], 'card')]
+    assert order == [4, 1]
+
+def test_just_refreshed_products_are_not_handed_out_for_demand():
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        record_product_demand('card', 3, path=os.path.join(directory, 'demand.jsonl'))
+        scheduler = _scheduler(_client(), directory)
+        assert scheduler.prioritize([{'id': 3}], 'card') == []
+        assert len(scheduler) == 1 and scheduler.remaining_budget() == scheduler.requests_per_hour
+
+def test_cards_needing_updates_are_read_past_the_first_page():
+    client = _client()
+    client.tables['pokemon_cards'] = [{'id': card_id, 'card_name': f'Card {card_id}'} for card_id in range(1, 2501)]
+    uploader = eBaySupabaseUploader()
+    uploader.supabase = client
+    uploader.freshness = FreshnessSnapshot(client, cache_path=None)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        stale = uploader.get_cards_needing_updates(days_threshold=7)
+        assert len(stale) == 2499  # all but card 3, scraped today
+        assert client.requests.count(('pokemon_cards', 'select')) == 3
+        assert [card['id'] for card in uploader.get_cards_needing_updates(limit=1500)][-1] == 1500
+
+def test_products_are_charged_for_the_pages_they_fetch():
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        scheduler = _scheduler(_client(), directory, requests_per_hour=30, requests_per_product=3)
+        assert len(scheduler.prioritize([{'id': 1}, {'id': 2}], 'card')) == 2
+        assert scheduler.remaining_budget() == 24
+
+        # Card 1's searches ran to 10 pages, card 2's found one page for one of its 3 searches
+        scheduler.settle(10)
+        scheduler.settle(1)
+        assert scheduler.remaining_budget() == 30 - 10 - 1
+        assert _scheduler(_client(), directory, requests_per_hour=30).remaining_budget() == 19
+
+def _charge_repeatedly(directory, count):
+    with contextlib.redirect_stdout(io.StringIO()):
+        scheduler = _scheduler(_client(), directory)
+        for _ in range(count):
+            scheduler.charge(1)
+
+def test_concurrent_charges_are_not_lost():
+    with tempfile.TemporaryDirectory() as directory:
+        workers = [multiprocessing.get_context('fork').Process(target=_charge_repeatedly, args=(directory, 40))
+                   for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        with open(os.path.join(directory, 'budget.json')) as f:
+            assert len(json.load(f)) == 160
+
+def test_demand_log_is_compacted():
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        path = os.path.join(directory, 'demand.jsonl')
+        with open(path, 'w') as f:
+            for _ in range(8):
+                f.write(json.dumps({'product_type': 'card', 'product_id': '5', 'at': _days_ago(45)}) + '\n')
+        for _ in range(2):
+            record_product_demand('card', 5, path=path)
+
+        scheduler = _scheduler(_client(), directory, demand_compact_lines=5)
+        assert scheduler._load_signals()['demand'] == {('card', '5'): 2}
+        with open(path) as f:
+            assert len(f.readlines()) == 2
+
+if __name__ == "__main__":
+    test_priority_order()
+    test_hourly_budget_is_shared_between_schedulers()
+    test_missing_price_series_falls_back_to_staleness()
+    test_just_refreshed_products_are_not_handed_out_for_demand()
+    test_cards_needing_updates_are_read_past_the_first_page()
+    test_products_are_charged_for_the_pages_they_fetch()
+    test_concurrent_charges_are_not_lost()
+    test_demand_log_is_compacted()
+    print("✅ All refresh scheduler tests passed")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Test the comprehensive scrape run journal: exclusive claims across processes,
+retries, and resuming an interrupted run without redoing finished pages
+"""
+
+import sys
+import os
+import io
+import tempfile
+import contextlib
+import multiprocessing
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from scrape_journal import ScrapeJournal
+from comprehensive_scraper import ComprehensiveeBayScraper
+
+CARDS = [{'id': card_id, 'card_name': f'Card {card_id}'} for card_id in (101, 102, 103)]
+TERMS = {str(card['id']): [f"{card['card_name']} psa", f"{card['card_name']} holo"] for card in CARDS}
+
+def _claim_all(db_path, run_id, worker_id, queue):
+    journal = ScrapeJournal(db_path)
+    claimed = []
+    while True:
+        unit = journal.claim(run_id, worker_id)
+        if unit is None:
+            break
+        claimed.append(unit.id)
+        journal.complete(unit, has_next_page=unit.page < 3)
+    queue.put(claimed)
+
+def test_workers_claim_units_without_overlap():
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'journal.db')
+        run_id = ScrapeJournal(db_path).create_run('initial', CARDS, TERMS)
+
+        queue = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_claim_all, args=(db_path, run_id, f'worker-{i}', queue)) for i in range(4)]
+        for worker in workers:
+            worker.start()
+        claimed = [unit_id for _ in workers for unit_id in queue.get(timeout=60)]
+        for worker in workers:
+            worker.join()
+
+        # 3 cards x 2 searches x 3 pages, each claimed exactly once
+        assert len(claimed) == len(set(claimed)) == 18
+        assert ScrapeJournal(db_path).progress(run_id)['units']['done'] == 18
+
+def test_failed_units_are_retried_then_left_failed():
+    with tempfile.TemporaryDirectory() as directory:
+        journal = ScrapeJournal(os.path.join(directory, 'journal.db'), max_attempts=2)
+        run_id = journal.create_run('initial', CARDS[:1], TERMS)
+
+        first = journal.claim(run_id, 'w')
+        journal.fail(first, 'timeout')
+        retry = journal.claim(run_id, 'w')
+        assert retry.id == first.id and retry.attempts == 2  # back in the queue
+        journal.fail(retry, 'timeout again')
+
+        second = journal.claim(run_id, 'w')
+        assert second.id != first.id
+        assert not journal.finish_card(run_id, '101')
+        journal.complete(second)
+        assert journal.finish_card(run_id, '101')
+        assert not journal.finish_card(run_id, '101')  # only one worker gets to finish a card
+
+        progress = journal.progress(run_id)
+        assert progress['units'] == {'pending': 0, 'claimed': 0, 'done': 1, 'failed': 1}
+        assert progress['failed_units'][0]['error'] == 'timeout again'
+
+def test_abandoned_claims_are_handed_out_again():
+    with tempfile.TemporaryDirectory() as directory:
+        journal = ScrapeJournal(os.path.join(directory, 'journal.db'), claim_timeout_seconds=0)
+        run_id = journal.create_run('initial', CARDS[:1], TERMS)
+        abandoned = journal.claim(run_id, 'dead-worker')
+        assert journal.claim(run_id, 'live-worker').id == abandoned.id
+
+def test_expired_claims_out_of_attempts_are_left_failed():
+    with tempfile.TemporaryDirectory() as directory:
+        journal = ScrapeJournal(os.path.join(directory, 'journal.db'), claim_timeout_seconds=0, max_attempts=2)
+        run_id = journal.create_run('initial', CARDS[:1], TERMS)
+        first = journal.claim(run_id, 'dead-worker')
+        assert journal.claim(run_id, 'dead-worker').attempts == 2
+
+        # A third expiry isn't handed out: the unit is failed and the next one claimed
+        assert journal.claim(run_id, 'live-worker').id != first.id
+        progress = journal.progress(run_id)
+        assert progress['units']['failed'] == 1
+        assert progress['failed_units'][0]['error'] == 'Claim expired after 2 attempts'
+
+class _StubSearcher:
+    """Three pages per search; records every page it is asked for"""
+
+    def __init__(self):
+        self.fetched = []
+
+    def build_search_url(self, keywords, page=1):
+        return (keywords, page)
+
+    def fetch_listings_page(self, url):
+        self.fetched.append(url)
+        return f"{url[0]} page {url[1]}"
+
+    def _is_last_page(self, html):
+        return html.endswith('page 3')
+
+class _StubParser:
+    def submit_pages(self, pages, expected_card_name=None):
+        results = [SimpleNamespace(success=True, page_num=1, listings=[{'title': pages[0]}, {'title': pages[0] + ' b'}])]
+        return SimpleNamespace(results=lambda: results)
+
+class _StubUploader:
+    def __init__(self, interrupt_after=None):
+        self.uploads = 0
+        self.interrupt_after = interrupt_after
+
+    def upload_targeted_listings(self, listings, card_id, search_terms):
+        if self.interrupt_after is not None and self.uploads == self.interrupt_after:
+            raise KeyboardInterrupt
+        self.uploads += 1
+        return True
+
+def _scraper(db_path, searcher, uploader):
+    scraper = ComprehensiveeBayScraper.__new__(ComprehensiveeBayScraper)
+    scraper.journal = ScrapeJournal(db_path)
+    scraper.ebay_searcher = searcher
+    scraper.page_parser = _StubParser()
+    scraper.uploader = uploader
+    scraper.analyzer = SimpleNamespace(update_market_summary=lambda card_id: None)
+    scraper.search_generator = SimpleNamespace(generate_batch_search_plan=lambda cards: {
+        'search_plans': [{'search_terms': TERMS[str(cards[0]['id'])]}]})
+    scraper.searches_per_card = 3
+    scraper.max_pages_per_search = 50
+    scraper.delay_between_pages = 0
+    scraper.total_cards_processed = scraper.total_listings_collected = 0
+    return scraper
+
+def test_interrupted_run_resumes_without_redoing_pages():
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        db_path = os.path.join(directory, 'journal.db')
+        searcher = _StubSearcher()
+
+        first = _scraper(db_path, searcher, _StubUploader(interrupt_after=7))
+        run_id = first._plan_run(CARDS, {})
+        try:
+            first._work_run(run_id, 'worker-a')
+            assert False, "expected the run to be interrupted"
+        except KeyboardInterrupt:
+            pass
+
+        second = _scraper(db_path, searcher, _StubUploader())
+        second._work_run(run_id, 'worker-b')
+        progress = second.journal.progress(run_id)
+
+    # The interrupted page and the one already fetched behind it are fetched twice
+    # (neither was uploaded); nothing else is
+    pages = [(terms, page) for terms_list in TERMS.values() for terms in terms_list for page in (1, 2, 3)]
+    assert sorted(set(searcher.fetched)) == sorted(pages)
+    assert len(searcher.fetched) == len(pages) + 2
+    assert progress['cards_finished'] == 3
+    assert progress['listings_uploaded'] == 2 * len(pages)
+    assert progress['searches_executed'] == 6
+
+def test_resume_waits_for_claims_of_a_killed_worker():
+    pages = [(terms, page) for terms_list in TERMS.values() for terms in terms_list for page in (1, 2, 3)]
+    for max_attempts in (3, 1):
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            db_path = os.path.join(directory, 'journal.db')
+            searcher = _StubSearcher()
+            scraper = _scraper(db_path, searcher, _StubUploader())
+            scraper.journal.claim_timeout_seconds = 0.5
+            scraper.journal.max_attempts = max_attempts
+            run_id = scraper._plan_run(CARDS, {})
+            scraper.journal.claim(run_id, 'killed-worker')  # Page 1 of the first search, never finished
+
+            scraper._work_run(run_id, 'worker-b', poll_seconds=0.05)
+            progress = scraper.journal.progress(run_id)
+
+        # The resume doesn't exit while the claim is live: once it expires the search is either
+        # scraped in full or, out of attempts, left failed - and its card still gets finished
+        assert progress['cards_finished'] == 3
+        if max_attempts > 1:
+            assert sorted(searcher.fetched) == sorted(pages)
+            assert progress['units']['done'] == len(pages)
+        else:
+            assert len(searcher.fetched) == len(pages) - 3
+            assert progress['units']['failed'] == 1
+
+def test_incremental_runs_are_journaled_and_resume_in_their_own_mode():
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        db_path = os.path.join(directory, 'journal.db')
+        searcher = _StubSearcher()
+        settled = []
+
+        def incremental_scraper(uploader):
+            scraper = _scraper(db_path, searcher, uploader)
+            scraper.scheduler = SimpleNamespace(settle=settled.append)
+            scraper._get_cards_needing_updates = lambda max_cards, offset: CARDS[:2]
+            scraper._save_comprehensive_results = lambda results: None
+            return scraper
+
+        try:
+            incremental_scraper(_StubUploader(interrupt_after=7)).run_comprehensive_scrape(mode="incremental")
+            assert False, "expected the run to be interrupted"
+        except KeyboardInterrupt:
+            pass
+        resumed = incremental_scraper(_StubUploader())
+        run_id = resumed.journal._conn.execute("SELECT run_id FROM runs").fetchone()['run_id']
+        assert resumed.journal.run_mode(run_id) == 'incremental'
+
+        # No mode given: the run carries on as the incremental run it was started as
+        results = resumed.run_comprehensive_scrape(resume_run_id=run_id)
+
+    assert results['mode'] == 'incremental' and results['run_id'] == run_id
+    assert results['total_cards_found'] == 2 and results['total_cards_processed'] == 2
+    # Each card settles its refresh budget charge once, with the pages fetched for it
+    assert len(settled) == 2 and all(pages >= 6 for pages in settled)
+    assert ('Card 103 psa', 1) not in searcher.fetched
+
+if __name__ == "__main__":
+    test_workers_claim_units_without_overlap()
+    test_failed_units_are_retried_then_left_failed()
+    test_abandoned_claims_are_handed_out_again()
+    test_expired_claims_out_of_attempts_are_left_failed()
+    test_interrupted_run_resumes_without_redoing_pages()
+    test_resume_waits_for_claims_of_a_killed_worker()
+    test_incremental_runs_are_journaled_and_resume_in_their_own_mode()
+    print("✅ All scrape journal tests passed")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test the distributed scrape queue and workers against a local stub eBay server:
+leases, heartbeats, retries, the shared rate limit and throughput scaling
+"""
+
+import sys
+import os
+import io
+import time
+import tempfile
+import threading
+import contextlib
+from types import SimpleNamespace
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ebay_search import eBaySearcher
+from scrape_queue import ScrapeQueue
+from scrape_worker import ScrapeWorker, enqueue_strategy
+
+PAGES_PER_TERM = 2
+FILLER = "x" * 12000  # keep stub pages above the "very small page" end indicator
+
+class _StubEbayHandler(BaseHTTPRequestHandler):
+    """Fake sold-listing search pages with a fixed latency; the last page omits 'Next page'"""
+
+    latency = 0.0
+    requests = []
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        keywords = params.get('_nkw', [''])[0]
+        page = int(params.get('_pgn', ['1'])[0])
+        self.requests.append((time.time(), keywords, page))
+        time.sleep(self.latency)
+
+        body = f"<html>{keywords} page {page} {FILLER}"
+        if page < PAGES_PER_TERM and 'single' not in keywords:
+            body += " Next page"
+        data = (body + "</html>").encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@contextlib.contextmanager
+def _stub_server(latency=0.0):
+    _StubEbayHandler.latency = latency
+    _StubEbayHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubEbayHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/sch/i.html"
+    finally:
+        server.shutdown()
+
+class _StubParser:
+    """One listing per page, titled after the page"""
+
+    def submit_pages(self, pages, expected_card_name=None, is_sealed_product=False):
+        results = [SimpleNamespace(success=True, page_num=1, error=None, listings=[{'title': pages[0][6:40]}])]
+        return SimpleNamespace(results=lambda: results)
+
+class _RecordingUploader:
+    def __init__(self):
+        self.uploads = []
+        self.lock = threading.Lock()
+
+    def upload_targeted_listings(self, listings, card_id, search_terms):
+        with self.lock:
+            self.uploads.append(('card', card_id, search_terms, len(listings)))
+        return True
+
+    def upload_sealed_product_listings(self, listings, sealed_product_id, search_terms):
+        with self.lock:
+            self.uploads.append(('sealed', sealed_product_id, search_terms, len(listings)))
+        return True
+
+def _run_workers(db_path, base_url, count, uploader, rate=1000.0, burst=1.0):
+    def _work(i):
+        worker = ScrapeWorker(ScrapeQueue(db_path), searcher=eBaySearcher(base_url=base_url), page_parser=_StubParser(),
+                              uploader=uploader, requests_per_second=rate, burst=burst, worker_id=f"worker-{i}",
+                              heartbeat_seconds=0.05)
+        worker.run(poll_seconds=0.05)
+
+    threads = [threading.Thread(target=_work, args=(i,)) for i in range(count)]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.time() - started
+
+def test_leases_expire_and_heartbeats_keep_them():
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'queue.db')
+        queue = ScrapeQueue(db_path, lease_seconds=0.2, max_attempts=2)
+        assert queue.enqueue([{'id': 1}], {'1': ['a', 'b']}) == 2
+        assert queue.enqueue([{'id': 1}], {'1': ['a', 'b']}) == 0  # already queued
+
+        kept = queue.lease('w1')
+        dropped = queue.lease('w1')
+        time.sleep(0.15)
+        assert queue.heartbeat(kept)
+        time.sleep(0.15)
+
+        # Only the job without heartbeats is handed to another worker
+        other = ScrapeQueue(db_path, lease_seconds=0.2, max_attempts=2)
+        stolen = other.lease('w2')
+        assert stolen.id == dropped.id and stolen.attempts == 2
+        assert other.lease('w2') is None
+        assert not queue.complete(dropped)  # w1 lost it
+        assert queue.complete(kept, pages_fetched=3)
+
+        other.fail(stolen, 'boom')  # out of attempts
+        assert other.stats()['jobs'] == {'pending': 0, 'leased': 0, 'done': 1, 'failed': 1}
+        assert other.failed_jobs()[0]['error'] == 'boom'
+
+        # Re-queuing a finished strategy starts its jobs over
+        assert queue.enqueue([{'id': 1}], {'1': ['a', 'b']}) == 2
+
+def test_rate_limit_bucket_is_shared_between_queues():
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'queue.db')
+        first, second = ScrapeQueue(db_path), ScrapeQueue(db_path)
+        assert first.acquire_request('ebay', 1.0, burst=2) == 0
+        assert second.acquire_request('ebay', 1.0, burst=2) == 0
+        assert 0.9 < first.acquire_request('ebay', 1.0, burst=2) <= 1.0
+
+def test_coordinator_enqueues_cards_and_sealed_products_for_workers():
+    selector = SimpleNamespace(
+        get_curated_investment_targets=lambda: [{'id': 1, 'card_name': 'Charizard'}, {'id': 2, 'card_name': 'Pikachu'}],
+        get_sealed_products_list=lambda: [{'id': 7, 'product_name': 'Evolving Skies Booster Box', 'product_type': 'Booster Box'}],
+    )
+    generator = SimpleNamespace(generate_batch_search_plan=lambda items, max_terms_per_item=3: {'search_plans': [
+        {'item_id': item['id'], 'search_terms': [f"{item.get('card_name', item.get('product_name'))} {n}" for n in ('psa', 'raw')]}
+        for item in items]})
+    uploader = _RecordingUploader()
+
+    with tempfile.TemporaryDirectory() as directory, _stub_server() as base_url, contextlib.redirect_stdout(io.StringIO()):
+        db_path = os.path.join(directory, 'queue.db')
+        assert enqueue_strategy(ScrapeQueue(db_path), selector, generator, 'curated') == 6
+        _run_workers(db_path, base_url, 3, uploader)
+        stats = ScrapeQueue(db_path).stats()
+
+    assert stats['jobs']['done'] == 6
+    assert stats['pages_fetched'] == 6 * PAGES_PER_TERM
+    assert len(_StubEbayHandler.requests) == 6 * PAGES_PER_TERM  # no page scraped twice
+    assert sorted({(kind, item_id) for kind, item_id, _, _ in uploader.uploads}) == [('card', 1), ('card', 2), ('sealed', 7)]
+
+def test_throughput_scales_with_workers_up_to_the_global_rate():
+    items = [{'id': i, 'card_name': f'Card {i}'} for i in range(16)]
+    terms = {str(i): [f'single card {i}'] for i in range(16)}
+
+    with tempfile.TemporaryDirectory() as directory, _stub_server(latency=0.1) as base_url, contextlib.redirect_stdout(io.StringIO()):
+        timings = {}
+        for count in (1, 4):
+            db_path = os.path.join(directory, f'queue-{count}.db')
+            ScrapeQueue(db_path).enqueue(items, terms)
+            timings[count] = _run_workers(db_path, base_url, count, _RecordingUploader())
+
+        # Capped at 8 requests/second: 4 workers can't go faster than the bucket refills
+        db_path = os.path.join(directory, 'queue-capped.db')
+        ScrapeQueue(db_path).enqueue(items, terms)
+        _StubEbayHandler.requests = []
+        timings['capped'] = _run_workers(db_path, base_url, 4, _RecordingUploader(), rate=8.0)
+        request_times = [at for at, _, _ in _StubEbayHandler.requests]
+
+    assert timings[4] < timings[1] / 2
+    assert timings['capped'] > 15 / 8 - 0.1
+    assert len(request_times) == 16
+    assert max(request_times) - min(request_times) >= 15 / 8 - 0.1
+
+if __name__ == "__main__":
+    test_leases_expire_and_heartbeats_keep_them()
+    test_rate_limit_bucket_is_shared_between_queues()
+    test_coordinator_enqueues_cards_and_sealed_products_for_workers()
+    test_throughput_scales_with_workers_up_to_the_global_rate()
+    print("✅ All scrape worker tests passed")
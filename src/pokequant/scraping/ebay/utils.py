@@ -5,9 +5,12 @@ Date handling, batching, retries, etc.
 
 import time
 import random
+import asyncio
 from datetime import datetime, timedelta
-from typing import List, Any, Callable
+from typing import List, Any, Callable, Awaitable, Dict, Optional
+from urllib.parse import urlparse, parse_qs
 import logging
+import re
 
 def setup_logging():
     """Setup logging for the scraper"""
@@ -45,6 +48,116 @@ def retry_with_backoff(func: Callable, max_retries: int = 3, base_delay: float =
             print(f"🔄 Retry {attempt + 1}/{max_retries} after {delay}s: {e}")
             time.sleep(delay)
 
+async def async_retry_with_backoff(func: Callable[[], Awaitable[Any]], max_retries: int = 3, base_delay: float = 1.0):
+    """Async counterpart of retry_with_backoff - awaits func() with the same backoff schedule"""
+    for attempt in range(max_retries):
+        try:
+            return await func()
+        except Exception as e:
+            if attempt == max_retries - 1:
+                raise e
+            
+            delay = base_delay * (2 ** attempt)
+            print(f"🔄 Retry {attempt + 1}/{max_retries} after {delay}s: {e}")
+            await asyncio.sleep(delay)
+
+class TokenBucket:
+    """Async token bucket - allows `rate` requests per second with bursts up to `capacity`"""
+    
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = None
+        self._lock_loop = None
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available and consume them"""
+        # asyncio.Lock binds to the loop it is first contended on; each asyncio.run() brings a new one
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+class HostRateLimiter:
+    """Keeps one TokenBucket per host so each site gets its own request budget"""
+    
+    def __init__(self, default_rate: float = 0.5, default_capacity: float = 1.0, host_budgets: Dict[str, Dict[str, float]] = None):
+        """
+        Args:
+            default_rate: Requests per second for hosts without an explicit budget
+            default_capacity: Burst size for hosts without an explicit budget
+            host_budgets: Per-host overrides, e.g. {'www.ebay.com': {'rate': 1.0, 'capacity': 3}}
+        """
+        self.default_rate = default_rate
+        self.default_capacity = default_capacity
+        self.host_budgets = host_budgets or {}
+        self.buckets = {}
+    
+    def bucket_for(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            budget = self.host_budgets.get(host, {})
+            self.buckets[host] = TokenBucket(
+                budget.get('rate', self.default_rate),
+                budget.get('capacity', self.default_capacity)
+            )
+        return self.buckets[host]
+    
+    async def acquire(self, url: str):
+        await self.bucket_for(url).acquire()
+
+# eBay item IDs are 9-15 digits: /itm/123456789012 or /itm/some-title-slug/123456789012
+_ITEM_PATH_PATTERN = re.compile(r'/itm/(?:[^/?#]+/)?(\d{9,15})(?:[/?#]|$)')
+
+def extract_item_id(url: str) -> Optional[str]:
+    """Extract the numeric eBay item ID from a listing URL (None if it has none)"""
+    if not url:
+        return None
+    
+    match = _ITEM_PATH_PATTERN.search(url)
+    if match:
+        return match.group(1)
+    
+    # Older links carry the ID as a query parameter (e.g. ViewItem&item=123456789012)
+    query = parse_qs(urlparse(url).query)
+    for key in ('item', 'itm', 'ItemId'):
+        value = query.get(key, [''])[0]
+        if value.isdigit() and 9 <= len(value) <= 15:
+            return value
+    
+    return None
+
+def canonical_listing_url(url: str) -> str:
+    """Canonical form of a listing URL - tracking query parameters and fragments dropped"""
+    if not url:
+        return ''
+    
+    item_id = extract_item_id(url)
+    if item_id:
+        return f"https://www.ebay.com/itm/{item_id}"
+    
+    parsed = urlparse(url.strip())
+    return f"{parsed.scheme}://{parsed.netloc}{parsed.path}" if parsed.netloc else url.strip()
+
+def listing_key(url: str) -> str:
+    """Identity of a sale for dedup: the item ID, or the canonical URL when there is no ID"""
+    return extract_item_id(url) or canonical_listing_url(url)
+
 def parse_ebay_date(date_str: str) -> datetime:
     """Parse eBay date string to datetime object"""
     # TODO: Handle various eBay date formats
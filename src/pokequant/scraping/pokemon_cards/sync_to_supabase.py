@@ -8,7 +8,9 @@ from typing import List, Dict, Any
 
 # Add parent directory to path to import supabase_client
 sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / "ebay"))
 from supabase_client import supabase
+from product_name_index import ProductNameIndex
 
 def load_cached_sets() -> List[Dict]:
     """Load cached sets data"""
@@ -168,6 +170,12 @@ def sync_cards_to_supabase():
                 print(f"  -> Error inserting cards batch: {e}")
     
     print(f"Successfully synced {total_cards} cards to Supabase")
+    
+    # Make the new cards searchable now instead of when the name index TTL runs out
+    try:
+        ProductNameIndex(supabase).refresh()
+    except Exception as e:
+        print(f"  -> Could not refresh product name index: {e}")
 
 def sync_all():
     """Sync both sets and cards to Supabase"""
@@ -0,0 +1,215 @@
+"""
+Fake Supabase Client
+In-memory stand-in for supabase_client.supabase, shared by the test suites
+
+Covers the part of the PostgREST query builder the repo uses: select (of plain column
+lists, optionally with a count), insert, upsert, update and delete, filtered with eq / neq / in_ / gt / gte /
+lt / lte / is_ / ilike and shaped with order / range / limit. Tables are plain lists of
+row dicts in client.tables.
+
+Every query sent is kept in client.queries (and as a (table, action) pair in
+client.requests), so tests can assert on round trips; both lists can be reset freely.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+class FakeResult:
+    def __init__(self, data: List[Dict[str, Any]], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+class FakeQuery:
+    """One query being built; executed against the client's tables"""
+
+    def __init__(self, client: 'FakeSupabase', table: str):
+        self.client = client
+        self.table = table
+        self.action = 'select'
+        self.payload = None
+        self.on_conflict = ''
+        self.ignore_duplicates = False
+        self.conditions = []  # (operator, column, value)
+        self.ordering = []    # (column, desc)
+        self.bounds = None
+        self.count = None
+        self.columns = '*'
+        self.data = None      # Rows returned, once executed
+
+    def select(self, *columns, count: str = None, **kwargs):
+        self.columns = ','.join(columns) or '*'
+        self.count = count
+        return self
+
+    def insert(self, rows):
+        self.action, self.payload = 'insert', rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: str = '', ignore_duplicates: bool = False):
+        self.action, self.payload = 'upsert', rows if isinstance(rows, list) else [rows]
+        self.on_conflict = on_conflict
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, values: Dict[str, Any]):
+        self.action, self.payload = 'update', values
+        return self
+
+    def delete(self):
+        self.action = 'delete'
+        return self
+
+    def _where(self, operator: str, column: str, value: Any):
+        self.conditions.append((operator, column, value))
+        return self
+
+    def eq(self, column, value):
+        return self._where('eq', column, value)
+
+    def neq(self, column, value):
+        return self._where('neq', column, value)
+
+    def in_(self, column, values):
+        return self._where('in', column, list(values))
+
+    def gt(self, column, value):
+        return self._where('gt', column, value)
+
+    def gte(self, column, value):
+        return self._where('gte', column, value)
+
+    def lt(self, column, value):
+        return self._where('lt', column, value)
+
+    def lte(self, column, value):
+        return self._where('lte', column, value)
+
+    def is_(self, column, value):
+        return self._where('is', column, value)
+
+    def ilike(self, column, pattern):
+        return self._where('ilike', column, pattern)
+
+    def order(self, column, desc: bool = False):
+        self.ordering.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end + 1)
+        return self
+
+    def limit(self, count):
+        self.bounds = (0, count)
+        return self
+
+    def condition(self, operator: str, column: str = None) -> Any:
+        """Value of the first operator condition (on column, if given), or None"""
+        for condition_operator, condition_column, value in self.conditions:
+            if condition_operator == operator and column in (None, condition_column):
+                return value
+        return None
+
+    @staticmethod
+    def _matches(row: Dict[str, Any], operator: str, column: str, value: Any) -> bool:
+        actual = row.get(column)
+        if operator == 'eq':
+            return str(actual) == str(value)
+        if operator == 'neq':
+            return str(actual) != str(value)
+        if operator == 'in':
+            return str(actual) in {str(item) for item in value}
+        if operator == 'is':
+            return (actual is None) == (value in (None, 'null'))
+        if operator == 'ilike':
+            regex = ''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in value)
+            return actual is not None and re.fullmatch(regex, str(actual), re.IGNORECASE | re.DOTALL) is not None
+        if actual is None:
+            return False
+        return {'gt': actual > value, 'gte': actual >= value, 'lt': actual < value, 'lte': actual <= value}[operator]
+
+    def _insert(self, rows: List[Dict[str, Any]], row: Dict[str, Any]) -> Dict[str, Any]:
+        row = dict(row)
+        for column, default in self.client.column_defaults.get(self.table, {}).items():
+            row.setdefault(column, default())
+        if row.get('id') is None:
+            row['id'] = f"{self.table}-{len(rows) + 1}"
+        rows.append(row)
+        return row
+
+    def execute(self) -> FakeResult:
+        client = self.client
+        client.queries.append(self)
+        client.requests.append((self.table, self.action))
+
+        error = client.fail_on(self) if client.fail_on else None
+        if error:
+            raise error
+        if self.table not in client.tables:
+            if not client.create_missing_tables:
+                raise Exception(f"relation {self.table} does not exist")
+            client.tables[self.table] = []
+        rows = client.tables[self.table]
+
+        if self.action == 'insert':
+            self.data = [self._insert(rows, row) for row in self.payload]
+            return FakeResult(self.data)
+
+        if self.action == 'upsert':
+            key_columns = self.on_conflict.split(',') if self.on_conflict else ['id']
+            self.data = []
+            for row in self.payload:
+                key = tuple(str(row.get(column)) for column in key_columns)
+                existing = next((stored for stored in rows
+                                 if tuple(str(stored.get(column)) for column in key_columns) == key), None)
+                if existing is None:
+                    self.data.append(self._insert(rows, row))
+                elif not self.ignore_duplicates:
+                    existing.update(row)
+                    self.data.append(existing)
+            return FakeResult(self.data)
+
+        matching = [row for row in rows if all(self._matches(row, *condition) for condition in self.conditions)]
+
+        if self.action == 'update':
+            for row in matching:
+                row.update(self.payload)
+            self.data = matching
+            return FakeResult(self.data)
+
+        if self.action == 'delete':
+            matched_ids = {id(row) for row in matching}
+            client.tables[self.table] = [row for row in rows if id(row) not in matched_ids]
+            self.data = matching
+            return FakeResult(self.data)
+
+        # Nulls sort last ascending and first descending, as in Postgres
+        for column, desc in reversed(self.ordering):
+            matching.sort(key=lambda row: (row.get(column) is None, row.get(column) if row.get(column) is not None else 0),
+                          reverse=desc)
+        total = len(matching)
+        self.data = matching[slice(*self.bounds)] if self.bounds else matching
+        if self.columns.strip() != '*':
+            # Copies holding just the selected columns, as PostgREST returns them
+            names = [name.strip() for name in self.columns.split(',')]
+            self.data = [{name: row.get(name) for name in names} for row in self.data]
+        return FakeResult(self.data, count=total if self.count else None)
+
+class FakeSupabase:
+    """
+    In-memory Supabase client
+
+    Args:
+        tables: table name -> list of row dicts (used as is, so tests can edit them in place)
+        create_missing_tables: Treat unknown tables as empty (False: raise like a missing relation)
+    """
+
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]] = None, create_missing_tables: bool = True):
+        self.tables = tables if tables is not None else {}
+        self.create_missing_tables = create_missing_tables
+        self.column_defaults: Dict[str, Dict[str, Callable[[], Any]]] = {}
+        self.fail_on: Optional[Callable[[FakeQuery], Optional[Exception]]] = None  # query -> error to raise
+        self.queries: List[FakeQuery] = []
+        self.requests: List[tuple] = []
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
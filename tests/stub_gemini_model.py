@@ -0,0 +1,56 @@
+"""
+Stub Gemini Model
+Local stand-in for the Gemini model behind LLMEnhancedFilter, shared by the listing filter tests
+"""
+
+import json
+import asyncio
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+def stub_answer(title):
+    action = 'remove' if 'packs' in title.lower() else 'keep'
+    return {'action': action, 'confidence': 0.9, 'language': 'english',
+            'product_type': 'booster_box', 'condition': 'new', 'reasoning': f'stub {action}'}
+
+class StubGeminiModel:
+    """Answers like Gemini would: keeps booster boxes, removes anything mentioning packs"""
+
+    def __init__(self, delay=0.05, fail_on=None, max_batch_ok=None, skip_first=False):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.max_batch_ok = max_batch_ok  # garble batch responses above this size
+        self.skip_first = skip_first      # leave the first listing out of each batch response
+        self.calls = 0
+        self.batch_sizes = []
+        self.active = 0
+        self.max_active = 0
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+
+        if 'LISTINGS (JSON):' in prompt:
+            entries = json.loads(prompt.split('LISTINGS (JSON):\n', 1)[1].split('\n\n', 1)[0])
+            self.batch_sizes.append(len(entries))
+            if self.max_batch_ok and len(entries) > self.max_batch_ok:
+                return StubResponse('[{"id": "truncated", "act')
+            if self.skip_first:
+                self.skip_first = False
+                entries = entries[1:]
+            return StubResponse(json.dumps({'results': [dict(stub_answer(e['title']), id=e['id']) for e in reversed(entries)]}))
+
+        title = prompt.split('TITLE: ', 1)[1].split('\n', 1)[0]
+        if self.fail_on and self.fail_on in title:
+            return StubResponse('not json')
+        return StubResponse(json.dumps(stub_answer(title)))
+
+    def generate_content(self, prompt, generation_config=None):
+        return asyncio.run(self.generate_content_async(prompt, generation_config))
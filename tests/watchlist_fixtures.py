@@ -0,0 +1,62 @@
+"""
+Watchlist Fixtures
+Products, price series and a wired PokeQuantOrchestrator on a FakeSupabase, for the batch analysis tests
+"""
+
+from datetime import datetime, timedelta
+
+from quant.pokequant_main import PokeQuantOrchestrator, ANALYSIS_VERSION
+from quant.price_series_cache import PriceSeriesCache
+from quant.analysis_cache import AnalysisResultCache, analysis_fingerprint
+from quant.enhanced_outlier_filter import FILTER_VERSION
+from product_name_index import ProductNameIndex
+from tests.fake_supabase import FakeSupabase
+
+def price_series_rows(pokequant_product_id, base_price, days=40):
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            'id': f"{pokequant_product_id}-{day}",
+            'pokequant_product_id': pokequant_product_id,
+            'price_date': (start + timedelta(days=day)).date().isoformat(),
+            'price': base_price + day,
+            'source': 'pricecharting',
+            'condition_category': 'market',
+            'data_confidence': 0.9,
+            'listing_count': 1,
+            'created_at': f"2024-03-01T00:00:{day:02d}+00:00",
+            'updated_at': f"2024-03-01T00:00:{day:02d}+00:00",
+        }
+        for day in range(days)
+    ]
+
+def fake_client(tables):
+    client = FakeSupabase(tables)
+    client.column_defaults['pokequant_analyses'] = {'analysis_date': lambda: datetime.now().isoformat()}
+    return client
+
+def watchlist_tables(card_count):
+    cards = [{'id': i, 'card_name': f"Card {i}", 'set_name': 'Test Set'} for i in range(1, card_count + 1)]
+    # Card 1 is already registered and was analyzed from its current data; the rest are new
+    products = [{'id': 'pq-1', 'product_type': 'card', 'product_id': '1', 'product_name': 'Card 1', 'set_name': 'Test Set',
+                 'last_data_update': '2024-03-01T00:00:00'}]
+    analyses = [{'id': 'a-1', 'pokequant_product_id': 'pq-1', 'analysis_date': (datetime.now() - timedelta(hours=1)).isoformat(),
+                 'metrics': {}, 'recommendation': 'HOLD', 'confidence_score': 0.6, 'analysis_version': ANALYSIS_VERSION,
+                 'data_range_start': '2024-01-01', 'data_range_end': '2024-02-09', 'total_data_points': 40,
+                 'input_fingerprint': analysis_fingerprint('pq-1', '2024-03-01T00:00:00', FILTER_VERSION, ANALYSIS_VERSION, None)}]
+    return {
+        'pokemon_cards': cards,
+        'sealed_products': [{'id': 7, 'product_name': 'Test Booster Box', 'set_name': 'Test Set'}],
+        'pokequant_products': products,
+        'pokequant_analyses': analyses,
+        'pokequant_price_series': [],
+    }
+
+def watchlist_orchestrator(client, cache_dir=None):
+    orchestrator = PokeQuantOrchestrator(parse_workers=0)
+    orchestrator.supabase = client
+    orchestrator.name_index = ProductNameIndex(client, cache_path=None)
+    orchestrator.analysis_cache = AnalysisResultCache(client)
+    orchestrator.price_data_service.supabase = client
+    orchestrator.price_data_service.price_cache = PriceSeriesCache(cache_dir, supabase_client=client) if cache_dir else None
+    return orchestrator